@@ -6,14 +6,17 @@ Handles message passing, coordination, and communication between agents
 
 import json
 import uuid
+import time
 import asyncio
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from enum import Enum
 import boto3
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -69,6 +72,127 @@ class AgentRegistration:
     last_heartbeat: str
     metadata: Dict[str, Any]
 
+@dataclass
+class PendingResponse:
+    """A request waiting for its correlated response"""
+    request_id: str
+    expected_sender: str
+    future: Future
+    deadline: float
+
+class ResponseCorrelator:
+    """
+    Correlation table mapping request message IDs to response futures.
+    
+    Responses are matched in O(1) by ``correlation_id`` as they arrive, so
+    waiters block on their own future instead of polling message history.
+    Entries leave the table as soon as their future is resolved, cancelled
+    or expired.
+    """
+    
+    def __init__(self):
+        """Initialize correlation table"""
+        self._pending: Dict[str, PendingResponse] = {}
+        self._lock = threading.Lock()
+        self.stats = {"registered": 0, "resolved": 0, "timed_out": 0, "cancelled": 0, "unmatched": 0}
+    
+    def register(self, request_message: AgentMessage, timeout_seconds: float) -> Future:
+        """Start tracking a request; must happen before the request is sent"""
+        future = Future()
+        pending = PendingResponse(
+            request_id=request_message.message_id,
+            expected_sender=request_message.recipient_agent_id,
+            future=future,
+            deadline=time.monotonic() + timeout_seconds
+        )
+        with self._lock:
+            self._pending[pending.request_id] = pending
+            self.stats["registered"] += 1
+        future.add_done_callback(lambda _: self._discard(pending))
+        return future
+    
+    def resolve(self, message: AgentMessage) -> bool:
+        """Complete the waiter for a response message, if one is registered"""
+        if not message.correlation_id:
+            return False
+        
+        with self._lock:
+            pending = self._pending.get(message.correlation_id)
+            if pending is None or pending.expected_sender != message.sender_agent_id:
+                self.stats["unmatched"] += 1
+                return False
+            del self._pending[message.correlation_id]
+        
+        if not pending.future.set_running_or_notify_cancel():
+            return False
+        pending.future.set_result(message)
+        with self._lock:
+            self.stats["resolved"] += 1
+        return True
+    
+    def cancel(self, request_id: str) -> bool:
+        """Stop waiting for a response; late responses are then ignored"""
+        with self._lock:
+            pending = self._pending.get(request_id)
+        if pending is None or not pending.future.cancel():
+            return False
+        with self._lock:
+            self.stats["cancelled"] += 1
+        return True
+    
+    def wait(self, future: Future, request_id: str, timeout_seconds: float) -> Optional[AgentMessage]:
+        """Block until the response arrives; returns None on timeout or cancellation"""
+        try:
+            return future.result(timeout=timeout_seconds)
+        except FutureTimeoutError:
+            self._time_out(request_id)
+            return None
+        except CancelledError:
+            return None
+    
+    async def wait_async(self, future: Future, request_id: str, timeout_seconds: float) -> Optional[AgentMessage]:
+        """Await the response without blocking the event loop"""
+        try:
+            # Shielded so a timeout is recorded here rather than as a plain cancel
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=timeout_seconds)
+        except asyncio.TimeoutError:
+            self._time_out(request_id)
+            return None
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # Request was cancelled through the table, not the awaiting task
+                return None
+            self.cancel(request_id)
+            raise
+    
+    def expire(self) -> int:
+        """Cancel requests past their deadline whose waiters have gone away"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [request_id for request_id, pending in self._pending.items() if pending.deadline <= now]
+        return sum(1 for request_id in expired if self._time_out(request_id))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Correlation counters and current table size"""
+        with self._lock:
+            return {**self.stats, "pending": len(self._pending)}
+    
+    def _time_out(self, request_id: str) -> bool:
+        """Cancel a request that ran out of time"""
+        with self._lock:
+            pending = self._pending.get(request_id)
+        if pending is None or not pending.future.cancel():
+            return False
+        with self._lock:
+            self.stats["timed_out"] += 1
+        return True
+    
+    def _discard(self, pending: PendingResponse):
+        """Drop a finished entry from the table"""
+        with self._lock:
+            if self._pending.get(pending.request_id) is pending:
+                del self._pending[pending.request_id]
+
 class AgentCommunicationManager:
     """
     Manages communication between agents in the fraud detection system
@@ -81,6 +205,7 @@ class AgentCommunicationManager:
         self.message_handlers: Dict[MessageType, Callable] = {}
         self.pending_messages: Dict[str, AgentMessage] = {}
         self.message_history: List[AgentMessage] = []
+        self.response_correlator = ResponseCorrelator()
         
         # AWS clients for message passing
         self.eventbridge_client = boto3.client('events', region_name=region_name)
@@ -208,29 +333,46 @@ class AgentCommunicationManager:
         """Send a request and wait for response"""
         logger.info(f"Sending request {request_message.message_id} and waiting for response")
         
-        # Set up response tracking
-        response_correlation_id = request_message.message_id
+        # Register before sending so an immediate response cannot be missed
+        future = self.response_correlator.register(request_message, timeout_seconds)
         
-        # Send the request
         if not self.send_message(request_message):
             logger.error("Failed to send request message")
+            self.response_correlator.cancel(request_message.message_id)
             return None
         
-        # Wait for response
-        start_time = datetime.now()
-        while (datetime.now() - start_time).total_seconds() < timeout_seconds:
-            # Check for response in message history
-            for message in reversed(self.message_history):
-                if (message.correlation_id == response_correlation_id and 
-                    message.sender_agent_id == request_message.recipient_agent_id):
-                    logger.info(f"Received response for request {request_message.message_id}")
-                    return message
-            
-            # Short sleep to avoid busy waiting
-            asyncio.sleep(0.1)
+        response = self.response_correlator.wait(future, request_message.message_id, timeout_seconds)
+        if response is None:
+            logger.warning(f"Timeout waiting for response to request {request_message.message_id}")
+        else:
+            logger.info(f"Received response for request {request_message.message_id}")
+        return response
+    
+    async def request_response_async(self, request_message: AgentMessage, timeout_seconds: int = 30) -> Optional[AgentMessage]:
+        """Send a request and await its response without blocking the event loop"""
+        logger.info(f"Sending request {request_message.message_id} and awaiting response")
         
-        logger.warning(f"Timeout waiting for response to request {request_message.message_id}")
-        return None
+        future = self.response_correlator.register(request_message, timeout_seconds)
+        loop = asyncio.get_running_loop()
+        
+        try:
+            sent = await loop.run_in_executor(self.executor, self.send_message, request_message)
+        except asyncio.CancelledError:
+            self.response_correlator.cancel(request_message.message_id)
+            raise
+        if not sent:
+            logger.error("Failed to send request message")
+            self.response_correlator.cancel(request_message.message_id)
+            return None
+        
+        response = await self.response_correlator.wait_async(future, request_message.message_id, timeout_seconds)
+        if response is None:
+            logger.warning(f"Timeout waiting for response to request {request_message.message_id}")
+        return response
+    
+    def cancel_request(self, request_id: str) -> bool:
+        """Stop waiting for the response to a request"""
+        return self.response_correlator.cancel(request_id)
     
     def coordinate_agents(self, coordination_request: Dict[str, Any]) -> Dict[str, Any]:
         """Coordinate multiple agents for a complex task"""
@@ -382,6 +524,9 @@ class AgentCommunicationManager:
             # Add to history
             self.message_history.append(message)
             
+            # Complete any request waiting on this response
+            self.response_correlator.resolve(message)
+            
             # Route to appropriate handler
             if message.message_type in self.message_handlers:
                 handler = self.message_handlers[message.message_type]
@@ -437,6 +582,7 @@ class AgentCommunicationManager:
             "registered_agents": registered_agents,
             "healthy_agents": healthy_agents,
             "message_type_distribution": message_type_counts,
+            "response_correlation": self.response_correlator.get_stats(),
             "stats_generated": datetime.now().isoformat()
         }
     
@@ -455,6 +601,9 @@ class AgentCommunicationManager:
         for message_id in expired_messages:
             del self.pending_messages[message_id]
         
+        # Drop correlation entries nobody is waiting on any more
+        self.response_correlator.expire()
+        
         # Keep only recent message history (last 1000 messages)
         if len(self.message_history) > 1000:
             self.message_history = self.message_history[-1000:]
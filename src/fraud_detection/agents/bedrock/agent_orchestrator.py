@@ -5,10 +5,14 @@ Central coordinator for the fraud detection AI agent system
 """
 
 import json
+import time
 import logging
+import threading
 import boto3
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from enum import Enum
 
@@ -79,6 +83,24 @@ class WorkflowPlan:
     required_agents: List[str]
     priority: str
 
+@dataclass
+class ScatterGatherResult:
+    """Outcome of invoking agents in parallel"""
+    responses: List[AgentResponse]
+    decision: Optional[FraudDecision]
+    timings: Dict[str, Dict[str, Any]]
+    total_time_ms: float
+    early_terminated: bool = False
+    completed_agents: List[str] = field(default_factory=list)
+    failed_agents: List[str] = field(default_factory=list)
+    timed_out_agents: List[str] = field(default_factory=list)
+    skipped_agents: List[str] = field(default_factory=list)
+    
+    @property
+    def is_partial(self) -> bool:
+        """Whether some selected agents did not contribute a decision"""
+        return bool(self.failed_agents or self.timed_out_agents or self.skipped_agents)
+
 class AgentOrchestrator:
     """
     Central orchestrator for AWS Bedrock Agent-based fraud detection
@@ -120,6 +142,30 @@ class AgentOrchestrator:
             }
         }
         
+        # Parallel invocation settings
+        self.scatter_gather_config = {
+            "overall_timeout_seconds": 60,
+            "max_workers": 16,
+            "hedge_percentile": 0.95,
+            "hedge_min_samples": 20,
+            "hedge_min_delay_seconds": 0.05,
+            "max_hedged_attempts": 1,
+            "early_termination_confidence": 0.85
+        }
+        self.agent_executor = ThreadPoolExecutor(
+            max_workers=self.scatter_gather_config["max_workers"],
+            thread_name_prefix="agent-invoke"
+        )
+        self._agent_latencies: Dict[str, Deque[float]] = {}
+        self._latency_lock = threading.Lock()
+        self.scatter_gather_stats = {
+            "runs": 0,
+            "hedges_launched": 0,
+            "hedge_wins": 0,
+            "agent_timeouts": 0,
+            "early_terminations": 0
+        }
+        
         logger.info("AgentOrchestrator initialized successfully")
     
     def _initialize_aws_clients(self):
@@ -161,14 +207,14 @@ class AgentOrchestrator:
                 context=self._gather_context(transaction)
             )
             
-            # Step 3: Coordinate agents
-            agent_responses = self.coordinate_agents(analysis_request)
+            # Step 3: Coordinate agents in parallel
+            gather_result = self.scatter_gather(analysis_request)
             
             # Step 4: Resolve conflicts and make final decision
-            final_decision = self.resolve_conflicts(agent_responses)
+            final_decision = gather_result.decision or self.resolve_conflicts(gather_result.responses)
             
             # Step 5: Log workflow completion
-            self._log_workflow_completion(transaction.id, final_decision)
+            self._log_workflow_completion(transaction.id, final_decision, gather_result)
             
             return final_decision
             
@@ -181,26 +227,148 @@ class AgentOrchestrator:
         """
         Coordinate multiple specialized agents for transaction analysis
         """
+        return self.scatter_gather(analysis_request).responses
+    
+    def scatter_gather(self, analysis_request: AnalysisRequest) -> ScatterGatherResult:
+        """
+        Invoke the selected agents in parallel and gather their responses
+        
+        Each agent runs against its own deadline (its configured timeout,
+        capped by the overall timeout). An agent still running past its
+        usual latency gets one hedged attempt, and whichever attempt finishes
+        first wins. Once the responses so far give a confident decision that
+        the remaining agents could not overturn, gathering stops early.
+        Agents that fail or time out yield error responses, and agents
+        skipped by early termination are only reported in the timings.
+        """
         logger.info(f"Coordinating agents for transaction {analysis_request.transaction.id}")
         
-        agent_responses = []
+        config = self.scatter_gather_config
+        start = time.monotonic()
+        overall_deadline = start + config["overall_timeout_seconds"]
+        required_agents = list(dict.fromkeys(self._select_agents(analysis_request)))
         
-        # Determine which agents to invoke
-        required_agents = self._select_agents(analysis_request)
+        deadlines = {
+            agent_id: min(overall_deadline, start + self.agent_config.get(agent_id, {}).get("timeout", 30))
+            for agent_id in required_agents
+        }
+        hedge_at = {agent_id: start + self._hedge_delay(agent_id) for agent_id in required_agents}
+        attempts: Dict[str, int] = {agent_id: 0 for agent_id in required_agents}
+        in_flight: Dict[Future, Tuple[str, int, float]] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        outcomes: Dict[str, AgentResponse] = {}
+        
+        def launch(agent_id: str):
+            attempts[agent_id] += 1
+            future = self.agent_executor.submit(self._invoke_agent, agent_id, analysis_request)
+            in_flight[future] = (agent_id, attempts[agent_id], time.monotonic())
+        
+        def finish(agent_id: str, status: str, response: AgentResponse, attempt: int = 0):
+            outcomes[agent_id] = response
+            timings[agent_id] = {
+                "status": status,
+                "latency_ms": (time.monotonic() - start) * 1000,
+                "attempts": attempts[agent_id],
+                "winning_attempt": attempt
+            }
+            # Abandon attempts that are still running for this agent
+            for future, (other_id, _, _) in list(in_flight.items()):
+                if other_id == agent_id:
+                    future.cancel()
+                    del in_flight[future]
         
         for agent_id in required_agents:
-            try:
-                # Invoke specialized agent
-                response = self._invoke_agent(agent_id, analysis_request)
-                agent_responses.append(response)
-                
-            except Exception as e:
-                logger.error(f"Error invoking agent {agent_id}: {str(e)}")
-                # Create error response
-                error_response = self._create_error_response(agent_id, str(e))
-                agent_responses.append(error_response)
-        
-        return agent_responses
+            launch(agent_id)
+        
+        early_terminated = False
+        decision = None
+        while len(outcomes) < len(required_agents):
+            pending_agents = [agent_id for agent_id in required_agents if agent_id not in outcomes]
+            hedgeable = [agent_id for agent_id in pending_agents if attempts[agent_id] <= config["max_hedged_attempts"]]
+            next_event = min(
+                [deadlines[agent_id] for agent_id in pending_agents] +
+                [hedge_at[agent_id] for agent_id in hedgeable]
+            )
+            done, _ = wait(
+                list(in_flight), timeout=max(0.0, next_event - time.monotonic()), return_when=FIRST_COMPLETED
+            )
+            
+            for future in done:
+                if future not in in_flight:
+                    continue
+                agent_id, attempt, started = in_flight.pop(future)
+                if agent_id in outcomes:
+                    continue
+                try:
+                    response = future.result()
+                    self._record_agent_latency(agent_id, time.monotonic() - started)
+                    if attempt > 1:
+                        self.scatter_gather_stats["hedge_wins"] += 1
+                    finish(agent_id, "completed", response, attempt)
+                except Exception as e:
+                    logger.error(f"Error invoking agent {agent_id}: {str(e)}")
+                    # Let a hedged attempt that is still running finish
+                    if not any(other_id == agent_id for other_id, _, _ in in_flight.values()):
+                        finish(agent_id, "failed", self._create_error_response(agent_id, str(e)), attempt)
+            
+            now = time.monotonic()
+            for agent_id in required_agents:
+                if agent_id in outcomes:
+                    continue
+                if now >= deadlines[agent_id]:
+                    logger.warning(f"Agent {agent_id} timed out after {deadlines[agent_id] - start:.2f}s")
+                    self.scatter_gather_stats["agent_timeouts"] += 1
+                    finish(agent_id, "timed_out", self._create_error_response(agent_id, "timed out"))
+                elif now >= hedge_at[agent_id] and attempts[agent_id] <= config["max_hedged_attempts"]:
+                    logger.info(f"Hedging slow agent {agent_id} (attempt {attempts[agent_id] + 1})")
+                    self.scatter_gather_stats["hedges_launched"] += 1
+                    launch(agent_id)
+                    hedge_at[agent_id] = now + self._hedge_delay(agent_id)
+            
+            remaining = [agent_id for agent_id in required_agents if agent_id not in outcomes]
+            if remaining and outcomes:
+                decision = self._settled_decision(list(outcomes.values()), remaining)
+                if decision is not None:
+                    early_terminated = True
+                    self.scatter_gather_stats["early_terminations"] += 1
+                    for agent_id in remaining:
+                        timings[agent_id] = {
+                            "status": "skipped",
+                            "latency_ms": None,
+                            "attempts": attempts[agent_id],
+                            "winning_attempt": 0
+                        }
+                    for future in in_flight:
+                        future.cancel()
+                    in_flight.clear()
+                    break
+        
+        # Keep the caller's agent order
+        responses = [outcomes[agent_id] for agent_id in required_agents if agent_id in outcomes]
+        if decision is None and responses:
+            decision = self.resolve_conflicts(responses)
+        self.scatter_gather_stats["runs"] += 1
+        
+        def by_status(status: str) -> List[str]:
+            return [agent_id for agent_id in required_agents if timings[agent_id]["status"] == status]
+        
+        result = ScatterGatherResult(
+            responses=responses,
+            decision=decision,
+            timings={agent_id: timings[agent_id] for agent_id in required_agents},
+            total_time_ms=(time.monotonic() - start) * 1000,
+            early_terminated=early_terminated,
+            completed_agents=by_status("completed"),
+            failed_agents=by_status("failed"),
+            timed_out_agents=by_status("timed_out"),
+            skipped_agents=by_status("skipped")
+        )
+        
+        logger.info(
+            f"Scatter-gather finished in {result.total_time_ms:.1f}ms: "
+            f"{len(result.completed_agents)}/{len(required_agents)} agents completed"
+        )
+        return result
     
     def resolve_conflicts(self, agent_responses: List[AgentResponse]) -> FraudDecision:
         """
@@ -255,6 +423,42 @@ class AgentOrchestrator:
         logger.info(f"Final decision: fraud={is_fraud}, confidence={final_confidence:.2f}")
         return final_decision
     
+    def _settled_decision(self, responses: List[AgentResponse], remaining_agents: List[str]) -> Optional[FraudDecision]:
+        """
+        Return the decision if it is confident and no remaining agent could flip it
+        """
+        decision = self.resolve_conflicts(responses)
+        if decision.confidence_score < self.scatter_gather_config["early_termination_confidence"]:
+            return None
+        
+        # Same weighted vote as resolve_conflicts; each remaining agent adds at most its priority weight
+        vote = sum(
+            (1 if response.decision.is_fraud else -1)
+            * response.confidence
+            * self.agent_config.get(response.agent_id, {}).get("priority", 1)
+            for response in responses
+        )
+        swing = sum(self.agent_config.get(agent_id, {}).get("priority", 1) for agent_id in remaining_agents)
+        if abs(vote) <= swing:
+            return None
+        return decision
+    
+    def _hedge_delay(self, agent_id: str) -> float:
+        """Time to wait before hedging an agent: its tail latency, or half its timeout until measured"""
+        config = self.scatter_gather_config
+        with self._latency_lock:
+            latencies = sorted(self._agent_latencies.get(agent_id, ()))
+        if len(latencies) >= config["hedge_min_samples"]:
+            delay = latencies[min(len(latencies) - 1, int(len(latencies) * config["hedge_percentile"]))]
+        else:
+            delay = self.agent_config.get(agent_id, {}).get("timeout", 30) / 2
+        return max(config["hedge_min_delay_seconds"], delay)
+    
+    def _record_agent_latency(self, agent_id: str, latency_seconds: float):
+        """Track recent agent latencies for hedging"""
+        with self._latency_lock:
+            self._agent_latencies.setdefault(agent_id, deque(maxlen=200)).append(latency_seconds)
+    
     def plan_analysis_workflow(self, transaction: Transaction) -> WorkflowPlan:
         """
         Plan the analysis workflow based on transaction characteristics
@@ -495,7 +699,8 @@ class AgentOrchestrator:
             status=AgentStatus.ERROR
         )
     
-    def _log_workflow_completion(self, transaction_id: str, decision: FraudDecision):
+    def _log_workflow_completion(self, transaction_id: str, decision: FraudDecision,
+                                 gather_result: Optional[ScatterGatherResult] = None):
         """Log workflow completion for audit trail"""
         workflow_log = {
             "transaction_id": transaction_id,
@@ -503,6 +708,10 @@ class AgentOrchestrator:
             "final_decision": asdict(decision),
             "workflow_id": f"wf_{transaction_id}_{int(datetime.now().timestamp())}"
         }
+        if gather_result is not None:
+            workflow_log["agent_timings"] = gather_result.timings
+            workflow_log["total_time_ms"] = gather_result.total_time_ms
+            workflow_log["partial"] = gather_result.is_partial
         
         self.workflow_history.append(workflow_log)
         logger.info(f"Workflow completed for transaction {transaction_id}")
@@ -513,5 +722,11 @@ class AgentOrchestrator:
             "orchestrator_status": "active",
             "active_agents": list(self.agent_config.keys()),
             "workflow_history_count": len(self.workflow_history),
+            "scatter_gather": dict(self.scatter_gather_stats),
             "last_updated": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the agent invocation pool, cancelling invocations not yet started"""
+        self.agent_executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("AgentOrchestrator shut down")
\ No newline at end of file
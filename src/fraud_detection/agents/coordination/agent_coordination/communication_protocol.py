@@ -9,15 +9,23 @@ import logging
 import json
 import time
 import uuid
+import heapq
+import itertools
+import random
+from functools import partial
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable, Union
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any, Callable, Tuple, Union
+from dataclasses import dataclass, field, asdict, replace
 from enum import Enum
 from abc import ABC, abstractmethod
 import asyncio
 import threading
 from queue import Queue, Empty
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from .delivery_tracking import DeliveryTracker
+from .handler_loops import HandlerLoopPool
+from .transports import InProcessTransport, Transport
 
 logger = logging.getLogger(__name__)
 
@@ -105,14 +113,26 @@ class Message:
     max_retries: int = 3
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for serialization."""
-        data = asdict(self)
-        data['message_type'] = self.message_type.value
-        data['priority'] = self.priority.value
-        data['timestamp'] = self.timestamp.isoformat()
-        if self.expires_at:
-            data['expires_at'] = self.expires_at.isoformat()
-        return data
+        """
+        Convert to dictionary for serialization.
+        
+        Built field by field rather than with ``asdict`` (which deep-copies
+        the payload) since this runs for every message a socket transport
+        sends; nested payload values are shared with the message.
+        """
+        return {
+            'message_id': self.message_id,
+            'message_type': self.message_type.value,
+            'sender_id': self.sender_id,
+            'recipient_id': self.recipient_id,
+            'payload': dict(self.payload),
+            'timestamp': self.timestamp.isoformat(),
+            'priority': self.priority.value,
+            'correlation_id': self.correlation_id,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'retry_count': self.retry_count,
+            'max_retries': self.max_retries
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Message':
@@ -176,7 +196,12 @@ class CommunicationProtocol:
         agent_name: str,
         agent_type: str,
         capabilities: List[str],
-        endpoint: str = "local"
+        endpoint: str = "local",
+        handler_loops: int = 1,
+        max_in_flight_handlers: int = 256,
+        transport: Optional[Transport] = None,
+        outbound_batch_size: int = 64,
+        fanout_workers: int = 8
     ):
         """
         Initialize communication protocol.
@@ -187,6 +212,11 @@ class CommunicationProtocol:
             agent_type: Type/category of agent
             capabilities: List of agent capabilities
             endpoint: Communication endpoint
+            handler_loops: Event loop threads running async message handlers
+            max_in_flight_handlers: Handler coroutines allowed to run at once
+            transport: Message transport; defaults to the in-process transport
+            outbound_batch_size: Queued messages sent together per recipient
+            fanout_workers: Threads sending to different recipients concurrently
         """
         self.agent_info = AgentInfo(
             agent_id=agent_id,
@@ -202,7 +232,39 @@ class CommunicationProtocol:
         self.message_handlers: Dict[MessageType, List[MessageHandler]] = {}
         self.message_queue = Queue()
         self.outbound_queue = Queue()
-        self.delivery_tracking: Dict[str, MessageDelivery] = {}
+        self.delivery_tracking: DeliveryTracker = DeliveryTracker(ttl_seconds=60)
+        self.handler_pool = HandlerLoopPool(
+            num_loops=handler_loops,
+            max_in_flight=max_in_flight_handlers,
+            name=f"{agent_id}-handlers"
+        )
+        self.transport = transport or InProcessTransport()
+        self.outbound_batch_size = max(1, outbound_batch_size)
+        self.fanout_executor = ThreadPoolExecutor(
+            max_workers=max(1, fanout_workers),
+            thread_name_prefix=f"{agent_id}-fanout"
+        )
+        
+        # Delayed redelivery of failed sends: (due, seq, recipient_id, message)
+        self._retry_queue: List[Tuple[float, int, str, Message]] = []
+        self._retry_lock = threading.Lock()
+        self._retry_sequence = itertools.count()
+        self.retry_base_delay = 0.1  # seconds
+        self.retry_max_delay = 5.0  # seconds
+        self.fanout_timeout = 1.0  # seconds a batch waits on any one recipient
+        self._slow_recipients: Dict[str, Future] = {}
+        self.delivery_stats = {
+            "batches": 0,
+            "recipient_sends": 0,
+            "frames_encoded": 0,
+            "retries_scheduled": 0,
+            "retries_exhausted": 0,
+            "heartbeats_coalesced": 0,
+            "slow_sends": 0,
+            "deferred_messages": 0,
+            "encoding_failures": 0
+        }
+        self._stats_lock = threading.Lock()
         
         # Agent registry
         self.known_agents: Dict[str, AgentInfo] = {}
@@ -223,6 +285,10 @@ class CommunicationProtocol:
         
         self.is_running = True
         self.agent_info.status = AgentStatus.ONLINE
+        self.handler_pool.start()
+        
+        # Bind the transport so peers learn our endpoint from registration
+        self.agent_info.endpoint = self.transport.start(self.agent_info.agent_id, self._on_transport_message)
         
         # Start background threads
         self.executor.submit(self._message_processor)
@@ -246,8 +312,11 @@ class CommunicationProtocol:
         self.is_running = False
         self.agent_info.status = AgentStatus.OFFLINE
         
-        # Shutdown executor
+        # Stop the handler loops first: it releases a message processor blocked on a full pool
+        self.handler_pool.stop()
         self.executor.shutdown(wait=True)
+        self.fanout_executor.shutdown(wait=True)
+        self.transport.close()
         
         logger.info(f"Communication protocol stopped for agent {self.agent_info.agent_id}")
     
@@ -493,6 +562,21 @@ class CommunicationProtocol:
         """
         return self.delivery_tracking.get(message_id)
     
+    def get_delivery_stats(self) -> Dict[str, Any]:
+        """
+        Get outbound delivery statistics.
+        
+        Returns:
+            Fan-out, retry and tracking counters
+        """
+        with self._stats_lock:
+            stats = dict(self.delivery_stats)
+        with self._retry_lock:
+            stats["pending_retries"] = len(self._retry_queue)
+        stats["tracking"] = self.delivery_tracking.get_stats()
+        stats["transport"] = self.transport.get_stats()
+        return stats
+    
     def receive_message(self, message_data: Dict[str, Any]) -> None:
         """
         Receive message from external source.
@@ -536,97 +620,377 @@ class CommunicationProtocol:
             elif message.message_type == MessageType.DISCOVERY:
                 self._handle_discovery(message)
             
-            # Handle with registered handlers
+            # Dispatch registered handlers concurrently on the handler loops
             handlers = self.message_handlers.get(message.message_type, [])
             for handler in handlers:
                 try:
-                    response = asyncio.run(handler.handle_message(message))
-                    if response and message.message_type == MessageType.REQUEST:
-                        # Send response back
-                        self.outbound_queue.put(response)
+                    result = handler.handle_message(message)
+                    if not asyncio.iscoroutine(result):
+                        self._on_handler_result(message, result)
+                        continue
+                    future = self.handler_pool.submit(result, key=message.sender_id)
+                    future.add_done_callback(
+                        lambda done, message=message: self._on_handler_done(message, done)
+                    )
                 except Exception as e:
                     logger.error(f"Handler error for message {message.message_id}: {str(e)}")
             
         except Exception as e:
             logger.error(f"Error handling message {message.message_id}: {str(e)}")
     
+    def _on_handler_done(self, message: Message, future: Future) -> None:
+        """Collect the outcome of an async handler."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Handler error for message {message.message_id}: {str(error)}")
+            return
+        self._on_handler_result(message, future.result())
+    
+    def _on_handler_result(self, message: Message, response: Optional[Message]) -> None:
+        """Queue a handler's response to a request."""
+        if response and message.message_type == MessageType.REQUEST:
+            # Send response back
+            self.outbound_queue.put(response)
+    
+    def run_coroutine(self, coroutine: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the handler loops from synchronous code.
+        
+        Args:
+            coroutine: Coroutine to run
+            timeout: Maximum seconds to wait for the result
+        
+        Returns:
+            The coroutine's result
+        """
+        return self.handler_pool.run(coroutine, timeout=timeout)
+    
+    def _on_transport_message(self, message: Union[Message, Dict[str, Any]]) -> None:
+        """Queue a message received by the transport."""
+        try:
+            if isinstance(message, dict):
+                message = Message.from_dict(message)
+            self.message_queue.put(message)
+        except Exception as e:
+            logger.error(f"Failed to deserialize message: {str(e)}")
+    
     def _outbound_processor(self) -> None:
         """Process outbound messages."""
         while self.is_running:
             try:
-                message = self.outbound_queue.get(timeout=1.0)
-                self._deliver_message(message)
-            except Empty:
-                continue
+                batch = []
+                try:
+                    batch.append(self.outbound_queue.get(timeout=self._next_retry_wait(1.0)))
+                except Empty:
+                    pass
+                # Drain whatever else is queued so it can share frames
+                while batch and len(batch) < self.outbound_batch_size:
+                    try:
+                        batch.append(self.outbound_queue.get_nowait())
+                    except Empty:
+                        break
+                retries = self._due_retries()
+                if batch or retries:
+                    self._deliver_batch(batch, retries)
             except Exception as e:
                 logger.error(f"Error processing outbound message: {str(e)}")
     
     def _deliver_message(self, message: Message) -> None:
         """Deliver message to recipient(s)."""
-        try:
-            start_time = time.time()
+        self._deliver_batch([message])
+    
+    def _deliver_batch(
+        self,
+        messages: List[Message],
+        retries: Optional[List[Tuple[str, Message]]] = None
+    ) -> None:
+        """
+        Deliver messages, sending each recipient's share in one transport call.
+        
+        Recipients are sent to concurrently, and a batch shared by several
+        recipients (typically a broadcast) is encoded once. Failed sends are
+        rescheduled per recipient with exponential backoff. A send still
+        running after ``fanout_timeout`` is left to finish in the background,
+        and messages for that recipient wait on the retry heap until it does.
+        
+        Args:
+            messages: Newly queued messages
+            retries: Due redeliveries as (recipient_id, message) pairs
+        """
+        start_time = time.time()
+        by_recipient: Dict[str, List[Message]] = {}
             
+        # Redeliveries go first so they stay ahead of newer messages
+        for agent_id, message in retries or []:
+            if message.is_expired():
+                self._expire_message(message)
+            else:
+                by_recipient.setdefault(agent_id, []).append(message)
+        
+        for message in messages:
             # Check if message is expired
             if message.is_expired():
+                self._expire_message(message)
+                continue
+            
+            if message.recipient_id:
+                # Unicast message
+                by_recipient.setdefault(message.recipient_id, []).append(message)
+            else:
+                # Broadcast message
+                for agent_id in list(self.known_agents):
+                    if agent_id != self.agent_info.agent_id:
+                        by_recipient.setdefault(agent_id, []).append(message)
+        
+        if not by_recipient:
+            return
+        
+        # Encode each distinct batch once; a message that cannot be encoded fails on its own
+        sends = []
+        prepared_batches: Dict[Tuple[int, ...], Tuple[Any, List[Message]]] = {}
+        unencodable: Dict[str, Message] = {}
+        for agent_id, batch in by_recipient.items():
+            batch = self._coalesce_heartbeats(batch)
+            if agent_id in self._slow_recipients:
+                self._defer(agent_id, batch)
+                continue
+            key = tuple(id(message) for message in batch)
+            if key not in prepared_batches:
+                prepared, sendable, rejected = self._prepare(batch)
+                prepared_batches[key] = (prepared, sendable)
+                unencodable.update((message.message_id, message) for message in rejected)
+            prepared, sendable = prepared_batches[key]
+            if sendable:
+                sends.append((agent_id, sendable, prepared))
+        
+        self._fail_unencodable(list(unencodable.values()))
+        if not sends:
+            return
+        
+        futures = {
+            self.fanout_executor.submit(self._send_prepared, agent_id, prepared): (agent_id, batch)
+            for agent_id, batch, prepared in sends
+        }
+        done, slow = wait(futures, timeout=self.fanout_timeout)
+        
+        with self._stats_lock:
+            self.delivery_stats["batches"] += 1
+            self.delivery_stats["recipient_sends"] += len(sends)
+            self.delivery_stats["frames_encoded"] += len(prepared_batches)
+            self.delivery_stats["slow_sends"] += len(slow)
+        
+        for future in done:
+            agent_id, batch = futures[future]
+            self._record_send(agent_id, batch, future, start_time)
+        
+        # Don't wait on slow peers; their outcome is recorded when the send returns
+        for future in slow:
+            agent_id, batch = futures[future]
+            logger.warning(f"Send to {agent_id} still running after {self.fanout_timeout}s; deferring its traffic")
+            with self._retry_lock:
+                self._slow_recipients[agent_id] = future
+            future.add_done_callback(partial(self._finish_slow_send, agent_id, batch, start_time=start_time))
+    
+    def _record_send(self, agent_id: str, batch: List[Message], future: Future, start_time: float) -> None:
+        """Mark a recipient's batch delivered, or reschedule it if the send failed."""
+        success, error_message = future.result()
+        delivery_time_ms = (time.time() - start_time) * 1000
+        if not success:
+            self._schedule_retries(agent_id, batch, error_message, delivery_time_ms)
+            return
+        for message in batch:
+            if message.recipient_id:
                 self._update_delivery_status(
                     message.message_id,
-                    MessageDeliveryStatus.TIMEOUT,
-                    "Message expired before delivery"
+                    MessageDeliveryStatus.DELIVERED,
+                    None,
+                    delivery_time_ms
                 )
-                return
-            
-            # Serialize message
-            message_data = message.to_dict()
-            
+    
+    def _finish_slow_send(self, agent_id: str, batch: List[Message], future: Future, start_time: float) -> None:
+        """Record a send that outlived the fan-out timeout and release its recipient."""
+        with self._retry_lock:
+            if self._slow_recipients.get(agent_id) is future:
+                del self._slow_recipients[agent_id]
+        self._record_send(agent_id, batch, future, start_time)
+    
+    def _defer(self, agent_id: str, batch: List[Message]) -> None:
+        """Hold messages for a recipient with a send in flight on the retry heap, without using a retry."""
+        due = time.monotonic() + self.retry_base_delay
+        deferred = 0
+        with self._retry_lock:
+            for message in batch:
+                # A queued heartbeat is superseded by the next one
+                if message.message_type != MessageType.HEARTBEAT:
+                    heapq.heappush(self._retry_queue, (due, next(self._retry_sequence), agent_id, message))
+                    deferred += 1
+        with self._stats_lock:
+            self.delivery_stats["deferred_messages"] += deferred
+    
+    def _prepare(self, batch: List[Message]) -> Tuple[Any, List[Message], List[Message]]:
+        """
+        Encode a batch for the transport.
+        
+        If the batch does not encode, its messages are tried one by one so
+        only those that cannot be encoded are left out.
+        
+        Returns:
+            (prepared batch or None, messages it carries, messages that cannot be encoded)
+        """
+        try:
+            return self.transport.prepare(batch), batch, []
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Failed to encode message {batch[0].message_id}: {str(e)}")
+                return None, [], list(batch)
+        
+        sendable, rejected = [], []
+        for message in batch:
+            try:
+                self.transport.prepare([message])
+                sendable.append(message)
+            except Exception as e:
+                logger.error(f"Failed to encode message {message.message_id}: {str(e)}")
+                rejected.append(message)
+        if not sendable:
+            return None, [], rejected
+        try:
+            return self.transport.prepare(sendable), sendable, rejected
+        except Exception as e:
+            logger.error(f"Failed to encode {len(sendable)} message(s): {str(e)}")
+            return None, [], batch
+    
+    def _fail_unencodable(self, messages: List[Message]) -> None:
+        """Mark messages that cannot be encoded failed; retrying would not help."""
+        if not messages:
+            return
+        with self._stats_lock:
+            self.delivery_stats["encoding_failures"] += len(messages)
+        for message in messages:
             if message.recipient_id:
-                # Unicast message
-                success = self._send_to_agent(message.recipient_id, message_data)
-                status = MessageDeliveryStatus.DELIVERED if success else MessageDeliveryStatus.FAILED
-                
                 self._update_delivery_status(
                     message.message_id,
-                    status,
-                    None if success else "Delivery failed",
-                    (time.time() - start_time) * 1000
+                    MessageDeliveryStatus.FAILED,
+                    "Message encoding failed"
                 )
-            else:
-                # Broadcast message
-                for agent_id in self.known_agents:
-                    if agent_id != self.agent_info.agent_id:
-                        self._send_to_agent(agent_id, message_data)
-            
+    
+    def _send_prepared(self, agent_id: str, prepared: Any) -> Tuple[bool, Optional[str]]:
+        """Send a prepared batch to one agent, returning (success, error)."""
+        if prepared is None:
+            return False, "Message encoding failed"
+        try:
+            agent_info = self.known_agents.get(agent_id)
+            if not agent_info or agent_info.status != AgentStatus.ONLINE:
+                return False, "Recipient unavailable"
+            if self.transport.send_prepared(agent_info.endpoint, prepared):
+                logger.debug(f"Delivered messages to agent {agent_id}")
+                return True, None
+            return False, "Delivery failed"
         except Exception as e:
-            logger.error(f"Error delivering message {message.message_id}: {str(e)}")
-            self._update_delivery_status(
-                message.message_id,
-                MessageDeliveryStatus.FAILED,
-                str(e)
-            )
+            logger.error(f"Error delivering messages to {agent_id}: {str(e)}")
+            return False, str(e)
     
-    def _send_to_agent(self, agent_id: str, message_data: Dict[str, Any]) -> bool:
+    def _send_to_agent(self, agent_id: str, messages: List[Message]) -> bool:
         """
-        Send message to specific agent.
+        Send messages to specific agent.
         
         Args:
             agent_id: Target agent ID
-            message_data: Serialized message
-            
+            messages: Messages for the agent, in order
+        
         Returns:
             True if sent successfully
         """
-        # In a real implementation, this would use actual transport
-        # (HTTP, WebSocket, message queue, etc.)
-        
-        # For demo purposes, simulate message delivery
-        agent_info = self.known_agents.get(agent_id)
-        if not agent_info or agent_info.status != AgentStatus.ONLINE:
+        prepared, sendable, rejected = self._prepare(messages)
+        self._fail_unencodable(rejected)
+        if not sendable:
             return False
+        success, _ = self._send_prepared(agent_id, prepared)
+        return success and not rejected
+    
+    def _coalesce_heartbeats(self, batch: List[Message]) -> List[Message]:
+        """Keep only the newest heartbeat per sender in a recipient's batch."""
+        latest: Dict[str, int] = {}
+        for index, message in enumerate(batch):
+            if message.message_type == MessageType.HEARTBEAT:
+                latest[message.sender_id] = index
         
-        # Simulate network delay
-        time.sleep(0.001)
+        heartbeats = sum(1 for message in batch if message.message_type == MessageType.HEARTBEAT)
+        if heartbeats == len(latest):
+            return batch
         
-        logger.debug(f"Delivered message to agent {agent_id}")
-        return True
+        with self._stats_lock:
+            self.delivery_stats["heartbeats_coalesced"] += heartbeats - len(latest)
+        return [
+            message for index, message in enumerate(batch)
+            if message.message_type != MessageType.HEARTBEAT or latest[message.sender_id] == index
+        ]
+    
+    def _schedule_retries(
+        self,
+        agent_id: str,
+        batch: List[Message],
+        error_message: Optional[str],
+        delivery_time_ms: float
+    ) -> None:
+        """Reschedule a recipient's failed messages, or mark them failed when out of retries."""
+        for message in batch:
+            # A missed heartbeat is superseded by the next one
+            if message.message_type != MessageType.HEARTBEAT and message.can_retry():
+                # Copy rather than mutate: a broadcast message is shared by all recipients
+                retry = replace(message, retry_count=message.retry_count + 1)
+                delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** message.retry_count))
+                delay *= random.uniform(0.5, 1.0)
+                due = time.monotonic() + delay
+                with self._retry_lock:
+                    heapq.heappush(self._retry_queue, (due, next(self._retry_sequence), agent_id, retry))
+                with self._stats_lock:
+                    self.delivery_stats["retries_scheduled"] += 1
+                if message.recipient_id:
+                    self._update_delivery_status(
+                        message.message_id,
+                        MessageDeliveryStatus.PENDING,
+                        f"Retry {retry.retry_count} scheduled: {error_message}"
+                    )
+                continue
+            
+            if message.message_type != MessageType.HEARTBEAT:
+                with self._stats_lock:
+                    self.delivery_stats["retries_exhausted"] += 1
+            if message.recipient_id:
+                self._update_delivery_status(
+                    message.message_id,
+                    MessageDeliveryStatus.FAILED,
+                    error_message,
+                    delivery_time_ms
+                )
+    
+    def _due_retries(self) -> List[Tuple[str, Message]]:
+        """Pop redeliveries whose backoff has elapsed."""
+        now = time.monotonic()
+        due = []
+        with self._retry_lock:
+            while self._retry_queue and self._retry_queue[0][0] <= now:
+                _, _, agent_id, message = heapq.heappop(self._retry_queue)
+                due.append((agent_id, message))
+        return due
+    
+    def _next_retry_wait(self, default: float) -> float:
+        """Seconds until the next redelivery is due, capped at ``default``."""
+        with self._retry_lock:
+            if not self._retry_queue:
+                return default
+            return min(default, max(0.0, self._retry_queue[0][0] - time.monotonic()))
+    
+    def _expire_message(self, message: Message) -> None:
+        """Record that a message expired before it could be delivered."""
+        self._update_delivery_status(
+            message.message_id,
+            MessageDeliveryStatus.TIMEOUT,
+            "Message expired before delivery"
+        )
     
     def _update_delivery_status(
         self,
@@ -669,19 +1033,13 @@ class CommunicationProtocol:
         while self.is_running:
             try:
                 current_time = datetime.now()
-                expired_deliveries = []
-                
-                # Find expired delivery tracking entries
-                for message_id, delivery in self.delivery_tracking.items():
-                    if (current_time - delivery.timestamp).total_seconds() > self.message_timeout:
-                        expired_deliveries.append(message_id)
                 
-                # Remove expired entries
-                for message_id in expired_deliveries:
-                    del self.delivery_tracking[message_id]
+                # Drop expired delivery tracking buckets
+                self.delivery_tracking.ttl_seconds = self.message_timeout
+                expired_deliveries = self.delivery_tracking.expire()
                 
                 if expired_deliveries:
-                    logger.debug(f"Cleaned up {len(expired_deliveries)} expired delivery records")
+                    logger.debug(f"Cleaned up {expired_deliveries} expired delivery records")
                 
                 # Clean up stale agent entries
                 stale_agents = []
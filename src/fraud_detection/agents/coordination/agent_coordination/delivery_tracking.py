@@ -0,0 +1,111 @@
+"""
+Message Delivery Tracking Store
+
+Time-bucketed mapping of message ID to delivery record. Records are filed
+under the bucket for their insertion time and expire a whole bucket at a
+time, so expiry costs O(1) per bucket no matter how many messages were
+sent, instead of a scan over every record ever tracked.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional
+
+
+class DeliveryTracker(MutableMapping):
+    """
+    Dict-like delivery store whose entries live for ``ttl_seconds``.
+    
+    Entries are kept in ``ttl_seconds / bucket_seconds`` buckets (plus the
+    one being filled); lookups probe each live bucket, newest first.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        bucket_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize tracker.
+        
+        Args:
+            ttl_seconds: How long an entry is kept after insertion
+            bucket_seconds: Expiry granularity; defaults to a tenth of the TTL
+            clock: Monotonic time source
+        """
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds or max(ttl_seconds / 10, 0.001)
+        self._clock = clock
+        self._buckets: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.expired_count = 0
+    
+    def __setitem__(self, message_id: str, delivery: Any) -> None:
+        with self._lock:
+            self.expire()
+            bucket = self._find(message_id)
+            if bucket is None:
+                key = int(self._clock() // self.bucket_seconds)
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = {}
+            bucket[message_id] = delivery
+    
+    def __getitem__(self, message_id: str) -> Any:
+        with self._lock:
+            bucket = self._find(message_id)
+            if bucket is None:
+                raise KeyError(message_id)
+            return bucket[message_id]
+    
+    def __delitem__(self, message_id: str) -> None:
+        with self._lock:
+            bucket = self._find(message_id)
+            if bucket is None:
+                raise KeyError(message_id)
+            del bucket[message_id]
+    
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            keys: List[str] = [message_id for bucket in self._buckets.values() for message_id in bucket]
+        return iter(keys)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(bucket) for bucket in self._buckets.values())
+    
+    def expire(self) -> int:
+        """
+        Drop buckets older than the TTL.
+        
+        Returns:
+            Number of entries removed
+        """
+        cutoff = int((self._clock() - self.ttl_seconds) // self.bucket_seconds)
+        removed = 0
+        with self._lock:
+            while self._buckets:
+                key = next(iter(self._buckets))
+                if key >= cutoff:
+                    break
+                removed += len(self._buckets.pop(key))
+            self.expired_count += removed
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Store size and expiry counters."""
+        with self._lock:
+            return {
+                "tracked": len(self),
+                "buckets": len(self._buckets),
+                "expired": self.expired_count
+            }
+    
+    def _find(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Bucket holding ``message_id``, searching newest first."""
+        for bucket in reversed(self._buckets.values()):
+            if message_id in bucket:
+                return bucket
+        return None
@@ -0,0 +1,222 @@
+"""
+Async Handler Event Loops
+
+Long-lived asyncio event loops for running MessageHandler coroutines.
+Each loop runs on its own daemon thread; coroutines are scheduled onto it
+with ``run_coroutine_threadsafe`` so no loop is created or torn down per
+message. In-flight work is bounded so a burst of messages applies
+backpressure to the dispatching thread instead of piling up tasks.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Coroutine, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often a submitter blocked on a full pool re-checks whether the pool was stopped
+_SLOT_POLL_SECONDS = 0.1
+
+
+class HandlerLoopPool:
+    """
+    Small pool of persistent event loop threads.
+    
+    Work submitted with the same key always lands on the same loop, so
+    coroutines for one key start in submission order.
+    """
+    
+    def __init__(self, num_loops: int = 1, max_in_flight: int = 256, name: str = "handler-loop"):
+        """
+        Initialize loop pool.
+        
+        Args:
+            num_loops: Number of event loop threads
+            max_in_flight: Coroutines allowed to be scheduled or running at once
+            name: Thread name prefix
+        """
+        self.num_loops = max(1, num_loops)
+        self.max_in_flight = max(1, max_in_flight)
+        self.name = name
+        self._loops: List[asyncio.AbstractEventLoop] = []
+        self._threads: List[threading.Thread] = []
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._next_loop = 0
+        self._stopped = False
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "in_flight": 0, "peak_in_flight": 0}
+    
+    @property
+    def is_running(self) -> bool:
+        """Whether the loop threads are up."""
+        return bool(self._loops)
+    
+    def start(self) -> None:
+        """Start the loop threads if they are not running."""
+        with self._lock:
+            self._stopped = False
+            if self._loops:
+                return
+            for index in range(self.num_loops):
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                thread = threading.Thread(
+                    target=self._run_loop,
+                    args=(loop, ready),
+                    name=f"{self.name}-{index}",
+                    daemon=True
+                )
+                thread.start()
+                ready.wait()
+                self._loops.append(loop)
+                self._threads.append(thread)
+        logger.debug(f"Started {self.num_loops} handler event loop(s)")
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel outstanding work and stop the loop threads; blocked submitters are released."""
+        with self._lock:
+            self._stopped = True
+            loops, threads = self._loops, self._threads
+            self._loops, self._threads = [], []
+        
+        for loop in loops:
+            loop.call_soon_threadsafe(self._cancel_all, loop)
+        for thread in threads:
+            thread.join(timeout)
+        for loop, thread in zip(loops, threads, strict=True):
+            if not thread.is_alive():
+                loop.close()
+    
+    def submit(
+        self,
+        coroutine: Coroutine[Any, Any, Any],
+        key: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Future:
+        """
+        Schedule a coroutine on one of the loops.
+        
+        Blocks while ``max_in_flight`` coroutines are outstanding, until a
+        slot frees up, ``timeout`` passes or the pool is stopped.
+        
+        Args:
+            coroutine: Coroutine to run
+            key: Optional affinity key; equal keys share a loop
+            timeout: Maximum seconds to wait for an in-flight slot
+        
+        Returns:
+            Future resolved with the coroutine's result
+        
+        Raises:
+            TimeoutError: If no slot freed up within ``timeout``
+            RuntimeError: If the pool is stopped
+        """
+        if not self._acquire_slot(timeout):
+            coroutine.close()
+            if self._stopped:
+                raise RuntimeError("Handler loop pool is stopped")
+            raise TimeoutError("Handler loop pool at capacity")
+        
+        try:
+            loop = self._select_loop(key)
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        except Exception:
+            coroutine.close()
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self.stats["submitted"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        future.add_done_callback(self._on_done)
+        return future
+    
+    def run(
+        self,
+        coroutine: Coroutine[Any, Any, Any],
+        key: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run a coroutine on the pool and wait for its result (sync bridge).
+        
+        Must not be called from one of the pool's own loop threads.
+        """
+        if threading.current_thread() in self._threads:
+            coroutine.close()
+            raise RuntimeError("HandlerLoopPool.run called from a handler loop thread")
+        
+        future = self.submit(coroutine, key=key, timeout=timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool counters."""
+        with self._lock:
+            return {**self.stats, "loops": len(self._loops), "max_in_flight": self.max_in_flight}
+    
+    def _acquire_slot(self, timeout: Optional[float]) -> bool:
+        """Wait for an in-flight slot; False on timeout or once the pool is stopped."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = _SLOT_POLL_SECONDS
+            if deadline is not None:
+                wait = max(0.0, min(wait, deadline - time.monotonic()))
+            if self._slots.acquire(timeout=wait):
+                return True
+            if self._stopped or (deadline is not None and time.monotonic() >= deadline):
+                return False
+    
+    def _select_loop(self, key: Optional[str]) -> asyncio.AbstractEventLoop:
+        """Pick the loop for a submission, starting the pool on first use (but not after stop)."""
+        if not self._loops and not self._stopped:
+            self.start()
+        
+        with self._lock:
+            loops = self._loops
+            if not loops:
+                raise RuntimeError("Handler loop pool is stopped")
+            if key is not None:
+                return loops[hash(key) % len(loops)]
+            self._next_loop = (self._next_loop + 1) % len(loops)
+            return loops[self._next_loop]
+    
+    def _on_done(self, future: Future) -> None:
+        """Release the slot held by a finished coroutine."""
+        self._slots.release()
+        with self._lock:
+            self.stats["in_flight"] -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["completed"] += 1
+    
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        """Thread body: run the loop until stopped."""
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+    
+    @staticmethod
+    def _cancel_all(loop: asyncio.AbstractEventLoop) -> None:
+        """Cancel pending tasks, then stop once they have unwound."""
+        tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            gathered = asyncio.gather(*tasks, return_exceptions=True)
+            gathered.add_done_callback(lambda _: loop.stop())
+        else:
+            loop.stop()
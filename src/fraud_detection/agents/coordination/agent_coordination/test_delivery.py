@@ -0,0 +1,219 @@
+"""
+Unit tests for broadcast fan-out, delivery retries and delivery tracking.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from .communication_protocol import (
+    AgentInfo, AgentStatus, CommunicationProtocol, MessageDeliveryStatus, MessagePriority, MessageType
+)
+from .delivery_tracking import DeliveryTracker
+from .transports import InProcessHub, InProcessTransport, Transport
+
+
+class _FlakyTransport(Transport):
+    """Transport recording sends and failing the first ``failures`` per endpoint."""
+    
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.sends = []
+        self.prepared = 0
+    
+    def start(self, agent_id, on_message):
+        self.endpoint = f"flaky://{agent_id}"
+        return self.endpoint
+    
+    def prepare(self, messages):
+        self.prepared += 1
+        return list(messages)
+    
+    def send(self, endpoint, messages):
+        self.sends.append((endpoint, [message.message_type for message in messages]))
+        return sum(1 for sent_to, _ in self.sends if sent_to == endpoint) > self.failures
+    
+    def close(self):
+        pass
+
+
+def _protocol(transport, peers=0):
+    """Protocol with ``peers`` online agents and no background threads."""
+    protocol = CommunicationProtocol("self", "Self", "test", [], transport=transport)
+    protocol.retry_base_delay = 0.01
+    for index in range(peers):
+        protocol.known_agents[f"peer_{index}"] = AgentInfo(
+            agent_id=f"peer_{index}", agent_name="Peer", agent_type="test", capabilities=[],
+            status=AgentStatus.ONLINE, endpoint=f"flaky://peer_{index}", last_heartbeat=datetime.now()
+        )
+    return protocol
+
+
+def _drain(protocol):
+    return [protocol.outbound_queue.get_nowait() for _ in range(protocol.outbound_queue.qsize())]
+
+
+def _run_retries(protocol, timeout=2.0):
+    """Deliver rescheduled messages until none are left."""
+    deadline = time.monotonic() + timeout
+    while protocol.get_delivery_stats()["pending_retries"] and time.monotonic() < deadline:
+        time.sleep(protocol._next_retry_wait(0.05))
+        protocol._deliver_batch([], protocol._due_retries())
+
+
+class TestBroadcastFanOut:
+    """Test cases for broadcast delivery."""
+    
+    def test_broadcast_is_encoded_once_and_heartbeats_coalesce(self):
+        """Test one encoding serves every recipient and stale heartbeats are dropped."""
+        transport = _FlakyTransport()
+        protocol = _protocol(transport, peers=20)
+        protocol.broadcast_message(MessageType.HEARTBEAT, {"seq": 1}, MessagePriority.LOW)
+        protocol.broadcast_message(MessageType.NOTIFICATION, {"alert": True})
+        protocol.broadcast_message(MessageType.HEARTBEAT, {"seq": 2}, MessagePriority.LOW)
+        
+        protocol._deliver_batch(_drain(protocol))
+        
+        assert transport.prepared == 1
+        assert len(transport.sends) == 20
+        assert all(types == [MessageType.NOTIFICATION, MessageType.HEARTBEAT] for _, types in transport.sends)
+        assert protocol.get_delivery_stats()["heartbeats_coalesced"] == 20
+        protocol.fanout_executor.shutdown()
+    
+    def test_in_process_broadcast_reaches_every_agent(self):
+        """Test a broadcast over the in-process hub reaches each registered agent."""
+        hub = InProcessHub()
+        sender = CommunicationProtocol("sender", "Sender", "test", [], transport=InProcessTransport(hub))
+        receivers = []
+        for index in range(10):
+            receiver = CommunicationProtocol(f"r{index}", "Receiver", "test", [], transport=InProcessTransport(hub))
+            receiver.agent_info.endpoint = receiver.transport.start(f"r{index}", receiver._on_transport_message)
+            receiver.agent_info.status = AgentStatus.ONLINE
+            sender.known_agents[f"r{index}"] = receiver.agent_info
+            receivers.append(receiver)
+        
+        sender.broadcast_message(MessageType.NOTIFICATION, {"alert": True})
+        sender._deliver_batch(_drain(sender))
+        
+        assert all(receiver.message_queue.get_nowait().payload == {"alert": True} for receiver in receivers)
+        sender.fanout_executor.shutdown()
+
+
+class TestDeliveryRetries:
+    """Test cases for per-recipient retry with backoff."""
+    
+    def test_failed_unicast_is_retried_until_delivered(self):
+        """Test a transient failure is retried with backoff and then delivered."""
+        transport = _FlakyTransport(failures=2)
+        protocol = _protocol(transport, peers=1)
+        message_id = protocol.send_message("peer_0", MessageType.REQUEST, {"work": 1})
+        
+        protocol._deliver_batch(_drain(protocol))
+        assert protocol.get_message_delivery_status(message_id).status == MessageDeliveryStatus.PENDING
+        _run_retries(protocol)
+        
+        assert protocol.get_message_delivery_status(message_id).status == MessageDeliveryStatus.DELIVERED
+        assert len(transport.sends) == 3
+        assert protocol.get_delivery_stats()["retries_scheduled"] == 2
+    
+    def test_retries_are_bounded_and_per_recipient(self):
+        """Test only the failing recipient is retried and gives up after max_retries."""
+        transport = _FlakyTransport()
+        transport.send = lambda endpoint, messages: (
+            transport.sends.append((endpoint, [m.message_type for m in messages])) or endpoint != "flaky://peer_1"
+        )
+        protocol = _protocol(transport, peers=3)
+        message_id = protocol.send_message("peer_1", MessageType.REQUEST, {})
+        protocol.broadcast_message(MessageType.NOTIFICATION, {})
+        
+        protocol._deliver_batch(_drain(protocol))
+        _run_retries(protocol)
+        
+        endpoints = [endpoint for endpoint, _ in transport.sends]
+        assert endpoints.count("flaky://peer_0") == 1 and endpoints.count("flaky://peer_2") == 1
+        peer_1_types = [t for endpoint, types in transport.sends if endpoint == "flaky://peer_1" for t in types]
+        # First attempt plus three retries for each message
+        assert peer_1_types.count(MessageType.REQUEST) == 4 and peer_1_types.count(MessageType.NOTIFICATION) == 4
+        assert protocol.get_message_delivery_status(message_id).status == MessageDeliveryStatus.FAILED
+        assert protocol.get_delivery_stats()["retries_exhausted"] == 2
+
+    
+    def test_slow_recipient_does_not_stall_fanout(self):
+        """Test a stalled recipient is left to finish in the background while its traffic waits."""
+        release = threading.Event()
+        transport = _FlakyTransport()
+        
+        def send(endpoint, messages):
+            if endpoint == "flaky://peer_1":
+                release.wait(5)
+            transport.sends.append((endpoint, [m.message_type for m in messages]))
+            return True
+        
+        transport.send = send
+        protocol = _protocol(transport, peers=3)
+        protocol.fanout_timeout = 0.05
+        first_id = protocol.send_message("peer_1", MessageType.REQUEST, {"n": 1})
+        protocol.broadcast_message(MessageType.NOTIFICATION, {})
+        
+        start = time.monotonic()
+        protocol._deliver_batch(_drain(protocol))
+        assert time.monotonic() - start < 1
+        assert sorted(endpoint for endpoint, _ in transport.sends) == ["flaky://peer_0", "flaky://peer_2"]
+        
+        second_id = protocol.send_message("peer_1", MessageType.REQUEST, {"n": 2})
+        protocol._deliver_batch(_drain(protocol))
+        assert protocol.get_delivery_stats()["deferred_messages"] == 1
+        
+        release.set()
+        _run_retries(protocol)
+        
+        assert protocol.get_message_delivery_status(first_id).status == MessageDeliveryStatus.DELIVERED
+        assert protocol.get_message_delivery_status(second_id).status == MessageDeliveryStatus.DELIVERED
+        assert [endpoint for endpoint, _ in transport.sends].count("flaky://peer_1") == 2
+        assert protocol.get_delivery_stats()["slow_sends"] == 1
+        protocol.fanout_executor.shutdown()    
+    def test_unencodable_message_fails_alone_without_retries(self):
+        """Test a message that cannot be encoded fails by itself and is not retried."""
+        transport = _FlakyTransport()
+        encode = transport.prepare
+        
+        def prepare(messages):
+            if any("unencodable" in message.payload for message in messages):
+                raise TypeError("cannot encode payload")
+            return encode(messages)
+        
+        transport.prepare = prepare
+        protocol = _protocol(transport, peers=1)
+        good_id = protocol.send_message("peer_0", MessageType.REQUEST, {"n": 1})
+        bad_id = protocol.send_message("peer_0", MessageType.REQUEST, {"unencodable": object()})
+        
+        protocol._deliver_batch(_drain(protocol))
+        
+        assert transport.sends == [("flaky://peer_0", [MessageType.REQUEST])]
+        assert protocol.get_message_delivery_status(good_id).status == MessageDeliveryStatus.DELIVERED
+        bad_status = protocol.get_message_delivery_status(bad_id)
+        assert bad_status.status == MessageDeliveryStatus.FAILED
+        assert bad_status.error_message == "Message encoding failed"
+        stats = protocol.get_delivery_stats()
+        assert stats["encoding_failures"] == 1 and stats["retries_scheduled"] == 0
+        protocol.fanout_executor.shutdown()
+
+
+class TestDeliveryTracker:
+    """Test cases for DeliveryTracker."""
+    
+    def test_entries_expire_by_bucket(self):
+        """Test entries live for the TTL and are dropped a bucket at a time."""
+        now = [0.0]
+        tracker = DeliveryTracker(ttl_seconds=10, bucket_seconds=1, clock=lambda: now[0])
+        for index in range(5):
+            tracker[f"old_{index}"] = index
+        now[0] = 5.0
+        tracker["new"] = "new"
+        
+        assert len(tracker) == 6 and tracker["old_3"] == 3
+        now[0] = 11.5
+        assert tracker.expire() == 5
+        assert "old_0" not in tracker and tracker.get("new") == "new"
+        assert tracker.get_stats() == {"tracked": 1, "buckets": 1, "expired": 5}
@@ -0,0 +1,144 @@
+"""
+Unit tests for the persistent handler event loops.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+
+from .communication_protocol import (
+    CommunicationProtocol, Message, MessageHandler, MessageType, RequestHandler
+)
+from .handler_loops import HandlerLoopPool
+
+
+@pytest.fixture
+def pool():
+    """Two-loop pool stopped after each test."""
+    loop_pool = HandlerLoopPool(num_loops=2, max_in_flight=4)
+    yield loop_pool
+    loop_pool.stop()
+
+
+class _LoopRecorder(MessageHandler):
+    """Handler recording which event loop ran it."""
+    
+    def __init__(self):
+        self.loops = []
+        self.done = threading.Semaphore(0)
+    
+    async def handle_message(self, message):
+        await asyncio.sleep(0.05)
+        self.loops.append(id(asyncio.get_running_loop()))
+        self.done.release()
+        return None
+
+
+def _message(message_type=MessageType.NOTIFICATION, sender_id="sender"):
+    return Message(
+        message_id=str(uuid.uuid4()),
+        message_type=message_type,
+        sender_id=sender_id,
+        recipient_id="receiver",
+        payload={"request_data": {"amount": 10}},
+        timestamp=datetime.now()
+    )
+
+
+class TestHandlerLoopPool:
+    """Test cases for HandlerLoopPool."""
+    
+    def test_loops_are_reused_and_run_concurrently(self, pool):
+        """Test coroutines share persistent loops and overlap in time."""
+        async def work():
+            await asyncio.sleep(0.1)
+            return id(asyncio.get_running_loop())
+        
+        start = time.time()
+        futures = [pool.submit(work(), key="same") for _ in range(4)]
+        loop_ids = {future.result(timeout=5) for future in futures}
+        
+        assert len(loop_ids) == 1
+        assert time.time() - start < 0.3
+        assert pool.run(work(), key="same") in loop_ids
+        assert pool.get_stats()["completed"] == 5
+    
+    def test_in_flight_work_is_bounded(self, pool):
+        """Test submissions beyond the in-flight bound wait for a free slot."""
+        release = threading.Event()
+        
+        async def blocked():
+            await asyncio.get_running_loop().run_in_executor(None, release.wait, 5)
+        
+        futures = [pool.submit(blocked()) for _ in range(4)]
+        with pytest.raises(TimeoutError):
+            pool.submit(blocked(), timeout=0.05)
+        
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert pool.get_stats()["peak_in_flight"] == 4
+    
+    def test_stop_cancels_outstanding_work(self, pool):
+        """Test stopping the pool cancels coroutines that are still running."""
+        future = pool.submit(asyncio.sleep(10))
+        pool.stop()
+        
+        assert future.cancelled()
+        assert not pool.is_running
+
+    
+    def test_stop_releases_blocked_submitter(self, pool):
+        """Test a submitter waiting on a full pool is released by stop() rather than restarting it."""
+        for _ in range(4):
+            pool.submit(asyncio.sleep(10))
+        errors = []
+        
+        def submit_blocked():
+            try:
+                pool.submit(asyncio.sleep(10))
+            except RuntimeError as e:
+                errors.append(e)
+        
+        submitter = threading.Thread(target=submit_blocked)
+        submitter.start()
+        time.sleep(0.05)
+        pool.stop()
+        submitter.join(timeout=5)
+        
+        assert not submitter.is_alive()
+        assert len(errors) == 1
+        assert not pool.is_running
+
+class TestProtocolHandlerDispatch:
+    """Test cases for async handler dispatch in CommunicationProtocol."""
+    
+    def test_handlers_run_on_persistent_loop(self):
+        """Test every message is handled on the same long-lived loop."""
+        protocol = CommunicationProtocol("agent", "Agent", "test", [])
+        recorder = _LoopRecorder()
+        protocol.register_handler(MessageType.NOTIFICATION, recorder)
+        
+        for _ in range(5):
+            protocol._handle_message(_message())
+        for _ in range(5):
+            assert recorder.done.acquire(timeout=5)
+        
+        assert len(set(recorder.loops)) == 1
+        protocol.handler_pool.stop()
+    
+    def test_request_response_is_queued(self):
+        """Test a request handler's response is placed on the outbound queue."""
+        protocol = CommunicationProtocol("agent", "Agent", "test", [])
+        protocol.register_handler(MessageType.REQUEST, RequestHandler(lambda data: {"echo": data}))
+        
+        protocol._handle_message(_message(MessageType.REQUEST))
+        response = protocol.outbound_queue.get(timeout=5)
+        
+        assert response.payload == {"success": True, "response_data": {"echo": {"amount": 10}}}
+        assert protocol.run_coroutine(asyncio.sleep(0, result="ok"), timeout=5) == "ok"
+        protocol.handler_pool.stop()
@@ -0,0 +1,177 @@
+"""
+Unit tests for agent message transports.
+"""
+
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from .communication_protocol import (
+    AgentInfo, AgentStatus, CommunicationProtocol, Message, MessageDeliveryStatus, MessageType
+)
+from . import transports
+from .transports import InProcessHub, InProcessTransport, TcpTransport, UnixSocketTransport, decode_frame, encode_frame
+
+
+def _message(index=0):
+    return Message(
+        message_id=str(uuid.uuid4()),
+        message_type=MessageType.NOTIFICATION,
+        sender_id="sender",
+        recipient_id="receiver",
+        payload={"index": index, "scores": [0.1, 0.2], "flags": {"velocity": True}},
+        timestamp=datetime.now()
+    )
+
+
+class _Collector:
+    """Receiver that records messages and signals when enough arrived."""
+    
+    def __init__(self, expected):
+        self.expected = expected
+        self.received = []
+        self.done = threading.Event()
+    
+    def __call__(self, message):
+        self.received.append(message)
+        if len(self.received) >= self.expected:
+            self.done.set()
+
+
+def _protocol(agent_id, hub):
+    """Protocol bound to an in-process hub without starting background threads."""
+    protocol = CommunicationProtocol(agent_id, agent_id, "test", [], transport=InProcessTransport(hub))
+    protocol.agent_info.endpoint = protocol.transport.start(agent_id, protocol._on_transport_message)
+    protocol.agent_info.status = AgentStatus.ONLINE
+    return protocol
+
+
+def _peer(protocol):
+    info = protocol.agent_info
+    return AgentInfo(
+        agent_id=info.agent_id, agent_name=info.agent_name, agent_type=info.agent_type,
+        capabilities=[], status=AgentStatus.ONLINE, endpoint=info.endpoint, last_heartbeat=datetime.now()
+    )
+
+
+class TestInProcessTransport:
+    """Test cases for in-process delivery."""
+    
+    def test_messages_are_delivered_without_copying(self):
+        """Test the recipient receives the sender's message objects, batched per recipient."""
+        hub = InProcessHub()
+        sender, receiver = _protocol("sender", hub), _protocol("receiver", hub)
+        sender.known_agents["receiver"] = _peer(receiver)
+        
+        message_ids = [
+            sender.send_message("receiver", MessageType.NOTIFICATION, {"index": i}) for i in range(3)
+        ]
+        outbound = [sender.outbound_queue.get_nowait() for _ in range(3)]
+        sender._deliver_batch(outbound)
+        
+        assert [receiver.message_queue.get_nowait() for _ in range(3)] == outbound
+        assert all(
+            sender.get_message_delivery_status(message_id).status == MessageDeliveryStatus.DELIVERED
+            for message_id in message_ids
+        )
+        assert sender.transport.get_stats()["frames_sent"] == 1
+    
+    def test_unbound_endpoint_fails_delivery(self):
+        """Test sending to an agent that is not on the hub fails and is rescheduled."""
+        hub = InProcessHub()
+        sender, receiver = _protocol("sender", hub), _protocol("receiver", hub)
+        sender.known_agents["receiver"] = _peer(receiver)
+        receiver.transport.close()
+        
+        message_id = sender.send_message("receiver", MessageType.NOTIFICATION, {})
+        sender._deliver_batch([sender.outbound_queue.get_nowait()])
+        
+        delivery = sender.get_message_delivery_status(message_id)
+        assert delivery.status == MessageDeliveryStatus.PENDING
+        assert delivery.error_message.startswith("Retry 1 scheduled")
+
+
+class TestFrameCodec:
+    """Test cases for frame encoding."""
+    
+    @pytest.mark.parametrize("use_msgpack", [
+        pytest.param(True, marks=pytest.mark.skipif(not transports.MSGPACK_AVAILABLE, reason="msgpack not installed")),
+        False
+    ], ids=["msgpack", "json"])
+    def test_codecs_accept_the_same_payloads(self, monkeypatch, use_msgpack):
+        """Test Decimal and datetime payload values encode with either codec."""
+        monkeypatch.setattr(transports, "MSGPACK_AVAILABLE", use_msgpack)
+        message = _message()
+        message.payload["amount"] = Decimal("125.50")
+        message.payload["seen_at"] = datetime(2024, 1, 1, 12, 0)
+        
+        frame = encode_frame([message])
+        header = transports._FRAME_HEADER
+        length, codec = header.unpack_from(frame)
+        records = decode_frame(codec, memoryview(frame)[header.size:header.size + length])
+        
+        assert records[0]["payload"]["amount"] == "125.50"
+        assert records[0]["payload"]["seen_at"] == "2024-01-01 12:00:00"
+
+
+class TestSocketTransports:
+    """Test cases for the framed socket transports."""
+    
+    @pytest.mark.parametrize("make_transport", [
+        lambda tmp_path, name: UnixSocketTransport(str(tmp_path / f"{name}.sock")),
+        lambda tmp_path, name: TcpTransport()
+    ], ids=["unix", "tcp"])
+    def test_batches_round_trip(self, tmp_path, make_transport):
+        """Test batches arrive complete and in order, one frame per batch."""
+        sender, receiver = make_transport(tmp_path, "sender"), make_transport(tmp_path, "receiver")
+        collector = _Collector(expected=500)
+        sender.start("sender", lambda message: None)
+        endpoint = receiver.start("receiver", collector)
+        
+        try:
+            messages = [_message(i) for i in range(500)]
+            for start in range(0, 500, 100):
+                assert sender.send(endpoint, messages[start:start + 100])
+            
+            assert collector.done.wait(timeout=5)
+            restored = [Message.from_dict(record) for record in collector.received]
+            assert [m.payload for m in restored] == [m.payload for m in messages]
+            assert restored[0].timestamp == messages[0].timestamp
+            assert receiver.get_stats()["frames_received"] == 5
+        finally:
+            sender.close()
+            receiver.close()
+    
+    def test_unreachable_endpoint_returns_false(self):
+        """Test a send to an endpoint nobody listens on fails cleanly."""
+        listener = TcpTransport()
+        endpoint = listener.start("gone", lambda message: None)
+        listener.close()
+        sender = TcpTransport()
+        
+        assert sender.send(endpoint, [_message()]) is False
+        assert sender.get_stats()["send_failures"] == 1
+    
+    def test_stalled_peer_times_out(self):
+        """Test a peer that stops reading fails the send after the send timeout."""
+        stalled = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        stalled.bind(("127.0.0.1", 0))
+        stalled.listen()
+        endpoint = f"tcp://127.0.0.1:{stalled.getsockname()[1]}"
+        sender = TcpTransport(send_timeout=0.2)
+        
+        try:
+            start = time.monotonic()
+            # Larger than the kernel buffers, so the write blocks on the silent peer
+            assert sender.send_prepared(endpoint, (b"\0" * (64 * 1024 * 1024), 1)) is False
+            assert time.monotonic() - start < 2
+            assert sender.get_stats()["send_failures"] == 1
+            assert sender._connections == {}
+        finally:
+            sender.close()
+            stalled.close()
@@ -0,0 +1,499 @@
+"""
+Agent Message Transports
+
+Delivery backends for CommunicationProtocol. A transport binds an endpoint
+for its agent, hands received messages to a callback, and sends batches of
+messages to other agents' endpoints:
+
+- InProcessTransport: agents in one process share a hub and exchange the
+  Message objects themselves, with no serialization.
+- UnixSocketTransport: agents on one host exchange length-prefixed msgpack
+  frames over Unix-domain sockets, one frame per batch of messages.
+- TcpTransport: the same framing over loopback TCP, for multi-process tests
+  and platforms without Unix-domain sockets.
+
+Endpoints are URIs: ``inproc://<name>``, ``unix://<path>`` and
+``tcp://<host>:<port>``.
+"""
+
+import json
+import logging
+import os
+import socket
+import struct
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Frame header: payload length and codec tag
+_FRAME_HEADER = struct.Struct(">IB")
+_CODEC_MSGPACK = 1
+_CODEC_JSON = 2
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class Transport(ABC):
+    """Abstract base class for message transports."""
+    
+    def __init__(self):
+        """Initialize transport."""
+        self.endpoint: Optional[str] = None
+        self.on_message: Optional[Callable[[Any], None]] = None
+        self.stats = {
+            "frames_sent": 0, "messages_sent": 0, "frames_received": 0, "messages_received": 0, "send_failures": 0
+        }
+        self._stats_lock = threading.Lock()
+    
+    @abstractmethod
+    def start(self, agent_id: str, on_message: Callable[[Any], None]) -> str:
+        """
+        Bind this agent's endpoint and start receiving.
+        
+        Args:
+            agent_id: Agent the transport belongs to
+            on_message: Called with each received message; in-process
+                transports pass Message objects, socket transports pass
+                the deserialized message dictionaries
+        
+        Returns:
+            Endpoint URI other agents send to
+        """
+        pass
+    
+    @abstractmethod
+    def send(self, endpoint: str, messages: List[Any]) -> bool:
+        """
+        Send a batch of messages to one endpoint.
+        
+        Args:
+            endpoint: Recipient endpoint URI
+            messages: Messages to deliver, in order
+        
+        Returns:
+            True if the whole batch was handed to the recipient
+        """
+        pass
+    
+    @abstractmethod
+    def close(self) -> None:
+        """Stop receiving and release resources."""
+        pass
+    
+    def prepare(self, messages: List[Any]) -> Any:
+        """
+        Turn a batch into whatever ``send_prepared`` writes.
+        
+        Lets a batch going to many endpoints (a broadcast) be encoded once.
+        """
+        return list(messages)
+    
+    def send_prepared(self, endpoint: str, prepared: Any) -> bool:
+        """Send a batch returned by ``prepare``."""
+        return self.send(endpoint, prepared)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Transport counters."""
+        with self._stats_lock:
+            return {**self.stats, "endpoint": self.endpoint}
+    
+    def _count(self, **increments: int) -> None:
+        """Bump stats counters."""
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+
+class InProcessHub:
+    """Registry connecting in-process transports by endpoint."""
+    
+    def __init__(self):
+        """Initialize hub."""
+        self._receivers: Dict[str, Callable[[Any], None]] = {}
+        self._lock = threading.Lock()
+    
+    def bind(self, endpoint: str, on_message: Callable[[Any], None]) -> None:
+        """Attach a receiver to an endpoint."""
+        with self._lock:
+            self._receivers[endpoint] = on_message
+    
+    def unbind(self, endpoint: str) -> None:
+        """Detach the receiver for an endpoint."""
+        with self._lock:
+            self._receivers.pop(endpoint, None)
+    
+    def receiver(self, endpoint: str) -> Optional[Callable[[Any], None]]:
+        """Receiver bound to an endpoint, if any."""
+        return self._receivers.get(endpoint)
+
+
+DEFAULT_HUB = InProcessHub()
+
+
+class InProcessTransport(Transport):
+    """
+    Transport for agents sharing a process.
+    
+    Messages are handed to the recipient as the same objects, so senders
+    must not mutate a message after sending it.
+    """
+    
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        """
+        Initialize transport.
+        
+        Args:
+            hub: Hub shared by the agents; defaults to the process-wide hub
+        """
+        super().__init__()
+        self.hub = hub or DEFAULT_HUB
+    
+    def start(self, agent_id: str, on_message: Callable[[Any], None]) -> str:
+        """Bind ``inproc://<agent_id>``."""
+        self.on_message = on_message
+        self.endpoint = f"inproc://{agent_id}"
+        self.hub.bind(self.endpoint, on_message)
+        return self.endpoint
+    
+    def send(self, endpoint: str, messages: List[Any]) -> bool:
+        """Hand messages straight to the recipient's receiver."""
+        receiver = self.hub.receiver(endpoint)
+        if receiver is None:
+            self._count(send_failures=1)
+            return False
+        for message in messages:
+            receiver(message)
+        self._count(frames_sent=1, messages_sent=len(messages))
+        return True
+    
+    def close(self) -> None:
+        """Unbind from the hub."""
+        if self.endpoint:
+            self.hub.unbind(self.endpoint)
+
+
+def _encode_default(value: Any) -> str:
+    """Fallback for values neither codec handles natively (Decimal, datetime, ...)."""
+    return str(value)
+
+
+def encode_frame(messages: List[Any]) -> bytes:
+    """
+    Encode messages as one length-prefixed frame.
+    
+    Both codecs accept the same payloads: values they cannot represent
+    natively are sent as their ``str()``.
+    """
+    records = [message.to_dict() for message in messages]
+    if MSGPACK_AVAILABLE:
+        body = msgpack.packb(records, use_bin_type=True, default=_encode_default)
+        codec = _CODEC_MSGPACK
+    else:
+        body = json.dumps(records, default=_encode_default).encode("utf-8")
+        codec = _CODEC_JSON
+    return _FRAME_HEADER.pack(len(body), codec) + body
+
+
+def decode_frame(codec: int, body: memoryview) -> List[Dict[str, Any]]:
+    """Decode a frame body into message dictionaries."""
+    if codec == _CODEC_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("Received msgpack frame but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if codec == _CODEC_JSON:
+        return json.loads(bytes(body).decode("utf-8"))
+    raise ValueError(f"Unknown frame codec: {codec}")
+
+
+class _SocketTransport(Transport):
+    """
+    Shared stream-socket implementation for the Unix and TCP transports.
+    
+    One listening socket accepts peers, with a reader thread per inbound
+    connection. Outbound connections are opened lazily, kept per endpoint,
+    and reopened once if a send fails on a stale connection. Connects and
+    writes are bounded by ``send_timeout`` so an unresponsive peer fails the
+    send instead of blocking the sender.
+    """
+    
+    family = socket.AF_INET
+    
+    def __init__(self, send_timeout: float = 5.0):
+        """
+        Initialize transport.
+        
+        Args:
+            send_timeout: Seconds allowed for connecting to a peer or writing one frame
+        """
+        super().__init__()
+        self.send_timeout = send_timeout
+        self._server: Optional[socket.socket] = None
+        self._connections: Dict[str, Tuple[socket.socket, threading.Lock]] = {}
+        self._connect_locks: Dict[str, threading.Lock] = {}
+        self._connections_lock = threading.Lock()
+        self._inbound: List[socket.socket] = []
+        self._running = False
+    
+    def start(self, agent_id: str, on_message: Callable[[Any], None]) -> str:
+        """Listen on the transport's address and start accepting peers."""
+        self.on_message = on_message
+        self._server = self._listen(agent_id)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name=f"{agent_id}-accept", daemon=True).start()
+        return self.endpoint
+    
+    def send(self, endpoint: str, messages: List[Any]) -> bool:
+        """Write the batch as one frame on the connection to ``endpoint``."""
+        if not messages:
+            return True
+        try:
+            prepared = self.prepare(messages)
+        except Exception as e:
+            logger.error(f"Failed to encode messages for {endpoint}: {str(e)}")
+            self._count(send_failures=1)
+            return False
+        return self.send_prepared(endpoint, prepared)
+    
+    def prepare(self, messages: List[Any]) -> Tuple[bytes, int]:
+        """Encode the batch once as a frame plus its message count."""
+        return encode_frame(messages), len(messages)
+    
+    def send_prepared(self, endpoint: str, prepared: Tuple[bytes, int]) -> bool:
+        """Write an encoded frame, reconnecting once on a stale connection."""
+        frame, count = prepared
+        for attempt in range(2):
+            try:
+                sock, lock = self._connection(endpoint)
+                with lock:
+                    sock.sendall(frame)
+                self._count(frames_sent=1, messages_sent=count)
+                return True
+            except socket.timeout:
+                # The peer is slow, not gone; a partial frame may be on the wire,
+                # so drop the connection and leave the batch to the caller's retries
+                self._drop_connection(endpoint)
+                logger.warning(f"Timed out sending to {endpoint} after {self.send_timeout}s")
+                break
+            except OSError as e:
+                self._drop_connection(endpoint)
+                if attempt == 1:
+                    logger.warning(f"Failed to send to {endpoint}: {str(e)}")
+        self._count(send_failures=1)
+        return False
+    
+    def close(self) -> None:
+        """Close the listener and every connection."""
+        self._running = False
+        if self._server is not None:
+            try:
+                # Wakes the accept loop before closing
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+        with self._connections_lock:
+            connections, self._connections = list(self._connections.values()), {}
+            inbound, self._inbound = self._inbound, []
+        for sock in [sock for sock, _ in connections] + inbound:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+    
+    @abstractmethod
+    def _listen(self, agent_id: str) -> socket.socket:
+        """Create the listening socket and set ``self.endpoint``."""
+        pass
+    
+    @abstractmethod
+    def _address(self, endpoint: str) -> Any:
+        """Socket address for an endpoint URI."""
+        pass
+    
+    def _connection(self, endpoint: str) -> Tuple[socket.socket, threading.Lock]:
+        """Existing or new outbound connection to an endpoint."""
+        with self._connections_lock:
+            connection = self._connections.get(endpoint)
+            if connection is not None:
+                return connection
+            connect_lock = self._connect_locks.setdefault(endpoint, threading.Lock())
+        
+        # Connect outside the table lock so a slow peer only delays its own senders
+        with connect_lock:
+            with self._connections_lock:
+                connection = self._connections.get(endpoint)
+            if connection is not None:
+                return connection
+            
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.settimeout(self.send_timeout)
+            try:
+                sock.connect(self._address(endpoint))
+            except OSError:
+                sock.close()
+                raise
+            self._configure(sock)
+            connection = (sock, threading.Lock())
+            with self._connections_lock:
+                self._connections[endpoint] = connection
+            return connection
+    
+    def _drop_connection(self, endpoint: str) -> None:
+        """Forget a broken outbound connection."""
+        with self._connections_lock:
+            connection = self._connections.pop(endpoint, None)
+        if connection is not None:
+            connection[0].close()
+    
+    def _configure(self, sock: socket.socket) -> None:
+        """Per-connection socket options."""
+        pass
+    
+    def _accept_loop(self) -> None:
+        """Accept peers and start a reader for each."""
+        while self._running:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                break
+            self._configure(sock)
+            with self._connections_lock:
+                self._inbound.append(sock)
+            threading.Thread(target=self._read_loop, args=(sock,), daemon=True).start()
+    
+    def _read_loop(self, sock: socket.socket) -> None:
+        """Read frames from one peer until it disconnects."""
+        header = bytearray(_FRAME_HEADER.size)
+        buffer = bytearray(64 * 1024)
+        try:
+            while self._running:
+                if not self._read_exactly(sock, memoryview(header)):
+                    break
+                length, codec = _FRAME_HEADER.unpack(header)
+                if length > MAX_FRAME_BYTES:
+                    logger.error(f"Dropping connection after oversized frame ({length} bytes)")
+                    break
+                if length > len(buffer):
+                    buffer = bytearray(length)
+                body = memoryview(buffer)[:length]
+                if not self._read_exactly(sock, body):
+                    break
+                self._dispatch(codec, body)
+        except OSError:
+            pass
+        finally:
+            with self._connections_lock:
+                if sock in self._inbound:
+                    self._inbound.remove(sock)
+            sock.close()
+    
+    def _dispatch(self, codec: int, body: memoryview) -> None:
+        """Decode a frame and hand its messages to the receiver."""
+        try:
+            records = decode_frame(codec, body)
+        except Exception as e:
+            logger.error(f"Failed to decode frame: {str(e)}")
+            return
+        self._count(frames_received=1, messages_received=len(records))
+        for record in records:
+            try:
+                self.on_message(record)
+            except Exception as e:
+                logger.error(f"Failed to deliver received message: {str(e)}")
+    
+    @staticmethod
+    def _read_exactly(sock: socket.socket, view: memoryview) -> bool:
+        """Fill ``view`` from the socket; False if the peer closed first."""
+        while len(view):
+            received = sock.recv_into(view)
+            if received == 0:
+                return False
+            view = view[received:]
+        return True
+
+
+class UnixSocketTransport(_SocketTransport):
+    """Transport over Unix-domain sockets for agents on one host."""
+    
+    family = getattr(socket, "AF_UNIX", None)
+    
+    def __init__(self, path: Optional[str] = None, send_timeout: float = 5.0):
+        """
+        Initialize transport.
+        
+        Args:
+            path: Socket path; defaults to ``<tempdir>/agent-<agent_id>.sock``
+            send_timeout: Seconds allowed for connecting to a peer or writing one frame
+        """
+        super().__init__(send_timeout)
+        self.path = path
+    
+    def close(self) -> None:
+        """Close sockets and remove the socket file."""
+        super().close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+    
+    def _listen(self, agent_id: str) -> socket.socket:
+        if self.family is None:
+            raise RuntimeError("Unix-domain sockets are not supported on this platform")
+        self.path = self.path or os.path.join(tempfile.gettempdir(), f"agent-{agent_id}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = socket.socket(self.family, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen()
+        self.endpoint = f"unix://{self.path}"
+        return server
+    
+    def _address(self, endpoint: str) -> str:
+        if not endpoint.startswith("unix://"):
+            raise OSError(f"Not a unix endpoint: {endpoint}")
+        return endpoint[len("unix://"):]
+
+
+class TcpTransport(_SocketTransport):
+    """Transport over TCP, bound to loopback by default."""
+    
+    family = socket.AF_INET
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, send_timeout: float = 5.0):
+        """
+        Initialize transport.
+        
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+            send_timeout: Seconds allowed for connecting to a peer or writing one frame
+        """
+        super().__init__(send_timeout)
+        self.host = host
+        self.port = port
+    
+    def _listen(self, agent_id: str) -> socket.socket:
+        server = socket.socket(self.family, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((self.host, self.port))
+        server.listen()
+        self.port = server.getsockname()[1]
+        self.endpoint = f"tcp://{self.host}:{self.port}"
+        return server
+    
+    def _address(self, endpoint: str) -> Tuple[str, int]:
+        if not endpoint.startswith("tcp://"):
+            raise OSError(f"Not a tcp endpoint: {endpoint}")
+        host, _, port = endpoint[len("tcp://"):].rpartition(":")
+        return host, int(port)
+    
+    def _configure(self, sock: socket.socket) -> None:
+        # Frames are already batched; do not delay them further
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
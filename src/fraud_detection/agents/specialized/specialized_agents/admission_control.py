@@ -0,0 +1,105 @@
+"""
+Agent Admission Control
+
+Bounds how much work an agent accepts: at most ``max_concurrent`` requests
+run at once, at most ``max_queued`` more wait for a slot in FIFO order, and
+anything beyond that is shed immediately. Under overload requests then
+fail fast or wait a bounded time instead of all slowing down together.
+"""
+
+import threading
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional
+
+
+class AdmissionDecision(Enum):
+    """Outcome of asking for an execution slot."""
+    ADMITTED = "admitted"
+    SHED = "shed"  # wait queue full
+    TIMED_OUT = "timed_out"  # no slot freed up before the deadline
+
+
+class RequestCancelled(Exception):
+    """Raised inside a request whose caller has stopped waiting for it."""
+    pass
+
+
+class AdmissionController:
+    """
+    Counting semaphore with a bounded FIFO wait queue.
+    
+    A released slot is handed directly to the longest-waiting caller, so
+    waiters are served in arrival order and a newcomer can never overtake
+    the queue.
+    """
+    
+    def __init__(self, max_concurrent: int, max_queued: int):
+        """
+        Initialize controller.
+        
+        Args:
+            max_concurrent: Requests allowed to run at once
+            max_queued: Requests allowed to wait for a slot
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.in_flight = 0
+        self._waiters: Deque[threading.Event] = deque()
+        self._lock = threading.Lock()
+        self.stats = {"admitted": 0, "queued": 0, "shed": 0, "queue_timeouts": 0}
+    
+    @property
+    def queued(self) -> int:
+        """Requests currently waiting for a slot."""
+        return len(self._waiters)
+    
+    def acquire(self, timeout: Optional[float] = None) -> AdmissionDecision:
+        """
+        Take an execution slot, waiting up to ``timeout`` seconds in the queue.
+        
+        Returns:
+            ADMITTED if the caller now holds a slot and must call release()
+        """
+        with self._lock:
+            if self.in_flight < self.max_concurrent and not self._waiters:
+                self.in_flight += 1
+                self.stats["admitted"] += 1
+                return AdmissionDecision.ADMITTED
+            if len(self._waiters) >= self.max_queued:
+                self.stats["shed"] += 1
+                return AdmissionDecision.SHED
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+            self.stats["queued"] += 1
+        
+        if waiter.wait(timeout):
+            return AdmissionDecision.ADMITTED
+        
+        with self._lock:
+            if waiter.is_set():
+                # A slot was handed over just as the wait timed out
+                return AdmissionDecision.ADMITTED
+            self._waiters.remove(waiter)
+            self.stats["queue_timeouts"] += 1
+            return AdmissionDecision.TIMED_OUT
+    
+    def release(self) -> None:
+        """Give up a slot, handing it to the next waiter if there is one."""
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+                self.stats["admitted"] += 1
+            else:
+                self.in_flight -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Occupancy and counters."""
+        with self._lock:
+            return {
+                **self.stats,
+                "in_flight": self.in_flight,
+                "queued": len(self._waiters),
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued
+            }
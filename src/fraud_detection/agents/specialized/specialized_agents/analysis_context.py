@@ -0,0 +1,218 @@
+"""
+Per-Request Analysis Context
+
+Loads the data pattern detectors share exactly once per request: the
+user's transaction history is fetched for the widest window any detector
+needs and narrower windows are derived from it in memory, and the fraud
+pattern catalog is read from a versioned in-process snapshot that is
+refreshed in the background instead of scanned on every transaction.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def window_history(
+    history: List[Any],
+    now: datetime,
+    days_back: int,
+    limit: int,
+    full_window_days: Optional[int] = None
+) -> List[Any]:
+    """
+    Narrow a newest-first history to the last ``days_back`` days and ``limit`` entries.
+    
+    Args:
+        history: Transactions fetched for a window at least as wide, newest first
+        now: Reference time the history was fetched at
+        days_back: Number of days to keep
+        limit: Maximum number of transactions to keep
+        full_window_days: Window ``history`` was fetched for; skips the time filter when equal
+    """
+    if days_back == full_window_days:
+        return history[:limit]
+    cutoff = now - timedelta(days=days_back)
+    return [tx for tx in history if tx.timestamp >= cutoff][:limit]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable view of the fraud pattern catalog."""
+    version: int
+    patterns: Tuple[Any, ...]
+    loaded_at: float  # time.monotonic() of the load
+
+
+class PatternCatalog:
+    """
+    Versioned, periodically refreshed copy of the fraud pattern catalog.
+    
+    The first caller loads the catalog synchronously; afterwards readers
+    always get the current snapshot immediately, and a stale snapshot
+    triggers a single background refresh (stale-while-revalidate). A failed
+    refresh keeps serving the previous snapshot.
+    """
+    
+    def __init__(self, loader: Callable[[], Sequence[Any]], refresh_interval_seconds: float = 300.0):
+        """
+        Initialize catalog.
+        
+        Args:
+            loader: Returns every known fraud pattern
+            refresh_interval_seconds: Age after which a snapshot is refreshed
+        """
+        self.loader = loader
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+        self.stats = {"loads": 0, "failures": 0, "background_refreshes": 0}
+    
+    @property
+    def version(self) -> int:
+        """Version of the current snapshot (0 before the first load)."""
+        return self._snapshot.version if self._snapshot else 0
+    
+    def snapshot(self) -> CatalogSnapshot:
+        """Current snapshot, loading it on first use."""
+        current = self._snapshot
+        if current is None:
+            return self.refresh()
+        if time.monotonic() - current.loaded_at >= self.refresh_interval_seconds:
+            self._refresh_in_background()
+        return current
+    
+    def refresh(self) -> CatalogSnapshot:
+        """Reload the catalog now; concurrent callers share one load."""
+        previous = self._snapshot
+        with self._load_lock:
+            if self._snapshot is not previous and self._snapshot is not None:
+                return self._snapshot
+            try:
+                patterns = tuple(self.loader())
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.error(f"Error loading fraud pattern catalog: {str(e)}")
+                return self._snapshot or CatalogSnapshot(version=0, patterns=(), loaded_at=time.monotonic())
+            
+            self._snapshot = CatalogSnapshot(
+                version=self.version + 1,
+                patterns=patterns,
+                loaded_at=time.monotonic()
+            )
+            self.stats["loads"] += 1
+            return self._snapshot
+    
+    def invalidate(self) -> None:
+        """Mark the current snapshot stale so the next read refreshes it."""
+        current = self._snapshot
+        if current is not None:
+            self._snapshot = CatalogSnapshot(current.version, current.patterns, loaded_at=float("-inf"))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Catalog version, size and counters."""
+        current = self._snapshot
+        return {
+            **self.stats,
+            "version": self.version,
+            "patterns": len(current.patterns) if current else 0,
+            "age_seconds": time.monotonic() - current.loaded_at if current else None
+        }
+    
+    def _refresh_in_background(self) -> None:
+        """Start one refresh thread unless one is already running."""
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self.stats["background_refreshes"] += 1
+        threading.Thread(target=self._background_refresh, name="pattern-catalog-refresh", daemon=True).start()
+    
+    def _background_refresh(self) -> None:
+        """Background refresh body."""
+        try:
+            self.refresh()
+        finally:
+            with self._state_lock:
+                self._refreshing = False
+
+
+class AnalysisContext:
+    """
+    Data shared by every detector while analysing one transaction.
+    
+    History is fetched once, newest first, for ``days_back``/``limit``; any
+    request for a window within those bounds is answered by filtering that
+    result, which matches what the memory manager would return for the
+    narrower query.
+    """
+    
+    def __init__(
+        self,
+        transaction: Any,
+        memory_manager: Any,
+        catalog: PatternCatalog,
+        days_back: int = 90,
+        limit: int = 100
+    ):
+        """
+        Initialize context.
+        
+        Args:
+            transaction: Transaction under analysis
+            memory_manager: Source of transaction history
+            catalog: Shared fraud pattern catalog
+            days_back: Widest history window any detector needs
+            limit: Largest history limit any detector needs
+        """
+        self.transaction = transaction
+        self.memory_manager = memory_manager
+        self.catalog = catalog
+        self.days_back = days_back
+        self.limit = limit
+        self.now = datetime.now()
+        self._history: Optional[List[Any]] = None
+        self._catalog_snapshot: Optional[CatalogSnapshot] = None
+        self.history_fetches = 0
+    
+    def history(self, days_back: int, limit: int = 100) -> List[Any]:
+        """
+        User's transactions from the last ``days_back`` days, newest first.
+        
+        Args:
+            days_back: Number of days to look back
+            limit: Maximum number of transactions to return
+        """
+        if days_back > self.days_back or limit > self.limit:
+            # Wider than the shared window; fetch it directly
+            self.history_fetches += 1
+            return self.memory_manager.get_user_transaction_history(
+                self.transaction.user_id, days_back=days_back, limit=limit
+            )
+        
+        if self._history is None:
+            self.history_fetches += 1
+            self._history = list(self.memory_manager.get_user_transaction_history(
+                self.transaction.user_id, days_back=self.days_back, limit=self.limit
+            ))
+        
+        return window_history(self._history, self.now, days_back, limit, full_window_days=self.days_back)
+    
+    @property
+    def catalog_snapshot(self) -> CatalogSnapshot:
+        """Catalog snapshot pinned for the duration of this request."""
+        if self._catalog_snapshot is None:
+            self._catalog_snapshot = self.catalog.snapshot()
+        return self._catalog_snapshot
+    
+    @property
+    def fraud_patterns(self) -> Tuple[Any, ...]:
+        """Known fraud patterns as of this request's catalog snapshot."""
+        return self.catalog_snapshot.patterns
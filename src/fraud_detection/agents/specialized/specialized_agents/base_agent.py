@@ -6,14 +6,20 @@ communication protocols, and performance monitoring.
 """
 
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 import uuid
 
+from .admission_control import AdmissionController, AdmissionDecision, RequestCancelled
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,6 +56,10 @@ class AgentMetrics:
     last_activity: Optional[datetime] = None
     error_count: int = 0
     throughput_per_second: float = 0.0
+    requests_shed: int = 0  # rejected because the wait queue was full
+    requests_timed_out: int = 0  # exceeded timeout_seconds queued or running
+    average_queue_time_ms: float = 0.0
+    peak_queue_time_ms: float = 0.0
     
     @property
     def success_rate(self) -> float:
@@ -74,7 +84,8 @@ class AgentConfiguration:
     version: str
     capabilities: List[AgentCapability]
     max_concurrent_requests: int = 10
-    timeout_seconds: int = 30
+    max_queued_requests: int = 50  # requests allowed to wait for a slot before load is shed
+    timeout_seconds: int = 30  # per request, queueing included; 0 disables
     retry_attempts: int = 3
     enable_metrics: bool = True
     enable_logging: bool = True
@@ -93,6 +104,23 @@ class ProcessingResult:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class BatchProcessingResult:
+    """Result of processing a batch of requests."""
+    results: List[ProcessingResult]  # one per request, in request order
+    processing_time_ms: float
+    successful: int = 0
+    failed: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def throughput_per_second(self) -> float:
+        """Requests processed per second over the whole batch."""
+        if self.processing_time_ms <= 0:
+            return 0.0
+        return len(self.results) / (self.processing_time_ms / 1000)
+
+
 class BaseAgent(ABC):
     """
     Base class for all specialized fraud detection agents.
@@ -119,8 +147,23 @@ class BaseAgent(ABC):
         self.logger = logging.getLogger(f"{__name__}.{config.agent_name}")
         
         # Initialize tracking lists
-        self._processing_times = []
-        self._request_timestamps = []
+        self._processing_times = deque(maxlen=100)
+        self._queue_times = deque(maxlen=100)
+        self._request_timestamps = deque()
+        self._metrics_lock = threading.RLock()
+        
+        # Admission control: bounded concurrency and wait queue
+        self.admission = AdmissionController(config.max_concurrent_requests, config.max_queued_requests)
+        self._request_executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        
+        # Requests for the same user run one at a time: user_id -> [lock, holders]
+        self._user_locks: Dict[str, List[Any]] = {}
+        self._user_locks_guard = threading.Lock()
+        
+        # Per-thread state of a request or batch in progress (cancellation, prefetched memory view)
+        self._request_scope = threading.local()
+        self._batch_scope = threading.local()
         
         # Initialize agent-specific components
         self._initialize_agent()
@@ -128,6 +171,17 @@ class BaseAgent(ABC):
         self.status = AgentStatus.READY
         self.logger.info(f"Agent {config.agent_name} initialized successfully")
     
+    @property
+    def memory_manager(self) -> Any:
+        """Memory manager, or the prefetched view of the batch running on this thread."""
+        scope = getattr(self, "_batch_scope", None)
+        memory_view = getattr(scope, "memory_view", None)
+        return memory_view if memory_view is not None else self.__dict__.get("_memory_manager")
+    
+    @memory_manager.setter
+    def memory_manager(self, memory_manager: Any) -> None:
+        self.__dict__["_memory_manager"] = memory_manager
+    
     @abstractmethod
     def _initialize_agent(self) -> None:
         """Initialize agent-specific components. Must be implemented by subclasses."""
@@ -148,7 +202,13 @@ class BaseAgent(ABC):
     
     def execute_with_metrics(self, request_data: Dict[str, Any]) -> ProcessingResult:
         """
-        Execute request processing with metrics tracking.
+        Execute request processing with admission control and metrics tracking.
+        
+        The request waits in a bounded FIFO queue for one of
+        ``max_concurrent_requests`` slots and must complete within
+        ``timeout_seconds`` of arriving, queueing included. A request that
+        finds the queue full is shed immediately; one that runs out of time
+        fails with a timeout and is asked to cancel cooperatively.
         
         Args:
             request_data: Input data for processing
@@ -156,55 +216,288 @@ class BaseAgent(ABC):
         Returns:
             ProcessingResult with analysis results
         """
-        if self.status != AgentStatus.READY:
-            return ProcessingResult(
-                success=False,
-                result_data={},
-                processing_time_ms=0.0,
-                confidence_score=0.0,
-                error_message=f"Agent not ready. Current status: {self.status.value}"
-            )
+        if self.status not in (AgentStatus.READY, AgentStatus.PROCESSING):
+            return self._failed_result(f"Agent not ready. Current status: {self.status.value}")
+        
+        arrival_time = time.time()
+        timeout = self.config.timeout_seconds if self.config.timeout_seconds > 0 else None
+        
+        decision = self.admission.acquire(timeout)
+        queue_time_ms = (time.time() - arrival_time) * 1000
+        if decision != AdmissionDecision.ADMITTED:
+            if decision == AdmissionDecision.SHED:
+                error_message = "Agent overloaded: request shed"
+            else:
+                error_message = f"Request timed out after {queue_time_ms:.0f}ms waiting for a processing slot"
+            result = self._failed_result(error_message)
+            result.metadata["queue_time_ms"] = queue_time_ms
+            timed_out = decision == AdmissionDecision.TIMED_OUT
+            self._record_request(result, queue_time_ms, admitted=False, timed_out=timed_out)
+            return result
         
         start_time = time.time()
-        self.status = AgentStatus.PROCESSING
-        self.metrics.requests_processed += 1
+        cancel_event = threading.Event()
+        timed_out = False
         
         try:
-            # Process the request
-            result = self.process_request(request_data)
-            
-            # Update metrics
-            processing_time_ms = (time.time() - start_time) * 1000
-            result.processing_time_ms = processing_time_ms
-            
+            if timeout is None:
+                result = self._run_admitted(request_data, cancel_event)
+            else:
+                future = self._get_request_executor().submit(self._run_admitted, request_data, cancel_event)
+                result = future.result(timeout=max(0.0, timeout - (start_time - arrival_time)))
+        
+        except FutureTimeoutError:
+            # The worker keeps its slot until it actually returns
+            cancel_event.set()
+            timed_out = True
+            result = self._failed_result(f"Request timed out after {self.config.timeout_seconds}s")
+        
+        except Exception as e:
+            self.logger.error(f"Error processing request: {str(e)}")
+            result = self._failed_result(str(e))
+        
+        result.processing_time_ms = (time.time() - start_time) * 1000
+        result.metadata["queue_time_ms"] = queue_time_ms
+        self._record_request(result, queue_time_ms, admitted=True, timed_out=timed_out)
+        return result
+    
+    def is_cancelled(self) -> bool:
+        """Whether the caller of the request running on this thread has stopped waiting."""
+        cancel_event = getattr(self._request_scope, "cancel_event", None)
+        return cancel_event is not None and cancel_event.is_set()
+    
+    def _raise_if_cancelled(self) -> None:
+        """Abandon the current request if it has been cancelled."""
+        if self.is_cancelled():
+            raise RequestCancelled("Request cancelled after timeout")
+    
+    def _run_admitted(self, request_data: Dict[str, Any], cancel_event: threading.Event) -> ProcessingResult:
+        """Run an admitted request, releasing its slot when it actually finishes."""
+        self._request_scope.cancel_event = cancel_event
+        self._enter_processing()
+        try:
+            with self._user_serialized(request_data):
+                return self.process_request(request_data)
+        finally:
+            self._request_scope.cancel_event = None
+            self._exit_processing()
+            self.admission.release()
+    
+    @contextmanager
+    def _user_serialized(self, request_data: Dict[str, Any]) -> Iterator[None]:
+        """
+        Hold the request's per-user lock, so per-user agent state is never
+        updated by two concurrent requests for the same user.
+        """
+        user_id = self._request_user_id(request_data)
+        if not user_id:
+            yield
+            return
+        
+        with self._user_locks_guard:
+            entry = self._user_locks.setdefault(user_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._user_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._user_locks[user_id]
+    
+    def _get_request_executor(self) -> ThreadPoolExecutor:
+        """Worker pool sized to the concurrency limit, created on first use."""
+        with self._metrics_lock:
+            if self._request_executor is None:
+                self._request_executor = ThreadPoolExecutor(
+                    max_workers=self.admission.max_concurrent,
+                    thread_name_prefix=f"{self.config.agent_name}-request"
+                )
+            return self._request_executor
+    
+    def _enter_processing(self) -> None:
+        """Mark one more request in progress."""
+        with self._metrics_lock:
+            self._in_flight += 1
+            if self.status == AgentStatus.READY:
+                self.status = AgentStatus.PROCESSING
+    
+    def _exit_processing(self) -> None:
+        """Mark a request finished; the agent is READY again once none are in progress."""
+        with self._metrics_lock:
+            self._in_flight -= 1
+            if self._in_flight == 0 and self.status == AgentStatus.PROCESSING:
+                self.status = AgentStatus.READY
+    
+    def _record_request(self, result: ProcessingResult, queue_time_ms: float, admitted: bool, timed_out: bool) -> None:
+        """Fold one request's outcome into the agent metrics."""
+        with self._metrics_lock:
+            self.metrics.requests_processed += 1
             if result.success:
                 self.metrics.successful_analyses += 1
             else:
                 self.metrics.failed_analyses += 1
+            if not admitted and not timed_out:
+                self.metrics.requests_shed += 1
+            if timed_out:
+                self.metrics.requests_timed_out += 1
             
-            # Update performance metrics
-            self._update_performance_metrics(processing_time_ms, result.success)
+            self._queue_times.append(queue_time_ms)
+            self.metrics.average_queue_time_ms = sum(self._queue_times) / len(self._queue_times)
+            self.metrics.peak_queue_time_ms = max(self.metrics.peak_queue_time_ms, queue_time_ms)
             
-            self.status = AgentStatus.READY
+            # Service time only covers requests that ran
+            if admitted:
+                self._update_performance_metrics(result.processing_time_ms, result.success)
             self.metrics.last_activity = datetime.now()
-            
-            return result
-            
-        except Exception as e:
-            processing_time_ms = (time.time() - start_time) * 1000
-            self.metrics.failed_analyses += 1
-            self._update_performance_metrics(processing_time_ms, False)
-            
-            self.status = AgentStatus.READY
-            self.logger.error(f"Error processing request: {str(e)}")
-            
-            return ProcessingResult(
-                success=False,
-                result_data={},
-                processing_time_ms=processing_time_ms,
-                confidence_score=0.0,
-                error_message=str(e)
+    
+    def process_batch(self, requests: List[Dict[str, Any]]) -> BatchProcessingResult:
+        """
+        Process a batch of requests with metrics tracking.
+        
+        Each request gets its own ProcessingResult, in request order; one
+        failing request does not fail the batch.
+        
+        Args:
+            requests: Input data for each request
+        
+        Returns:
+            BatchProcessingResult with per-request results and batch metrics
+        """
+        error_message = None
+        if self.status not in (AgentStatus.READY, AgentStatus.PROCESSING):
+            error_message = f"Agent not ready. Current status: {self.status.value}"
+        else:
+            # A batch occupies one processing slot for its whole run
+            timeout = self.config.timeout_seconds if self.config.timeout_seconds > 0 else None
+            decision = self.admission.acquire(timeout)
+            if decision == AdmissionDecision.SHED:
+                error_message = "Agent overloaded: batch shed"
+            elif decision == AdmissionDecision.TIMED_OUT:
+                error_message = "Batch timed out waiting for a processing slot"
+        
+        if error_message:
+            return BatchProcessingResult(
+                results=[self._failed_result(error_message) for _ in requests],
+                processing_time_ms=0.0,
+                failed=len(requests)
             )
+        
+        start_time = time.time()
+        batch_metadata: Dict[str, Any] = {"batch_size": len(requests)}
+        self._enter_processing()
+        
+        try:
+            results = self._process_batch(requests, batch_metadata)
+        except Exception as e:
+            self.logger.error(f"Error processing batch: {str(e)}")
+            results = [self._failed_result(str(e)) for _ in requests]
+        finally:
+            self._exit_processing()
+            self.admission.release()
+        
+        processing_time_ms = (time.time() - start_time) * 1000
+        successful = sum(1 for result in results if result.success)
+        
+        # Per-request metrics, as if each request had been executed on its own
+        with self._metrics_lock:
+            self.metrics.requests_processed += len(results)
+            self.metrics.successful_analyses += successful
+            self.metrics.failed_analyses += len(results) - successful
+            for result in results:
+                self._update_performance_metrics(result.processing_time_ms, result.success)
+            self.metrics.last_activity = datetime.now()
+        
+        return BatchProcessingResult(
+            results=results,
+            processing_time_ms=processing_time_ms,
+            successful=successful,
+            failed=len(results) - successful,
+            metadata=batch_metadata
+        )
+    
+    def _process_batch(self, requests: List[Dict[str, Any]], batch_metadata: Dict[str, Any]) -> List[ProcessingResult]:
+        """
+        Process every request of a batch. Override to share data loading across the batch.
+        
+        Args:
+            requests: Input data for each request
+            batch_metadata: Batch-level metadata subclasses may add to
+        
+        Returns:
+            One ProcessingResult per request, in request order
+        """
+        return [self._process_batch_item(request_data) for request_data in requests]
+    
+    def _process_batch_item(self, request_data: Dict[str, Any]) -> ProcessingResult:
+        """Process one request of a batch, timing it and isolating failures."""
+        start_time = time.time()
+        try:
+            with self._user_serialized(request_data):
+                result = self.process_request(request_data)
+        except Exception as e:
+            self.logger.error(f"Error processing batch item: {str(e)}")
+            result = self._failed_result(str(e))
+        result.processing_time_ms = (time.time() - start_time) * 1000
+        return result
+    
+    def _process_batch_by_user(
+        self,
+        requests: List[Dict[str, Any]],
+        memory_view: Any,
+        batch_metadata: Dict[str, Any]
+    ) -> List[ProcessingResult]:
+        """
+        Process a batch grouped by user against a prefetched memory view.
+        
+        Every user's data is prefetched up front, requests run user by user
+        (in request order within a user) with ``self.memory_manager`` served
+        by ``memory_view``, and buffered writes are flushed at the end.
+        
+        Args:
+            requests: Input data for each request
+            memory_view: PrefetchedMemory wrapping this agent's memory manager
+            batch_metadata: Batch-level metadata to add prefetch statistics to
+        
+        Returns:
+            One ProcessingResult per request, in request order
+        """
+        user_ids = [self._request_user_id(request_data) for request_data in requests]
+        
+        prefetch_start = time.time()
+        memory_view.prefetch(user_ids)
+        batch_metadata["prefetch_time_ms"] = (time.time() - prefetch_start) * 1000
+        
+        results: List[Optional[ProcessingResult]] = [None] * len(requests)
+        self._batch_scope.memory_view = memory_view
+        try:
+            for index in sorted(range(len(requests)), key=lambda i: user_ids[i]):
+                results[index] = self._process_batch_item(requests[index])
+        finally:
+            self._batch_scope.memory_view = None
+            batch_metadata["write_results"] = memory_view.flush()
+        
+        batch_metadata["users"] = len(set(user_ids))
+        batch_metadata["prefetch"] = dict(memory_view.stats)
+        return results
+    
+    def _request_user_id(self, request_data: Dict[str, Any]) -> str:
+        """User a request belongs to (empty string if none)."""
+        transaction_data = request_data.get("transaction", request_data)
+        if not isinstance(transaction_data, dict):
+            return ""
+        return str(transaction_data.get("user_id") or "")
+    
+    def _failed_result(self, error_message: str) -> ProcessingResult:
+        """Build a failed ProcessingResult."""
+        return ProcessingResult(
+            success=False,
+            result_data={},
+            processing_time_ms=0.0,
+            confidence_score=0.0,
+            error_message=error_message
+        )
     
     def get_status(self) -> Dict[str, Any]:
         """
@@ -231,10 +524,16 @@ class BaseAgent(ABC):
                 "peak_processing_time_ms": self.metrics.peak_processing_time_ms,
                 "uptime_seconds": uptime_seconds,
                 "throughput_per_second": self.metrics.throughput_per_second,
-                "last_activity": self.metrics.last_activity.isoformat() if self.metrics.last_activity else None
+                "last_activity": self.metrics.last_activity.isoformat() if self.metrics.last_activity else None,
+                "requests_shed": self.metrics.requests_shed,
+                "requests_timed_out": self.metrics.requests_timed_out,
+                "average_queue_time_ms": self.metrics.average_queue_time_ms,
+                "peak_queue_time_ms": self.metrics.peak_queue_time_ms
             },
+            "admission": self.admission.get_stats(),
             "configuration": {
                 "max_concurrent_requests": self.config.max_concurrent_requests,
+                "max_queued_requests": self.config.max_queued_requests,
                 "timeout_seconds": self.config.timeout_seconds,
                 "retry_attempts": self.config.retry_attempts
             }
@@ -298,6 +597,11 @@ class BaseAgent(ABC):
             # Perform agent-specific cleanup
             self._cleanup_agent()
             
+            # Release request workers; requests still running finish on their own
+            if self._request_executor is not None:
+                self._request_executor.shutdown(wait=False, cancel_futures=True)
+                self._request_executor = None
+            
             self.logger.info(f"Agent {self.config.agent_name} shutdown complete")
             return True
             
@@ -311,13 +615,9 @@ class BaseAgent(ABC):
     
     def _update_performance_metrics(self, processing_time_ms: float, success: bool) -> None:
         """Update performance metrics with latest request data."""
-        # Update processing time metrics
+        # Update processing time metrics (only the last 100 are kept for the average)
         self._processing_times.append(processing_time_ms)
         
-        # Keep only last 100 processing times for average calculation
-        if len(self._processing_times) > 100:
-            self._processing_times.pop(0)
-        
         # Calculate average processing time
         if self._processing_times:
             self.metrics.average_processing_time_ms = sum(self._processing_times) / len(self._processing_times)
@@ -331,16 +631,19 @@ class BaseAgent(ABC):
         
         # Remove timestamps older than 1 minute
         one_minute_ago = now - timedelta(minutes=1)
-        self._request_timestamps = [ts for ts in self._request_timestamps if ts > one_minute_ago]
+        while self._request_timestamps and self._request_timestamps[0] <= one_minute_ago:
+            self._request_timestamps.popleft()
         
         # Calculate throughput
         self.metrics.throughput_per_second = len(self._request_timestamps) / 60.0
     
     def reset_metrics(self) -> None:
         """Reset performance metrics."""
-        self.metrics = AgentMetrics()
-        self._processing_times = []
-        self._request_timestamps = []
+        with self._metrics_lock:
+            self.metrics = AgentMetrics()
+            self._processing_times = deque(maxlen=100)
+            self._queue_times = deque(maxlen=100)
+            self._request_timestamps = deque()
         self.logger.info(f"Reset metrics for agent {self.config.agent_name}")
     
     def has_capability(self, capability: AgentCapability) -> bool:
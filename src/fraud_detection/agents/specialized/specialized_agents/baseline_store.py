@@ -0,0 +1,420 @@
+"""
+User Baseline Store
+
+Bounded LRU/TTL store of per-user spending baselines. Each baseline is
+seeded once from history and then kept current as transactions arrive:
+mean and variance with Welford's algorithm, the median with a P-squared
+streaming quantile sketch, and bounded country/city frequency tables. The
+store can be snapshotted to disk and restored so a cold start does not have
+to reload every active user's history at once.
+"""
+
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Fewer observations than this and a baseline is not considered meaningful
+MIN_BASELINE_TRANSACTIONS = 5
+
+
+class RunningStats:
+    """Welford running mean/variance with min and max."""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+    
+    def update(self, value: float) -> None:
+        """Fold one observation in."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (0 with fewer than two observations)."""
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable state."""
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        """Rebuild from ``to_dict`` output."""
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        stats.min, stats.max = data["min"], data["max"]
+        return stats
+
+
+class P2Quantile:
+    """
+    P-squared streaming quantile estimate (Jain & Chlamtac).
+    
+    Tracks one quantile with five markers in O(1) memory; the first five
+    observations are kept exactly.
+    """
+    
+    def __init__(self, quantile: float = 0.5):
+        """
+        Initialize sketch.
+        
+        Args:
+            quantile: Quantile to track, in (0, 1)
+        """
+        self.quantile = quantile
+        self._initial: List[float] = []
+        self._heights: List[float] = []
+        self._positions: List[float] = []
+        self._desired: List[float] = []
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+    
+    def update(self, value: float) -> None:
+        """Fold one observation in."""
+        if not self._heights:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                q = self.quantile
+                self._heights = sorted(self._initial)
+                self._positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+                self._desired = [1.0, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5.0]
+                self._initial = []
+            return
+        
+        heights, positions = self._heights, self._positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+        
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        
+        for i in range(1, 4):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                candidate = self._parabolic(i, step)
+                if heights[i - 1] < candidate < heights[i + 1]:
+                    heights[i] = candidate
+                else:
+                    heights[i] += step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                positions[i] += step
+    
+    def value(self) -> Optional[float]:
+        """Current quantile estimate (exact for fewer than five observations)."""
+        if self._heights:
+            return self._heights[2]
+        if not self._initial:
+            return None
+        if self.quantile == 0.5:
+            return statistics.median(self._initial)
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+    
+    def _parabolic(self, i: int, step: int) -> float:
+        """Piecewise-parabolic height adjustment for marker ``i``."""
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable state."""
+        return {
+            "quantile": self.quantile,
+            "initial": self._initial,
+            "heights": self._heights,
+            "positions": self._positions,
+            "desired": self._desired
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "P2Quantile":
+        """Rebuild from ``to_dict`` output."""
+        sketch = cls(data["quantile"])
+        sketch._initial = list(data["initial"])
+        sketch._heights = list(data["heights"])
+        sketch._positions = list(data["positions"])
+        sketch._desired = list(data["desired"])
+        return sketch
+
+
+class UserBaseline:
+    """Incrementally maintained baseline for one user."""
+    
+    def __init__(self, max_locations: int = 100):
+        """
+        Initialize baseline.
+        
+        Args:
+            max_locations: Countries/cities tracked before the rarest are dropped
+        """
+        self.amounts = RunningStats()
+        self.median = P2Quantile(0.5)
+        self.countries: Dict[str, int] = {}
+        self.cities: Dict[str, int] = {}
+        self.max_locations = max_locations
+        self.loaded_at = time.time()
+    
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Any], max_locations: int = 100) -> "UserBaseline":
+        """Seed a baseline from transaction history."""
+        baseline = cls(max_locations)
+        for transaction in transactions:
+            baseline.update(transaction)
+        return baseline
+    
+    def update(self, transaction: Any) -> None:
+        """Fold one transaction in."""
+        amount = float(transaction.amount)
+        self.amounts.update(amount)
+        self.median.update(amount)
+        if transaction.location.country:
+            self._count(self.countries, transaction.location.country)
+        if transaction.location.city:
+            self._count(self.cities, transaction.location.city)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Baseline in the detector's dictionary form (empty until enough history)."""
+        if self.amounts.count < MIN_BASELINE_TRANSACTIONS:
+            return {}
+        return {
+            "amount_stats": {
+                "mean": self.amounts.mean,
+                "std": self.amounts.std,
+                "median": self.median.value(),
+                "min": self.amounts.min,
+                "max": self.amounts.max
+            },
+            "location_stats": {
+                "common_countries": list(self.countries),
+                "common_cities": list(self.cities)
+            }
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable state."""
+        return {
+            "amounts": self.amounts.to_dict(),
+            "median": self.median.to_dict(),
+            "countries": self.countries,
+            "cities": self.cities,
+            "max_locations": self.max_locations,
+            "loaded_at": self.loaded_at
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserBaseline":
+        """Rebuild from ``to_dict`` output."""
+        baseline = cls(data.get("max_locations", 100))
+        baseline.amounts = RunningStats.from_dict(data["amounts"])
+        baseline.median = P2Quantile.from_dict(data["median"])
+        baseline.countries = dict(data["countries"])
+        baseline.cities = dict(data["cities"])
+        baseline.loaded_at = data["loaded_at"]
+        return baseline
+    
+    def _count(self, counts: Dict[str, int], key: str) -> None:
+        """Increment a frequency table, evicting its rarest entry when full."""
+        if key not in counts and len(counts) >= self.max_locations:
+            del counts[min(counts, key=counts.get)]
+        counts[key] = counts.get(key, 0) + 1
+
+
+BaselineEntry = Union[UserBaseline, Dict[str, Any]]
+
+
+class BaselineStore(MutableMapping):
+    """
+    LRU/TTL mapping of user ID to baseline.
+    
+    Entries expire ``ttl_seconds`` after they were loaded from history so
+    incremental statistics are periodically re-anchored to the source of
+    truth; the least recently used entry is evicted beyond ``max_entries``.
+    Concurrent misses for the same user share a single load.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0):
+        """
+        Initialize store.
+        
+        Args:
+            max_entries: Maximum number of cached baselines
+            ttl_seconds: Lifetime of a baseline after it was loaded
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, BaselineEntry]" = OrderedDict()
+        self._loaded_at: Dict[str, float] = {}
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "expirations": 0}
+    
+    def __getitem__(self, user_id: str) -> BaselineEntry:
+        with self._lock:
+            if user_id not in self._entries:
+                raise KeyError(user_id)
+            if time.time() - self._loaded_at[user_id] > self.ttl_seconds:
+                self._remove(user_id)
+                self.stats["expirations"] += 1
+                raise KeyError(user_id)
+            self._entries.move_to_end(user_id)
+            return self._entries[user_id]
+    
+    def __setitem__(self, user_id: str, entry: BaselineEntry) -> None:
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            self._loaded_at[user_id] = getattr(entry, "loaded_at", time.time())
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+    
+    def __delitem__(self, user_id: str) -> None:
+        with self._lock:
+            if user_id not in self._entries:
+                raise KeyError(user_id)
+            self._remove(user_id)
+    
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __repr__(self) -> str:
+        return f"BaselineStore({len(self)} entries)"
+    
+    def clear(self) -> None:
+        """Drop every cached baseline."""
+        with self._lock:
+            self._entries.clear()
+            self._loaded_at.clear()
+    
+    def get_or_load(self, user_id: str, loader: Callable[[str], BaselineEntry]) -> BaselineEntry:
+        """
+        Return the cached baseline, loading it at most once across concurrent callers.
+        
+        Args:
+            user_id: User identifier
+            loader: Builds a baseline from history on a miss
+        """
+        while True:
+            with self._lock:
+                try:
+                    entry = self[user_id]
+                    self.stats["hits"] += 1
+                    return entry
+                except KeyError:
+                    pass
+                pending = self._loading.get(user_id)
+                if pending is None:
+                    pending = self._loading[user_id] = threading.Event()
+                    self.stats["misses"] += 1
+                    break
+            # Another caller is loading this user; wait for it and re-check
+            pending.wait(timeout=30.0)
+        
+        try:
+            entry = loader(user_id)
+            self.stats["loads"] += 1
+            self[user_id] = entry
+            return entry
+        finally:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            pending.set()
+    
+    def observe(self, user_id: str, transaction: Any) -> bool:
+        """
+        Fold a transaction into the user's cached baseline.
+        
+        Returns:
+            True if a live incremental baseline was updated
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not isinstance(entry, UserBaseline):
+                return False
+            entry.update(transaction)
+            return True
+    
+    def snapshot(self, path: str) -> int:
+        """
+        Atomically write every live incremental baseline to ``path``.
+        
+        Returns:
+            Number of baselines written
+        """
+        with self._lock:
+            now = time.time()
+            data = {
+                user_id: entry.to_dict()
+                for user_id, entry in self._entries.items()
+                if isinstance(entry, UserBaseline) and now - self._loaded_at[user_id] <= self.ttl_seconds
+            }
+        
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": 1, "baselines": data}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(data)
+    
+    def restore(self, path: str) -> int:
+        """
+        Load baselines from a snapshot, skipping entries that have expired.
+        
+        Returns:
+            Number of baselines restored
+        """
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading baseline snapshot {path}: {str(e)}")
+            return 0
+        
+        now = time.time()
+        restored = 0
+        # Oldest first so the most recently loaded users end up most recently used
+        entries = sorted(data.get("baselines", {}).items(), key=lambda item: item[1]["loaded_at"])
+        for user_id, state in entries:
+            if now - state["loaded_at"] > self.ttl_seconds:
+                continue
+            self[user_id] = UserBaseline.from_dict(state)
+            restored += 1
+        return restored
+    
+    def _remove(self, user_id: str) -> None:
+        """Drop an entry; must hold the lock."""
+        del self._entries[user_id]
+        del self._loaded_at[user_id]
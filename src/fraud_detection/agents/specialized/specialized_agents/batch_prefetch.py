@@ -0,0 +1,142 @@
+"""
+Batch Prefetching Memory View
+
+Read-through view of a MemoryManager used while an agent scores a batch.
+Each user's history is queried once for the widest window the agent needs
+(queries for different users run concurrently) and profiles are read with
+batched gets; the agent's narrower history lookups are then answered from
+memory. Transaction writes are buffered and flushed as one batch write.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .analysis_context import window_history
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchedMemory:
+    """
+    MemoryManager stand-in backed by data prefetched for a batch.
+    
+    History lookups within ``history_days``/``history_limit`` for prefetched
+    users are served from memory; everything else is delegated to the
+    wrapped memory manager.
+    """
+    
+    def __init__(
+        self,
+        memory_manager: Any,
+        history_days: int = 30,
+        history_limit: int = 100,
+        include_profiles: bool = False,
+        max_workers: int = 8
+    ):
+        """
+        Initialize view.
+        
+        Args:
+            memory_manager: Underlying memory manager
+            history_days: Widest history window the agent requests
+            history_limit: Largest history limit the agent requests
+            include_profiles: Prefetch user behavior profiles as well
+            max_workers: Concurrent history queries during prefetch
+        """
+        self.memory_manager = memory_manager
+        self.history_days = history_days
+        self.history_limit = history_limit
+        self.include_profiles = include_profiles
+        self.max_workers = max_workers
+        self.now = datetime.now()
+        self._histories: Dict[str, List[Any]] = {}
+        self._profiles: Dict[str, Any] = {}
+        self._pending_writes: List[Any] = []
+        self.stats = {
+            "users": 0, "history_queries": 0, "profile_reads": 0, "hits": 0, "misses": 0, "buffered_writes": 0
+        }
+    
+    def prefetch(self, user_ids: Iterable[str]) -> None:
+        """Load history (and profiles) for every user not yet prefetched."""
+        users = [user_id for user_id in dict.fromkeys(user_ids) if user_id and user_id not in self._histories]
+        if not users:
+            return
+        self.stats["users"] += len(users)
+        
+        def fetch(user_id: str) -> List[Any]:
+            return list(self.memory_manager.get_user_transaction_history(
+                user_id, days_back=self.history_days, limit=self.history_limit
+            ))
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(users)))) as executor:
+                for user_id, history in zip(users, executor.map(fetch, users), strict=True):
+                    self._histories[user_id] = history
+            self.stats["history_queries"] += len(users)
+        except Exception as e:
+            # Users left unfetched fall through to the memory manager
+            logger.warning(f"Error prefetching transaction history: {str(e)}")
+        
+        if self.include_profiles:
+            self._prefetch_profiles(users)
+    
+    def get_user_transaction_history(self, user_id: str, days_back: int = 30, limit: int = 100) -> List[Any]:
+        """Same contract as MemoryManager.get_user_transaction_history."""
+        history = self._histories.get(user_id)
+        if history is None or days_back > self.history_days or limit > self.history_limit:
+            self.stats["misses"] += 1
+            return self.memory_manager.get_user_transaction_history(user_id, days_back=days_back, limit=limit)
+        
+        self.stats["hits"] += 1
+        return window_history(history, self.now, days_back, limit, full_window_days=self.history_days)
+    
+    def get_user_profile(self, user_id: str) -> Optional[Any]:
+        """Same contract as MemoryManager.get_user_profile."""
+        if user_id in self._profiles:
+            self.stats["hits"] += 1
+            return self._profiles[user_id]
+        
+        self.stats["misses"] += 1
+        return self.memory_manager.get_user_profile(user_id)
+    
+    def store_transaction(self, transaction: Any) -> bool:
+        """Buffer a transaction write and make it visible to later lookups in the batch."""
+        self._pending_writes.append(transaction)
+        self.stats["buffered_writes"] += 1
+        history = self._histories.get(transaction.user_id)
+        if history is not None:
+            history.insert(0, transaction)
+            history.sort(key=lambda tx: tx.timestamp, reverse=True)
+            del history[self.history_limit:]
+        return True
+    
+    def flush(self) -> Dict[str, int]:
+        """Write buffered transactions in one batch."""
+        if not self._pending_writes:
+            return {"success": 0, "failures": 0}
+        writes, self._pending_writes = self._pending_writes, []
+        return self.memory_manager.batch_store_transactions(writes)
+    
+    def __getattr__(self, name: str) -> Any:
+        # Anything not overridden goes straight to the memory manager
+        return getattr(self.memory_manager, name)
+    
+    def _prefetch_profiles(self, users: List[str]) -> None:
+        """
+        Read profiles with batched gets when the memory manager supports them.
+        
+        Only profiles that were actually read are kept; users left out of the
+        batch result are looked up individually on first use.
+        """
+        try:
+            if hasattr(type(self.memory_manager), "batch_get_user_profiles"):
+                self._profiles.update(self.memory_manager.batch_get_user_profiles(users))
+                self.stats["profile_reads"] += 1
+            else:
+                for user_id in users:
+                    self._profiles[user_id] = self.memory_manager.get_user_profile(user_id)
+                    self.stats["profile_reads"] += 1
+        except Exception as e:
+            logger.warning(f"Error prefetching user profiles: {str(e)}")
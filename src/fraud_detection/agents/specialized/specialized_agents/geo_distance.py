@@ -0,0 +1,277 @@
+"""
+Geodesic Distance
+
+Great-circle distances for impossible-travel detection. Coordinates come
+from the transaction's Location when present and otherwise from a compact
+city/country centroid table. The table is a sorted array of 64-bit key
+hashes with float32 coordinates, written once to a per-user cache directory
+and memory-mapped, so every agent process shares a single read-only copy
+through the page cache.
+"""
+
+import bisect
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+TABLE_MAGIC = b"CTRD"
+TABLE_VERSION = 2
+TABLE_HEADER = struct.Struct("<4sII8s")  # magic, version, entry count, content digest
+TABLE_KEY = struct.Struct("<Q")
+TABLE_COORDS = struct.Struct("<ff")
+
+# Country centroids (ISO 3166-1 alpha-2)
+COUNTRY_CENTROIDS = {
+    "US": (39.83, -98.58), "CA": (56.13, -106.35), "MX": (23.63, -102.55), "BR": (-14.24, -51.93),
+    "AR": (-38.42, -63.62), "CL": (-35.68, -71.54), "CO": (4.57, -74.30), "PE": (-9.19, -75.02),
+    "GB": (55.38, -3.44), "IE": (53.41, -8.24), "FR": (46.23, 2.21), "DE": (51.17, 10.45),
+    "ES": (40.46, -3.75), "PT": (39.40, -8.22), "IT": (41.87, 12.57), "NL": (52.13, 5.29),
+    "BE": (50.50, 4.47), "CH": (46.82, 8.23), "AT": (47.52, 14.55), "SE": (60.13, 18.64),
+    "NO": (60.47, 8.47), "DK": (56.26, 9.50), "FI": (61.92, 25.75), "PL": (51.92, 19.15),
+    "CZ": (49.82, 15.47), "GR": (39.07, 21.82), "TR": (38.96, 35.24), "RU": (61.52, 105.32),
+    "UA": (48.38, 31.17), "RO": (45.94, 24.97), "IL": (31.05, 34.85), "AE": (23.42, 53.85),
+    "SA": (23.89, 45.08), "EG": (26.82, 30.80), "NG": (9.08, 8.68), "KE": (-0.02, 37.91),
+    "ZA": (-30.56, 22.94), "MA": (31.79, -7.09), "IN": (20.59, 78.96), "PK": (30.38, 69.35),
+    "CN": (35.86, 104.20), "HK": (22.32, 114.17), "JP": (36.20, 138.25), "KR": (35.91, 127.77),
+    "SG": (1.35, 103.82), "MY": (4.21, 101.98), "TH": (15.87, 100.99), "VN": (14.06, 108.28),
+    "ID": (-0.79, 113.92), "PH": (12.88, 121.77), "AU": (-25.27, 133.78), "NZ": (-40.90, 174.89),
+}
+
+# City centroids keyed by (country, city)
+CITY_CENTROIDS = {
+    ("US", "New York"): (40.7128, -74.0060), ("US", "Los Angeles"): (34.0522, -118.2437),
+    ("US", "Chicago"): (41.8781, -87.6298), ("US", "Houston"): (29.7604, -95.3698),
+    ("US", "Phoenix"): (33.4484, -112.0740), ("US", "Philadelphia"): (39.9526, -75.1652),
+    ("US", "San Francisco"): (37.7749, -122.4194), ("US", "Seattle"): (47.6062, -122.3321),
+    ("US", "Miami"): (25.7617, -80.1918), ("US", "Boston"): (42.3601, -71.0589),
+    ("US", "Atlanta"): (33.7490, -84.3880), ("US", "Dallas"): (32.7767, -96.7970),
+    ("US", "Denver"): (39.7392, -104.9903), ("US", "Las Vegas"): (36.1699, -115.1398),
+    ("US", "Washington"): (38.9072, -77.0369), ("CA", "Toronto"): (43.6532, -79.3832),
+    ("CA", "Vancouver"): (49.2827, -123.1207), ("CA", "Montreal"): (45.5017, -73.5673),
+    ("MX", "Mexico City"): (19.4326, -99.1332), ("BR", "Sao Paulo"): (-23.5505, -46.6333),
+    ("BR", "Rio de Janeiro"): (-22.9068, -43.1729), ("AR", "Buenos Aires"): (-34.6037, -58.3816),
+    ("GB", "London"): (51.5074, -0.1278), ("GB", "Manchester"): (53.4808, -2.2426),
+    ("IE", "Dublin"): (53.3498, -6.2603), ("FR", "Paris"): (48.8566, 2.3522),
+    ("FR", "Lyon"): (45.7640, 4.8357), ("DE", "Berlin"): (52.5200, 13.4050),
+    ("DE", "Munich"): (48.1351, 11.5820), ("DE", "Frankfurt"): (50.1109, 8.6821),
+    ("ES", "Madrid"): (40.4168, -3.7038), ("ES", "Barcelona"): (41.3874, 2.1686),
+    ("IT", "Rome"): (41.9028, 12.4964), ("IT", "Milan"): (45.4642, 9.1900),
+    ("NL", "Amsterdam"): (52.3676, 4.9041), ("CH", "Zurich"): (47.3769, 8.5417),
+    ("SE", "Stockholm"): (59.3293, 18.0686), ("PL", "Warsaw"): (52.2297, 21.0122),
+    ("TR", "Istanbul"): (41.0082, 28.9784), ("RU", "Moscow"): (55.7558, 37.6173),
+    ("AE", "Dubai"): (25.2048, 55.2708), ("IL", "Tel Aviv"): (32.0853, 34.7818),
+    ("EG", "Cairo"): (30.0444, 31.2357), ("NG", "Lagos"): (6.5244, 3.3792),
+    ("ZA", "Johannesburg"): (-26.2041, 28.0473), ("KE", "Nairobi"): (-1.2921, 36.8219),
+    ("IN", "Mumbai"): (19.0760, 72.8777), ("IN", "Delhi"): (28.7041, 77.1025),
+    ("IN", "Bangalore"): (12.9716, 77.5946), ("CN", "Beijing"): (39.9042, 116.4074),
+    ("CN", "Shanghai"): (31.2304, 121.4737), ("HK", "Hong Kong"): (22.3193, 114.1694),
+    ("JP", "Tokyo"): (35.6762, 139.6503), ("JP", "Osaka"): (34.6937, 135.5023),
+    ("KR", "Seoul"): (37.5665, 126.9780), ("SG", "Singapore"): (1.3521, 103.8198),
+    ("TH", "Bangkok"): (13.7563, 100.5018), ("ID", "Jakarta"): (-6.2088, 106.8456),
+    ("PH", "Manila"): (14.5995, 120.9842), ("AU", "Sydney"): (-33.8688, 151.2093),
+    ("AU", "Melbourne"): (-37.8136, 144.9631), ("NZ", "Auckland"): (-36.8485, 174.7633),
+}
+
+
+def centroid_key(country: str, city: Optional[str] = None) -> int:
+    """64-bit table key for a country or a city within it (case-insensitive)."""
+    name = f"{(country or '').strip().upper()}|{(city or '').strip().lower()}"
+    return TABLE_KEY.unpack(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest())[0]
+
+
+def _pack_table(entries: Iterable[Tuple[int, float, float]]) -> Tuple[int, bytes, bytes]:
+    """Entry count, content digest and body (keys then coordinates) of a table."""
+    rows = sorted(dict((key, (lat, lon)) for key, lat, lon in entries).items())
+    body = b"".join(TABLE_KEY.pack(key) for key, _ in rows)
+    body += b"".join(TABLE_COORDS.pack(lat, lon) for _, (lat, lon) in rows)
+    return len(rows), hashlib.blake2b(body, digest_size=8).digest(), body
+
+
+def write_centroid_table(path: str, entries: Iterable[Tuple[int, float, float]]) -> None:
+    """
+    Write a centroid table atomically.
+    
+    Layout: header, sorted uint64 keys, then (lat, lon) float32 pairs in key order.
+    The header carries a digest of the body so stale tables can be detected.
+    """
+    count, digest, body = _pack_table(entries)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, count, digest))
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def default_centroid_entries() -> List[Tuple[int, float, float]]:
+    """Built-in country and city centroids as table entries."""
+    entries = [(centroid_key(country), lat, lon) for country, (lat, lon) in COUNTRY_CENTROIDS.items()]
+    entries.extend(
+        (centroid_key(country, city), lat, lon) for (country, city), (lat, lon) in CITY_CENTROIDS.items()
+    )
+    return entries
+
+
+@lru_cache(maxsize=1)
+def default_table_digest() -> bytes:
+    """Content digest of the table built from the built-in centroids."""
+    return _pack_table(default_centroid_entries())[1]
+
+
+def default_table_dir() -> str:
+    """Private per-user directory for the default table, created on first use."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(cache_home, "fraud_detection")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+class CentroidTable:
+    """Read-only, memory-mapped centroid lookup."""
+    
+    def __init__(self, path: str):
+        """
+        Open a centroid table.
+        
+        Args:
+            path: Table written by write_centroid_table
+        
+        Raises:
+            ValueError: If the file is not a complete table of this version
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        if len(self._mmap) < TABLE_HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"Truncated centroid table: {path}")
+        magic, version, self.count, self.digest = TABLE_HEADER.unpack_from(self._mmap, 0)
+        expected_size = TABLE_HEADER.size + self.count * (TABLE_KEY.size + TABLE_COORDS.size)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or len(self._mmap) != expected_size:
+            self._mmap.close()
+            raise ValueError(f"Unsupported centroid table: {path}")
+        
+        keys_offset = TABLE_HEADER.size
+        coords_offset = keys_offset + self.count * TABLE_KEY.size
+        if NUMPY_AVAILABLE:
+            self._keys = np.frombuffer(self._mmap, dtype="<u8", count=self.count, offset=keys_offset)
+            self._coords = np.frombuffer(self._mmap, dtype="<f4", count=self.count * 2, offset=coords_offset)
+        else:
+            view = memoryview(self._mmap)
+            self._keys = view[keys_offset:coords_offset].cast("Q")
+            self._coords = view[coords_offset:coords_offset + self.count * TABLE_COORDS.size].cast("f")
+    
+    @classmethod
+    def open_default(cls, path: Optional[str] = None) -> "CentroidTable":
+        """
+        Open the built-in centroid table, (re)building it when needed.
+        
+        The default file lives in a private per-user directory and its name
+        includes the digest of the built-in centroids. A file that is missing,
+        malformed or was built from different centroids is rewritten.
+        
+        Args:
+            path: Table location (defaults to the per-user cache directory)
+        """
+        digest = default_table_digest()
+        if path is None:
+            path = os.path.join(default_table_dir(), f"centroids_v{TABLE_VERSION}_{digest.hex()}.bin")
+        try:
+            table = cls(path)
+            if table.digest == digest:
+                return table
+            logger.warning(f"Rebuilding stale centroid table: {path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding invalid centroid table: {str(e)}")
+        write_centroid_table(path, default_centroid_entries())
+        return cls(path)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def lookup(
+        self,
+        country: str,
+        city: Optional[str] = None,
+        country_fallback: bool = True
+    ) -> Optional[Tuple[float, float]]:
+        """Centroid of a city, falling back to its country unless disabled; None if neither is known."""
+        keys = [centroid_key(country, city)] if city else []
+        if country_fallback or not city:
+            keys.append(centroid_key(country))
+        for key in keys:
+            index = self._find(key)
+            if index is not None:
+                return float(self._coords[2 * index]), float(self._coords[2 * index + 1])
+        return None
+    
+    def _find(self, key: int) -> Optional[int]:
+        """Binary search the key column."""
+        if NUMPY_AVAILABLE:
+            index = int(np.searchsorted(self._keys, np.uint64(key)))
+        else:
+            index = bisect.bisect_left(self._keys, key)
+        if index < self.count and int(self._keys[index]) == key:
+            return index
+        return None
+
+
+@lru_cache(maxsize=8)
+def get_centroid_table(path: Optional[str] = None) -> CentroidTable:
+    """Process-wide shared centroid table."""
+    return CentroidTable.open_default(path)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    if math.isnan(a):
+        return math.nan
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def consecutive_distances_km(latitudes: Sequence[float], longitudes: Sequence[float]) -> List[float]:
+    """
+    Distances between consecutive points of a track.
+    
+    Unknown coordinates are passed as NaN and yield NaN for the pairs they
+    belong to.
+    
+    Returns:
+        ``len(latitudes) - 1`` distances in kilometres
+    """
+    if len(latitudes) < 2:
+        return []
+    
+    if NUMPY_AVAILABLE:
+        phi = np.radians(np.asarray(latitudes, dtype=np.float64))
+        lam = np.radians(np.asarray(longitudes, dtype=np.float64))
+        d_phi = phi[1:] - phi[:-1]
+        d_lambda = lam[1:] - lam[:-1]
+        a = np.sin(d_phi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(d_lambda / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).tolist()
+    
+    return [
+        haversine_km(latitudes[i], longitudes[i], latitudes[i + 1], longitudes[i + 1])
+        for i in range(len(latitudes) - 1)
+    ]
@@ -6,15 +6,18 @@ recognition, trend analysis, and pattern similarity matching.
 """
 
 import logging
-import statistics
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
+from functools import partial
 from collections import defaultdict
 import math
 
 from .base_agent import BaseAgent, AgentConfiguration, AgentCapability, ProcessingResult
+from .analysis_context import AnalysisContext, PatternCatalog
+from .baseline_store import BaselineStore, UserBaseline
+from .batch_prefetch import PrefetchedMemory
 from fraud_detection.memory.models import Transaction, DecisionContext, UserBehaviorProfile, FraudDecision, Location, DeviceInfo
 from fraud_detection.memory.memory_manager import MemoryManager
 from fraud_detection.memory.pattern_learning import PatternLearningEngine
@@ -122,8 +125,16 @@ class PatternDetector(BaseAgent):
         
         # Statistical models and thresholds
         self.statistical_models = {}
-        self.user_baselines = {}  # user_id -> baseline statistics
+        self.user_baselines = BaselineStore(  # user_id -> baseline statistics
+            max_entries=config.custom_parameters.get("baseline_cache_size", 10000),
+            ttl_seconds=config.custom_parameters.get("baseline_ttl_seconds", 3600)
+        )
+        self.baseline_snapshot_path = config.custom_parameters.get("baseline_snapshot_path")
         self.pattern_cache = {}  # Cache for frequently accessed patterns
+        self.pattern_catalog = PatternCatalog(
+            memory_manager.get_all_fraud_patterns,
+            refresh_interval_seconds=config.custom_parameters.get("pattern_catalog_refresh_seconds", 300)
+        )
         
         super().__init__(config)
     
@@ -150,6 +161,11 @@ class PatternDetector(BaseAgent):
             "similarity_threshold": 0.75
         }
         
+        # Warm baselines from the last snapshot instead of reloading every user's history
+        if self.baseline_snapshot_path:
+            restored = self.user_baselines.restore(self.baseline_snapshot_path)
+            self.logger.info(f"Restored {restored} user baselines from snapshot")
+        
         self.logger.info("Pattern Detection Agent initialized successfully")
     
     def process_request(self, request_data: Dict[str, Any]) -> ProcessingResult:
@@ -177,7 +193,11 @@ class PatternDetector(BaseAgent):
                 )
             
             # Perform pattern detection analysis
-            detection_result = self._analyze_patterns(transaction, analysis_type)
+            context = self._create_analysis_context(transaction)
+            detection_result = self._analyze_patterns(transaction, analysis_type, context)
+            
+            # Keep the user's cached baseline current
+            self.user_baselines.observe(transaction.user_id, transaction)
             
             return ProcessingResult(
                 success=True,
@@ -191,7 +211,9 @@ class PatternDetector(BaseAgent):
                 confidence_score=self._calculate_overall_confidence(detection_result),
                 metadata={
                     "agent_type": "pattern_detector",
-                    "analysis_version": "1.0.0"
+                    "analysis_version": "1.0.0",
+                    "pattern_catalog_version": self.pattern_catalog.version,
+                    "history_fetches": context.history_fetches
                 }
             )
             
@@ -205,6 +227,12 @@ class PatternDetector(BaseAgent):
                 error_message=str(e)
             )
     
+    def _process_batch(self, requests: List[Dict[str, Any]], batch_metadata: Dict[str, Any]) -> List[ProcessingResult]:
+        """Detect patterns for a batch user by user with each user's history prefetched once."""
+        memory_view = PrefetchedMemory(self.memory_manager, history_days=self._history_window_days(), history_limit=100)
+        batch_metadata["pattern_catalog_version"] = self.pattern_catalog.snapshot().version
+        return self._process_batch_by_user(requests, memory_view, batch_metadata)
+    
     def _extract_transaction(self, request_data: Dict[str, Any]) -> Optional[Transaction]:
         """Extract transaction from request data."""
         try:
@@ -247,28 +275,57 @@ class PatternDetector(BaseAgent):
             self.logger.error(f"Error extracting transaction: {str(e)}")
             return None
     
-    def _analyze_patterns(self, transaction: Transaction, analysis_type: str) -> PatternDetectionResult:
+    def _create_analysis_context(self, transaction: Transaction) -> AnalysisContext:
+        """Create the shared data context for analysing one transaction."""
+        return AnalysisContext(
+            transaction,
+            self.memory_manager,
+            self.pattern_catalog,
+            days_back=self._history_window_days()
+        )
+    
+    def _history_window_days(self) -> int:
+        """Widest history window any detector needs."""
+        return max(
+            90,  # baseline window
+            self.pattern_recognition_config["pattern_time_window_days"],
+            self.config.custom_parameters.get("trend_analysis_window_days", 30)
+        )
+    
+    def _analyze_patterns(
+        self,
+        transaction: Transaction,
+        analysis_type: str,
+        context: Optional[AnalysisContext] = None
+    ) -> PatternDetectionResult:
         """Perform comprehensive pattern detection analysis."""
         result = PatternDetectionResult(transaction_id=transaction.id)
+        context = context or self._create_analysis_context(transaction)
         
         # 1. Statistical Anomaly Detection
         if analysis_type in ["full", "anomaly"]:
-            anomaly_scores = self._detect_statistical_anomalies(transaction)
+            anomaly_scores = self._detect_statistical_anomalies(transaction, context)
             result.anomaly_scores.extend(anomaly_scores)
         
+        self._raise_if_cancelled()
+        
         # 2. Behavioral Pattern Recognition
         if analysis_type in ["full", "behavioral"]:
-            behavioral_patterns = self._recognize_behavioral_patterns(transaction)
+            behavioral_patterns = self._recognize_behavioral_patterns(transaction, context)
             result.behavioral_patterns.extend(behavioral_patterns)
         
+        self._raise_if_cancelled()
+        
         # 3. Trend Analysis
         if analysis_type in ["full", "trend"]:
-            trend_analyses = self._analyze_trends(transaction)
+            trend_analyses = self._analyze_trends(transaction, context)
             result.trend_analyses.extend(trend_analyses)
         
+        self._raise_if_cancelled()
+        
         # 4. Pattern Similarity Matching
         if analysis_type in ["full", "similarity"]:
-            similarity_matches = self._find_pattern_similarities(transaction)
+            similarity_matches = self._find_pattern_similarities(transaction, context)
             result.pattern_similarity_matches.extend(similarity_matches)
         
         # 5. Calculate overall anomaly score
@@ -279,12 +336,16 @@ class PatternDetector(BaseAgent):
         
         return result
     
-    def _detect_statistical_anomalies(self, transaction: Transaction) -> List[AnomalyScore]:
+    def _detect_statistical_anomalies(
+        self,
+        transaction: Transaction,
+        context: Optional[AnalysisContext] = None
+    ) -> List[AnomalyScore]:
         """Detect statistical anomalies using various models."""
         anomalies = []
         
         # Get user baseline statistics
-        user_baseline = self._get_user_baseline(transaction.user_id)
+        user_baseline = self._get_user_baseline(transaction.user_id, context)
         
         # Amount anomaly detection
         amount_anomaly = self._detect_amount_anomaly(transaction, user_baseline)
@@ -407,14 +468,17 @@ class PatternDetector(BaseAgent):
         
         return None
     
-    def _recognize_behavioral_patterns(self, transaction: Transaction) -> List[BehavioralPattern]:
+    def _recognize_behavioral_patterns(
+        self,
+        transaction: Transaction,
+        context: Optional[AnalysisContext] = None
+    ) -> List[BehavioralPattern]:
         """Recognize behavioral patterns in user's transaction history."""
         patterns = []
+        context = context or self._create_analysis_context(transaction)
         
         # Get user's transaction history
-        user_transactions = self.memory_manager.get_user_transaction_history(
-            transaction.user_id, days_back=self.pattern_recognition_config["pattern_time_window_days"]
-        )
+        user_transactions = context.history(self.pattern_recognition_config["pattern_time_window_days"])
         
         if len(user_transactions) < self.pattern_recognition_config["min_pattern_occurrences"]:
             return patterns
@@ -455,15 +519,18 @@ class PatternDetector(BaseAgent):
         
         return patterns
     
-    def _analyze_trends(self, transaction: Transaction) -> List[TrendAnalysis]:
+    def _analyze_trends(
+        self,
+        transaction: Transaction,
+        context: Optional[AnalysisContext] = None
+    ) -> List[TrendAnalysis]:
         """Analyze trends in user behavior."""
         trends = []
+        context = context or self._create_analysis_context(transaction)
         
         # Get user's transaction history for trend analysis
         window_days = self.config.custom_parameters.get("trend_analysis_window_days", 30)
-        user_transactions = self.memory_manager.get_user_transaction_history(
-            transaction.user_id, days_back=window_days
-        )
+        user_transactions = context.history(window_days)
         
         min_data_points = self.config.custom_parameters.get("min_data_points_for_analysis", 10)
         if len(user_transactions) < min_data_points:
@@ -526,18 +593,23 @@ class PatternDetector(BaseAgent):
             data_points=len(amounts)
         )
     
-    def _find_pattern_similarities(self, transaction: Transaction) -> List[Dict[str, Any]]:
+    def _find_pattern_similarities(
+        self,
+        transaction: Transaction,
+        context: Optional[AnalysisContext] = None
+    ) -> List[Dict[str, Any]]:
         """Find similar patterns in known fraud patterns."""
         similarities = []
+        context = context or self._create_analysis_context(transaction)
         
         try:
-            # Get all known fraud patterns
-            fraud_patterns = self.memory_manager.get_all_fraud_patterns()
+            # Get all known fraud patterns from the catalog snapshot
+            fraud_patterns = context.fraud_patterns
             
             similarity_threshold = self.config.custom_parameters.get("pattern_similarity_threshold", 0.8)
             
             for pattern in fraud_patterns:
-                similarity_score = self._calculate_pattern_similarity(transaction, pattern)
+                similarity_score = self._calculate_pattern_similarity(transaction, pattern, context)
                 
                 if similarity_score >= similarity_threshold:
                     similarities.append({
@@ -556,7 +628,12 @@ class PatternDetector(BaseAgent):
         
         return similarities[:5]  # Return top 5 matches
     
-    def _calculate_pattern_similarity(self, transaction: Transaction, pattern) -> float:
+    def _calculate_pattern_similarity(
+        self,
+        transaction: Transaction,
+        pattern,
+        context: Optional[AnalysisContext] = None
+    ) -> float:
         """Calculate similarity between transaction and known pattern."""
         # Simplified similarity calculation
         similarity_factors = []
@@ -564,9 +641,8 @@ class PatternDetector(BaseAgent):
         # Check pattern type relevance
         if pattern.pattern_type == "velocity_fraud":
             # Check if transaction shows velocity characteristics
-            recent_transactions = self.memory_manager.get_user_transaction_history(
-                transaction.user_id, days_back=1, limit=10
-            )
+            context = context or self._create_analysis_context(transaction)
+            recent_transactions = context.history(1, limit=10)
             if len(recent_transactions) > 3:
                 similarity_factors.append(0.8)
             else:
@@ -657,51 +733,58 @@ class PatternDetector(BaseAgent):
         
         return recommendations
     
-    def _get_user_baseline(self, user_id: str) -> Dict[str, Any]:
+    def _get_user_baseline(self, user_id: str, context: Optional[AnalysisContext] = None) -> Dict[str, Any]:
         """Get or calculate user baseline statistics."""
-        if user_id in self.user_baselines:
-            return self.user_baselines[user_id]
-        
-        # Calculate baseline from user's transaction history
-        baseline = self._calculate_user_baseline(user_id)
-        self.user_baselines[user_id] = baseline
-        
-        return baseline
+        if context is not None:
+            loader = partial(self._load_user_baseline, context=context)
+        else:
+            loader = self._load_user_baseline
+        baseline = self.user_baselines.get_or_load(user_id, loader)
+        return baseline.as_dict() if isinstance(baseline, UserBaseline) else baseline
     
     def _calculate_user_baseline(self, user_id: str) -> Dict[str, Any]:
         """Calculate baseline statistics for a user."""
-        baseline = {}
-        
+        return self._load_user_baseline(user_id).as_dict()
+    
+    def _load_user_baseline(self, user_id: str, context: Optional[AnalysisContext] = None) -> UserBaseline:
+        """Seed an incremental baseline from the user's transaction history."""
         try:
             # Get user's transaction history
-            transactions = self.memory_manager.get_user_transaction_history(user_id, days_back=90)
-            
-            if len(transactions) < 5:
-                return baseline
-            
-            # Amount statistics
-            amounts = [float(tx.amount) for tx in transactions]
-            baseline["amount_stats"] = {
-                "mean": statistics.mean(amounts),
-                "std": statistics.stdev(amounts) if len(amounts) > 1 else 0,
-                "median": statistics.median(amounts),
-                "min": min(amounts),
-                "max": max(amounts)
-            }
-            
-            # Location statistics
-            countries = [tx.location.country for tx in transactions if tx.location.country]
-            cities = [tx.location.city for tx in transactions if tx.location.city]
-            
-            baseline["location_stats"] = {
-                "common_countries": list(set(countries)),
-                "common_cities": list(set(cities))
-            }
+            if context is not None:
+                transactions = context.history(90)
+            else:
+                transactions = self.memory_manager.get_user_transaction_history(user_id, days_back=90)
+            return UserBaseline.from_transactions(transactions)
             
         except Exception as e:
             self.logger.warning(f"Error calculating user baseline: {str(e)}")
+            return UserBaseline()
+    
+    def save_baseline_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Snapshot cached user baselines to disk.
+        
+        Args:
+            path: Snapshot file (defaults to the baseline_snapshot_path parameter)
+            
+        Returns:
+            Number of baselines written
+        """
+        path = path or self.baseline_snapshot_path
+        if not path:
+            return 0
         
-        return baseline
+        try:
+            return self.user_baselines.snapshot(path)
+        except Exception as e:
+            self.logger.error(f"Error saving baseline snapshot: {str(e)}")
+            return 0
+    
+    def _cleanup_agent(self) -> None:
+        """Persist cached baselines so the next start is warm."""
+        written = self.save_baseline_snapshot()
+        if written:
+            self.logger.info(f"Saved {written} user baselines to snapshot")
     
     def _initialize_statistical_models(self) -> None:
         """Initialize statistical models for anomaly detection."""
@@ -716,11 +799,14 @@ class PatternDetector(BaseAgent):
         return {
             "cached_patterns": len(self.pattern_cache),
             "cached_baselines": len(self.user_baselines),
-            "cache_size_estimate": len(str(self.pattern_cache)) + len(str(self.user_baselines))
+            "cache_size_estimate": len(str(self.pattern_cache)) + len(str(dict(self.user_baselines))),
+            "baseline_cache": dict(self.user_baselines.stats),
+            "pattern_catalog": self.pattern_catalog.get_stats()
         }
     
     def clear_pattern_cache(self) -> None:
         """Clear pattern cache to free memory."""
         self.pattern_cache.clear()
         self.user_baselines.clear()
+        self.pattern_catalog.invalidate()
         self.logger.info("Pattern cache cleared")
\ No newline at end of file
@@ -15,6 +15,7 @@ from collections import defaultdict
 import statistics
 
 from .base_agent import BaseAgent, AgentConfiguration, AgentCapability, ProcessingResult
+from .batch_prefetch import PrefetchedMemory
 from fraud_detection.memory.models import Transaction, RiskProfile, RiskLevel, Location, DecisionContext, DeviceInfo
 from fraud_detection.memory.memory_manager import MemoryManager
 
@@ -234,6 +235,11 @@ class RiskAssessor(BaseAgent):
                 error_message=str(e)
             )
     
+    def _process_batch(self, requests: List[Dict[str, Any]], batch_metadata: Dict[str, Any]) -> List[ProcessingResult]:
+        """Assess a batch user by user with history and profiles prefetched in bulk."""
+        memory_view = PrefetchedMemory(self.memory_manager, history_days=30, history_limit=50, include_profiles=True)
+        return self._process_batch_by_user(requests, memory_view, batch_metadata)
+    
     def _extract_transaction(self, request_data: Dict[str, Any]) -> Optional[Transaction]:
         """Extract transaction from request data."""
         try:
@@ -292,6 +298,8 @@ class RiskAssessor(BaseAgent):
         risk_factors = self._calculate_risk_factors(transaction)
         result.risk_factors = risk_factors
         
+        self._raise_if_cancelled()
+        
         # 2. Geographic risk analysis
         if self.config.custom_parameters.get("geographic_risk_enabled", True):
             geographic_risk = self._assess_geographic_risk(transaction)
@@ -302,6 +310,8 @@ class RiskAssessor(BaseAgent):
             temporal_risk = self._assess_temporal_risk(transaction)
             result.temporal_risk = temporal_risk
         
+        self._raise_if_cancelled()
+        
         # 4. Cross-reference checks
         if self.config.custom_parameters.get("cross_reference_enabled", True):
             cross_ref_results = self._perform_cross_reference_checks(transaction)
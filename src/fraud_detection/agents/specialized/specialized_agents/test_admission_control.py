@@ -0,0 +1,155 @@
+"""
+Unit tests for agent admission control.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import Mock
+
+from .admission_control import AdmissionController, AdmissionDecision
+from .base_agent import AgentCapability, AgentConfiguration, AgentStatus, BaseAgent, ProcessingResult
+from .transaction_analyzer import TransactionAnalyzer
+
+
+class _SlowAgent(BaseAgent):
+    """Agent whose requests block until released or cancelled."""
+    
+    def __init__(self, **config_overrides):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.cancelled = threading.Event()
+        super().__init__(AgentConfiguration(
+            agent_id="slow_agent",
+            agent_name="SlowAgent",
+            version="1.0.0",
+            capabilities=[AgentCapability.REAL_TIME_PROCESSING],
+            **config_overrides
+        ))
+    
+    def _initialize_agent(self) -> None:
+        pass
+    
+    def process_request(self, request_data):
+        self.started.release()
+        while not self.release.wait(timeout=0.01):
+            if self.is_cancelled():
+                self.cancelled.set()
+                break
+        return ProcessingResult(success=True, result_data={}, processing_time_ms=0.0, confidence_score=1.0)
+
+
+
+class _OverlapTrackingAnalyzer(TransactionAnalyzer):
+    """Transaction analyzer recording the most requests it ran at once for one user."""
+    
+    def __init__(self, memory_manager, context_manager):
+        self.active = 0
+        self.peak_active = 0
+        self._active_lock = threading.Lock()
+        super().__init__(memory_manager, context_manager)
+    
+    def process_request(self, request_data):
+        with self._active_lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            time.sleep(0.001)
+            return super().process_request(request_data)
+        finally:
+            with self._active_lock:
+                self.active -= 1
+
+
+class TestAdmissionController:
+    """Test cases for AdmissionController."""
+    
+    def test_slots_queue_and_shed(self):
+        """Test requests run up to the limit, queue up to the bound, and are shed beyond it."""
+        controller = AdmissionController(max_concurrent=1, max_queued=1)
+        assert controller.acquire(timeout=0) == AdmissionDecision.ADMITTED
+        
+        outcome = []
+        waiter = threading.Thread(target=lambda: outcome.append(controller.acquire(timeout=5)))
+        waiter.start()
+        while controller.queued == 0:
+            time.sleep(0.001)
+        
+        assert controller.acquire(timeout=5) == AdmissionDecision.SHED
+        controller.release()
+        waiter.join()
+        assert outcome == [AdmissionDecision.ADMITTED]
+        assert controller.in_flight == 1
+    
+    def test_queue_timeout(self):
+        """Test a queued request gives up at its deadline and leaves the queue."""
+        controller = AdmissionController(max_concurrent=1, max_queued=5)
+        controller.acquire()
+        
+        assert controller.acquire(timeout=0.05) == AdmissionDecision.TIMED_OUT
+        assert controller.queued == 0 and controller.stats["queue_timeouts"] == 1
+
+
+class TestAgentAdmission:
+    """Test cases for admission control in BaseAgent."""
+    
+    def test_overload_is_shed_not_slowed(self):
+        """Test requests beyond the concurrency and queue limits fail fast."""
+        agent = _SlowAgent(max_concurrent_requests=1, max_queued_requests=0, timeout_seconds=5)
+        running = threading.Thread(target=agent.execute_with_metrics, args=({},))
+        running.start()
+        agent.started.acquire()
+        assert agent.status == AgentStatus.PROCESSING
+        
+        start = time.time()
+        result = agent.execute_with_metrics({})
+        assert not result.success and "shed" in result.error_message
+        assert time.time() - start < 1.0
+        
+        agent.release.set()
+        running.join()
+        assert agent.metrics.requests_shed == 1
+        assert agent.status == AgentStatus.READY
+    
+    def test_timeout_cancels_request(self):
+        """Test a request past its deadline fails and is asked to cancel."""
+        agent = _SlowAgent(max_concurrent_requests=2, timeout_seconds=0.2)
+        
+        result = agent.execute_with_metrics({})
+        
+        assert not result.success and "timed out" in result.error_message
+        assert agent.cancelled.wait(timeout=2)
+        assert agent.metrics.requests_timed_out == 1
+        assert "queue_time_ms" in result.metadata
+        agent.shutdown()
+    
+    def test_concurrent_requests_for_one_user_are_serialized(self):
+        """Test overlapping requests for one user keep the velocity index consistent."""
+        memory_manager = Mock()
+        memory_manager.get_user_transaction_history.return_value = []
+        context_manager = Mock()
+        context_manager.get_contextual_recommendation.return_value = {}
+        agent = _OverlapTrackingAnalyzer(memory_manager, context_manager)
+        agent.cache_cleanup_interval = 0  # sweep the cache on every update as well
+        now = datetime.now()
+        requests = [
+            {"transaction": {
+                "id": f"tx_{i}", "user_id": "user_1", "amount": str(10 + i),
+                "timestamp": (now - timedelta(seconds=i)).isoformat(),
+                "location": {"country": "US", "city": "New York"}
+            }}
+            for i in range(40)
+        ]
+        
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(agent.execute_with_metrics, requests))
+        
+        assert all(result.success for result in results)
+        assert agent.peak_active == 1
+        buffer = agent.velocity_cache["user_1"]
+        assert len(buffer) == 40
+        assert buffer.window(now - timedelta(minutes=5)) == (40, sum(Decimal(10 + i) for i in range(40)))
+        assert agent._user_locks == {}
+        agent.shutdown()
@@ -0,0 +1,94 @@
+"""
+Unit tests for the per-request analysis context and pattern catalog.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from .analysis_context import AnalysisContext, PatternCatalog
+
+
+def _history(days):
+    """Transactions one per day back from now, newest first."""
+    now = datetime.now()
+    return [SimpleNamespace(id=f"tx_{day}", timestamp=now - timedelta(days=day, minutes=1)) for day in range(days)]
+
+
+class TestAnalysisContext:
+    """Test cases for AnalysisContext."""
+    
+    def test_history_is_fetched_once_for_all_windows(self):
+        """Test narrower windows are derived from a single history fetch."""
+        memory_manager = Mock()
+        memory_manager.get_user_transaction_history.return_value = _history(60)
+        context = AnalysisContext(SimpleNamespace(user_id="user"), memory_manager, Mock(), days_back=90)
+        
+        assert len(context.history(90)) == 60
+        assert len(context.history(30)) == 30
+        assert [tx.id for tx in context.history(1, limit=10)] == ["tx_0"]
+        assert len(context.history(90, limit=10)) == 10
+        memory_manager.get_user_transaction_history.assert_called_once_with("user", days_back=90, limit=100)
+        assert context.history_fetches == 1
+    
+    def test_wider_window_is_fetched_directly(self):
+        """Test windows beyond the shared bounds fall back to a direct fetch."""
+        memory_manager = Mock()
+        memory_manager.get_user_transaction_history.return_value = []
+        context = AnalysisContext(SimpleNamespace(user_id="user"), memory_manager, Mock(), days_back=30)
+        
+        context.history(90)
+        memory_manager.get_user_transaction_history.assert_called_once_with("user", days_back=90, limit=100)
+
+
+class TestPatternCatalog:
+    """Test cases for PatternCatalog."""
+    
+    def test_snapshot_is_versioned_and_cached(self):
+        """Test readers share a snapshot until it is refreshed."""
+        loader = Mock(return_value=["pattern_a"])
+        catalog = PatternCatalog(loader, refresh_interval_seconds=300)
+        
+        first = catalog.snapshot()
+        assert catalog.snapshot() is first
+        assert first.version == 1 and first.patterns == ("pattern_a",)
+        
+        loader.return_value = ["pattern_a", "pattern_b"]
+        assert catalog.refresh().version == 2
+        assert loader.call_count == 2
+    
+    def test_stale_snapshot_refreshes_in_background(self):
+        """Test a stale snapshot is served while one background refresh runs."""
+        release = threading.Event()
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            if len(calls) > 1:
+                release.wait(timeout=5)
+            return [len(calls)]
+        
+        catalog = PatternCatalog(loader, refresh_interval_seconds=0)
+        first = catalog.snapshot()
+        
+        for _ in range(5):
+            assert catalog.snapshot() is first
+        release.set()
+        
+        deadline = time.monotonic() + 5
+        while catalog.version < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert catalog.version == 2
+        assert len(calls) == 2
+    
+    def test_failed_load_keeps_previous_snapshot(self):
+        """Test a loader error keeps serving the last good snapshot."""
+        loader = Mock(return_value=["pattern_a"])
+        catalog = PatternCatalog(loader)
+        first = catalog.snapshot()
+        
+        loader.side_effect = RuntimeError("scan failed")
+        assert catalog.refresh() is first
+        assert catalog.stats["failures"] == 1
@@ -0,0 +1,136 @@
+"""
+Unit tests for the user baseline store.
+"""
+
+import random
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from .base_agent import AgentCapability, AgentConfiguration
+from .baseline_store import BaselineStore, P2Quantile, RunningStats, UserBaseline
+from .pattern_detector import PatternDetector
+
+
+def _tx(amount, country="US", city="New York"):
+    """Create a minimal transaction."""
+    return SimpleNamespace(amount=amount, location=SimpleNamespace(country=country, city=city))
+
+
+class TestIncrementalStatistics:
+    """Test cases for the streaming estimators."""
+    
+    def test_running_stats_match_batch_statistics(self):
+        """Test Welford mean and sample deviation match the statistics module."""
+        values = [random.uniform(1, 500) for _ in range(200)]
+        stats = RunningStats()
+        for value in values:
+            stats.update(value)
+        
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.std == pytest.approx(statistics.stdev(values))
+        assert (stats.min, stats.max) == (min(values), max(values))
+    
+    def test_p2_median_tracks_true_median(self):
+        """Test the P-squared sketch converges on the median and is exact early on."""
+        sketch = P2Quantile(0.5)
+        for value in [5.0, 1.0, 3.0]:
+            sketch.update(value)
+        assert sketch.value() == 3.0
+        
+        rng = random.Random(7)
+        values = [rng.gauss(100, 15) for _ in range(5000)]
+        sketch = P2Quantile(0.5)
+        for value in values:
+            sketch.update(value)
+        assert sketch.value() == pytest.approx(statistics.median(values), abs=1.5)
+
+
+class TestBaselineStore:
+    """Test cases for BaselineStore."""
+    
+    def test_baseline_appears_after_enough_history_and_updates(self):
+        """Test baselines stay empty below five transactions and then update incrementally."""
+        store = BaselineStore()
+        store["user"] = UserBaseline.from_transactions([_tx(100.0)] * 4)
+        assert store["user"].as_dict() == {}
+        
+        assert store.observe("user", _tx(200.0, country="CA", city="Toronto"))
+        baseline = store["user"].as_dict()
+        assert baseline["amount_stats"]["mean"] == pytest.approx(120.0)
+        assert baseline["amount_stats"]["max"] == 200.0
+        assert set(baseline["location_stats"]["common_countries"]) == {"US", "CA"}
+        assert not store.observe("unknown_user", _tx(1.0))
+    
+    def test_lru_and_ttl_eviction(self):
+        """Test least recently used eviction and expiry after the TTL."""
+        store = BaselineStore(max_entries=2, ttl_seconds=60)
+        store["a"] = {}
+        store["b"] = {}
+        store["a"]
+        store["c"] = {}
+        assert set(store) == {"a", "c"}
+        
+        store._loaded_at["a"] = time.time() - 120
+        assert "a" not in store
+        assert store.stats["expirations"] == 1
+    
+    def test_concurrent_misses_load_once(self):
+        """Test concurrent callers for the same user share one load."""
+        store = BaselineStore()
+        calls = []
+        
+        def loader(user_id):
+            calls.append(user_id)
+            time.sleep(0.05)
+            return UserBaseline()
+        
+        threads = [threading.Thread(target=store.get_or_load, args=("user", loader)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert calls == ["user"]
+        assert store.stats["loads"] == 1
+    
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test baselines survive a snapshot and restore, skipping expired entries."""
+        store = BaselineStore()
+        store["fresh"] = UserBaseline.from_transactions(_tx(float(amount)) for amount in range(1, 11))
+        stale = UserBaseline.from_transactions([_tx(1.0)] * 5)
+        stale.loaded_at = time.time() - 7200
+        store["stale"] = stale
+        store["legacy"] = {"amount_stats": {}}
+        
+        path = str(tmp_path / "baselines.json")
+        assert store.snapshot(path) == 1
+        
+        restored = BaselineStore()
+        assert restored.restore(path) == 1
+        assert restored["fresh"].as_dict() == store["fresh"].as_dict()
+        assert restored.restore(str(tmp_path / "missing.json")) == 0
+    
+    def test_pattern_detector_shutdown_snapshot_warms_next_start(self, tmp_path):
+        """Test PatternDetector snapshots baselines on shutdown and restores them on start."""
+        def detector():
+            return PatternDetector(Mock(), Mock(), AgentConfiguration(
+                agent_id="pattern_detector_test",
+                agent_name="PatternDetector",
+                version="1.0.0",
+                capabilities=[AgentCapability.PATTERN_DETECTION],
+                custom_parameters={"baseline_snapshot_path": str(tmp_path / "baselines.json")}
+            ))
+        
+        first = detector()
+        first.user_baselines["user_123"] = UserBaseline.from_transactions(
+            _tx(float(amount)) for amount in range(1, 11)
+        )
+        assert first.shutdown() is True
+        
+        second = detector()
+        assert second.user_baselines["user_123"].as_dict() == first.user_baselines["user_123"].as_dict()
@@ -0,0 +1,115 @@
+"""
+Unit tests for batch processing and the prefetched memory view.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from .base_agent import AgentCapability, AgentConfiguration, BaseAgent, ProcessingResult
+from .batch_prefetch import PrefetchedMemory
+
+
+class _HistoryAgent(BaseAgent):
+    """Agent that reads two history windows and a profile per request."""
+    
+    def __init__(self, memory_manager):
+        self.memory_manager = memory_manager
+        super().__init__(AgentConfiguration(
+            agent_id="history_agent",
+            agent_name="HistoryAgent",
+            version="1.0.0",
+            capabilities=[AgentCapability.BATCH_PROCESSING]
+        ))
+    
+    def _initialize_agent(self) -> None:
+        pass
+    
+    def process_request(self, request_data):
+        if request_data.get("fail"):
+            raise ValueError("bad request")
+        user_id = request_data["user_id"]
+        month = self.memory_manager.get_user_transaction_history(user_id, days_back=30, limit=50)
+        day = self.memory_manager.get_user_transaction_history(user_id, days_back=1, limit=5)
+        profile = self.memory_manager.get_user_profile(user_id)
+        return ProcessingResult(
+            success=True,
+            result_data={"month": len(month), "day": len(day), "profile": profile},
+            processing_time_ms=0.0,
+            confidence_score=1.0
+        )
+    
+    def _process_batch(self, requests, batch_metadata):
+        memory_view = PrefetchedMemory(self.memory_manager, history_days=30, history_limit=50, include_profiles=True)
+        return self._process_batch_by_user(requests, memory_view, batch_metadata)
+
+
+def _memory_manager():
+    """Memory manager mock with ten days of history per user."""
+    now = datetime.now()
+    memory_manager = Mock()
+    memory_manager.get_user_transaction_history.side_effect = lambda user_id, days_back=30, limit=100: [
+        SimpleNamespace(user_id=user_id, timestamp=now - timedelta(days=day, minutes=1)) for day in range(10)
+    ]
+    memory_manager.get_user_profile.side_effect = lambda user_id: f"profile_{user_id}"
+    return memory_manager
+
+
+class TestBatchProcessing:
+    """Test cases for BaseAgent.process_batch."""
+    
+    def test_batch_prefetches_once_per_user_and_keeps_order(self):
+        """Test each user's data is loaded once and results keep request order."""
+        memory_manager = _memory_manager()
+        agent = _HistoryAgent(memory_manager)
+        requests = [{"user_id": user_id} for user_id in ["b", "a", "b", "a", "b"]]
+        
+        batch = agent.process_batch(requests)
+        
+        assert [r.result_data["profile"] for r in batch.results] == ["profile_b", "profile_a"] * 2 + ["profile_b"]
+        assert all(r.result_data == {**r.result_data, "month": 10, "day": 1} for r in batch.results)
+        assert memory_manager.get_user_transaction_history.call_count == 2
+        assert memory_manager.get_user_profile.call_count == 2
+        assert batch.successful == 5 and batch.metadata["users"] == 2
+        assert agent.metrics.requests_processed == 5
+        assert agent.memory_manager is memory_manager
+    
+    def test_failed_item_does_not_fail_batch(self):
+        """Test one failing request yields a failed result without affecting the rest."""
+        agent = _HistoryAgent(_memory_manager())
+        
+        batch = agent.process_batch([{"user_id": "a"}, {"user_id": "a", "fail": True}])
+        
+        assert [r.success for r in batch.results] == [True, False]
+        assert batch.results[1].error_message == "bad request"
+        assert agent.metrics.failed_analyses == 1
+    
+    def test_buffered_writes_are_visible_and_flushed_together(self):
+        """Test transaction writes are buffered, visible to later lookups, and flushed in one call."""
+        memory_manager = _memory_manager()
+        memory_view = PrefetchedMemory(memory_manager, history_days=30, history_limit=20)
+        memory_view.prefetch(["a"])
+        
+        memory_view.store_transaction(SimpleNamespace(user_id="a", timestamp=datetime.now()))
+        memory_view.store_transaction(SimpleNamespace(user_id="b", timestamp=datetime.now()))
+        
+        assert len(memory_view.get_user_transaction_history("a", days_back=1, limit=20)) == 2
+        memory_view.flush()
+        memory_manager.batch_store_transactions.assert_called_once()
+        assert len(memory_manager.batch_store_transactions.call_args[0][0]) == 2
+        memory_manager.store_transaction.assert_not_called()
+    
+    def test_profiles_missing_from_batch_read_fall_through(self):
+        """Test users left out of a batched profile read are looked up individually."""
+        class _BatchMemory(Mock):
+            def batch_get_user_profiles(self, user_ids):
+                # "b" was read and has no profile; "c" was never read
+                return {"a": "batched_a", "b": None}
+        
+        memory_manager = _BatchMemory()
+        memory_manager.get_user_profile.side_effect = lambda user_id: f"profile_{user_id}"
+        memory_view = PrefetchedMemory(memory_manager, include_profiles=True)
+        memory_view.prefetch(["a", "b", "c"])
+        
+        assert [memory_view.get_user_profile(u) for u in ["a", "b", "c"]] == ["batched_a", None, "profile_c"]
+        memory_manager.get_user_profile.assert_called_once_with("c")
@@ -0,0 +1,116 @@
+"""
+Unit tests for geodesic distance and the centroid table.
+"""
+
+import math
+import os
+import stat
+from unittest.mock import Mock
+
+import pytest
+
+from fraud_detection.memory.models import Location
+from .geo_distance import (
+    CentroidTable, centroid_key, consecutive_distances_km, default_table_digest, haversine_km,
+    write_centroid_table
+)
+from .transaction_analyzer import TransactionAnalyzer
+
+
+class TestHaversine:
+    """Test cases for distance functions."""
+    
+    def test_known_distance(self):
+        """Test New York to London is about 5570 km."""
+        assert haversine_km(40.7128, -74.0060, 51.5074, -0.1278) == pytest.approx(5570, rel=0.01)
+        assert haversine_km(10.0, 20.0, 10.0, 20.0) == 0.0
+    
+    def test_consecutive_distances_propagate_unknowns(self):
+        """Test vectorized distances match the scalar form and NaN marks unknown pairs."""
+        latitudes = [40.7128, 51.5074, math.nan, 48.8566]
+        longitudes = [-74.0060, -0.1278, math.nan, 2.3522]
+        
+        distances = consecutive_distances_km(latitudes, longitudes)
+        
+        assert len(distances) == 3
+        assert distances[0] == pytest.approx(haversine_km(40.7128, -74.0060, 51.5074, -0.1278))
+        assert math.isnan(distances[1]) and math.isnan(distances[2])
+        assert consecutive_distances_km([1.0], [2.0]) == []
+
+
+class TestCentroidTable:
+    """Test cases for CentroidTable."""
+    
+    def test_lookup_city_then_country(self, tmp_path):
+        """Test city lookup falls back to the country centroid."""
+        path = str(tmp_path / "centroids.bin")
+        write_centroid_table(path, [
+            (centroid_key("US"), 39.8, -98.6),
+            (centroid_key("US", "Boston"), 42.36, -71.06),
+        ])
+        table = CentroidTable(path)
+        
+        assert len(table) == 2
+        assert table.lookup("us", "BOSTON") == pytest.approx((42.36, -71.06), abs=1e-4)
+        assert table.lookup("US", "Springfield") == pytest.approx((39.8, -98.6), abs=1e-4)
+        assert table.lookup("ZZ") is None
+    
+    def test_default_table_is_built_once(self, tmp_path):
+        """Test the default table is written on first open and reused."""
+        path = str(tmp_path / "default.bin")
+        
+        table = CentroidTable.open_default(path)
+        modified = (tmp_path / "default.bin").stat().st_mtime_ns
+        
+        assert table.lookup("FR", "Paris") == pytest.approx((48.8566, 2.3522), abs=1e-4)
+        assert CentroidTable.open_default(path).lookup("JP") is not None
+        assert (tmp_path / "default.bin").stat().st_mtime_ns == modified
+    
+    @pytest.mark.parametrize("contents", [None, b"", b"CTRD", b"not a centroid table at all"])
+    def test_default_table_rebuilds_stale_or_corrupt_files(self, tmp_path, contents):
+        """Test a table built from other centroids or a malformed file is rewritten."""
+        path = tmp_path / "default.bin"
+        if contents is None:
+            write_centroid_table(str(path), [(centroid_key("FR", "Paris"), 0.0, 0.0)])
+        else:
+            path.write_bytes(contents)
+        
+        table = CentroidTable.open_default(str(path))
+        
+        assert table.digest == default_table_digest()
+        assert table.lookup("FR", "Paris") == pytest.approx((48.8566, 2.3522), abs=1e-4)
+    
+    def test_default_location_is_private_and_keyed_by_content(self, tmp_path, monkeypatch):
+        """Test the default table lives in a user-only directory under a digest-keyed name."""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        
+        table = CentroidTable.open_default()
+        
+        directory = os.path.dirname(table.path)
+        assert directory == str(tmp_path / "fraud_detection")
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+        assert default_table_digest().hex() in os.path.basename(table.path)
+
+
+class TestCentroidDistances:
+    """Test cases for centroid-based distance estimates in TransactionAnalyzer."""
+    
+    @pytest.fixture
+    def analyzer(self, tmp_path):
+        analyzer = TransactionAnalyzer(Mock(), Mock())
+        analyzer.centroid_table_path = str(tmp_path / "centroids.bin")
+        return analyzer
+    
+    def test_unlisted_city_is_not_placed_at_country_centroid(self, analyzer):
+        """Test an unknown city in a known country uses the coarse same-country estimate."""
+        new_york = Location(country="US", city="New York")
+        brooklyn = Location(country="US", city="Brooklyn")
+        
+        assert analyzer._estimate_distance(new_york, brooklyn) == 200.0
+    
+    def test_country_centroids_are_only_compared_with_each_other(self, analyzer):
+        """Test two unlisted cities in different countries are measured between country centroids."""
+        brooklyn = Location(country="US", city="Brooklyn")
+        unlisted = Location(country="FR", city="Lyon-sur-Nowhere")
+        
+        assert analyzer._estimate_distance(brooklyn, unlisted) == pytest.approx(7600, rel=0.05)
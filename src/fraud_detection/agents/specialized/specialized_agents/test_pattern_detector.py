@@ -12,6 +12,7 @@ from .pattern_detector import (
     TrendAnalysis, PatternDetectionResult
 )
 from .base_agent import AgentConfiguration, AgentCapability
+from .baseline_store import BaselineStore, UserBaseline
 from src.models import Transaction, Location, DeviceInfo, FraudPattern
 from src.memory_manager import MemoryManager
 from src.pattern_learning import PatternLearningEngine
@@ -578,6 +579,14 @@ class TestPatternDetector:
         
         assert health["health_status"] == "healthy"
         assert len(health["issues"]) == 0
+    
+    def test_shutdown_saves_baseline_snapshot(self, pattern_detector, tmp_path):
+        """Test shutdown snapshots cached baselines for the next start."""
+        pattern_detector.baseline_snapshot_path = str(tmp_path / "baselines.json")
+        pattern_detector.user_baselines["user_123"] = UserBaseline()
+        
+        assert pattern_detector.shutdown() is True
+        assert BaselineStore().restore(pattern_detector.baseline_snapshot_path) == 1
 
 
 if __name__ == "__main__":
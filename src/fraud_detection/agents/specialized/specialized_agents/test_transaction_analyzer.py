@@ -463,17 +463,25 @@ class TestTransactionAnalyzer:
         loc3 = Location(country="US", city="Boston")
         loc4 = Location(country="US", city="New York")
         
-        # Different countries
+        # Different countries (city centroids)
         distance1 = transaction_analyzer._estimate_distance(loc1, loc2)
-        assert distance1 == 1000.0
+        assert distance1 == pytest.approx(5837, rel=0.01)
         
         # Same country, different cities
         distance2 = transaction_analyzer._estimate_distance(loc1, loc3)
-        assert distance2 == 200.0
+        assert distance2 == pytest.approx(306, rel=0.01)
         
         # Same city
         distance3 = transaction_analyzer._estimate_distance(loc1, loc4)
         assert distance3 == 0.0
+        
+        # Coordinates on the location take precedence over centroids
+        loc5 = Location(country="US", city="New York", latitude=34.0522, longitude=-118.2437)
+        assert transaction_analyzer._estimate_distance(loc1, loc5) == pytest.approx(3936, rel=0.01)
+        
+        # Unknown places fall back to the coarse estimate
+        loc6 = Location(country="ZZ", city="Nowhere")
+        assert transaction_analyzer._estimate_distance(loc1, loc6) == 1000.0
     
     def test_get_velocity_statistics(self, transaction_analyzer, sample_transaction):
         """Test velocity statistics retrieval."""
@@ -0,0 +1,69 @@
+"""
+Unit tests for the per-user velocity index.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from .velocity_index import UserVelocityBuffer
+
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _tx(minutes, amount="10.00", tx_id=None):
+    """Create a minimal transaction ``minutes`` after the base time."""
+    return SimpleNamespace(
+        id=tx_id or f"tx_{minutes}",
+        timestamp=BASE_TIME + timedelta(minutes=minutes),
+        amount=Decimal(amount)
+    )
+
+
+class TestUserVelocityBuffer:
+    """Test cases for UserVelocityBuffer."""
+    
+    def test_window_counts_and_totals(self):
+        """Test window queries return counts and exact totals."""
+        buffer = UserVelocityBuffer(timedelta(minutes=60))
+        for minutes, amount in [(0, "10.00"), (20, "20.00"), (50, "30.00"), (55, "40.00")]:
+            buffer.add(_tx(minutes, amount))
+        
+        assert buffer.window(BASE_TIME + timedelta(minutes=45)) == (2, Decimal("70.00"))
+        assert buffer.window(BASE_TIME, BASE_TIME + timedelta(minutes=20)) == (2, Decimal("30.00"))
+        assert buffer.window(BASE_TIME - timedelta(hours=1)) == (4, Decimal("100.00"))
+    
+    def test_out_of_order_insert_keeps_time_order(self):
+        """Test a late transaction is placed in time order with correct sums."""
+        buffer = UserVelocityBuffer(timedelta(minutes=60))
+        buffer.add(_tx(0, "1.00"))
+        buffer.add(_tx(10, "2.00"))
+        buffer.add(_tx(5, "4.00"))
+        
+        assert [tx.id for tx in buffer] == ["tx_0", "tx_5", "tx_10"]
+        assert buffer.window(BASE_TIME + timedelta(minutes=5)) == (2, Decimal("6.00"))
+    
+    def test_eviction_by_event_time(self):
+        """Test entries older than the retention behind the newest event are evicted."""
+        buffer = UserVelocityBuffer(timedelta(minutes=60))
+        for minutes in range(0, 200, 10):
+            buffer.add(_tx(minutes))
+        
+        assert buffer[0].id == "tx_130"
+        assert len(buffer) == 7
+        assert buffer.window(BASE_TIME) == (7, Decimal("70.00"))
+    
+    def test_capacity_bound_and_compaction(self):
+        """Test the capacity bound survives repeated compaction."""
+        buffer = UserVelocityBuffer(timedelta(days=1), capacity=50)
+        for i in range(500):
+            buffer.add(_tx(i / 100, "1.00", tx_id=f"tx_{i}"))
+        
+        assert len(buffer) == 50
+        assert buffer[-1].id == "tx_499"
+        assert buffer.window(BASE_TIME) == (50, Decimal("50.00"))
+        
+        buffer.evict_before((BASE_TIME + timedelta(hours=1)).timestamp())
+        assert len(buffer) == 0
+        assert buffer.latest_timestamp is None
@@ -8,12 +8,18 @@ comprehensive validation, and streaming support.
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass, field
+import bisect
+import math
 import statistics
 import re
+import threading
 
 from .base_agent import BaseAgent, AgentConfiguration, AgentCapability, ProcessingResult
+from .batch_prefetch import PrefetchedMemory
+from .geo_distance import CentroidTable, consecutive_distances_km, get_centroid_table, haversine_km
+from .velocity_index import UserVelocityBuffer
 from fraud_detection.memory.models import Transaction, Location, DeviceInfo, FraudDecision
 from fraud_detection.memory.memory_manager import MemoryManager
 from fraud_detection.memory.context_manager import ContextManager
@@ -105,7 +111,14 @@ class TransactionAnalyzer(BaseAgent):
         self.context_manager = context_manager
         
         # Initialize velocity tracking
-        self.velocity_cache = {}  # user_id -> list of recent transactions
+        self.velocity_cache: Dict[str, UserVelocityBuffer] = {}  # user_id -> time-ordered recent transactions
+        self._velocity_lock = threading.Lock()  # guards velocity_cache membership and cleanup
+        self.velocity_retention = timedelta(
+            minutes=config.custom_parameters.get("velocity_window_minutes", 60)
+        )
+        self.velocity_buffer_capacity = config.custom_parameters.get("velocity_buffer_capacity", 1000)
+        self.centroid_table_path = config.custom_parameters.get("centroid_table_path")
+        self._centroid_table: Optional[CentroidTable] = None
         self.cache_cleanup_interval = 300  # 5 minutes
         self.last_cache_cleanup = datetime.now()
         
@@ -185,6 +198,11 @@ class TransactionAnalyzer(BaseAgent):
                 error_message=str(e)
             )
     
+    def _process_batch(self, requests: List[Dict[str, Any]], batch_metadata: Dict[str, Any]) -> List[ProcessingResult]:
+        """Analyze a batch user by user with velocity history prefetched and transaction writes batched."""
+        memory_view = PrefetchedMemory(self.memory_manager, history_days=1, history_limit=20)
+        return self._process_batch_by_user(requests, memory_view, batch_metadata)
+    
     def _extract_transaction(self, request_data: Dict[str, Any]) -> Optional[Transaction]:
         """Extract and validate transaction from request data."""
         try:
@@ -339,18 +357,19 @@ class TransactionAnalyzer(BaseAgent):
         """Detect velocity-based fraud patterns."""
         patterns = []
         
-        # Get recent transactions for this user
-        recent_transactions = self._get_recent_user_transactions(transaction.user_id)
-        recent_transactions.append(transaction)  # Include current transaction
-        
-        # Sort by timestamp
-        recent_transactions.sort(key=lambda tx: tx.timestamp)
+        # Get the user's time-ordered recent transactions
+        velocity_window = self._get_velocity_window(transaction.user_id)
         
         # Detect rapid-fire pattern (multiple transactions in short time)
-        rapid_fire = self._detect_rapid_fire_pattern(recent_transactions)
+        rapid_fire = self._detect_rapid_fire_pattern(velocity_window, transaction)
         if rapid_fire:
             patterns.append(rapid_fire)
         
+        # Recent transactions including the current one, in time order
+        anchor = max(filter(None, [velocity_window.latest_timestamp, transaction.timestamp]))
+        recent_transactions = velocity_window.since(anchor - self.velocity_retention)
+        bisect.insort(recent_transactions, transaction, key=lambda tx: tx.timestamp)
+        
         # Detect escalating amounts pattern
         escalating = self._detect_escalating_amounts_pattern(recent_transactions)
         if escalating:
@@ -363,40 +382,55 @@ class TransactionAnalyzer(BaseAgent):
         
         return patterns
     
-    def _detect_rapid_fire_pattern(self, transactions: List[Transaction]) -> Optional[VelocityPattern]:
-        """Detect rapid-fire transaction pattern."""
-        if len(transactions) < 3:
+    def _detect_rapid_fire_pattern(
+        self,
+        transactions: Union[UserVelocityBuffer, List[Transaction]],
+        current: Optional[Transaction] = None
+    ) -> Optional[VelocityPattern]:
+        """
+        Detect rapid-fire transaction pattern.
+        
+        Args:
+            transactions: User's velocity window (a plain list is indexed first)
+            current: Transaction being analyzed, if not already in the window
+        """
+        if not isinstance(transactions, UserVelocityBuffer):
+            transactions = UserVelocityBuffer.from_transactions(
+                transactions, self.velocity_retention, max(self.velocity_buffer_capacity, len(transactions))
+            )
+        
+        if len(transactions) + (1 if current else 0) < 3:
             return None
         
+        window_end = max(filter(None, [transactions.latest_timestamp, current.timestamp if current else None]))
+        
         # Check for multiple transactions in short time windows
         time_windows = [5, 10, 30, 60]  # minutes
         
         for window_minutes in time_windows:
-            window_start = transactions[-1].timestamp - timedelta(minutes=window_minutes)
-            window_transactions = [
-                tx for tx in transactions 
-                if tx.timestamp >= window_start
-            ]
+            window_start = window_end - timedelta(minutes=window_minutes)
+            transaction_count, total_amount = transactions.window(window_start)
+            if current is not None and current.timestamp >= window_start:
+                transaction_count += 1
+                total_amount += current.amount
             
-            if len(window_transactions) >= 4:  # 4+ transactions in window
-                total_amount = sum(tx.amount for tx in window_transactions)
-                
+            if transaction_count >= 4:  # 4+ transactions in window
                 # Calculate risk score based on frequency and amounts
-                frequency_risk = min(1.0, len(window_transactions) / 10)
+                frequency_risk = min(1.0, transaction_count / 10)
                 amount_risk = min(1.0, float(total_amount) / 5000)
                 risk_score = (frequency_risk + amount_risk) / 2
                 
                 return VelocityPattern(
                     pattern_type="rapid_fire",
-                    transaction_count=len(window_transactions),
+                    transaction_count=transaction_count,
                     time_window_minutes=window_minutes,
                     total_amount=total_amount,
                     risk_score=risk_score,
-                    description=f"{len(window_transactions)} transactions in {window_minutes} minutes",
+                    description=f"{transaction_count} transactions in {window_minutes} minutes",
                     evidence=[
-                        f"Transaction frequency: {len(window_transactions)} in {window_minutes}min",
+                        f"Transaction frequency: {transaction_count} in {window_minutes}min",
                         f"Total amount: ${total_amount}",
-                        f"Average interval: {window_minutes / len(window_transactions):.1f} minutes"
+                        f"Average interval: {window_minutes / transaction_count:.1f} minutes"
                     ]
                 )
         
@@ -442,8 +476,15 @@ class TransactionAnalyzer(BaseAgent):
         if len(transactions) < 2:
             return None
         
-        # Check last few transactions for impossible travel
-        for i in range(len(transactions) - 1):
+        # Great-circle distances between consecutive transactions in one vectorized pass
+        coordinates = [self._resolve_coordinates(tx.location) for tx in transactions]
+        distances = consecutive_distances_km(
+            [latitude for latitude, _, _ in coordinates],
+            [longitude for _, longitude, _ in coordinates]
+        )
+        
+        # Check consecutive transactions for impossible travel
+        for i, distance_km in enumerate(distances):
             tx1 = transactions[i]
             tx2 = transactions[i + 1]
             
@@ -455,8 +496,11 @@ class TransactionAnalyzer(BaseAgent):
             # Calculate time difference
             time_diff_hours = (tx2.timestamp - tx1.timestamp).total_seconds() / 3600
             
-            # Estimate distance (simplified)
-            distance_km = self._estimate_distance(tx1.location, tx2.location)
+            # Unknown or mixed-precision places: coarse estimate
+            if math.isnan(distance_km) or not self._centroids_comparable(
+                tx1.location, coordinates[i][2], tx2.location, coordinates[i + 1][2]
+            ):
+                distance_km = self._estimate_distance(tx1.location, tx2.location)
             
             # Check if travel is impossible (assuming max 1000 km/h)
             if distance_km > 0 and time_diff_hours > 0:
@@ -572,52 +616,51 @@ class TransactionAnalyzer(BaseAgent):
     
     def _get_recent_user_transactions(self, user_id: str) -> List[Transaction]:
         """Get recent transactions for velocity analysis."""
+        cutoff_time = datetime.now() - timedelta(hours=1)
+        return self._get_velocity_window(user_id).since(cutoff_time)
+    
+    def _get_velocity_window(self, user_id: str) -> UserVelocityBuffer:
+        """Get a user's velocity window, indexing stored history if the user is not cached."""
         # Check velocity cache first
-        if user_id in self.velocity_cache:
-            cached_transactions = self.velocity_cache[user_id]
-            # Filter to last hour
-            cutoff_time = datetime.now() - timedelta(hours=1)
-            return [tx for tx in cached_transactions if tx.timestamp >= cutoff_time]
+        with self._velocity_lock:
+            buffer = self.velocity_cache.get(user_id)
+        if buffer is not None:
+            return buffer
         
         # Fallback to memory manager
         try:
-            return self.memory_manager.get_user_transaction_history(user_id, days_back=1, limit=20)
+            history = self.memory_manager.get_user_transaction_history(user_id, days_back=1, limit=20)
+            return UserVelocityBuffer.from_transactions(history, self.velocity_retention, self.velocity_buffer_capacity)
         except Exception as e:
             self.logger.warning(f"Error getting user transaction history: {str(e)}")
-            return []
+            return UserVelocityBuffer(self.velocity_retention, self.velocity_buffer_capacity)
     
     def _update_velocity_cache(self, transaction: Transaction) -> None:
         """Update velocity cache with new transaction."""
         user_id = transaction.user_id
         
-        if user_id not in self.velocity_cache:
-            self.velocity_cache[user_id] = []
-        
-        self.velocity_cache[user_id].append(transaction)
-        
-        # Keep only last hour of transactions
-        cutoff_time = datetime.now() - timedelta(hours=1)
-        self.velocity_cache[user_id] = [
-            tx for tx in self.velocity_cache[user_id] 
-            if tx.timestamp >= cutoff_time
-        ]
-        
-        # Periodic cache cleanup
-        if (datetime.now() - self.last_cache_cleanup).total_seconds() > self.cache_cleanup_interval:
-            self._cleanup_velocity_cache()
+        with self._velocity_lock:
+            buffer = self.velocity_cache.get(user_id)
+            if buffer is None:
+                buffer = UserVelocityBuffer(self.velocity_retention, self.velocity_buffer_capacity)
+                self.velocity_cache[user_id] = buffer
+            
+            # Insert in time order; entries older than the window behind the newest one are evicted
+            buffer.add(transaction)
+            
+            # Periodic cache cleanup
+            if (datetime.now() - self.last_cache_cleanup).total_seconds() > self.cache_cleanup_interval:
+                self._cleanup_velocity_cache()
     
     def _cleanup_velocity_cache(self) -> None:
-        """Clean up old entries from velocity cache."""
-        cutoff_time = datetime.now() - timedelta(hours=2)
-        
-        for user_id in list(self.velocity_cache.keys()):
-            self.velocity_cache[user_id] = [
-                tx for tx in self.velocity_cache[user_id] 
-                if tx.timestamp >= cutoff_time
-            ]
+        """Clean up old entries from velocity cache (caller holds the velocity lock)."""
+        cutoff_time = (datetime.now() - timedelta(hours=2)).timestamp()
+        
+        for user_id, buffer in list(self.velocity_cache.items()):
+            buffer.evict_before(cutoff_time)
             
             # Remove empty entries
-            if not self.velocity_cache[user_id]:
+            if not buffer:
                 del self.velocity_cache[user_id]
         
         self.last_cache_cleanup = datetime.now()
@@ -643,7 +686,13 @@ class TransactionAnalyzer(BaseAgent):
         return any(keyword in merchant_lower for keyword in high_risk_keywords)
     
     def _estimate_distance(self, loc1: Location, loc2: Location) -> float:
-        """Estimate distance between two locations (simplified)."""
+        """Estimate distance between two locations in km."""
+        lat1, lon1, city_precise1 = self._resolve_coordinates(loc1)
+        lat2, lon2, city_precise2 = self._resolve_coordinates(loc2)
+        if (not any(math.isnan(value) for value in (lat1, lon1, lat2, lon2))
+                and self._centroids_comparable(loc1, city_precise1, loc2, city_precise2)):
+            return haversine_km(lat1, lon1, lat2, lon2)
+        
         # Simple distance estimation based on country/city
         if loc1.country != loc2.country:
             # Different countries - assume significant distance
@@ -655,14 +704,53 @@ class TransactionAnalyzer(BaseAgent):
             # Same city
             return 0.0
     
+    def _resolve_coordinates(self, location: Location) -> Tuple[float, float, bool]:
+        """
+        Coordinates of a location and whether they are city-precise.
+        
+        Falls back to the city centroid, then to the country centroid (not
+        city-precise); NaN if neither is known.
+        """
+        if location.latitude is not None and location.longitude is not None:
+            return float(location.latitude), float(location.longitude), True
+        
+        table = self._get_centroid_table()
+        if table is None:
+            return math.nan, math.nan, False
+        if location.city:
+            centroid = table.lookup(location.country, location.city, country_fallback=False)
+            if centroid:
+                return centroid[0], centroid[1], True
+        centroid = table.lookup(location.country)
+        return (centroid[0], centroid[1], False) if centroid else (math.nan, math.nan, False)
+    
+    @staticmethod
+    def _centroids_comparable(loc1: Location, city_precise1: bool, loc2: Location, city_precise2: bool) -> bool:
+        """Whether resolved coordinates give a meaningful distance between two locations."""
+        if city_precise1 and city_precise2:
+            return True
+        # A country centroid says nothing about distances inside that country,
+        # so it is only compared with another country's centroid
+        return not city_precise1 and not city_precise2 and loc1.country != loc2.country
+    
+    def _get_centroid_table(self) -> Optional[CentroidTable]:
+        """Get the shared centroid table, opening it on first use."""
+        if self._centroid_table is None:
+            try:
+                self._centroid_table = get_centroid_table(self.centroid_table_path)
+            except Exception as e:
+                self.logger.warning(f"Error opening centroid table: {str(e)}")
+                return None
+        return self._centroid_table
+    
     def get_velocity_statistics(self) -> Dict[str, Any]:
         """Get velocity cache statistics."""
-        total_users = len(self.velocity_cache)
-        total_transactions = sum(len(transactions) for transactions in self.velocity_cache.values())
+        with self._velocity_lock:
+            buffers = list(self.velocity_cache.values())
         
         return {
-            "cached_users": total_users,
-            "cached_transactions": total_transactions,
-            "cache_size_mb": len(str(self.velocity_cache)) / (1024 * 1024),
+            "cached_users": len(buffers),
+            "cached_transactions": sum(len(buffer) for buffer in buffers),
+            "cache_size_mb": sum(buffer.nbytes for buffer in buffers) / (1024 * 1024),
             "last_cleanup": self.last_cache_cleanup.isoformat()
         }
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Per-User Velocity Index
+
+Time-ordered transaction buffer with prefix sums over counts and amounts,
+so the number and total of a user's transactions in any time window is two
+binary searches and a subtraction instead of a filter over the history.
+Entries are evicted by event time relative to the newest transaction.
+"""
+
+import bisect
+import sys
+import threading
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Evicted head slots are reclaimed once they make up this share of the buffer
+COMPACTION_RATIO = 0.5
+MIN_COMPACTION_SLOTS = 64
+
+
+def _to_decimal(amount: Any) -> Decimal:
+    """Coerce an amount to Decimal without float artifacts."""
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+
+class UserVelocityBuffer(Sequence):
+    """
+    Time-ordered ring buffer of one user's recent transactions.
+    
+    Transactions are kept sorted by timestamp alongside a running prefix sum
+    of amounts. Eviction only advances a head offset; the evicted slots are
+    compacted away in bulk, so appends and evictions are amortized O(1) and
+    window queries are O(log n). The buffer behaves as a read-only sequence
+    of the retained transactions, oldest first. All operations are
+    thread-safe.
+    """
+    
+    def __init__(self, retention: timedelta, capacity: int = 1000):
+        """
+        Initialize buffer.
+        
+        Args:
+            retention: How far behind the newest transaction entries are kept
+            capacity: Maximum number of transactions retained
+        """
+        self.retention = retention
+        self.capacity = capacity
+        self._times: List[float] = []
+        self._transactions: List[Any] = []
+        self._amount_sums: List[Decimal] = [Decimal("0")]  # _amount_sums[i] = total of entries before slot i
+        self._head = 0
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def from_transactions(
+        cls,
+        transactions: Iterable[Any],
+        retention: timedelta,
+        capacity: int = 1000
+    ) -> "UserVelocityBuffer":
+        """Build a buffer from transactions in any order."""
+        buffer = cls(retention, capacity)
+        for transaction in sorted(transactions, key=lambda tx: tx.timestamp):
+            buffer.add(transaction)
+        return buffer
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._times) - self._head
+    
+    def __getitem__(self, index):
+        with self._lock:
+            if isinstance(index, slice):
+                return [self._transactions[self._head + i] for i in range(*index.indices(len(self)))]
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("UserVelocityBuffer index out of range")
+            return self._transactions[self._head + index]
+    
+    def __iter__(self):
+        with self._lock:
+            return iter(self._transactions[self._head:])
+    
+    @property
+    def latest_timestamp(self) -> Optional[datetime]:
+        """Timestamp of the newest retained transaction."""
+        with self._lock:
+            return self._transactions[-1].timestamp if len(self) else None
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the buffer's index arrays."""
+        return sys.getsizeof(self._times) + sys.getsizeof(self._transactions) + sys.getsizeof(self._amount_sums)
+    
+    def add(self, transaction: Any) -> None:
+        """
+        Insert a transaction and evict entries that fall out of retention.
+        
+        In-order inserts append; a late transaction is placed in time order
+        and only the prefix sums after it are recomputed.
+        """
+        timestamp = transaction.timestamp.timestamp()
+        amount = _to_decimal(transaction.amount)
+        
+        with self._lock:
+            if not len(self) or timestamp >= self._times[-1]:
+                self._times.append(timestamp)
+                self._transactions.append(transaction)
+                self._amount_sums.append(self._amount_sums[-1] + amount)
+            else:
+                position = bisect.bisect_right(self._times, timestamp, lo=self._head)
+                self._times.insert(position, timestamp)
+                self._transactions.insert(position, transaction)
+                self._amount_sums.insert(position + 1, self._amount_sums[position] + amount)
+                for slot in range(position + 2, len(self._amount_sums)):
+                    self._amount_sums[slot] += amount
+            
+            self.evict_before(self._times[-1] - self.retention.total_seconds())
+            if len(self) > self.capacity:
+                self._head += len(self) - self.capacity
+                self._compact()
+    
+    def evict_before(self, cutoff: float) -> int:
+        """
+        Evict transactions with an event time before ``cutoff`` (epoch seconds).
+        
+        Returns:
+            Number of transactions evicted
+        """
+        with self._lock:
+            position = bisect.bisect_left(self._times, cutoff, lo=self._head)
+            evicted = position - self._head
+            self._head = position
+            self._compact()
+            return evicted
+    
+    def window(self, start: datetime, end: Optional[datetime] = None) -> Tuple[int, Decimal]:
+        """
+        Count and total amount of transactions with start <= timestamp <= end.
+        
+        Args:
+            start: Window start (inclusive)
+            end: Window end (inclusive); defaults to no upper bound
+        
+        Returns:
+            (transaction count, total amount)
+        """
+        with self._lock:
+            first = bisect.bisect_left(self._times, start.timestamp(), lo=self._head)
+            last = len(self._times) if end is None else bisect.bisect_right(self._times, end.timestamp(), lo=first)
+            return last - first, self._amount_sums[last] - self._amount_sums[first]
+    
+    def since(self, start: datetime) -> List[Any]:
+        """Transactions at or after ``start``, oldest first."""
+        with self._lock:
+            first = bisect.bisect_left(self._times, start.timestamp(), lo=self._head)
+            return self._transactions[first:]
+    
+    def _compact(self) -> None:
+        """Drop evicted head slots once they dominate the buffer."""
+        if self._head < MIN_COMPACTION_SLOTS or self._head < len(self._times) * COMPACTION_RATIO:
+            if self._head and self._head == len(self._times):
+                self._reset()
+            return
+        
+        base = self._amount_sums[self._head]
+        self._times = self._times[self._head:]
+        self._transactions = self._transactions[self._head:]
+        self._amount_sums = [total - base for total in self._amount_sums[self._head:]]
+        self._head = 0
+    
+    def _reset(self) -> None:
+        """Release storage once every entry has been evicted."""
+        self._times = []
+        self._transactions = []
+        self._amount_sums = [Decimal("0")]
+        self._head = 0
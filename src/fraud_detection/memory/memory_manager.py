@@ -7,6 +7,7 @@ user behavior profiles, and fraud patterns.
 
 import json
 import logging
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
@@ -365,28 +366,7 @@ class MemoryManager:
             )
             
             if 'Item' in response:
-                item = response['Item']
-                from .models import Location
-                
-                return UserBehaviorProfile(
-                    user_id=item['user_id'],
-                    typical_spending_range=item['typical_spending_range'],
-                    frequent_merchants=item['frequent_merchants'],
-                    common_locations=[
-                        Location(
-                            country=loc['country'],
-                            city=loc['city'],
-                            latitude=loc.get('latitude'),
-                            longitude=loc.get('longitude'),
-                            ip_address=loc.get('ip_address')
-                        ) for loc in item['common_locations']
-                    ],
-                    preferred_categories=item['preferred_categories'],
-                    transaction_frequency=item['transaction_frequency'],
-                    risk_score=float(item['risk_score']),
-                    last_updated=datetime.fromisoformat(item['last_updated']),
-                    transaction_count=int(item['transaction_count'])
-                )
+                return self._item_to_user_profile(response['Item'])
             
             return None
             
@@ -394,6 +374,84 @@ class MemoryManager:
             logger.error(f"Error retrieving user profile: {str(e)}")
             return None
     
+    def batch_get_user_profiles(self, user_ids: List[str]) -> Dict[str, Optional[UserBehaviorProfile]]:
+        """
+        Retrieve behavior profiles for many users with batched reads.
+        
+        Users whose keys were not read (errors, or keys still unprocessed
+        after retries) are left out so callers can fall back to
+        ``get_user_profile`` for them.
+        
+        Args:
+            user_ids: User identifiers
+            
+        Returns:
+            Dictionary mapping each user ID that was read to its profile (None if not found)
+        """
+        profiles: Dict[str, Optional[UserBehaviorProfile]] = {}
+        unique_ids = list(dict.fromkeys(user_ids))
+        
+        # Process in batches of 100 (DynamoDB BatchGetItem limit)
+        batch_size = 100
+        table_name = self.profile_table.name
+        
+        try:
+            for i in range(0, len(unique_ids), batch_size):
+                chunk = unique_ids[i:i + batch_size]
+                request_items = {table_name: {'Keys': [{'user_id': user_id} for user_id in chunk]}}
+                found: Dict[str, UserBehaviorProfile] = {}
+                
+                # Retry keys DynamoDB left unprocessed under throttling
+                for attempt in range(5):
+                    response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                    for item in response.get('Responses', {}).get(table_name, []):
+                        found[item['user_id']] = self._item_to_user_profile(item)
+                    
+                    request_items = response.get('UnprocessedKeys') or {}
+                    if not request_items:
+                        break
+                    time.sleep(0.05 * (2 ** attempt))
+                
+                unread = {key['user_id'] for key in request_items.get(table_name, {}).get('Keys', [])}
+                if unread:
+                    logger.warning(f"Unprocessed profile keys remain after retries: {len(unread)}")
+                for user_id in chunk:
+                    if user_id in found:
+                        profiles[user_id] = found[user_id]
+                    elif user_id not in unread:
+                        profiles[user_id] = None
+            
+            logger.info(f"Batch retrieved {sum(1 for p in profiles.values() if p)} of {len(unique_ids)} user profiles")
+            return profiles
+            
+        except Exception as e:
+            logger.error(f"Error batch retrieving user profiles: {str(e)}")
+            return profiles
+    
+    def _item_to_user_profile(self, item: Dict[str, Any]) -> UserBehaviorProfile:
+        """Convert DynamoDB item to UserBehaviorProfile object."""
+        from .models import Location
+        
+        return UserBehaviorProfile(
+            user_id=item['user_id'],
+            typical_spending_range=item['typical_spending_range'],
+            frequent_merchants=item['frequent_merchants'],
+            common_locations=[
+                Location(
+                    country=loc['country'],
+                    city=loc['city'],
+                    latitude=loc.get('latitude'),
+                    longitude=loc.get('longitude'),
+                    ip_address=loc.get('ip_address')
+                ) for loc in item['common_locations']
+            ],
+            preferred_categories=item['preferred_categories'],
+            transaction_frequency=item['transaction_frequency'],
+            risk_score=float(item['risk_score']),
+            last_updated=datetime.fromisoformat(item['last_updated']),
+            transaction_count=int(item['transaction_count'])
+        )
+    
     # Fraud Pattern Operations
     
     def store_fraud_pattern(self, pattern: FraudPattern) -> bool:
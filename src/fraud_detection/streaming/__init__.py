@@ -2,11 +2,14 @@
 
 from fraud_detection.streaming.transaction_stream_processor import (
     TransactionStreamProcessor,
+    AsyncTransactionStreamProcessor,
     StreamingFraudDetector,
     Transaction,
     ProcessingResult,
     ProcessingPriority,
-    StreamStatus
+    StreamStatus,
+    PriorityScheduler,
+    SchedulingPolicy
 )
 from fraud_detection.streaming.event_response_system import (
     EventResponseSystem,
@@ -25,14 +28,19 @@ from fraud_detection.streaming.scalable_event_processor import (
     ProcessingMode,
     ScalingStrategy
 )
+from fraud_detection.streaming.audit_writer import AuditLogWriter, FsyncPolicy
+from fraud_detection.streaming.replay_log import SegmentedReplayLog, LogRecord
 
 __all__ = [
     "TransactionStreamProcessor",
+    "AsyncTransactionStreamProcessor",
     "StreamingFraudDetector",
     "Transaction",
     "ProcessingResult",
     "ProcessingPriority",
     "StreamStatus",
+    "PriorityScheduler",
+    "SchedulingPolicy",
     "EventResponseSystem",
     "FraudEvent",
     "ResponseRule",
@@ -46,4 +54,8 @@ __all__ = [
     "ScalingDecision",
     "ProcessingMode",
     "ScalingStrategy",
+    "SegmentedReplayLog",
+    "LogRecord",
+    "AuditLogWriter",
+    "FsyncPolicy",
 ]
@@ -0,0 +1,318 @@
+"""
+Per-Action-Class Executors
+
+Runs response action handlers on separate bounded thread pools ("lanes")
+per action class, so slow alerting I/O can never delay blocking actions.
+Each lane is a bulkhead with a cap on queued plus running work and a
+per-action timeout, and actions submitted under the same key (e.g. an
+event ID) run one at a time in submission order within their lane.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ActionClass(Enum):
+    """Execution lanes for response actions."""
+    BLOCKING = "blocking"  # actions that stop money moving
+    ALERTING = "alerting"  # notifications and escalations (external I/O)
+    RECORDING = "recording"  # logging and score updates
+
+
+# Keyed by ResponseAction value to keep this module free of response-system imports
+DEFAULT_ACTION_CLASSES: Dict[str, ActionClass] = {
+    "block_transaction": ActionClass.BLOCKING,
+    "block_account": ActionClass.BLOCKING,
+    "require_verification": ActionClass.BLOCKING,
+    "send_alert": ActionClass.ALERTING,
+    "escalate_to_human": ActionClass.ALERTING,
+    "notify_customer": ActionClass.ALERTING,
+    "log_event": ActionClass.RECORDING,
+    "update_risk_score": ActionClass.RECORDING,
+}
+
+
+@dataclass
+class LaneConfig:
+    """Sizing for one action lane."""
+    max_workers: int
+    max_pending: int  # bulkhead: queued plus running actions
+    timeout_seconds: float
+
+
+DEFAULT_LANE_CONFIGS: Dict[ActionClass, LaneConfig] = {
+    ActionClass.BLOCKING: LaneConfig(max_workers=4, max_pending=1000, timeout_seconds=2.0),
+    ActionClass.ALERTING: LaneConfig(max_workers=8, max_pending=500, timeout_seconds=10.0),
+    ActionClass.RECORDING: LaneConfig(max_workers=2, max_pending=1000, timeout_seconds=5.0),
+}
+
+# on_done(result, error, timed_out)
+CompletionCallback = Callable[[Any, Optional[BaseException], bool], None]
+
+
+class ActionTask:
+    """One submitted action."""
+    
+    __slots__ = ("key", "fn", "on_done", "deadline", "finished")
+    
+    def __init__(self, key: str, fn: Callable[[], Any], on_done: CompletionCallback):
+        self.key = key
+        self.fn = fn
+        self.on_done = on_done
+        self.deadline = 0.0
+        self.finished = False
+
+
+class ActionLane:
+    """
+    Bounded thread pool for one action class.
+    
+    Tasks sharing a key form a chain: only the head of a chain is running,
+    and the next task starts once the head completes or times out. A task
+    that times out is reported as failed immediately, but keeps its
+    bulkhead slot until its thread actually returns, so a lane full of hung
+    handlers rejects new work instead of piling up threads.
+    """
+    
+    def __init__(self, action_class: ActionClass, config: LaneConfig, watchdog: "_DeadlineWatchdog"):
+        """
+        Initialize lane.
+        
+        Args:
+            action_class: Class of actions run on this lane
+            config: Lane sizing and timeout
+            watchdog: Shared deadline watchdog
+        """
+        self.action_class = action_class
+        self.config = config
+        self._watchdog = watchdog
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._chains: Dict[str, Deque[ActionTask]] = {}
+        self._pending = 0  # bulkhead occupancy
+        self._unfinished = 0  # submitted tasks not yet completed or timed out
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "timed_out": 0, "rejected": 0}
+    
+    def submit(self, key: str, fn: Callable[[], Any], on_done: CompletionCallback) -> bool:
+        """
+        Submit an action.
+        
+        Args:
+            key: Ordering key; tasks with the same key run sequentially
+            fn: Action to run
+            on_done: Called once with (result, error, timed_out)
+        
+        Returns:
+            False if the bulkhead is full and the task was rejected
+        """
+        task = ActionTask(key, fn, on_done)
+        with self._lock:
+            if self._pending >= self.config.max_pending:
+                self.stats["rejected"] += 1
+                return False
+            self._pending += 1
+            self._unfinished += 1
+            self.stats["submitted"] += 1
+            
+            chain = self._chains.get(key)
+            if chain is not None:
+                chain.append(task)
+                return True
+            self._chains[key] = deque()
+            self._start(task)
+        return True
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted task has completed or timed out."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unfinished == 0, timeout)
+    
+    def shutdown(self) -> None:
+        """Release the lane's threads; a later submit starts a new pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Lane counters and occupancy."""
+        with self._lock:
+            return {
+                **self.stats,
+                "pending": self._pending,
+                "unfinished": self._unfinished,
+                "max_pending": self.config.max_pending,
+                "max_workers": self.config.max_workers
+            }
+    
+    def _start(self, task: ActionTask) -> None:
+        """Schedule a chain head; must hold the lock."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.max_workers,
+                thread_name_prefix=f"action-{self.action_class.value}"
+            )
+        task.deadline = time.monotonic() + self.config.timeout_seconds
+        self._watchdog.watch(task.deadline, self, task)
+        self._executor.submit(self._run, task)
+    
+    def _run(self, task: ActionTask) -> None:
+        """Worker body."""
+        result, error = None, None
+        try:
+            result = task.fn()
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self._finish(task, result, error, timed_out=False)
+    
+    def expire(self, task: ActionTask) -> None:
+        """Report a task as timed out if it has not finished yet."""
+        self._finish(
+            task,
+            None,
+            TimeoutError(f"{self.action_class.value} action exceeded {self.config.timeout_seconds}s"),
+            timed_out=True
+        )
+    
+    def _finish(self, task: ActionTask, result: Any, error: Optional[BaseException], timed_out: bool) -> None:
+        """Report a task's outcome once and start the next task in its chain."""
+        with self._lock:
+            if task.finished:
+                return
+            task.finished = True
+            if timed_out:
+                self.stats["timed_out"] += 1
+            elif error is not None:
+                self.stats["failed"] += 1
+            else:
+                self.stats["completed"] += 1
+        
+        try:
+            task.on_done(result, error, timed_out)
+        except Exception as e:
+            logger.error(f"Error in {self.action_class.value} action callback: {str(e)}")
+        
+        with self._lock:
+            chain = self._chains.get(task.key)
+            if chain:
+                self._start(chain.popleft())
+            else:
+                self._chains.pop(task.key, None)
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._idle.notify_all()
+
+
+class _DeadlineWatchdog:
+    """Single thread that times out running actions across all lanes."""
+    
+    def __init__(self):
+        self._heap: List[tuple] = []  # (deadline, sequence, lane, task)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+    
+    def watch(self, deadline: float, lane: ActionLane, task: ActionTask) -> None:
+        """Expire ``task`` on ``lane`` at ``deadline`` unless it finishes first."""
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._sequence), lane, task))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="action-watchdog", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+    
+    def _loop(self) -> None:
+        """Sleep until the earliest deadline and expire unfinished tasks."""
+        while True:
+            with self._condition:
+                while self._heap and self._heap[0][3].finished:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    # Exit when idle; the next watch() restarts the thread
+                    if not self._condition.wait(timeout=30.0) and not self._heap:
+                        self._thread = None
+                        return
+                    continue
+                remaining = self._heap[0][0] - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(timeout=remaining)
+                    continue
+                _, _, lane, task = heapq.heappop(self._heap)
+            lane.expire(task)
+
+
+class ActionExecutor:
+    """
+    Routes actions to per-class lanes.
+    
+    Actions are classified with ``action_classes`` (unknown actions use
+    ``default_class``); each class runs on its own ActionLane.
+    """
+    
+    def __init__(
+        self,
+        lane_configs: Optional[Dict[ActionClass, LaneConfig]] = None,
+        action_classes: Optional[Dict[str, ActionClass]] = None,
+        default_class: ActionClass = ActionClass.RECORDING
+    ):
+        """
+        Initialize executor.
+        
+        Args:
+            lane_configs: Sizing per action class (defaults to DEFAULT_LANE_CONFIGS)
+            action_classes: Action value to class mapping (defaults to DEFAULT_ACTION_CLASSES)
+            default_class: Class for actions missing from the mapping
+        """
+        configs = {**DEFAULT_LANE_CONFIGS, **(lane_configs or {})}
+        self.action_classes = dict(action_classes or DEFAULT_ACTION_CLASSES)
+        self.default_class = default_class
+        self._watchdog = _DeadlineWatchdog()
+        self.lanes: Dict[ActionClass, ActionLane] = {
+            action_class: ActionLane(action_class, config, self._watchdog)
+            for action_class, config in configs.items()
+        }
+    
+    def classify(self, action_value: str) -> ActionClass:
+        """Action class for a ResponseAction value."""
+        return self.action_classes.get(action_value, self.default_class)
+    
+    def submit(self, action_value: str, key: str, fn: Callable[[], Any], on_done: CompletionCallback) -> bool:
+        """
+        Run an action on its class's lane.
+        
+        Returns:
+            False if the lane's bulkhead rejected the action
+        """
+        return self.lanes[self.classify(action_value)].submit(key, fn, on_done)
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every lane has no unfinished actions."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for lane in self.lanes.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not lane.wait_idle(remaining):
+                return False
+        return True
+    
+    def shutdown(self) -> None:
+        """Release every lane's threads."""
+        for lane in self.lanes.values():
+            lane.shutdown()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-lane statistics."""
+        return {action_class.value: lane.get_stats() for action_class, lane in self.lanes.items()}
@@ -0,0 +1,347 @@
+"""
+Buffered Asynchronous Audit Writer
+
+Moves audit I/O off the event hot path. Callers enqueue entries on a bounded
+queue; a single writer thread serializes them, group-commits everything that
+has accumulated in one write, applies the configured fsync policy and rotates
+by tracked size. Rotated files are gzip-compressed on a separate thread so
+compression never stalls the writer. Each file carries a running SHA-256 hash
+chain so tampering with or removing any entry breaks every later checksum.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Any, Dict, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+
+
+class FsyncPolicy(Enum):
+    """When the writer forces audit data to stable storage."""
+    NEVER = "never"  # leave durability to the OS page cache
+    BATCH = "batch"  # fsync after every group commit
+    INTERVAL = "interval"  # fsync at most once per fsync_interval
+
+
+def chain_hash(previous_hash: str, entry_json: str) -> str:
+    """Return the next hash in a chain from the previous hash and an entry."""
+    return hashlib.sha256(f"{previous_hash}{entry_json}".encode()).hexdigest()
+
+
+def verify_audit_chain(path: str) -> bool:
+    """
+    Verify the hash chain of an audit log file.
+    
+    Args:
+        path: Path to an audit log, optionally gzip-compressed
+    
+    Returns:
+        True if every entry's checksum matches the chain
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    previous = GENESIS_HASH
+    with opener(path, "rt") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            checksum = entry.pop("checksum", None)
+            if checksum != chain_hash(previous, json.dumps(entry)):
+                return False
+            previous = checksum
+    return True
+
+
+class _FlushMarker:
+    """Queue sentinel that is signalled once everything ahead of it is written."""
+    
+    def __init__(self):
+        """Initialize unsignalled marker."""
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Background audit log writer with group commit and size-based rotation.
+    
+    Entries are written to ``audit_YYYYMMDD.log`` as JSON lines. The writer
+    thread starts on the first write; ``flush`` waits until everything queued
+    so far has been written and ``close`` drains the queue and stops it.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        queue_size: int = 10000,
+        max_batch_size: int = 1000,
+        fsync_policy: FsyncPolicy = FsyncPolicy.INTERVAL,
+        fsync_interval: float = 1.0,
+        rotation_size: int = 100 * 1024 * 1024,
+        compress_rotated: bool = True,
+        enqueue_timeout: float = 1.0
+    ):
+        """
+        Initialize audit writer.
+        
+        Args:
+            directory: Directory holding the audit logs
+            queue_size: Maximum number of entries waiting to be written
+            max_batch_size: Maximum entries per group commit
+            fsync_policy: When to fsync written data
+            fsync_interval: Minimum seconds between fsyncs for FsyncPolicy.INTERVAL
+            rotation_size: File size in bytes that triggers rotation
+            compress_rotated: Whether rotated files are gzip-compressed
+            enqueue_timeout: Seconds a caller blocks on a full queue before the entry is dropped
+        """
+        self.directory = directory
+        self.max_batch_size = max_batch_size
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.rotation_size = rotation_size
+        self.compress_rotated = compress_rotated
+        self.enqueue_timeout = enqueue_timeout
+        
+        self.queue: Queue = Queue(maxsize=queue_size)
+        self.entries_written = 0
+        self.entries_dropped = 0
+        self.commits = 0
+        self.files_rotated = 0
+        
+        self._file: Optional[TextIO] = None
+        self._file_path: Optional[str] = None
+        self._file_size = 0
+        self._chain_hash = GENESIS_HASH
+        self._last_fsync = time.monotonic()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._compression_queue: Queue = Queue()
+        self._compression_thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        
+        Path(directory).mkdir(parents=True, exist_ok=True)
+    
+    def write(self, action: str, entity_id: str, details: Dict[str, Any]) -> bool:
+        """
+        Queue an audit entry.
+        
+        Args:
+            action: Audited action
+            entity_id: ID of the affected entity
+            details: Entry details (shallow-copied so later mutation is not logged)
+        
+        Returns:
+            True if queued, False if dropped because the queue stayed full
+        """
+        if self._closed:
+            return False
+        self._ensure_started()
+        entry = (datetime.now(), action, entity_id, dict(details))
+        try:
+            self.queue.put(entry, timeout=self.enqueue_timeout)
+            return True
+        except Full:
+            self.entries_dropped += 1
+            logger.error(f"Audit queue full, dropped entry for {action}:{entity_id}")
+            return False
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every entry queued before this call has been written.
+        
+        Returns:
+            True if flushed within the timeout
+        """
+        if self._writer_thread is None:
+            return True
+        marker = _FlushMarker()
+        self.queue.put(marker)
+        return marker.done.wait(timeout)
+    
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Drain queued entries, close the current file and stop background threads."""
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+        
+        if self._writer_thread is not None:
+            self.queue.put(_STOP)
+            self._writer_thread.join(timeout)
+        if self._compression_thread is not None:
+            self._compression_queue.put(_STOP)
+            self._compression_thread.join(timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return writer counters."""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "entries_written": self.entries_written,
+            "entries_dropped": self.entries_dropped,
+            "commits": self.commits,
+            "average_batch_size": self.entries_written / self.commits if self.commits else 0.0,
+            "files_rotated": self.files_rotated,
+            "fsync_policy": self.fsync_policy.value
+        }
+    
+    def _ensure_started(self) -> None:
+        """Start the writer and compression threads on first use."""
+        if self._writer_thread is not None:
+            return
+        with self._start_lock:
+            if self._writer_thread is None and not self._closed:
+                self._compression_thread = threading.Thread(
+                    target=self._compression_loop, name="audit-compressor", daemon=True
+                )
+                self._compression_thread.start()
+                self._writer_thread = threading.Thread(target=self._writer_loop, name="audit-writer", daemon=True)
+                self._writer_thread.start()
+    
+    def _writer_loop(self) -> None:
+        """Group-commit queued entries until stopped."""
+        stopping = False
+        while not stopping:
+            items = [self.queue.get()]
+            # Group commit: take everything that accumulated while the last write ran
+            while len(items) < self.max_batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            
+            entries = []
+            markers = []
+            for item in items:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    entries.append(item)
+            
+            try:
+                if entries:
+                    self._commit(entries)
+                self._maybe_fsync(force=stopping)
+            except Exception as e:
+                logger.error(f"Error writing audit log: {str(e)}")
+            
+            for marker in markers:
+                marker.done.set()
+        
+        self._close_file()
+    
+    def _commit(self, entries: List[tuple]) -> None:
+        """Serialize, chain and write a group of entries."""
+        lines = []
+        for timestamp, action, entity_id, details in entries:
+            path = os.path.join(self.directory, f"audit_{timestamp.strftime('%Y%m%d')}.log")
+            if path != self._file_path:
+                self._write_lines(lines)
+                lines = []
+                self._open_file(path)
+            
+            entry = {
+                "timestamp": timestamp.isoformat(),
+                "action": action,
+                "entity_id": entity_id,
+                "details": details
+            }
+            self._chain_hash = chain_hash(self._chain_hash, json.dumps(entry, default=str))
+            entry["checksum"] = self._chain_hash
+            line = json.dumps(entry, default=str) + "\n"
+            lines.append(line)
+            self._file_size += len(line)
+            
+            if self._file_size >= self.rotation_size:
+                self._write_lines(lines)
+                lines = []
+                self._rotate()
+        
+        self._write_lines(lines)
+        self.entries_written += len(entries)
+        self.commits += 1
+    
+    def _write_lines(self, lines: List[str]) -> None:
+        """Write lines to the current file in a single call."""
+        if lines:
+            self._file.write("".join(lines))
+            self._file.flush()
+    
+    def _maybe_fsync(self, force: bool = False) -> None:
+        """Apply the fsync policy to the current file."""
+        if self._file is None or self.fsync_policy == FsyncPolicy.NEVER:
+            return
+        now = time.monotonic()
+        if force or self.fsync_policy == FsyncPolicy.BATCH or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+    
+    def _open_file(self, path: str) -> None:
+        """Switch to ``path``, resuming its hash chain if it already has entries."""
+        self._close_file()
+        self._file_path = path
+        self._file_size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._chain_hash = self._last_checksum(path) if self._file_size else GENESIS_HASH
+        self._file = open(path, "a")
+    
+    def _close_file(self) -> None:
+        """Flush, fsync (unless disabled) and close the current file."""
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync_policy != FsyncPolicy.NEVER:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+    
+    def _rotate(self) -> None:
+        """Move the current file aside and hand it to the compression thread."""
+        path = self._file_path
+        self._close_file()
+        rotated_path = f"{path}.{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        os.rename(path, rotated_path)
+        self.files_rotated += 1
+        logger.info(f"Rotated audit log: {rotated_path}")
+        
+        if self.compress_rotated:
+            self._compression_queue.put(rotated_path)
+        self._open_file(path)
+    
+    def _compression_loop(self) -> None:
+        """Gzip rotated files off the writer thread."""
+        while True:
+            path = self._compression_queue.get()
+            if path is _STOP:
+                return
+            try:
+                with open(path, "rb") as f_in:
+                    with gzip.open(f"{path}.gz", "wb") as f_out:
+                        shutil.copyfileobj(f_in, f_out)
+                os.remove(path)
+            except Exception as e:
+                logger.error(f"Error compressing audit log {path}: {str(e)}")
+    
+    def _last_checksum(self, path: str) -> str:
+        """Read the checksum of the last entry in an existing file."""
+        with open(path, "rb") as f:
+            f.seek(max(0, self._file_size - 65536))
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        try:
+            return json.loads(lines[-1])["checksum"]
+        except (IndexError, KeyError, ValueError):
+            return GENESIS_HASH
@@ -0,0 +1,140 @@
+"""
+Offset Checkpointing
+
+Tracks which replay-log offsets have been fully processed and persists them
+atomically. A batch's offsets are only committed once every part of it has
+finished and every earlier batch has committed too, so the committed offset
+is always a safe point to resume from.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "default"
+
+
+@dataclass
+class InFlightBatch:
+    """A dispatched batch whose offsets are not yet committed."""
+    batch_id: str
+    first_offset: int
+    last_offset: int
+    pending_parts: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the checkpoint representation."""
+        return {
+            "batch_id": self.batch_id,
+            "first_offset": self.first_offset,
+            "last_offset": self.last_offset,
+            "completed": self.pending_parts <= 0
+        }
+
+
+class OffsetCommitTracker:
+    """
+    Low-watermark commit tracking for one log partition.
+    
+    Batches may finish in any order; the committed offset only advances over
+    a contiguous prefix of finished batches. A batch can have several parts
+    (e.g. the batch lane plus each real-time event in hybrid mode) and
+    finishes when all of them complete.
+    """
+    
+    def __init__(self, committed_offset: int = -1):
+        """
+        Initialize tracker.
+        
+        Args:
+            committed_offset: Last offset already processed (-1 for none)
+        """
+        self.committed_offset = committed_offset
+        self._batches: Dict[str, InFlightBatch] = {}
+        self._order: List[tuple] = []  # heap of (first_offset, batch_id)
+        self._lock = threading.Lock()
+    
+    def begin(self, batch_id: str, first_offset: int, last_offset: int, parts: int = 1) -> None:
+        """Start tracking a batch covering [first_offset, last_offset]; ``parts=0`` marks it already finished."""
+        with self._lock:
+            self._batches[batch_id] = InFlightBatch(batch_id, first_offset, last_offset, parts)
+            heapq.heappush(self._order, (first_offset, batch_id))
+            self._advance()
+    
+    def complete(self, batch_id: str, parts: int = 1) -> int:
+        """
+        Mark parts of a batch as finished.
+        
+        Returns:
+            The committed offset after any advance
+        """
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if batch is not None:
+                batch.pending_parts -= parts
+                self._advance()
+            return self.committed_offset
+    
+    def reset(self, committed_offset: int) -> None:
+        """Forget in-flight batches and restart from ``committed_offset``."""
+        with self._lock:
+            self.committed_offset = committed_offset
+            self._batches.clear()
+            self._order.clear()
+    
+    def in_flight(self) -> List[InFlightBatch]:
+        """Batches that have not been committed, in offset order."""
+        with self._lock:
+            return sorted(self._batches.values(), key=lambda batch: batch.first_offset)
+    
+    def _advance(self) -> None:
+        """Commit finished batches at the head of the offset order; must hold the lock."""
+        while self._order:
+            first_offset, batch_id = self._order[0]
+            batch = self._batches[batch_id]
+            # Stop at unfinished batches and at gaps (offsets appended but not yet tracked)
+            if batch.pending_parts > 0 or first_offset > self.committed_offset + 1:
+                return
+            heapq.heappop(self._order)
+            del self._batches[batch_id]
+            self.committed_offset = max(self.committed_offset, batch.last_offset)
+
+
+def write_checkpoint(path: str, data: Dict[str, Any]) -> None:
+    """
+    Atomically replace the checkpoint at ``path``.
+    
+    The data is written and fsynced to a temporary file that is then renamed
+    over the target, so readers see either the old or the new checkpoint.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    
+    # Persist the rename itself
+    dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """Load a checkpoint, returning None if it does not exist or is unreadable."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading checkpoint {path}: {str(e)}")
+        return None
@@ -0,0 +1,294 @@
+"""
+Incremental Sliding-Window Correlation Engine
+
+Maintains a bounded, event-time window per correlation key (e.g. per user)
+and detects correlation patterns as each event is inserted. Every window
+keeps running state - a velocity sub-window, the last located event and a
+reference-counted set of recent devices - so an insert costs O(1) amortized
+regardless of how many keys are active, and idle keys are expired in
+least-recently-updated order without scanning the rest.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+
+@dataclass
+class CorrelationMatch:
+    """A correlation pattern completed by an inserted event."""
+    key: str
+    pattern_type: str
+    events: List[Any]
+    confidence_score: float
+    time_window_minutes: int
+    correlation_factors: List[str]
+
+
+class WindowedDistinctCounter:
+    """
+    Distinct-value count over a sliding window.
+    
+    Values are reference counted so they can be removed as they expire; the
+    window is bounded, so the counter is bounded too.
+    """
+    
+    def __init__(self):
+        """Initialize empty counter."""
+        self._counts: Dict[Any, int] = {}
+    
+    def add(self, value: Any) -> None:
+        """Count one occurrence of ``value``."""
+        self._counts[value] = self._counts.get(value, 0) + 1
+    
+    def remove(self, value: Any) -> None:
+        """Forget one occurrence of ``value``."""
+        remaining = self._counts.get(value, 0) - 1
+        if remaining > 0:
+            self._counts[value] = remaining
+        else:
+            self._counts.pop(value, None)
+    
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class CorrelationWindow:
+    """
+    Event-time window for one key.
+    
+    Events are assumed to arrive approximately in time order; expiry is
+    driven by the highest event time seen (the watermark), not the wall clock.
+    """
+    
+    def __init__(self, window: timedelta, capacity: int, velocity_window: timedelta):
+        """
+        Initialize window.
+        
+        Args:
+            window: How far behind the watermark events are retained
+            capacity: Maximum events retained (ring buffer size)
+            velocity_window: Span over which velocity is counted
+        """
+        self.window = window
+        self.velocity_window = velocity_window
+        self.events: Deque[Any] = deque(maxlen=capacity)
+        self.velocity_events: Deque[Any] = deque(maxlen=capacity)
+        self.device_events: Deque[Any] = deque()
+        self.devices = WindowedDistinctCounter()
+        self.capacity = capacity
+        self.last_location_event: Optional[Any] = None
+        self.watermark: Optional[datetime] = None
+        self.velocity_armed = True
+        self.device_armed = True
+    
+    def __len__(self) -> int:
+        return len(self.events)
+    
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.events)
+    
+    def advance(self, timestamp: datetime) -> None:
+        """Move the watermark forward and expire state that fell out of the window."""
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+        
+        cutoff = self.watermark - self.window
+        while self.events and self.events[0].timestamp < cutoff:
+            self.events.popleft()
+        while self.device_events and (
+            self.device_events[0].timestamp < cutoff or len(self.device_events) > self.capacity
+        ):
+            self.devices.remove(self.device_events.popleft().details.get("device_id"))
+        if self.last_location_event is not None and self.last_location_event.timestamp < cutoff:
+            self.last_location_event = None
+        
+        velocity_cutoff = self.watermark - self.velocity_window
+        while self.velocity_events and self.velocity_events[0].timestamp < velocity_cutoff:
+            self.velocity_events.popleft()
+    
+    def resize(self, window: timedelta, capacity: int, velocity_window: timedelta) -> None:
+        """Apply new limits, dropping the oldest retained events that no longer fit."""
+        self.window = window
+        self.velocity_window = velocity_window
+        self.capacity = capacity
+        self.events = deque(self.events, maxlen=capacity)
+        self.velocity_events = deque(self.velocity_events, maxlen=capacity)
+        if self.watermark is not None:
+            self.advance(self.watermark)
+
+
+class CorrelationEngine:
+    """
+    Per-key sliding windows with insert-time correlation detection.
+    
+    Patterns:
+    - high_velocity: ``velocity_threshold`` or more events within ``velocity_window``
+    - impossible_travel: consecutive located events in the window with different locations
+    - multiple_devices: ``distinct_device_threshold`` or more distinct devices in the window
+    
+    Velocity and device patterns fire once when their threshold is reached
+    and re-arm after the count drops back below it. The public methods are
+    serialized by one lock, so inserts, expiry and reconfiguration may run
+    on different threads.
+    """
+    
+    def __init__(
+        self,
+        window: timedelta = timedelta(minutes=10),
+        capacity: int = 100,
+        velocity_window: timedelta = timedelta(minutes=5),
+        velocity_threshold: int = 3,
+        distinct_device_threshold: int = 3
+    ):
+        """
+        Initialize correlation engine.
+        
+        Args:
+            window: Event-time retention per key
+            capacity: Maximum events retained per key
+            velocity_window: Span for the velocity pattern
+            velocity_threshold: Events within velocity_window that trigger high_velocity
+            distinct_device_threshold: Distinct devices within window that trigger multiple_devices
+        """
+        self.window = window
+        self.capacity = capacity
+        self._requested_velocity_window = velocity_window
+        self.velocity_window = min(velocity_window, window)
+        self.velocity_threshold = velocity_threshold
+        self.distinct_device_threshold = distinct_device_threshold
+        self.windows: "OrderedDict[str, CorrelationWindow]" = OrderedDict()
+        self._last_seen: Dict[str, datetime] = {}
+        self._lock = threading.RLock()
+    
+    def add(self, key: str, event: Any) -> List[CorrelationMatch]:
+        """
+        Insert an event and return the correlations it completes.
+        
+        Args:
+            key: Correlation key (e.g. ``user_<id>``)
+            event: Event with ``timestamp`` and ``details`` attributes
+        
+        Returns:
+            Newly detected correlations (usually empty)
+        """
+        with self._lock:
+            window = self.windows.get(key)
+            if window is None:
+                window = CorrelationWindow(self.window, self.capacity, self.velocity_window)
+                self.windows[key] = window
+            self.windows.move_to_end(key)
+            self._last_seen[key] = datetime.now()
+            
+            window.advance(event.timestamp)
+            if event.timestamp < window.watermark - self.window:
+                return []  # later than the window allows
+            
+            window.events.append(event)
+            window.velocity_events.append(event)
+            
+            matches = []
+            matches.extend(self._check_velocity(key, window))
+            if "location" in event.details:
+                matches.extend(self._check_location(key, window, event))
+            if "device_id" in event.details:
+                matches.extend(self._check_devices(key, window, event))
+            return matches
+    
+    def reconfigure(self, window: Optional[timedelta] = None, capacity: Optional[int] = None) -> None:
+        """
+        Change the window span and/or per-key capacity.
+        
+        Existing windows pick up the new limits immediately; shrinking either
+        drops their oldest events.
+        """
+        with self._lock:
+            if window is not None:
+                self.window = window
+                self.velocity_window = min(self._requested_velocity_window, window)
+            if capacity is not None:
+                self.capacity = capacity
+            for state in self.windows.values():
+                state.resize(self.window, self.capacity, self.velocity_window)
+    
+    def expire(self, now: datetime) -> int:
+        """
+        Drop windows for keys that have not received events within the window.
+        
+        Keys are kept in least-recently-updated order, so only expired keys
+        are visited.
+        
+        Returns:
+            Number of windows removed
+        """
+        removed = 0
+        with self._lock:
+            cutoff = now - self.window
+            while self.windows:
+                key = next(iter(self.windows))
+                if self._last_seen[key] >= cutoff:
+                    break
+                del self.windows[key]
+                del self._last_seen[key]
+                removed += 1
+        return removed
+    
+    def _window_minutes(self, span: timedelta) -> int:
+        """Express a span in whole minutes."""
+        return int(span.total_seconds() // 60)
+    
+    def _check_velocity(self, key: str, window: CorrelationWindow) -> List[CorrelationMatch]:
+        """Fire high_velocity when the velocity sub-window reaches the threshold."""
+        count = len(window.velocity_events)
+        if count < self.velocity_threshold:
+            window.velocity_armed = True
+            return []
+        if not window.velocity_armed:
+            return []
+        window.velocity_armed = False
+        return [CorrelationMatch(
+            key=key,
+            pattern_type="high_velocity",
+            events=list(window.velocity_events),
+            confidence_score=0.8,
+            time_window_minutes=self._window_minutes(self.velocity_window),
+            correlation_factors=["event_frequency", "time_proximity"]
+        )]
+    
+    def _check_location(self, key: str, window: CorrelationWindow, event: Any) -> List[CorrelationMatch]:
+        """Fire impossible_travel when the location changes between consecutive located events."""
+        previous = window.last_location_event
+        window.last_location_event = event
+        if previous is None or previous.details.get("location") == event.details.get("location"):
+            return []
+        return [CorrelationMatch(
+            key=key,
+            pattern_type="impossible_travel",
+            events=[previous, event],
+            confidence_score=0.9,
+            time_window_minutes=self._window_minutes(self.window),
+            correlation_factors=["location_distance", "time_proximity"]
+        )]
+    
+    def _check_devices(self, key: str, window: CorrelationWindow, event: Any) -> List[CorrelationMatch]:
+        """Fire multiple_devices when distinct devices in the window reach the threshold."""
+        window.device_events.append(event)
+        window.devices.add(event.details.get("device_id"))
+        window.advance(event.timestamp)
+        
+        if len(window.devices) < self.distinct_device_threshold:
+            window.device_armed = True
+            return []
+        if not window.device_armed:
+            return []
+        window.device_armed = False
+        return [CorrelationMatch(
+            key=key,
+            pattern_type="multiple_devices",
+            events=list(window.device_events),
+            confidence_score=0.7,
+            time_window_minutes=self._window_minutes(self.window),
+            correlation_factors=["device_diversity", "time_proximity"]
+        )]
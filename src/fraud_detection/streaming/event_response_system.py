@@ -14,9 +14,21 @@ from typing import Dict, List, Optional, Any, Callable, Set
 from dataclasses import dataclass, field
 from enum import Enum
 import threading
+from collections import OrderedDict
 from queue import Queue, PriorityQueue, Empty
 import uuid
 
+from fraud_detection.streaming.action_executor import ActionExecutor
+from fraud_detection.streaming.correlation_engine import CorrelationEngine, CorrelationMatch
+from fraud_detection.streaming.retention import (
+    ArchiveSummary,
+    ColumnarArchive,
+    RetentionPolicy,
+    evict_from_list,
+    evict_from_mapping
+)
+from fraud_detection.streaming.rule_index import RuleIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -148,22 +160,24 @@ class EventResponseSystem:
         # Event processing
         self.event_queue = PriorityQueue(maxsize=max_queue_size)
         self.pending_events: Dict[str, FraudEvent] = {}
-        self.processed_events: Dict[str, FraudEvent] = {}
+        self.processed_events: "OrderedDict[str, FraudEvent]" = OrderedDict()
         
         # Response rules and executions
         self.response_rules: Dict[str, ResponseRule] = {}
+        self.rule_index = RuleIndex()
         self.response_executions: List[ResponseExecution] = []
         self.rule_execution_counts: Dict[str, Dict[str, int]] = {}  # rule_id -> hour -> count
         self.rule_last_execution: Dict[str, datetime] = {}
         
         # Event correlation
-        self.correlation_windows: Dict[str, List[FraudEvent]] = {}
-        self.active_correlations: Dict[str, EventCorrelation] = {}
+        self.active_correlations: "OrderedDict[str, EventCorrelation]" = OrderedDict()
         self.correlation_rules = []
         
         # Response handlers
         self.action_handlers: Dict[ResponseAction, Callable] = {}
         self.event_listeners: List[Callable[[FraudEvent], None]] = []
+        self.action_executor = ActionExecutor()
+        self._execution_lock = threading.Lock()
         
         # Threading and processing
         self.is_running = False
@@ -172,9 +186,22 @@ class EventResponseSystem:
         
         # Configuration
         self.enable_correlation = True
-        self.correlation_window_minutes = 10
-        self.max_correlation_events = 100
-        self.cleanup_interval_hours = 24
+        self._correlation_window_minutes = 10
+        self._max_correlation_events = 100
+        self.correlation_engine = CorrelationEngine(
+            window=timedelta(minutes=self._correlation_window_minutes),
+            capacity=self._max_correlation_events
+        )
+        
+        # Retention of processed history; cleanup_interval_hours reads and sets its TTL
+        self.retention_policy = RetentionPolicy()
+        self.archived_summaries: Dict[str, ArchiveSummary] = {
+            "events": ArchiveSummary(),
+            "executions": ArchiveSummary(),
+            "correlations": ArchiveSummary()
+        }
+        self.execution_archive: Optional[ColumnarArchive] = None
+        self._last_retention_sweep = time.monotonic()
         
         # Metrics
         self.metrics = {
@@ -192,6 +219,9 @@ class EventResponseSystem:
         """
         Add a response rule to the system.
         
+        Rules are compiled into the rule index when added; after changing a
+        rule's event types, threshold, conditions or priority, add it again.
+        
         Args:
             rule: Response rule to add
             
@@ -200,6 +230,7 @@ class EventResponseSystem:
         """
         try:
             self.response_rules[rule.rule_id] = rule
+            self.rule_index.add(rule)
             logger.info(f"Added response rule: {rule.name} ({rule.rule_id})")
             return True
             
@@ -219,6 +250,7 @@ class EventResponseSystem:
         """
         if rule_id in self.response_rules:
             del self.response_rules[rule_id]
+            self.rule_index.remove(rule_id)
             logger.info(f"Removed response rule: {rule_id}")
             return True
         
@@ -245,6 +277,40 @@ class EventResponseSystem:
         self.event_listeners.append(listener)
         logger.debug("Added event listener")
     
+    @property
+    def correlation_windows(self) -> Dict[str, Any]:
+        """Per-key correlation windows."""
+        return self.correlation_engine.windows
+    
+    @property
+    def correlation_window_minutes(self) -> int:
+        """Event-time span of each correlation window."""
+        return self._correlation_window_minutes
+    
+    @correlation_window_minutes.setter
+    def correlation_window_minutes(self, minutes: int) -> None:
+        self._correlation_window_minutes = minutes
+        self.correlation_engine.reconfigure(window=timedelta(minutes=minutes))
+    
+    @property
+    def max_correlation_events(self) -> int:
+        """Maximum events retained per correlation window."""
+        return self._max_correlation_events
+    
+    @max_correlation_events.setter
+    def max_correlation_events(self, count: int) -> None:
+        self._max_correlation_events = count
+        self.correlation_engine.reconfigure(capacity=count)
+    
+    @property
+    def cleanup_interval_hours(self) -> float:
+        """How long processed history is kept; an alias for the retention TTL."""
+        return self.retention_policy.ttl_seconds / 3600.0
+    
+    @cleanup_interval_hours.setter
+    def cleanup_interval_hours(self, hours: float) -> None:
+        self.retention_policy.ttl_seconds = hours * 3600.0
+    
     def submit_event(self, event: FraudEvent) -> bool:
         """
         Submit a fraud event for processing.
@@ -304,8 +370,24 @@ class EventResponseSystem:
         if self.correlation_thread:
             self.correlation_thread.join(timeout=5)
         
+        # Let in-flight actions finish (or time out) before releasing their threads
+        self.wait_for_actions(timeout=5)
+        self.action_executor.shutdown()
+        
         logger.info("Event response system stopped")
     
+    def wait_for_actions(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every dispatched response action has completed or timed out.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            
+        Returns:
+            True if no actions remain in flight
+        """
+        return self.action_executor.wait_idle(timeout)
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get system metrics."""
         return {
@@ -346,7 +428,67 @@ class EventResponseSystem:
                     "executed_at": exec.executed_at.isoformat()
                 }
                 for exec in self.response_executions[-10:]  # Last 10 executions
-            ]
+            ],
+            "action_lanes": self.action_executor.get_stats(),
+            "retention": {
+                "processed_events": len(self.processed_events),
+                "response_executions": len(self.response_executions),
+                "active_correlations": len(self.active_correlations),
+                "archived": {name: summary.to_dict() for name, summary in self.archived_summaries.items()},
+                "execution_archive_rows": self.execution_archive.rows_written if self.execution_archive else 0
+            }
+        }
+    
+    def enforce_retention(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Evict history beyond the retention policy's TTL and count limits.
+        
+        Evicted records are folded into ``archived_summaries``; evicted
+        executions are also spilled to the columnar archive when
+        ``retention_policy.archive_directory`` is set.
+        
+        Args:
+            now: Reference time for TTLs (defaults to the current time)
+        
+        Returns:
+            Number of records evicted per collection
+        """
+        now = now or datetime.now()
+        policy = self.retention_policy
+        cutoff = now - timedelta(seconds=policy.ttl_seconds)
+        self._last_retention_sweep = time.monotonic()
+        
+        events = evict_from_mapping(
+            self.processed_events, policy.max_processed_events, cutoff, lambda event: event.timestamp
+        )
+        for event in events:
+            self.archived_summaries["events"].add(event.event_type.value, event.timestamp)
+        
+        with self._execution_lock:
+            executions = evict_from_list(
+                self.response_executions, policy.max_executions, cutoff, lambda execution: execution.executed_at
+            )
+        for execution in executions:
+            outcome = "success" if execution.success else "failure"
+            self.archived_summaries["executions"].add(
+                f"{execution.action.value}:{outcome}", execution.executed_at, execution.execution_time_ms
+            )
+        if executions and policy.archive_directory:
+            self._get_execution_archive().append(
+                [self._execution_row(execution) for execution in executions], now
+            )
+        
+        correlations = evict_from_mapping(
+            self.active_correlations, policy.max_correlations, cutoff, lambda correlation: correlation.created_at
+        )
+        for correlation in correlations:
+            self.archived_summaries["correlations"].add(correlation.pattern_type, correlation.created_at)
+        
+        return {
+            "processed_events": len(events),
+            "response_executions": len(executions),
+            "active_correlations": len(correlations),
+            "rule_execution_counts": self._prune_rule_execution_tracking(now)
         }
     
     def _event_processor_loop(self) -> None:
@@ -357,6 +499,7 @@ class EventResponseSystem:
                 try:
                     event = self.event_queue.get(timeout=1.0)
                 except Empty:
+                    self._maybe_enforce_retention()
                     continue
                 
                 # Process event
@@ -365,6 +508,8 @@ class EventResponseSystem:
                 # Update metrics
                 self.metrics["events_processed"] += 1
                 
+                self._maybe_enforce_retention()
+                
             except Exception as e:
                 logger.error(f"Error in event processor loop: {str(e)}")
                 self.metrics["processing_errors"] += 1
@@ -396,65 +541,78 @@ class EventResponseSystem:
             logger.error(f"Error processing event {event.event_id}: {str(e)}")
             self.metrics["processing_errors"] += 1
     
-    def _find_matching_rules(self, event: FraudEvent) -> List[ResponseRule]:
-        """Find response rules that match the event."""
-        matching_rules = []
-        
-        for rule in self.response_rules.values():
-            if not rule.enabled:
-                continue
-            
-            # Check event type match
-            if event.event_type not in rule.event_types:
-                continue
-            
-            # Check severity threshold
-            if event.severity.value < rule.severity_threshold.value:
-                continue
-            
-            # Check additional conditions
-            if self._evaluate_rule_conditions(event, rule):
-                matching_rules.append(rule)
-        
-        # Sort by priority
-        matching_rules.sort(key=lambda r: r.priority)
+    def _maybe_enforce_retention(self) -> None:
+        """Run a retention sweep when the interval has elapsed or a count limit is overrun."""
+        policy = self.retention_policy
+        slack = 1.0 + policy.overflow_slack
+        due = time.monotonic() - self._last_retention_sweep >= policy.check_interval_seconds
+        overrun = (
+            len(self.processed_events) > policy.max_processed_events * slack
+            or len(self.response_executions) > policy.max_executions * slack
+            or len(self.active_correlations) > policy.max_correlations * slack
+        )
+        if not (due or overrun):
+            return
         
-        return matching_rules
+        try:
+            self.enforce_retention()
+        except Exception as e:
+            logger.error(f"Error enforcing retention: {str(e)}")
+            self._last_retention_sweep = time.monotonic()
+    
+    def _prune_rule_execution_tracking(self, now: datetime) -> int:
+        """Drop hourly execution buckets past retention and tracking for removed rules."""
+        oldest_hour = (now - timedelta(hours=self.retention_policy.rule_count_retention_hours)).strftime("%Y-%m-%d-%H")
+        pruned = 0
+        
+        for rule_id in list(self.rule_execution_counts):
+            hours = self.rule_execution_counts[rule_id]
+            for hour in [hour for hour in hours if hour < oldest_hour]:
+                del hours[hour]
+                pruned += 1
+            if not hours or rule_id not in self.response_rules:
+                pruned += len(hours)
+                del self.rule_execution_counts[rule_id]
+        
+        for rule_id in list(self.rule_last_execution):
+            if rule_id not in self.response_rules:
+                del self.rule_last_execution[rule_id]
+        
+        return pruned
+    
+    def _get_execution_archive(self) -> ColumnarArchive:
+        """Get the execution archive for the configured directory, creating it lazily."""
+        directory = self.retention_policy.archive_directory
+        if self.execution_archive is None or self.execution_archive.directory != directory:
+            self.execution_archive = ColumnarArchive(directory, "executions")
+        return self.execution_archive
+    
+    @staticmethod
+    def _execution_row(execution: ResponseExecution) -> Dict[str, Any]:
+        """Flatten an execution into an archive row."""
+        return {
+            "execution_id": execution.execution_id,
+            "event_id": execution.event_id,
+            "rule_id": execution.rule_id,
+            "action": execution.action.value,
+            "executed_at": execution.executed_at.timestamp(),
+            "success": int(execution.success),
+            "execution_time_ms": float(execution.execution_time_ms),
+            "error_message": execution.error_message,
+            "result": execution.result
+        }
+    
+    def _find_matching_rules(self, event: FraudEvent) -> List[ResponseRule]:
+        """Find response rules that match the event, in priority order."""
+        return [
+            compiled.rule
+            for compiled in self.rule_index.candidates(event)
+            if compiled.rule.enabled and compiled.predicate(event)
+        ]
     
     def _evaluate_rule_conditions(self, event: FraudEvent, rule: ResponseRule) -> bool:
         """Evaluate rule conditions against event."""
-        conditions = rule.conditions
-        
-        # Risk score threshold
-        if "min_risk_score" in conditions:
-            if event.risk_score < conditions["min_risk_score"]:
-                return False
-        
-        # Confidence threshold
-        if "min_confidence" in conditions:
-            if event.confidence_score < conditions["min_confidence"]:
-                return False
-        
-        # User ID filter
-        if "user_ids" in conditions:
-            if event.user_id not in conditions["user_ids"]:
-                return False
-        
-        # Transaction amount threshold
-        if "min_amount" in conditions and event.transaction_id:
-            transaction_amount = event.details.get("amount", 0)
-            if transaction_amount < conditions["min_amount"]:
-                return False
-        
-        # Time-based conditions
-        if "time_window" in conditions:
-            window = conditions["time_window"]
-            if "start_hour" in window and "end_hour" in window:
-                current_hour = event.timestamp.hour
-                if not (window["start_hour"] <= current_hour <= window["end_hour"]):
-                    return False
-        
-        return True
+        return self.rule_index.predicate_for(rule)(event)
     
     def _can_execute_rule(self, rule: ResponseRule) -> bool:
         """Check if rule can be executed (cooldown and rate limits)."""
@@ -480,20 +638,30 @@ class EventResponseSystem:
         return True
     
     def _execute_rule_responses(self, event: FraudEvent, rule: ResponseRule) -> None:
-        """Execute all response actions for a rule."""
+        """
+        Dispatch all response actions for a rule to their action-class lanes.
+        
+        Actions run asynchronously; actions of the same class for the same
+        event run in rule order, and each execution is recorded when it
+        completes, fails, times out or is rejected by a full lane.
+        """
         for action in rule.actions:
             try:
-                execution = self._execute_action(event, rule, action)
-                self.response_executions.append(execution)
-                
-                if execution.success:
-                    self.metrics["responses_executed"] += 1
-                    
-                    # Update specific action metrics
-                    if action == ResponseAction.BLOCK_TRANSACTION:
-                        self.metrics["blocked_transactions"] += 1
-                    elif action == ResponseAction.SEND_ALERT:
-                        self.metrics["alerts_sent"] += 1
+                execution = self._new_execution(event, rule, action)
+                start_time = time.time()
+                accepted = self.action_executor.submit(
+                    action.value,
+                    event.event_id,
+                    lambda action=action: self._run_action_handler(event, rule, action),
+                    lambda result, error, timed_out, execution=execution, start_time=start_time:
+                        self._record_execution(self._finalize_execution(execution, start_time, result, error))
+                )
+                if not accepted:
+                    error = RuntimeError(
+                        f"{self.action_executor.classify(action.value).value} action lane is full"
+                    )
+                    logger.error(f"Rejected action {action.value} for rule {rule.rule_id}: {str(error)}")
+                    self._record_execution(self._finalize_execution(execution, start_time, None, error))
                 
             except Exception as e:
                 logger.error(f"Error executing action {action.value} for rule {rule.rule_id}: {str(e)}")
@@ -511,42 +679,69 @@ class EventResponseSystem:
             self.rule_execution_counts[rule.rule_id].get(current_hour, 0) + 1
     
     def _execute_action(self, event: FraudEvent, rule: ResponseRule, action: ResponseAction) -> ResponseExecution:
-        """Execute a single response action."""
+        """Execute a single response action synchronously on the calling thread."""
         start_time = time.time()
-        execution_id = str(uuid.uuid4())
+        execution = self._new_execution(event, rule, action)
         
-        execution = ResponseExecution(
-            execution_id=execution_id,
+        try:
+            result, error = self._run_action_handler(event, rule, action), None
+        except Exception as e:
+            result, error = None, e
+        
+        return self._finalize_execution(execution, start_time, result, error)
+    
+    def _new_execution(self, event: FraudEvent, rule: ResponseRule, action: ResponseAction) -> ResponseExecution:
+        """Create the execution record for an action about to run."""
+        return ResponseExecution(
+            execution_id=str(uuid.uuid4()),
             event_id=event.event_id,
             rule_id=rule.rule_id,
             action=action,
             executed_at=datetime.now(),
             success=False
         )
-        
-        try:
-            # Check if we have a registered handler
-            if action in self.action_handlers:
-                handler = self.action_handlers[action]
-                result = handler(event, rule)
-                execution.result = result
-                execution.success = True
-            else:
-                # Default action implementations
-                result = self._default_action_handler(event, rule, action)
-                execution.result = result
-                execution.success = True
-            
-            logger.debug(f"Executed action {action.value} for event {event.event_id}")
-            
-        except Exception as e:
-            execution.error_message = str(e)
+    
+    def _run_action_handler(self, event: FraudEvent, rule: ResponseRule, action: ResponseAction) -> Dict[str, Any]:
+        """Run the registered handler for an action, or the default implementation."""
+        handler = self.action_handlers.get(action)
+        if handler is not None:
+            return handler(event, rule)
+        return self._default_action_handler(event, rule, action)
+    
+    def _finalize_execution(
+        self,
+        execution: ResponseExecution,
+        start_time: float,
+        result: Any,
+        error: Optional[BaseException]
+    ) -> ResponseExecution:
+        """Fill in an execution record from its handler outcome."""
+        if error is None:
+            execution.result = result
+            execution.success = True
+            logger.debug(f"Executed action {execution.action.value} for event {execution.event_id}")
+        else:
+            execution.error_message = str(error)
             execution.success = False
-            logger.error(f"Failed to execute action {action.value}: {str(e)}")
+            logger.error(f"Failed to execute action {execution.action.value}: {str(error)}")
         
         execution.execution_time_ms = (time.time() - start_time) * 1000
         return execution
     
+    def _record_execution(self, execution: ResponseExecution) -> None:
+        """Store a finished execution and update action metrics."""
+        with self._execution_lock:
+            self.response_executions.append(execution)
+            
+            if execution.success:
+                self.metrics["responses_executed"] += 1
+                
+                # Update specific action metrics
+                if execution.action == ResponseAction.BLOCK_TRANSACTION:
+                    self.metrics["blocked_transactions"] += 1
+                elif execution.action == ResponseAction.SEND_ALERT:
+                    self.metrics["alerts_sent"] += 1
+    
     def _default_action_handler(self, event: FraudEvent, rule: ResponseRule, action: ResponseAction) -> Dict[str, Any]:
         """Default implementation for response actions."""
         if action == ResponseAction.LOG_EVENT:
@@ -570,153 +765,45 @@ class EventResponseSystem:
             return {"action": action.value, "executed": True}
     
     def _correlation_loop(self) -> None:
-        """Event correlation processing loop."""
+        """Expire correlation windows of keys that have gone idle."""
         while self.is_running:
             try:
-                self._detect_event_correlations()
-                time.sleep(5)  # Check every 5 seconds
+                self.correlation_engine.expire(datetime.now())
+                time.sleep(5)
                 
             except Exception as e:
                 logger.error(f"Error in correlation loop: {str(e)}")
                 time.sleep(10)
     
     def _add_to_correlation_window(self, event: FraudEvent) -> None:
-        """Add event to correlation window for pattern detection."""
-        # Group events by user for correlation
-        if event.user_id:
-            key = f"user_{event.user_id}"
-            if key not in self.correlation_windows:
-                self.correlation_windows[key] = []
-            
-            self.correlation_windows[key].append(event)
-            
-            # Keep only recent events
-            cutoff_time = datetime.now() - timedelta(minutes=self.correlation_window_minutes)
-            self.correlation_windows[key] = [
-                e for e in self.correlation_windows[key]
-                if e.timestamp > cutoff_time
-            ]
-            
-            # Limit window size
-            if len(self.correlation_windows[key]) > self.max_correlation_events:
-                self.correlation_windows[key] = self.correlation_windows[key][-self.max_correlation_events:]
-    
-    def _detect_event_correlations(self) -> None:
-        """Detect patterns and correlations in event streams."""
-        for key, events in self.correlation_windows.items():
-            if len(events) < 2:
-                continue
-            
-            # Detect velocity patterns
-            self._detect_velocity_correlation(key, events)
-            
-            # Detect location patterns
-            self._detect_location_correlation(key, events)
-            
-            # Detect device patterns
-            self._detect_device_correlation(key, events)
-    
-    def _detect_velocity_correlation(self, key: str, events: List[FraudEvent]) -> None:
-        """Detect velocity-based correlations."""
-        # Count events in last few minutes
-        recent_events = [
-            e for e in events
-            if (datetime.now() - e.timestamp).total_seconds() < 300  # 5 minutes
-        ]
+        """Insert event into its user's correlation window and act on any correlation it completes."""
+        # Correlation events are not fed back in, so a pattern cannot trigger itself
+        if not event.user_id or event.source_agent == "correlation_engine":
+            return
         
-        if len(recent_events) >= 3:  # 3+ events in 5 minutes
-            correlation_id = f"velocity_{key}_{int(time.time())}"
-            
-            if correlation_id not in self.active_correlations:
-                correlation = EventCorrelation(
-                    correlation_id=correlation_id,
-                    events=recent_events,
-                    pattern_type="high_velocity",
-                    confidence_score=0.8,
-                    created_at=datetime.now(),
-                    time_window_minutes=5,
-                    correlation_factors=["event_frequency", "time_proximity"]
-                )
-                
-                self.active_correlations[correlation_id] = correlation
-                self.metrics["correlations_detected"] += 1
-                
-                logger.warning(f"Detected high velocity pattern: {correlation_id}")
-                
-                # Generate correlation event
-                self._generate_correlation_event(correlation)
-    
-    def _detect_location_correlation(self, key: str, events: List[FraudEvent]) -> None:
-        """Detect location-based correlations."""
-        # Look for impossible travel patterns
-        location_events = [
-            e for e in events
-            if "location" in e.details and e.timestamp > datetime.now() - timedelta(hours=1)
-        ]
+        for match in self.correlation_engine.add(f"user_{event.user_id}", event):
+            self._record_correlation(match)
+    
+    def _record_correlation(self, match: CorrelationMatch) -> None:
+        """Store a detected correlation and raise a correlation event for it."""
+        correlation_id = f"{match.pattern_type}_{match.key}_{uuid.uuid4().hex[:8]}"
+        correlation = EventCorrelation(
+            correlation_id=correlation_id,
+            events=match.events,
+            pattern_type=match.pattern_type,
+            confidence_score=match.confidence_score,
+            created_at=datetime.now(),
+            time_window_minutes=match.time_window_minutes,
+            correlation_factors=match.correlation_factors
+        )
         
-        if len(location_events) >= 2:
-            # Check for impossible travel between locations
-            for i in range(len(location_events) - 1):
-                event1 = location_events[i]
-                event2 = location_events[i + 1]
-                
-                time_diff = abs((event2.timestamp - event1.timestamp).total_seconds())
-                
-                # If events are very close in time but from different locations
-                if time_diff < 3600 and event1.details.get("location") != event2.details.get("location"):
-                    correlation_id = f"location_{key}_{int(time.time())}"
-                    
-                    if correlation_id not in self.active_correlations:
-                        correlation = EventCorrelation(
-                            correlation_id=correlation_id,
-                            events=[event1, event2],
-                            pattern_type="impossible_travel",
-                            confidence_score=0.9,
-                            created_at=datetime.now(),
-                            time_window_minutes=60,
-                            correlation_factors=["location_distance", "time_proximity"]
-                        )
-                        
-                        self.active_correlations[correlation_id] = correlation
-                        self.metrics["correlations_detected"] += 1
-                        
-                        logger.warning(f"Detected impossible travel pattern: {correlation_id}")
-                        
-                        # Generate correlation event
-                        self._generate_correlation_event(correlation)
-    
-    def _detect_device_correlation(self, key: str, events: List[FraudEvent]) -> None:
-        """Detect device-based correlations."""
-        # Look for multiple device usage patterns
-        device_events = [
-            e for e in events
-            if "device_id" in e.details and e.timestamp > datetime.now() - timedelta(hours=1)
-        ]
+        self.active_correlations[correlation_id] = correlation
+        self.metrics["correlations_detected"] += 1
         
-        if len(device_events) >= 2:
-            unique_devices = set(e.details.get("device_id") for e in device_events)
-            
-            if len(unique_devices) >= 3:  # 3+ different devices in 1 hour
-                correlation_id = f"device_{key}_{int(time.time())}"
-                
-                if correlation_id not in self.active_correlations:
-                    correlation = EventCorrelation(
-                        correlation_id=correlation_id,
-                        events=device_events,
-                        pattern_type="multiple_devices",
-                        confidence_score=0.7,
-                        created_at=datetime.now(),
-                        time_window_minutes=60,
-                        correlation_factors=["device_diversity", "time_proximity"]
-                    )
-                    
-                    self.active_correlations[correlation_id] = correlation
-                    self.metrics["correlations_detected"] += 1
-                    
-                    logger.warning(f"Detected multiple device pattern: {correlation_id}")
-                    
-                    # Generate correlation event
-                    self._generate_correlation_event(correlation)
+        logger.warning(f"Detected {match.pattern_type} pattern: {correlation_id}")
+        
+        # Generate correlation event
+        self._generate_correlation_event(correlation)
     
     def _generate_correlation_event(self, correlation: EventCorrelation) -> None:
         """Generate a new event based on detected correlation."""
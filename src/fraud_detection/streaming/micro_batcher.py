@@ -0,0 +1,147 @@
+"""
+Adaptive Micro-Batching
+
+Forms batches from a queue under a latency SLO. The target batch size tracks
+the observed arrival rate (rate x latency budget), so low-rate streams flush
+almost immediately while high-rate streams fill large batches. Events are
+drained from the queue in bulk under a single lock acquisition rather than
+one ``get`` per event.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from queue import Empty, Queue
+from typing import Any, List, Optional, Tuple
+
+
+@dataclass
+class BatchStats:
+    """Per-batch formation metrics."""
+    size: int
+    target_size: int
+    fill_ratio: float  # size / target_size
+    wait_ms: float  # time from the first event being taken to the batch being flushed
+    trigger: str  # "full" or "deadline"
+    arrival_rate: float
+    
+    def to_dict(self) -> dict:
+        """Convert stats to a dictionary."""
+        return {
+            "size": self.size,
+            "target_size": self.target_size,
+            "fill_ratio": self.fill_ratio,
+            "wait_ms": self.wait_ms,
+            "trigger": self.trigger,
+            "arrival_rate": self.arrival_rate
+        }
+
+
+def drain_queue(source: Queue, max_items: int) -> List[Any]:
+    """
+    Remove up to ``max_items`` items from a queue under one lock acquisition.
+    
+    Args:
+        source: Queue to drain
+        max_items: Maximum number of items to take
+    
+    Returns:
+        Items in FIFO order (possibly empty)
+    """
+    with source.mutex:
+        count = min(max_items, len(source.queue))
+        if count <= 0:
+            return []
+        items = [source.queue.popleft() for _ in range(count)]
+        source.not_full.notify(count)
+    return items
+
+
+class AdaptiveBatcher:
+    """
+    Latency-bounded, rate-adaptive batch former.
+    
+    Each call to ``next_batch`` blocks for the first event, then keeps
+    draining until the batch reaches the rate-derived target size or the
+    latency budget since the first event runs out.
+    """
+    
+    def __init__(self, source: Queue, smoothing: float = 0.2):
+        """
+        Initialize batcher.
+        
+        Args:
+            source: Queue events are taken from
+            smoothing: EWMA weight given to the newest arrival-rate sample
+        """
+        self.source = source
+        self.smoothing = smoothing
+        self.arrival_rate = 0.0  # events per second (EWMA)
+        self._last_flush = time.monotonic()
+    
+    def target_size(self, max_batch_size: int, max_latency_ms: float) -> int:
+        """Batch size expected to accumulate within the latency budget at the current rate."""
+        expected = math.ceil(self.arrival_rate * max_latency_ms / 1000.0)
+        return max(1, min(max_batch_size, expected))
+    
+    def next_batch(
+        self,
+        max_batch_size: int,
+        max_latency_ms: float,
+        idle_timeout: float = 1.0
+    ) -> Optional[Tuple[List[Any], BatchStats]]:
+        """
+        Form the next batch.
+        
+        Args:
+            max_batch_size: Hard upper bound on batch size
+            max_latency_ms: Longest the first event may wait for the batch to fill
+            idle_timeout: How long to wait for a first event before returning None
+        
+        Returns:
+            (events, stats), or None if no event arrived within idle_timeout
+        """
+        try:
+            batch = [self.source.get(timeout=idle_timeout)]
+        except Empty:
+            return None
+        
+        started = time.monotonic()
+        deadline = started + max_latency_ms / 1000.0
+        target = self.target_size(max_batch_size, max_latency_ms)
+        trigger = "deadline"
+        
+        while True:
+            batch.extend(drain_queue(self.source, target - len(batch)))
+            if len(batch) >= target:
+                trigger = "full"
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.source.get(timeout=remaining))
+            except Empty:
+                break
+        
+        flushed = time.monotonic()
+        self._update_rate(len(batch), flushed)
+        stats = BatchStats(
+            size=len(batch),
+            target_size=target,
+            fill_ratio=len(batch) / target,
+            wait_ms=(flushed - started) * 1000.0,
+            trigger=trigger,
+            arrival_rate=self.arrival_rate
+        )
+        return batch, stats
+    
+    def _update_rate(self, count: int, now: float) -> None:
+        """Fold the events taken since the previous flush into the rate estimate."""
+        elapsed = max(now - self._last_flush, 1e-3)
+        sample = count / elapsed
+        if self.arrival_rate == 0.0:
+            self.arrival_rate = sample
+        else:
+            self.arrival_rate += self.smoothing * (sample - self.arrival_rate)
+        self._last_flush = now
@@ -0,0 +1,402 @@
+"""
+Segmented Append-Only Replay Log
+
+Stores events as length-prefixed, checksummed records in size-rolled segment
+files. Each segment has a sparse timestamp/offset index so a time-range replay
+seeks straight to the first candidate record instead of scanning every file.
+"""
+
+import bisect
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from itertools import pairwise
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# payload length, event timestamp (microseconds since epoch), crc32 of payload
+RECORD_HEADER = struct.Struct(">IqI")
+# max timestamp of all records before this position, record offset, byte position,
+# min timestamp of all records before this position
+INDEX_ENTRY = struct.Struct(">qqQq")
+
+MIN_TIMESTAMP_US = -(2 ** 63)
+SEGMENT_PREFIX = "events_"
+
+
+def to_timestamp_us(value: datetime) -> int:
+    """Convert a datetime to integer microseconds since the epoch."""
+    return int(value.timestamp() * 1_000_000)
+
+
+def from_timestamp_us(value: int) -> datetime:
+    """Convert integer microseconds since the epoch to a datetime."""
+    return datetime.fromtimestamp(value / 1_000_000)
+
+
+@dataclass
+class LogRecord:
+    """A single record read back from the replay log."""
+    offset: int
+    timestamp: datetime
+    payload: Dict[str, Any]
+
+
+@dataclass
+class LogSegment:
+    """Metadata for one segment file and its sparse index."""
+    base_offset: int
+    log_path: str
+    index_path: str
+    next_offset: int = 0
+    size: int = 0
+    min_timestamp_us: int = 2 ** 63 - 1
+    max_timestamp_us: int = MIN_TIMESTAMP_US
+    index: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    
+    @property
+    def record_count(self) -> int:
+        """Number of records in the segment."""
+        return self.next_offset - self.base_offset
+    
+    def overlaps(self, start_us: int, end_us: int) -> bool:
+        """Whether any record in the segment may fall in [start_us, end_us]."""
+        return self.record_count > 0 and self.max_timestamp_us >= start_us and self.min_timestamp_us <= end_us
+
+
+class SegmentedReplayLog:
+    """
+    Append-only event log split into size-rolled segments.
+    
+    Records are written as ``[length][timestamp][crc32][json payload]``. Every
+    ``index_interval_bytes`` an index entry records the running maximum
+    timestamp seen so far, which is monotonic even when event times are not,
+    so a binary search finds the latest position that can be skipped safely.
+    On open, segment state is restored from the index files and only the
+    records after each segment's last index entry are scanned; torn writes at
+    the tail of the active segment are truncated.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        index_interval_bytes: int = 4096,
+        fsync: bool = False
+    ):
+        """
+        Open (or create) a replay log.
+        
+        Args:
+            directory: Directory holding the segment and index files
+            segment_max_bytes: Size at which the active segment is rolled
+            index_interval_bytes: Bytes of records between sparse index entries
+            fsync: Whether to fsync after every appended batch
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.index_interval_bytes = index_interval_bytes
+        self.fsync = fsync
+        self.segments: List[LogSegment] = []
+        self._lock = threading.Lock()
+        self._log_file: Optional[BinaryIO] = None
+        self._index_file: Optional[BinaryIO] = None
+        self._bytes_since_index = 0
+        
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self._load_segments()
+    
+    @property
+    def next_offset(self) -> int:
+        """Offset that the next appended record will receive."""
+        return self.segments[-1].next_offset if self.segments else 0
+    
+    def append(self, payload: Dict[str, Any], timestamp: datetime) -> int:
+        """
+        Append a single record.
+        
+        Returns:
+            Offset assigned to the record
+        """
+        return self.append_batch([(timestamp, payload)])[0]
+    
+    def append_batch(self, records: List[Tuple[datetime, Dict[str, Any]]]) -> List[int]:
+        """
+        Append records and flush them as one write.
+        
+        Args:
+            records: (timestamp, payload) tuples
+        
+        Returns:
+            Offsets assigned to the records, in order
+        """
+        encoded = [
+            (to_timestamp_us(timestamp), json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+            for timestamp, payload in records
+        ]
+        
+        offsets = []
+        with self._lock:
+            for timestamp_us, data in encoded:
+                segment = self._active_segment(len(data) + RECORD_HEADER.size)
+                if segment.size == 0 or self._bytes_since_index >= self.index_interval_bytes:
+                    self._write_index_entry(segment)
+                
+                self._log_file.write(RECORD_HEADER.pack(len(data), timestamp_us, zlib.crc32(data)))
+                self._log_file.write(data)
+                
+                record_size = RECORD_HEADER.size + len(data)
+                segment.size += record_size
+                segment.min_timestamp_us = min(segment.min_timestamp_us, timestamp_us)
+                segment.max_timestamp_us = max(segment.max_timestamp_us, timestamp_us)
+                offsets.append(segment.next_offset)
+                segment.next_offset += 1
+                self._bytes_since_index += record_size
+            
+            self._flush()
+        return offsets
+    
+    def read(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> Iterator[LogRecord]:
+        """
+        Stream records whose timestamp falls within [start_time, end_time].
+        
+        Segments outside the range are skipped entirely and the first candidate
+        segment is entered at the position found in its sparse index.
+        
+        Yields:
+            LogRecord for each matching record, in log order
+        """
+        start_us = to_timestamp_us(start_time) if start_time else MIN_TIMESTAMP_US
+        end_us = to_timestamp_us(end_time) if end_time else 2 ** 63 - 1
+        
+        for segment, size in self._snapshot():
+            if not segment.overlaps(start_us, end_us):
+                continue
+            position, offset = self._seek_position(segment, start_us)
+            for record_offset, timestamp_us, data in self._iter_segment(segment, position, offset, size):
+                if start_us <= timestamp_us <= end_us:
+                    yield LogRecord(record_offset, from_timestamp_us(timestamp_us), json.loads(data))
+    
+    def read_from(self, offset: int, end_offset: Optional[int] = None) -> Iterator[LogRecord]:
+        """
+        Stream records starting at ``offset``.
+        
+        Args:
+            offset: First offset to return
+            end_offset: Last offset to return (inclusive); defaults to the log end
+        
+        Yields:
+            LogRecord for each offset in range, in order
+        """
+        for segment, size in self._snapshot():
+            if segment.next_offset <= offset:
+                continue
+            if end_offset is not None and segment.base_offset > end_offset:
+                return
+            with self._lock:
+                index = list(segment.index)
+            # Index entries are in offset order, so start from the last one at or before offset
+            position = bisect.bisect_right([entry[1] for entry in index], offset) - 1
+            if position < 0:
+                byte_position, start_offset = 0, segment.base_offset
+            else:
+                start_offset, byte_position = index[position][1:3]
+            for record_offset, timestamp_us, data in self._iter_segment(segment, byte_position, start_offset, size):
+                if end_offset is not None and record_offset > end_offset:
+                    return
+                if record_offset >= offset:
+                    yield LogRecord(record_offset, from_timestamp_us(timestamp_us), json.loads(data))
+    
+    def close(self) -> None:
+        """Flush and close the active segment."""
+        with self._lock:
+            self._close_active()
+    
+    def _snapshot(self) -> List[Tuple[LogSegment, int]]:
+        """Segments and their readable sizes at this instant."""
+        with self._lock:
+            return [(segment, segment.size) for segment in self.segments]
+    
+    def _seek_position(self, segment: LogSegment, start_us: int) -> Tuple[int, int]:
+        """Return (byte position, record offset) of the latest index entry before start_us."""
+        with self._lock:
+            index = list(segment.index)
+        # Every record before an entry has a timestamp <= that entry's running max
+        keys = [entry[0] for entry in index]
+        position = bisect.bisect_left(keys, start_us) - 1
+        if position < 0:
+            return 0, segment.base_offset
+        offset, byte_position = index[position][1:3]
+        return byte_position, offset
+    
+    def _iter_segment(
+        self,
+        segment: LogSegment,
+        position: int,
+        offset: int,
+        size: int
+    ) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (offset, timestamp_us, payload bytes) from position up to size."""
+        with open(segment.log_path, "rb") as f:
+            f.seek(position)
+            while position + RECORD_HEADER.size <= size:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                length, timestamp_us, checksum = RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length or zlib.crc32(data) != checksum:
+                    logger.error(f"Corrupt record at {segment.log_path}:{position}")
+                    return
+                yield offset, timestamp_us, data
+                position += RECORD_HEADER.size + length
+                offset += 1
+    
+    def _active_segment(self, incoming_bytes: int) -> LogSegment:
+        """Return the segment to append to, rolling if it would exceed the size limit; must hold the lock."""
+        if not self.segments:
+            return self._open_segment(0)
+        segment = self.segments[-1]
+        if segment.size > 0 and segment.size + incoming_bytes > self.segment_max_bytes:
+            self._close_active()
+            return self._open_segment(segment.next_offset)
+        if self._log_file is None:
+            self._log_file = open(segment.log_path, "ab")
+            self._index_file = open(segment.index_path, "ab")
+        return segment
+    
+    def _open_segment(self, base_offset: int) -> LogSegment:
+        """Create a new empty segment; must hold the lock."""
+        name = f"{SEGMENT_PREFIX}{base_offset:020d}"
+        segment = LogSegment(
+            base_offset=base_offset,
+            log_path=os.path.join(self.directory, f"{name}.log"),
+            index_path=os.path.join(self.directory, f"{name}.index"),
+            next_offset=base_offset
+        )
+        self._log_file = open(segment.log_path, "ab")
+        self._index_file = open(segment.index_path, "ab")
+        self._bytes_since_index = 0
+        self.segments.append(segment)
+        logger.debug(f"Opened replay segment {segment.log_path}")
+        return segment
+    
+    def _write_index_entry(self, segment: LogSegment) -> None:
+        """Append a sparse index entry at the current write position; must hold the lock."""
+        entry = (segment.max_timestamp_us, segment.next_offset, segment.size, segment.min_timestamp_us)
+        self._index_file.write(INDEX_ENTRY.pack(*entry))
+        segment.index.append(entry)
+        self._bytes_since_index = 0
+    
+    def _flush(self) -> None:
+        """Flush the active files so readers see appended records; must hold the lock."""
+        for f in (self._log_file, self._index_file):
+            if f is not None:
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+    
+    def _close_active(self) -> None:
+        """Close the active segment's files; must hold the lock."""
+        self._flush()
+        for f in (self._log_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._log_file = None
+        self._index_file = None
+    
+    def _load_segments(self) -> None:
+        """Load existing segments, rebuilding index state and truncating any torn tail."""
+        names = sorted(
+            name[:-len(".log")] for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".log")
+        )
+        for name in names:
+            base_offset = int(name[len(SEGMENT_PREFIX):])
+            segment = LogSegment(
+                base_offset=base_offset,
+                log_path=os.path.join(self.directory, f"{name}.log"),
+                index_path=os.path.join(self.directory, f"{name}.index"),
+                next_offset=base_offset
+            )
+            self._recover_segment(segment)
+            self.segments.append(segment)
+        
+        if self.segments:
+            last = self.segments[-1]
+            last_indexed = last.index[-1][2] if last.index else 0
+            self._bytes_since_index = last.size - last_indexed
+    
+    def _recover_segment(self, segment: LogSegment) -> None:
+        """Restore a segment's offsets, time range and index, scanning only records past its last index entry."""
+        file_size = os.path.getsize(segment.log_path)
+        segment.index, index_changed = self._read_index(segment, file_size)
+        while True:
+            if segment.index:
+                running_max, offset, start, running_min = segment.index[-1]
+            else:
+                running_max, offset, start, running_min = MIN_TIMESTAMP_US, segment.base_offset, 0, 2 ** 63 - 1
+            
+            position = start
+            since_index = 0 if segment.index else self.index_interval_bytes
+            for record_offset, timestamp_us, data in self._iter_segment(segment, start, offset, file_size):
+                if since_index >= self.index_interval_bytes:
+                    segment.index.append((running_max, record_offset, position, running_min))
+                    index_changed = True
+                    since_index = 0
+                record_size = RECORD_HEADER.size + len(data)
+                position += record_size
+                since_index += record_size
+                offset = record_offset + 1
+                running_max = max(running_max, timestamp_us)
+                running_min = min(running_min, timestamp_us)
+            
+            # Nothing readable at the last index entry: it may point past a torn write, so step back one entry
+            if segment.index and position == start < file_size:
+                segment.index.pop()
+                index_changed = True
+                continue
+            break
+        
+        if position < file_size:
+            logger.warning(f"Truncating torn tail of {segment.log_path} at byte {position}")
+            with open(segment.log_path, "r+b") as f:
+                f.truncate(position)
+        
+        segment.size = position
+        segment.next_offset = offset
+        segment.min_timestamp_us = running_min
+        segment.max_timestamp_us = running_max
+        if index_changed:
+            with open(segment.index_path, "wb") as f:
+                for entry in segment.index:
+                    f.write(INDEX_ENTRY.pack(*entry))
+    
+    def _read_index(self, segment: LogSegment, file_size: int) -> Tuple[List[Tuple[int, int, int, int]], bool]:
+        """
+        Load a segment's index file.
+        
+        Returns:
+            The usable entries, and whether any were dropped (torn or past the
+            end of the log); no entries if the file is missing or inconsistent
+        """
+        try:
+            with open(segment.index_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return [], True
+        
+        usable = len(raw) - len(raw) % INDEX_ENTRY.size
+        entries = [entry for entry in INDEX_ENTRY.iter_unpack(raw[:usable]) if entry[2] <= file_size]
+        if not entries or entries[0][1:3] != (segment.base_offset, 0) or any(
+            later[1] <= earlier[1] or later[2] <= earlier[2] for earlier, later in pairwise(entries)
+        ):
+            return [], True
+        return entries, len(entries) * INDEX_ENTRY.size != len(raw)
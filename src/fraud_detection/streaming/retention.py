@@ -0,0 +1,178 @@
+"""
+Bounded Retention
+
+Keeps in-memory event, execution and correlation history within TTL and
+count limits. Records are evicted oldest-first and folded into compact
+rollup summaries, and evicted executions can optionally be spilled to an
+append-only columnar archive on disk for later analysis.
+"""
+
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fraud_detection.streaming.column_block import ColumnBatch, decode_column_block, encode_column_block
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_RECORD_HEADER = struct.Struct(">I")
+
+
+@dataclass
+class RetentionPolicy:
+    """TTL and count limits for in-memory history."""
+    ttl_seconds: float = 24 * 3600.0
+    max_processed_events: int = 50000
+    max_executions: int = 100000
+    max_correlations: int = 10000
+    rule_count_retention_hours: int = 2  # hourly rate-limit buckets kept per rule
+    check_interval_seconds: float = 60.0
+    overflow_slack: float = 0.1  # fraction over a count limit that triggers an early sweep
+    archive_directory: Optional[str] = None  # spill evicted executions here when set
+
+
+@dataclass
+class ArchiveSummary:
+    """Compact rollup of records evicted from memory."""
+    count: int = 0
+    first_at: Optional[datetime] = None
+    last_at: Optional[datetime] = None
+    by_key: Dict[str, int] = field(default_factory=dict)
+    total_duration_ms: float = 0.0
+    
+    def add(self, key: str, at: datetime, duration_ms: float = 0.0) -> None:
+        """Fold one evicted record into the summary."""
+        self.count += 1
+        self.by_key[key] = self.by_key.get(key, 0) + 1
+        self.total_duration_ms += duration_ms
+        if self.first_at is None or at < self.first_at:
+            self.first_at = at
+        if self.last_at is None or at > self.last_at:
+            self.last_at = at
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert summary to a dictionary."""
+        return {
+            "count": self.count,
+            "first_at": self.first_at.isoformat() if self.first_at else None,
+            "last_at": self.last_at.isoformat() if self.last_at else None,
+            "by_key": dict(self.by_key),
+            "avg_duration_ms": self.total_duration_ms / self.count if self.count else 0.0
+        }
+
+
+def evict_from_mapping(
+    records: "OrderedDict[str, Any]",
+    max_size: int,
+    cutoff: datetime,
+    timestamp_of: Callable[[Any], datetime]
+) -> List[Any]:
+    """
+    Evict the oldest entries of an insertion-ordered mapping.
+    
+    Entries are removed from the front while the mapping is over ``max_size``
+    or the front entry is older than ``cutoff``; the sweep stops at the first
+    entry that is within both limits.
+    
+    Returns:
+        Evicted values, oldest first
+    """
+    evicted = []
+    while records:
+        oldest = next(iter(records.values()))
+        if len(records) <= max_size and timestamp_of(oldest) >= cutoff:
+            break
+        evicted.append(records.popitem(last=False)[1])
+    return evicted
+
+
+def evict_from_list(
+    records: List[Any],
+    max_size: int,
+    cutoff: datetime,
+    timestamp_of: Callable[[Any], datetime]
+) -> List[Any]:
+    """
+    Evict the oldest entries of an append-ordered list in one slice deletion.
+    
+    Returns:
+        Evicted values, oldest first
+    """
+    count = max(0, len(records) - max_size)
+    while count < len(records) and timestamp_of(records[count]) < cutoff:
+        count += 1
+    if count == 0:
+        return []
+    evicted = records[:count]
+    del records[:count]
+    return evicted
+
+
+class ColumnarArchive:
+    """
+    Append-only on-disk archive of column blocks.
+    
+    Each append writes one length-prefixed column block, so a spill of many
+    rows is a single sequential write and readers can decode block by block.
+    """
+    
+    def __init__(self, directory: str, name: str):
+        """
+        Initialize archive.
+        
+        Args:
+            directory: Directory holding archive files
+            name: Archive name; files are ``<name>_<YYYYMMDD>.colarc``
+        """
+        self.directory = directory
+        self.name = name
+        self.rows_written = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def path_for(self, day: datetime) -> str:
+        """Archive file holding rows spilled on ``day``."""
+        return os.path.join(self.directory, f"{self.name}_{day.strftime('%Y%m%d')}.colarc")
+    
+    def append(self, rows: List[Dict[str, Any]], now: Optional[datetime] = None) -> int:
+        """
+        Append rows as one column block.
+        
+        Returns:
+            Number of rows written (0 on error)
+        """
+        if not rows:
+            return 0
+        
+        try:
+            block = encode_column_block(rows)
+            with self._lock:
+                with open(self.path_for(now or datetime.now()), "ab") as f:
+                    f.write(ARCHIVE_RECORD_HEADER.pack(len(block)) + block)
+                self.rows_written += len(rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error writing {self.name} archive: {str(e)}")
+            return 0
+    
+    def read(self) -> Iterator[ColumnBatch]:
+        """Yield every archived block, oldest file first."""
+        prefix = f"{self.name}_"
+        for filename in sorted(os.listdir(self.directory)):
+            if not (filename.startswith(prefix) and filename.endswith(".colarc")):
+                continue
+            with open(os.path.join(self.directory, filename), "rb") as f:
+                while True:
+                    header = f.read(ARCHIVE_RECORD_HEADER.size)
+                    if len(header) < ARCHIVE_RECORD_HEADER.size:
+                        break
+                    length = ARCHIVE_RECORD_HEADER.unpack(header)[0]
+                    block = f.read(length)
+                    if len(block) < length:
+                        break  # torn tail from an interrupted write
+                    yield decode_column_block(block)
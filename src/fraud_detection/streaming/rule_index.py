@@ -0,0 +1,146 @@
+"""
+Compiled Response Rule Index
+
+Indexes response rules by (event type, severity level) so matching an event
+touches only the rules that can apply to it. Each bucket is kept sorted by
+priority as rules are added and removed, and rule conditions are compiled
+once into predicate closures instead of being re-interpreted per event.
+"""
+
+import bisect
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from fraud_detection.streaming.event_response_system import FraudEvent, ResponseRule
+
+Predicate = Callable[["FraudEvent"], bool]
+
+
+def compile_conditions(conditions: Dict[str, Any]) -> Predicate:
+    """
+    Compile a rule's ``conditions`` dict into a single predicate.
+    
+    Args:
+        conditions: Rule conditions (min_risk_score, min_confidence, user_ids,
+            min_amount, time_window)
+    
+    Returns:
+        Predicate returning True if an event satisfies every condition
+    """
+    checks: List[Predicate] = []
+    
+    if "min_risk_score" in conditions:
+        min_risk_score = conditions["min_risk_score"]
+        checks.append(lambda event: event.risk_score >= min_risk_score)
+    
+    if "min_confidence" in conditions:
+        min_confidence = conditions["min_confidence"]
+        checks.append(lambda event: event.confidence_score >= min_confidence)
+    
+    if "user_ids" in conditions:
+        try:
+            user_ids = frozenset(conditions["user_ids"])
+        except TypeError:
+            user_ids = list(conditions["user_ids"])
+        checks.append(lambda event: event.user_id in user_ids)
+    
+    if "min_amount" in conditions:
+        min_amount = conditions["min_amount"]
+        checks.append(lambda event: not event.transaction_id or event.details.get("amount", 0) >= min_amount)
+    
+    window = conditions.get("time_window", {})
+    if "start_hour" in window and "end_hour" in window:
+        start_hour, end_hour = window["start_hour"], window["end_hour"]
+        checks.append(lambda event: start_hour <= event.timestamp.hour <= end_hour)
+    
+    if not checks:
+        return lambda event: True
+    if len(checks) == 1:
+        return checks[0]
+    return lambda event: all(check(event) for check in checks)
+
+
+@dataclass(order=True)
+class CompiledRule:
+    """A rule with its precompiled predicate, ordered by (priority, insertion order)."""
+    priority: int
+    sequence: int
+    rule: "ResponseRule" = field(compare=False)
+    predicate: Predicate = field(compare=False)
+
+
+class RuleIndex:
+    """
+    Priority-ordered rule buckets keyed by (EventType, severity value).
+    
+    A rule is placed in the bucket of every event type it lists and every
+    severity at or above its threshold, so a lookup is a single dict access
+    returning candidates already in priority order. Buckets are replaced
+    copy-on-write, so lookups never take the lock.
+    """
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        self._buckets: Dict[Tuple[Any, int], Tuple[CompiledRule, ...]] = {}
+        self._rules: Dict[str, Tuple[CompiledRule, List[Tuple[Any, int]]]] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._rules)
+    
+    def add(self, rule: "ResponseRule") -> None:
+        """Index a rule, replacing any previous version with the same ID."""
+        with self._lock:
+            previous = self._rules.get(rule.rule_id)
+            sequence = previous[0].sequence if previous else next(self._sequence)
+            if previous:
+                self._unindex(rule.rule_id)
+            
+            compiled = CompiledRule(rule.priority, sequence, rule, compile_conditions(rule.conditions))
+            keys = [
+                (event_type, severity.value)
+                for event_type in dict.fromkeys(rule.event_types)
+                for severity in type(rule.severity_threshold)
+                if severity.value >= rule.severity_threshold.value
+            ]
+            for key in keys:
+                bucket = list(self._buckets.get(key, ()))
+                bisect.insort(bucket, compiled)
+                self._buckets[key] = tuple(bucket)
+            self._rules[rule.rule_id] = (compiled, keys)
+    
+    def remove(self, rule_id: str) -> bool:
+        """Remove a rule; returns False if it was not indexed."""
+        with self._lock:
+            if rule_id not in self._rules:
+                return False
+            self._unindex(rule_id)
+            return True
+    
+    def candidates(self, event: "FraudEvent") -> Tuple[CompiledRule, ...]:
+        """Rules whose event type and severity threshold admit the event, in priority order."""
+        return self._buckets.get((event.event_type, event.severity.value), ())
+    
+    def predicate_for(self, rule: "ResponseRule") -> Predicate:
+        """Compiled predicate for an indexed rule, compiling on the fly otherwise."""
+        entry = self._rules.get(rule.rule_id)
+        if entry is not None and entry[0].rule is rule:
+            return entry[0].predicate
+        return compile_conditions(rule.conditions)
+    
+    def _unindex(self, rule_id: str) -> None:
+        """Drop a rule from its buckets; must hold the lock."""
+        compiled, keys = self._rules.pop(rule_id)
+        for key in keys:
+            bucket = list(self._buckets.get(key, ()))
+            position = bisect.bisect_left(bucket, compiled)
+            if position < len(bucket) and bucket[position].rule is compiled.rule:
+                del bucket[position]
+            if bucket:
+                self._buckets[key] = tuple(bucket)
+            else:
+                self._buckets.pop(key, None)
@@ -7,24 +7,54 @@ and comprehensive audit logging for high-volume event processing.
 
 import logging
 import asyncio
-import json
 import time
-import gzip
-import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable, AsyncGenerator
+from typing import Dict, List, Optional, Any, Callable, AsyncGenerator, Set
 from dataclasses import dataclass, field
 from enum import Enum
 import threading
+from collections import deque
 from queue import Queue, PriorityQueue, Empty
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import Future, ProcessPoolExecutor
 import uuid
 import os
+import pickle
 from pathlib import Path
 
+from fraud_detection.streaming.audit_writer import AuditLogWriter, FsyncPolicy
+from fraud_detection.streaming.checkpoint import (
+    DEFAULT_PARTITION,
+    OffsetCommitTracker,
+    load_checkpoint,
+    write_checkpoint
+)
+from fraud_detection.streaming.column_block import BlockHandle, open_column_block, pack_column_block
+from fraud_detection.streaming.micro_batcher import AdaptiveBatcher, BatchStats
+from fraud_detection.streaming.replay_log import SegmentedReplayLog
+from fraud_detection.streaming.stream_metrics import LatencyHistogram, ShardedCounter
+from fraud_detection.streaming.worker_pool import (
+    CancellationToken,
+    LoadAwareScalingPolicy,
+    ScalingDecision,
+    WorkerHandle,
+    WorkerPool
+)
+
 logger = logging.getLogger(__name__)
 
 
+def _run_batch_processors(processors: List[Callable], handle: BlockHandle) -> List[str]:
+    """Decode a column block in a worker process and run batch processors over it."""
+    events = open_column_block(handle)
+    errors = []
+    for processor in processors:
+        try:
+            processor(events)
+        except Exception as e:
+            errors.append(f"{getattr(processor, '__name__', repr(processor))}: {str(e)}")
+    return errors
+
+
 class ProcessingMode(Enum):
     """Event processing modes."""
     REAL_TIME = "real_time"
@@ -73,20 +103,13 @@ class ProcessingMetrics:
     queue_depth: int = 0
     active_workers: int = 0
     batch_size_avg: float = 0.0
+    batch_fill_ratio: float = 0.0
+    batch_wait_p50_ms: float = 0.0
+    batch_wait_p99_ms: float = 0.0
     throughput_trend: List[float] = field(default_factory=list)
     last_updated: datetime = field(default_factory=datetime.now)
 
 
-@dataclass
-class ScalingDecision:
-    """Auto-scaling decision."""
-    action: str  # "scale_up", "scale_down", "no_change"
-    target_workers: int
-    reason: str
-    confidence: float
-    timestamp: datetime
-
-
 class ScalableEventProcessor:
     """
     Scalable event processing architecture with auto-scaling,
@@ -110,13 +133,22 @@ class ScalableEventProcessor:
         
         # Event processing
         self.event_buffer = Queue(maxsize=buffer_size)
+        self.batcher = AdaptiveBatcher(self.event_buffer)
+        self.max_batch_latency_ms = 250.0  # latency SLO for batch formation
+        self.recent_batches: deque = deque(maxlen=100)
+        self.batch_wait_histogram = LatencyHistogram()
         self.batch_queue = PriorityQueue()
         self.processing_queue = Queue()
         
         # Worker management
-        self.workers = []
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.process_executor = ProcessPoolExecutor(max_workers=4)
+        self.worker_pool = WorkerPool(self._worker_loop)
+        
+        # CPU-bound batch lane (created on first BATCH-mode batch)
+        self.process_pool_workers = 4
+        self.shared_memory_threshold = 1024 * 1024  # 1MB
+        self.process_executor: Optional[ProcessPoolExecutor] = None
+        self._process_executor_lock = threading.Lock()
+        self._batch_slots: Optional[threading.Semaphore] = None
         
         # Auto-scaling
         self.scaling_strategy = ScalingStrategy.ADAPTIVE
@@ -124,21 +156,38 @@ class ScalableEventProcessor:
         self.scale_down_threshold = 0.3
         self.scaling_cooldown = 60  # seconds
         self.last_scaling_action = datetime.now()
+        self.scaling_policy = LoadAwareScalingPolicy(min_workers=min_workers, max_workers=max_workers)
+        self.scaling_events: deque = deque(maxlen=100)
+        self.scaling_handlers: List[Callable[[ScalingDecision], None]] = []
+        self.arrival_counter = ShardedCounter()
+        self.last_arrival_count = 0
+        self.last_scaling_check = time.time()
         
         # Event replay and recovery
         self.enable_replay = True
         self.replay_storage_path = "event_replay"
+        self.replay_segment_size = 64 * 1024 * 1024  # 64MB
+        self.replay_index_interval = 4096  # bytes between sparse index entries
+        self._replay_log: Optional[SegmentedReplayLog] = None
+        self._replay_log_lock = threading.Lock()
         self.checkpoint_interval = 1000  # events
+        self.checkpoint_check_interval = 5.0  # seconds
         self.last_checkpoint = 0
+        self.offset_tracker = OffsetCommitTracker()
         
         # Audit logging
         self.enable_audit_logging = True
         self.audit_log_path = "audit_logs"
         self.log_rotation_size = 100 * 1024 * 1024  # 100MB
         self.log_compression = True
+        self.audit_queue_size = 10000
+        self.audit_fsync_policy = FsyncPolicy.INTERVAL
+        self._audit_writer: Optional[AuditLogWriter] = None
+        self._audit_writer_lock = threading.Lock()
         
         # Metrics and monitoring
         self.metrics = ProcessingMetrics()
+        self.latency_histogram = LatencyHistogram()
         self.performance_history = []
         
         # State management
@@ -148,6 +197,7 @@ class ScalableEventProcessor:
         # Event handlers
         self.event_processors: List[Callable] = []
         self.batch_processors: List[Callable] = []
+        self._cpu_bound_processors: Set[int] = set()  # id() of batch processors opted in to the process pool
         
         # Initialize storage directories
         self._initialize_storage()
@@ -167,11 +217,42 @@ class ScalableEventProcessor:
         self.event_processors.append(processor)
         logger.debug("Added event processor")
     
-    def add_batch_processor(self, processor: Callable) -> None:
-        """Add batch processor for batch processing."""
+    def add_batch_processor(self, processor: Callable, cpu_bound: bool = False) -> None:
+        """
+        Add batch processor for batch processing.
+        
+        Processors run in this process and receive the batch's list of event
+        dicts. A ``cpu_bound`` processor instead runs in the process pool in
+        BATCH mode, receiving a read-only column view of the batch in which
+        datetimes are strings; it must be picklable and its side effects stay
+        in the worker process.
+        
+        Args:
+            processor: Callable taking the batch's events
+            cpu_bound: Run the processor in the batch-lane process pool
+        
+        Raises:
+            ValueError: If a cpu_bound processor cannot be pickled
+        """
+        if cpu_bound:
+            try:
+                pickle.dumps(processor)
+            except Exception as e:
+                raise ValueError(f"cpu_bound batch processor must be picklable: {str(e)}") from e
+            self._cpu_bound_processors.add(id(processor))
         self.batch_processors.append(processor)
         logger.debug("Added batch processor")
     
+    def add_scaling_handler(self, handler: Callable[[ScalingDecision], None]) -> None:
+        """Add handler that receives every executed auto-scaling decision."""
+        self.scaling_handlers.append(handler)
+        logger.debug("Added scaling handler")
+    
+    @property
+    def workers(self) -> List[WorkerHandle]:
+        """Active (non-retiring) workers."""
+        return self.worker_pool.active
+    
     def start(self) -> None:
         """Start the scalable event processor."""
         if self.is_running:
@@ -204,13 +285,21 @@ class ScalableEventProcessor:
         for thread in self.processor_threads:
             thread.join(timeout=5)
         
-        # Shutdown executors
-        self.executor.shutdown(wait=True)
-        self.process_executor.shutdown(wait=True)
+        # Retire workers, then shutdown executors
+        self.worker_pool.stop(timeout=5)
+        if self.process_executor is not None:
+            self.process_executor.shutdown(wait=True)
+            self.process_executor = None
         
         # Final checkpoint
         if self.enable_replay:
             self._create_checkpoint()
+            if self._replay_log is not None:
+                self._replay_log.close()
+        
+        # Drain pending audit entries
+        if self._audit_writer is not None:
+            self._audit_writer.close()
         
         logger.info("Scalable event processor stopped")
     
@@ -223,6 +312,7 @@ class ScalableEventProcessor:
             
             # Add to buffer
             self.event_buffer.put_nowait(event)
+            self.arrival_counter.add()
             
             # Audit log
             if self.enable_audit_logging:
@@ -262,6 +352,16 @@ class ScalableEventProcessor:
         """Get current processing metrics."""
         self.metrics.queue_depth = self.event_buffer.qsize()
         self.metrics.active_workers = len(self.workers)
+        self.metrics.average_latency_ms = self.latency_histogram.mean
+        
+        recent_batches = list(self.recent_batches)
+        if recent_batches:
+            self.metrics.batch_size_avg = sum(b.size for b in recent_batches) / len(recent_batches)
+            self.metrics.batch_fill_ratio = sum(b.fill_ratio for b in recent_batches) / len(recent_batches)
+        wait_percentiles = self.batch_wait_histogram.percentiles([50.0, 99.0])
+        self.metrics.batch_wait_p50_ms = wait_percentiles[50.0]
+        self.metrics.batch_wait_p99_ms = wait_percentiles[99.0]
+        
         self.metrics.last_updated = datetime.now()
         return self.metrics
     
@@ -289,10 +389,23 @@ class ScalableEventProcessor:
                 "average_latency_ms": metrics.average_latency_ms,
                 "error_rate": metrics.error_rate
             },
+            "batching": {
+                "max_batch_size": self.batch_size,
+                "max_batch_latency_ms": self.max_batch_latency_ms,
+                "target_batch_size": self.batcher.target_size(self.batch_size, self.max_batch_latency_ms),
+                "arrival_rate": self.batcher.arrival_rate,
+                "batch_size_avg": metrics.batch_size_avg,
+                "fill_ratio_avg": metrics.batch_fill_ratio,
+                "wait_p50_ms": metrics.batch_wait_p50_ms,
+                "wait_p99_ms": metrics.batch_wait_p99_ms,
+                "recent": [stats.to_dict() for stats in list(self.recent_batches)[-10:]]
+            },
             "storage": {
                 "replay_enabled": self.enable_replay,
                 "audit_logging_enabled": self.enable_audit_logging,
-                "last_checkpoint": self.last_checkpoint
+                "audit_writer": self._audit_writer.get_stats() if self._audit_writer else None,
+                "last_checkpoint": self.last_checkpoint,
+                "committed_offset": self.offset_tracker.committed_offset
             }
         }
     
@@ -306,22 +419,16 @@ class ScalableEventProcessor:
         replayed_count = 0
         
         try:
-            # Find replay files in time range
-            replay_files = self._find_replay_files(start_time, end_time)
-            
-            for file_path in replay_files:
-                events = self._load_replay_file(file_path)
+            # Stream records straight from the first index position before start_time
+            for record in self._get_replay_log().read(start_time, end_time):
+                event = record.payload
                 
-                for event in events:
-                    event_time = datetime.fromisoformat(event.get("_submitted_at", ""))
-                    
-                    if start_time <= event_time <= end_time:
-                        # Mark as replay event
-                        event["_is_replay"] = True
-                        event["_replayed_at"] = datetime.now().isoformat()
-                        
-                        self.submit_event(event)
-                        replayed_count += 1
+                # Mark as replay event
+                event["_is_replay"] = True
+                event["_replayed_at"] = datetime.now().isoformat()
+                
+                if self.submit_event(event):
+                    replayed_count += 1
             
             logger.info(f"Replayed {replayed_count} events from {start_time} to {end_time}")
             return replayed_count
@@ -331,36 +438,26 @@ class ScalableEventProcessor:
             return 0
     
     def _event_buffer_manager(self) -> None:
-        """Manage event buffer and create batches."""
-        batch_events = []
-        last_batch_time = time.time()
-        
+        """Form latency-bounded batches from the event buffer."""
         while self.is_running:
             try:
-                # Get events from buffer
-                try:
-                    event = self.event_buffer.get(timeout=1.0)
-                    batch_events.append(event)
-                except Empty:
-                    pass
-                
-                current_time = time.time()
-                
-                # Create batch if conditions are met
-                should_create_batch = (
-                    len(batch_events) >= self.batch_size or
-                    (batch_events and (current_time - last_batch_time) > 5.0)  # 5 second timeout
-                )
+                result = self.batcher.next_batch(self.batch_size, self.max_batch_latency_ms, idle_timeout=1.0)
+                if result is None:
+                    continue
                 
-                if should_create_batch and batch_events:
-                    self._create_event_batch(batch_events)
-                    batch_events = []
-                    last_batch_time = current_time
+                events, stats = result
+                self._record_batch_stats(stats)
+                self._create_event_batch(events)
                 
             except Exception as e:
                 logger.error(f"Error in event buffer manager: {str(e)}")
                 time.sleep(1)
     
+    def _record_batch_stats(self, stats: BatchStats) -> None:
+        """Record fill and wait-time metrics for a formed batch."""
+        self.recent_batches.append(stats)
+        self.batch_wait_histogram.record(stats.wait_ms)
+    
     def _create_event_batch(self, events: List[Dict[str, Any]]) -> None:
         """Create and queue event batch."""
         batch = EventBatch(
@@ -373,15 +470,34 @@ class ScalableEventProcessor:
         if self.enable_replay:
             self._store_replay_batch(batch)
         
+        self._queue_batch(batch)
+    
+    def _queue_batch(self, batch: EventBatch) -> None:
+        """Track a batch's log offsets and hand it to the processing lanes."""
+        offsets = batch.metadata.get("offsets")
+        if offsets:
+            for event in batch.events:
+                event["_batch_id"] = batch.batch_id
+            self.offset_tracker.begin(batch.batch_id, offsets[0], offsets[1], parts=self._batch_parts(batch))
+        
         # Queue for processing
         if self.processing_mode in [ProcessingMode.BATCH, ProcessingMode.HYBRID]:
             self.batch_queue.put_nowait(batch)
         
         # Process individually for real-time mode
         if self.processing_mode in [ProcessingMode.REAL_TIME, ProcessingMode.HYBRID]:
-            for event in events:
+            for event in batch.events:
                 self.processing_queue.put_nowait(event)
     
+    def _batch_parts(self, batch: EventBatch) -> int:
+        """Number of completions needed before a batch's offsets can commit."""
+        parts = 0
+        if self.processing_mode in [ProcessingMode.BATCH, ProcessingMode.HYBRID]:
+            parts += 1
+        if self.processing_mode in [ProcessingMode.REAL_TIME, ProcessingMode.HYBRID]:
+            parts += len(batch.events)
+        return parts
+    
     def _batch_processor(self) -> None:
         """Process event batches."""
         while self.is_running:
@@ -397,6 +513,10 @@ class ScalableEventProcessor:
     
     def _process_batch(self, batch: EventBatch) -> None:
         """Process a single event batch."""
+        if self.processing_mode == ProcessingMode.BATCH and self.batch_processors:
+            self._dispatch_batch(batch)
+            return
+        
         start_time = time.time()
         
         try:
@@ -407,23 +527,106 @@ class ScalableEventProcessor:
                 except Exception as e:
                     logger.error(f"Error in batch processor: {str(e)}")
             
-            # Update metrics
-            processing_time = (time.time() - start_time) * 1000
-            self.metrics.events_processed += len(batch.events)
-            
-            # Audit log
-            if self.enable_audit_logging:
-                self._audit_log("batch_processed", batch.batch_id, {
-                    "event_count": len(batch.events),
-                    "processing_time_ms": processing_time
-                })
+            self._complete_batch(batch, start_time)
             
         except Exception as e:
             logger.error(f"Error processing batch {batch.batch_id}: {str(e)}")
     
-    def _worker_loop(self, worker_id: str) -> None:
-        """Individual worker processing loop."""
-        while self.is_running:
+    def _complete_batch(self, batch: EventBatch, start_time: float) -> None:
+        """Record metrics and audit entry for a finished batch."""
+        processing_time = (time.time() - start_time) * 1000
+        self.metrics.events_processed += len(batch.events)
+        self.offset_tracker.complete(batch.batch_id)
+        
+        # Audit log
+        if self.enable_audit_logging:
+            self._audit_log("batch_processed", batch.batch_id, {
+                "event_count": len(batch.events),
+                "processing_time_ms": processing_time
+            })
+    
+    def _fail_batch(self, batch: EventBatch, start_time: float, error: str) -> None:
+        """Dead-letter a batch that could not be processed so it does not hold back checkpoint commits."""
+        processing_time = (time.time() - start_time) * 1000
+        self.offset_tracker.complete(batch.batch_id)
+        
+        # The audit log keeps the failed batch's offsets for manual replay
+        if self.enable_audit_logging:
+            self._audit_log("batch_failed", batch.batch_id, {
+                "event_count": len(batch.events),
+                "offsets": batch.metadata.get("offsets"),
+                "error": error,
+                "processing_time_ms": processing_time
+            })
+    
+    def _get_process_executor(self) -> ProcessPoolExecutor:
+        """Return the batch-lane process pool, creating it on first use."""
+        with self._process_executor_lock:
+            if self.process_executor is None:
+                self.process_executor = ProcessPoolExecutor(max_workers=self.process_pool_workers)
+                # Bound in-flight batches so encoded blocks cannot pile up unboundedly
+                self._batch_slots = threading.Semaphore(self.process_pool_workers * 2)
+            return self.process_executor
+    
+    def _dispatch_batch(self, batch: EventBatch) -> None:
+        """Run in-process batch processors, then ship the batch to the process pool for cpu_bound ones."""
+        start_time = time.time()
+        remote_processors = []
+        
+        for processor in self.batch_processors:
+            if id(processor) in self._cpu_bound_processors:
+                remote_processors.append(processor)
+                continue
+            try:
+                processor(batch.events)
+            except Exception as e:
+                logger.error(f"Error in batch processor: {str(e)}")
+        
+        if not remote_processors:
+            self._complete_batch(batch, start_time)
+            return
+        
+        shm = None
+        slot_held = False
+        try:
+            executor = self._get_process_executor()
+            handle, shm = pack_column_block(batch.events, self.shared_memory_threshold)
+            self._batch_slots.acquire()
+            slot_held = True
+            future = executor.submit(_run_batch_processors, remote_processors, handle)
+        except Exception as e:
+            if slot_held:
+                self._batch_slots.release()
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            logger.error(f"Error dispatching batch {batch.batch_id}: {str(e)}")
+            self._fail_batch(batch, start_time, str(e))
+            return
+        
+        future.add_done_callback(lambda f: self._on_batch_done(f, batch, shm, start_time))
+    
+    def _on_batch_done(self, future: Future, batch: EventBatch, shm: Optional[Any], start_time: float) -> None:
+        """Release a dispatched batch's resources and record its outcome."""
+        self._batch_slots.release()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        
+        try:
+            errors = future.result()
+        except Exception as e:
+            logger.error(f"Error processing batch {batch.batch_id}: {str(e)}")
+            self._fail_batch(batch, start_time, str(e))
+            return
+        
+        for error in errors:
+            logger.error(f"Error in batch processor: {error}")
+        self._complete_batch(batch, start_time)
+    
+    def _worker_loop(self, worker_id: str, token: CancellationToken) -> None:
+        """Individual worker processing loop; exits when stopped or retired."""
+        while self.is_running and not token.cancelled:
             try:
                 event = self.processing_queue.get(timeout=1.0)
                 self._process_single_event(event, worker_id)
@@ -432,7 +635,7 @@ class ScalableEventProcessor:
                 continue
             except Exception as e:
                 logger.error(f"Error in worker {worker_id}: {str(e)}")
-                time.sleep(1)
+                token.wait(1)
     
     def _process_single_event(self, event: Dict[str, Any], worker_id: str) -> None:
         """Process a single event."""
@@ -449,6 +652,9 @@ class ScalableEventProcessor:
             # Update metrics
             processing_time = (time.time() - start_time) * 1000
             self.metrics.events_processed += 1
+            self.latency_histogram.record(processing_time)
+            if "_batch_id" in event:
+                self.offset_tracker.complete(event["_batch_id"])
             
             # Audit log
             if self.enable_audit_logging:
@@ -513,16 +719,41 @@ class ScalableEventProcessor:
     def _make_scaling_decision(self) -> ScalingDecision:
         """Make auto-scaling decision based on current metrics."""
         current_workers = len(self.workers)
-        queue_utilization = self.event_buffer.qsize() / self.buffer_size
+        queue_depth = self.event_buffer.qsize()
+        
+        if self.scaling_strategy == ScalingStrategy.QUEUE_BASED:
+            return self._make_queue_based_decision(current_workers, queue_depth)
+        
+        # Load-aware sizing from arrival rate and p95 service time (Little's law)
+        now = time.time()
+        elapsed = now - self.last_scaling_check
+        arrivals = self.arrival_counter.value
+        arrival_rate = (arrivals - self.last_arrival_count) / elapsed if elapsed > 0 else 0.0
+        self.last_arrival_count = arrivals
+        self.last_scaling_check = now
+        
+        self.scaling_policy.min_workers = self.min_workers
+        self.scaling_policy.max_workers = self.max_workers
+        return self.scaling_policy.decide(
+            current_workers=current_workers,
+            queue_depth=queue_depth + self.processing_queue.qsize(),
+            arrival_rate=arrival_rate,
+            service_time_ms=self.latency_histogram.percentile(95.0)
+        )
+    
+    def _make_queue_based_decision(self, current_workers: int, queue_depth: int) -> ScalingDecision:
+        """Make scaling decision from raw buffer utilization."""
+        queue_utilization = queue_depth / self.buffer_size
         
-        # Queue-based scaling
         if queue_utilization > self.scale_up_threshold and current_workers < self.max_workers:
             return ScalingDecision(
                 action="scale_up",
                 target_workers=min(current_workers + 2, self.max_workers),
                 reason=f"High queue utilization: {queue_utilization:.2f}",
                 confidence=0.8,
-                timestamp=datetime.now()
+                timestamp=datetime.now(),
+                current_workers=current_workers,
+                queue_depth=queue_depth
             )
         
         elif queue_utilization < self.scale_down_threshold and current_workers > self.min_workers:
@@ -531,15 +762,19 @@ class ScalableEventProcessor:
                 target_workers=max(current_workers - 1, self.min_workers),
                 reason=f"Low queue utilization: {queue_utilization:.2f}",
                 confidence=0.7,
-                timestamp=datetime.now()
+                timestamp=datetime.now(),
+                current_workers=current_workers,
+                queue_depth=queue_depth
             )
         
         return ScalingDecision(
             action="no_change",
-            target_workers=current_workers,
+            target_workers=max(current_workers, self.min_workers),
             reason="Metrics within acceptable range",
             confidence=0.9,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            current_workers=current_workers,
+            queue_depth=queue_depth
         )
     
     def _execute_scaling_decision(self, decision: ScalingDecision) -> None:
@@ -557,22 +792,17 @@ class ScalableEventProcessor:
             logger.info(f"Scaled down: removed {workers_to_remove} workers ({decision.reason})")
         
         self.last_scaling_action = datetime.now()
+        
+        self.scaling_events.append(decision)
+        for handler in self.scaling_handlers:
+            try:
+                handler(decision)
+            except Exception as e:
+                logger.error(f"Error in scaling handler: {str(e)}")
     
     def _scale_workers(self, target_count: int) -> None:
-        """Scale workers to target count."""
-        current_count = len(self.workers)
-        
-        if target_count > current_count:
-            # Add workers
-            for i in range(target_count - current_count):
-                worker_id = f"worker_{len(self.workers)}"
-                future = self.executor.submit(self._worker_loop, worker_id)
-                self.workers.append({"id": worker_id, "future": future})
-        
-        elif target_count < current_count:
-            # Remove workers (they will finish current work and exit)
-            workers_to_remove = current_count - target_count
-            self.workers = self.workers[:-workers_to_remove]
+        """Scale workers to target count; retired workers finish current work and exit."""
+        self.worker_pool.resize(target_count)
     
     def _checkpoint_manager(self) -> None:
         """Manage checkpoints for event replay."""
@@ -581,22 +811,29 @@ class ScalableEventProcessor:
                 if (self.metrics.events_processed - self.last_checkpoint) >= self.checkpoint_interval:
                     self._create_checkpoint()
                 
-                time.sleep(60)  # Check every minute
+                time.sleep(self.checkpoint_check_interval)
                 
             except Exception as e:
                 logger.error(f"Error in checkpoint manager: {str(e)}")
-                time.sleep(60)
+                time.sleep(self.checkpoint_check_interval)
+    
+    def _checkpoint_path(self) -> str:
+        """Path of the current checkpoint file."""
+        return os.path.join(self.replay_storage_path, "checkpoint_latest.json")
     
     def _create_checkpoint(self) -> None:
-        """Create checkpoint for event replay."""
+        """Atomically write the committed replay-log offsets and in-flight batches."""
         if not self.enable_replay:
             return
         
         try:
+            log = self._get_replay_log()
             checkpoint_data = {
                 "timestamp": datetime.now().isoformat(),
                 "events_processed": self.metrics.events_processed,
-                "last_event_id": getattr(self, '_last_event_id', None),
+                "committed_offsets": {DEFAULT_PARTITION: self.offset_tracker.committed_offset},
+                "in_flight_batches": [batch.to_dict() for batch in self.offset_tracker.in_flight()],
+                "log_end_offset": log.next_offset - 1,
                 "metrics": {
                     "events_per_second": self.metrics.events_per_second,
                     "average_latency_ms": self.metrics.average_latency_ms,
@@ -604,13 +841,8 @@ class ScalableEventProcessor:
                 }
             }
             
-            checkpoint_file = os.path.join(
-                self.replay_storage_path,
-                f"checkpoint_{int(time.time())}.json"
-            )
-            
-            with open(checkpoint_file, 'w') as f:
-                json.dump(checkpoint_data, f)
+            checkpoint_file = self._checkpoint_path()
+            write_checkpoint(checkpoint_file, checkpoint_data)
             
             self.last_checkpoint = self.metrics.events_processed
             logger.debug(f"Created checkpoint: {checkpoint_file}")
@@ -618,138 +850,158 @@ class ScalableEventProcessor:
         except Exception as e:
             logger.error(f"Error creating checkpoint: {str(e)}")
     
-    def _store_replay_batch(self, batch: EventBatch) -> None:
-        """Store event batch for replay capability."""
+    def resume_from_checkpoint(self) -> int:
+        """
+        Re-queue every logged event that the last checkpoint did not commit.
+        
+        Batches that were in flight are rebuilt with their original IDs and
+        offset ranges, so sinks can drop duplicates by batch ID, and batches
+        that had already finished are committed without being re-run. The rest
+        of the log tail is batched afresh. Must be called before start().
+        
+        Returns:
+            Number of events re-queued
+        """
         if not self.enable_replay:
-            return
+            logger.warning("Event replay is disabled")
+            return 0
+        
+        if self.is_running:
+            logger.error("resume_from_checkpoint must be called before start()")
+            return 0
         
         try:
-            # Create timestamped filename
-            timestamp = batch.created_at.strftime("%Y%m%d_%H%M%S")
-            filename = f"events_{timestamp}_{batch.batch_id}.json"
-            
-            if self.log_compression:
-                filename += ".gz"
-            
-            file_path = os.path.join(self.replay_storage_path, filename)
+            log = self._get_replay_log()
+            checkpoint = load_checkpoint(self._checkpoint_path()) or {}
+            committed = checkpoint.get("committed_offsets", {}).get(DEFAULT_PARTITION, -1)
+            self.offset_tracker.reset(committed)
             
-            # Prepare data
-            replay_data = {
-                "batch_id": batch.batch_id,
-                "created_at": batch.created_at.isoformat(),
-                "event_count": len(batch.events),
-                "events": batch.events
-            }
+            resumed_count = 0
+            for batch_id, first_offset, last_offset, completed in self._plan_resume_batches(
+                committed, checkpoint.get("in_flight_batches", []), log.next_offset - 1
+            ):
+                if completed:
+                    self.offset_tracker.begin(batch_id, first_offset, last_offset, parts=0)
+                    continue
+                
+                records = list(log.read_from(first_offset, last_offset))
+                if not records:
+                    continue
+                batch = EventBatch(
+                    batch_id=batch_id,
+                    events=[record.payload for record in records],
+                    created_at=datetime.now(),
+                    metadata={"offsets": (first_offset, last_offset), "resumed": True}
+                )
+                self._queue_batch(batch)
+                resumed_count += len(batch.events)
             
-            # Write file
-            if self.log_compression:
-                with gzip.open(file_path, 'wt') as f:
-                    json.dump(replay_data, f)
-            else:
-                with open(file_path, 'w') as f:
-                    json.dump(replay_data, f)
+            logger.info(f"Resumed {resumed_count} events after committed offset {committed}")
+            return resumed_count
             
         except Exception as e:
-            logger.error(f"Error storing replay batch: {str(e)}")
+            logger.error(f"Error resuming from checkpoint: {str(e)}")
+            return 0
+    
+    def _plan_resume_batches(
+        self,
+        committed: int,
+        in_flight: List[Dict[str, Any]],
+        end_offset: int
+    ) -> List[tuple]:
+        """Split (committed, end_offset] into (batch_id, first, last, completed) ranges."""
+        plan = []
+        next_offset = committed + 1
+        
+        def fill_gap(until: int) -> None:
+            for start in range(next_offset, until + 1, self.batch_size):
+                plan.append((str(uuid.uuid4()), start, min(start + self.batch_size - 1, until), False))
+        
+        for batch in sorted(in_flight, key=lambda b: b["first_offset"]):
+            if batch["last_offset"] <= committed:
+                continue
+            fill_gap(batch["first_offset"] - 1)
+            plan.append((batch["batch_id"], batch["first_offset"], batch["last_offset"], batch.get("completed", False)))
+            next_offset = batch["last_offset"] + 1
+        
+        fill_gap(end_offset)
+        return plan
+    
+    def _get_replay_log(self) -> SegmentedReplayLog:
+        """Return the replay log for the current storage path, opening it on first use."""
+        with self._replay_log_lock:
+            if self._replay_log is None or self._replay_log.directory != self.replay_storage_path:
+                if self._replay_log is not None:
+                    self._replay_log.close()
+                self._replay_log = SegmentedReplayLog(
+                    self.replay_storage_path,
+                    segment_max_bytes=self.replay_segment_size,
+                    index_interval_bytes=self.replay_index_interval
+                )
+                # New batches append at the log end, so track commits from there;
+                # resume_from_checkpoint() rewinds to the checkpoint to replay the tail
+                log_end = self._replay_log.next_offset - 1
+                checkpoint = load_checkpoint(self._checkpoint_path()) or {}
+                committed = checkpoint.get("committed_offsets", {}).get(DEFAULT_PARTITION, -1)
+                if committed < log_end:
+                    logger.warning(
+                        f"Replay log has {log_end - committed} uncommitted events after the last checkpoint; "
+                        f"call resume_from_checkpoint() to reprocess them"
+                    )
+                self.offset_tracker.reset(log_end)
+            return self._replay_log
     
-    def _find_replay_files(self, start_time: datetime, end_time: datetime) -> List[str]:
-        """Find replay files within time range."""
-        replay_files = []
+    def _store_replay_batch(self, batch: EventBatch) -> None:
+        """Append event batch to the replay log."""
+        if not self.enable_replay:
+            return
         
         try:
-            for filename in os.listdir(self.replay_storage_path):
-                if filename.startswith("events_"):
-                    file_path = os.path.join(self.replay_storage_path, filename)
-                    
-                    # Extract timestamp from filename
-                    parts = filename.split("_")
-                    if len(parts) >= 3:
-                        timestamp_str = f"{parts[1]}_{parts[2]}"
-                        try:
-                            file_time = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                            if start_time <= file_time <= end_time:
-                                replay_files.append(file_path)
-                        except ValueError:
-                            continue
-            
-            return sorted(replay_files)
+            records = [(self._event_time(event, batch.created_at), event) for event in batch.events]
+            offsets = self._get_replay_log().append_batch(records)
+            if offsets:
+                batch.metadata["offsets"] = (offsets[0], offsets[-1])
             
         except Exception as e:
-            logger.error(f"Error finding replay files: {str(e)}")
-            return []
+            logger.error(f"Error storing replay batch: {str(e)}")
     
-    def _load_replay_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """Load events from replay file."""
+    def _event_time(self, event: Dict[str, Any], default: datetime) -> datetime:
+        """Return the event's submission time, falling back to ``default``."""
         try:
-            if file_path.endswith('.gz'):
-                with gzip.open(file_path, 'rt') as f:
-                    data = json.load(f)
-            else:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-            
-            return data.get("events", [])
-            
-        except Exception as e:
-            logger.error(f"Error loading replay file {file_path}: {str(e)}")
-            return []
+            return datetime.fromisoformat(event["_submitted_at"])
+        except (KeyError, TypeError, ValueError):
+            return default
+    
+    def _get_audit_writer(self) -> AuditLogWriter:
+        """Return the audit writer for the current log path, creating it on first use."""
+        with self._audit_writer_lock:
+            if self._audit_writer is None or self._audit_writer.directory != self.audit_log_path:
+                if self._audit_writer is not None:
+                    self._audit_writer.close()
+                self._audit_writer = AuditLogWriter(
+                    self.audit_log_path,
+                    queue_size=self.audit_queue_size,
+                    fsync_policy=self.audit_fsync_policy,
+                    rotation_size=self.log_rotation_size,
+                    compress_rotated=self.log_compression
+                )
+            return self._audit_writer
     
     def _audit_log(self, action: str, entity_id: str, details: Dict[str, Any]) -> None:
-        """Write audit log entry."""
+        """Queue audit log entry for the background writer."""
         if not self.enable_audit_logging:
             return
         
         try:
-            log_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "action": action,
-                "entity_id": entity_id,
-                "details": details,
-                "checksum": self._calculate_checksum(f"{action}:{entity_id}:{json.dumps(details, sort_keys=True)}")
-            }
-            
-            # Determine log file
-            log_filename = f"audit_{datetime.now().strftime('%Y%m%d')}.log"
-            log_path = os.path.join(self.audit_log_path, log_filename)
-            
-            # Write log entry
-            with open(log_path, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
-            
-            # Check for log rotation
-            self._check_log_rotation(log_path)
-            
+            self._get_audit_writer().write(action, entity_id, details)
         except Exception as e:
             logger.error(f"Error writing audit log: {str(e)}")
     
-    def _calculate_checksum(self, data: str) -> str:
-        """Calculate checksum for audit trail integrity."""
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
-    
-    def _check_log_rotation(self, log_path: str) -> None:
-        """Check if log rotation is needed."""
-        try:
-            if os.path.getsize(log_path) > self.log_rotation_size:
-                # Rotate log
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                rotated_path = f"{log_path}.{timestamp}"
-                
-                if self.log_compression:
-                    rotated_path += ".gz"
-                    
-                    with open(log_path, 'rb') as f_in:
-                        with gzip.open(rotated_path, 'wb') as f_out:
-                            f_out.writelines(f_in)
-                else:
-                    os.rename(log_path, rotated_path)
-                
-                # Create new log file
-                open(log_path, 'w').close()
-                
-                logger.info(f"Rotated audit log: {rotated_path}")
-                
-        except Exception as e:
-            logger.error(f"Error rotating log: {str(e)}")
+    def flush_audit_log(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every queued audit entry has been written."""
+        if self._audit_writer is None:
+            return True
+        return self._audit_writer.flush(timeout)
 
 
 def create_scalable_processor(
@@ -0,0 +1,290 @@
+"""
+Stream Processing Metrics Primitives
+
+Provides per-thread sharded counters and a fixed-memory, HDR-style latency
+histogram. Hot paths only touch the calling thread's shard, so workers never
+contend on a lock and read-modify-write races between threads cannot lose
+updates; readers merge the shards on demand.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class _ThreadShards:
+    """
+    Registry that hands each thread its own shard, created on first use.
+    
+    Shards of threads that have exited are folded into a single retired
+    shard whenever the registry is read or a new thread registers, so worker
+    churn does not grow the registry.
+    """
+    
+    def __init__(self, factory, fold):
+        """
+        Initialize shard registry.
+        
+        Args:
+            factory: Zero-argument callable that creates an empty shard
+            fold: Callable ``fold(target, shard)`` adding ``shard`` into ``target``
+        """
+        self._factory = factory
+        self._fold = fold
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._retired = factory()
+        self._owned: List[Tuple[threading.Thread, object]] = []
+    
+    def local(self):
+        """Return the calling thread's shard."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._factory()
+            with self._lock:
+                self._retire_dead()
+                self._owned.append((threading.current_thread(), shard))
+            self._local.shard = shard
+        return shard
+    
+    def snapshot(self) -> List:
+        """Return the retired shard followed by every live thread's shard."""
+        with self._lock:
+            self._retire_dead()
+            return [self._retired] + [shard for _, shard in self._owned]
+    
+    def _retire_dead(self) -> None:
+        """Fold shards of exited threads into the retired shard (lock held)."""
+        live = []
+        for thread, shard in self._owned:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._fold(self._retired, shard)
+        self._owned = live
+
+
+def _fold_counter(target: List[int], shard: List[int]) -> None:
+    """Add a counter shard into ``target``."""
+    target[0] += shard[0]
+
+
+class ShardedCounter:
+    """
+    Monotonic counter sharded per thread.
+    
+    Each worker increments a private shard, so increments are never lost to
+    interleaving; ``value`` sums the shards.
+    """
+    
+    def __init__(self):
+        """Initialize counter at zero."""
+        self._shards = _ThreadShards(lambda: [0], _fold_counter)
+    
+    def add(self, amount: int = 1) -> None:
+        """Add ``amount`` to the calling thread's shard."""
+        self._shards.local()[0] += amount
+    
+    @property
+    def value(self) -> int:
+        """Merged counter value across all shards."""
+        return sum(shard[0] for shard in self._shards.snapshot())
+    
+    def reset(self) -> None:
+        """Reset every shard to zero."""
+        for shard in self._shards.snapshot():
+            shard[0] = 0
+
+
+class _HistogramShard:
+    """Bucket counts plus exact summary statistics for one thread."""
+    
+    __slots__ = ("counts", "total", "sum", "min", "max")
+    
+    def __init__(self, bucket_count: int):
+        """Initialize an empty shard with ``bucket_count`` buckets."""
+        self.counts = [0] * bucket_count
+        self.total = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    @staticmethod
+    def fold(target: "_HistogramShard", shard: "_HistogramShard") -> None:
+        """Add ``shard``'s samples into ``target``."""
+        target.counts = [a + b for a, b in zip(target.counts, shard.counts, strict=True)]
+        target.total += shard.total
+        target.sum += shard.sum
+        target.min = min(target.min, shard.min)
+        target.max = max(target.max, shard.max)
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory log-linear latency histogram (HDR-style).
+    
+    Values are recorded in milliseconds and bucketed at microsecond resolution
+    with ``2 ** sub_bucket_bits`` linear sub-buckets per power of two, giving a
+    bounded relative error (about 1.6% with the default 7 bits) from 1us up to
+    ``max_value_ms``. Memory is fixed at construction regardless of how many
+    samples are recorded.
+    """
+    
+    def __init__(self, max_value_ms: float = 3_600_000.0, sub_bucket_bits: int = 7):
+        """
+        Initialize latency histogram.
+        
+        Args:
+            max_value_ms: Largest trackable value; larger samples are clamped
+            sub_bucket_bits: Precision bits per power-of-two range
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.max_value_us = max(int(max_value_ms * 1000), self.sub_bucket_count)
+        self.bucket_count = self._index_for(self.max_value_us) + 1
+        self._shards = _ThreadShards(lambda: _HistogramShard(self.bucket_count), _HistogramShard.fold)
+    
+    def record(self, value_ms: float, count: int = 1) -> None:
+        """
+        Record a latency sample.
+        
+        Args:
+            value_ms: Latency in milliseconds
+            count: Number of identical samples to record
+        """
+        if count <= 0:
+            return
+        value_ms = max(value_ms, 0.0)
+        value_us = min(int(value_ms * 1000), self.max_value_us)
+        shard = self._shards.local()
+        shard.counts[self._index_for(value_us)] += count
+        shard.total += count
+        shard.sum += value_ms * count
+        if value_ms < shard.min:
+            shard.min = value_ms
+        if value_ms > shard.max:
+            shard.max = value_ms
+    
+    @property
+    def count(self) -> int:
+        """Total number of recorded samples."""
+        return sum(shard.total for shard in self._shards.snapshot())
+    
+    @property
+    def mean(self) -> float:
+        """Exact mean of recorded samples in milliseconds."""
+        shards = self._shards.snapshot()
+        total = sum(shard.total for shard in shards)
+        return sum(shard.sum for shard in shards) / total if total else 0.0
+    
+    @property
+    def min(self) -> float:
+        """Smallest recorded sample in milliseconds."""
+        values = [shard.min for shard in self._shards.snapshot() if shard.total]
+        return min(values) if values else 0.0
+    
+    @property
+    def max(self) -> float:
+        """Largest recorded sample in milliseconds."""
+        values = [shard.max for shard in self._shards.snapshot() if shard.total]
+        return max(values) if values else 0.0
+    
+    def percentile(self, percentile: float) -> float:
+        """
+        Estimate a percentile from the merged buckets.
+        
+        Args:
+            percentile: Percentile in the range 0-100
+        
+        Returns:
+            Latency in milliseconds, or 0.0 if nothing was recorded
+        """
+        return self.percentiles([percentile])[percentile]
+    
+    def percentiles(self, percentiles: Optional[List[float]] = None) -> Dict[float, float]:
+        """
+        Estimate several percentiles in a single pass over the merged buckets.
+        
+        Args:
+            percentiles: Percentiles in the range 0-100 (defaults to p50/p95/p99/p99.9)
+        
+        Returns:
+            Mapping of percentile to latency in milliseconds
+        """
+        percentiles = percentiles if percentiles is not None else [50.0, 95.0, 99.0, 99.9]
+        counts, total, observed_min, observed_max = self._merge()
+        if total == 0:
+            return {p: 0.0 for p in percentiles}
+        
+        targets = sorted((max(1, math.ceil(p / 100.0 * total)), p) for p in percentiles)
+        results = {}
+        cumulative = 0
+        target_index = 0
+        for index, bucket_count in enumerate(counts):
+            if not bucket_count:
+                continue
+            cumulative += bucket_count
+            while target_index < len(targets) and cumulative >= targets[target_index][0]:
+                value = self._value_for(index) / 1000.0
+                results[targets[target_index][1]] = min(max(value, observed_min), observed_max)
+                target_index += 1
+            if target_index == len(targets):
+                break
+        return results
+    
+    def summary(self) -> Dict[str, float]:
+        """Return count, mean, min, max and p50/p95/p99/p999 as a flat dict."""
+        quantiles = self.percentiles([50.0, 95.0, 99.0, 99.9])
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": quantiles[50.0],
+            "p95_ms": quantiles[95.0],
+            "p99_ms": quantiles[99.0],
+            "p999_ms": quantiles[99.9]
+        }
+    
+    def reset(self) -> None:
+        """Clear every shard."""
+        for shard in self._shards.snapshot():
+            shard.counts = [0] * self.bucket_count
+            shard.total = 0
+            shard.sum = 0.0
+            shard.min = math.inf
+            shard.max = 0.0
+    
+    def _merge(self) -> tuple[List[int], int, float, float]:
+        """Sum bucket counts across shards."""
+        merged = [0] * self.bucket_count
+        total = 0
+        observed_min = math.inf
+        observed_max = 0.0
+        for shard in self._shards.snapshot():
+            if not shard.total:
+                continue
+            merged = [a + b for a, b in zip(merged, shard.counts, strict=True)]
+            total += shard.total
+            observed_min = min(observed_min, shard.min)
+            observed_max = max(observed_max, shard.max)
+        return merged, total, observed_min, observed_max
+    
+    def _index_for(self, value_us: int) -> int:
+        """Map a microsecond value to its bucket index."""
+        if value_us < self.sub_bucket_count:
+            return value_us
+        shift = value_us.bit_length() - self.sub_bucket_bits
+        mantissa = value_us >> shift
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (mantissa - self.sub_bucket_half)
+    
+    def _value_for(self, index: int) -> float:
+        """Return the midpoint (in microseconds) of a bucket."""
+        if index < self.sub_bucket_count:
+            return float(index)
+        offset = index - self.sub_bucket_count
+        shift = offset // self.sub_bucket_half + 1
+        mantissa = offset % self.sub_bucket_half + self.sub_bucket_half
+        lower = mantissa << shift
+        return lower + ((1 << shift) - 1) / 2.0
@@ -0,0 +1,269 @@
+"""
+Stream Worker Pool and Load-Aware Scaling
+
+Provides cooperatively cancellable worker threads with unique, never-reused
+IDs, and a scaling policy that sizes the pool from queue depth, arrival rate
+and service time using Little's law instead of raw queue utilization.
+"""
+
+import itertools
+import logging
+import math
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScalingDecision:
+    """Auto-scaling decision."""
+    action: str  # "scale_up", "scale_down", "no_change"
+    target_workers: int
+    reason: str
+    confidence: float
+    timestamp: datetime
+    current_workers: int = 0
+    queue_depth: int = 0
+    arrival_rate: float = 0.0
+    service_time_ms: float = 0.0
+    
+    def to_dict(self) -> dict:
+        """Convert decision to a dictionary suitable for event export."""
+        return {
+            "action": self.action,
+            "target_workers": self.target_workers,
+            "current_workers": self.current_workers,
+            "reason": self.reason,
+            "confidence": self.confidence,
+            "queue_depth": self.queue_depth,
+            "arrival_rate": self.arrival_rate,
+            "service_time_ms": self.service_time_ms,
+            "timestamp": self.timestamp.isoformat()
+        }
+
+
+class CancellationToken:
+    """Cooperative cancellation flag checked by a worker loop."""
+    
+    def __init__(self):
+        """Initialize an uncancelled token."""
+        self._event = threading.Event()
+    
+    def cancel(self) -> None:
+        """Request that the owning worker stop after its current item."""
+        self._event.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation has been requested."""
+        return self._event.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep until cancelled or the timeout expires; returns True if cancelled."""
+        return self._event.wait(timeout)
+
+
+@dataclass
+class WorkerHandle:
+    """A running worker thread and its cancellation token."""
+    worker_id: str
+    token: CancellationToken
+    thread: threading.Thread
+    start_time: datetime = field(default_factory=datetime.now)
+    
+    @property
+    def alive(self) -> bool:
+        """Whether the worker thread is still running."""
+        return self.thread.is_alive()
+
+
+class WorkerPool:
+    """
+    Pool of worker threads that can be grown and shrunk at runtime.
+    
+    Each worker runs ``target(worker_id, token)`` and is expected to return
+    once ``token.cancelled`` is set. Retiring a worker cancels its token and
+    calls ``wake`` so workers blocked on a queue notice promptly; retired
+    threads are tracked until they exit so none are orphaned.
+    """
+    
+    def __init__(
+        self,
+        target: Callable[[str, CancellationToken], None],
+        name_prefix: str = "worker",
+        wake: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialize worker pool.
+        
+        Args:
+            target: Worker loop taking the worker ID and its cancellation token
+            name_prefix: Prefix for generated worker IDs
+            wake: Callback that wakes workers blocked waiting for work
+        """
+        self.target = target
+        self.name_prefix = name_prefix
+        self.wake = wake
+        self.active: List[WorkerHandle] = []
+        self.retiring: List[WorkerHandle] = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+    
+    @property
+    def size(self) -> int:
+        """Number of workers that have not been asked to retire."""
+        return len(self.active)
+    
+    def spawn(self) -> WorkerHandle:
+        """Start a new worker with a fresh, never-reused ID."""
+        with self._lock:
+            worker_id = f"{self.name_prefix}_{next(self._ids)}"
+            token = CancellationToken()
+            thread = threading.Thread(
+                target=self._run,
+                args=(worker_id, token),
+                name=worker_id,
+                daemon=True
+            )
+            handle = WorkerHandle(worker_id=worker_id, token=token, thread=thread)
+            self.active.append(handle)
+        thread.start()
+        logger.debug(f"Started worker: {worker_id}")
+        return handle
+    
+    def retire(self, count: int = 1) -> List[WorkerHandle]:
+        """
+        Cancel the most recently started workers.
+        
+        Args:
+            count: Number of workers to retire
+        
+        Returns:
+            Handles of the retired workers
+        """
+        with self._lock:
+            self._reap()
+            count = min(count, len(self.active))
+            retired = self.active[len(self.active) - count:] if count > 0 else []
+            self.active = self.active[:len(self.active) - count]
+            for handle in retired:
+                handle.token.cancel()
+            self.retiring.extend(retired)
+        
+        if retired and self.wake:
+            self.wake()
+        for handle in retired:
+            logger.debug(f"Retiring worker: {handle.worker_id}")
+        return retired
+    
+    def resize(self, target: int) -> int:
+        """
+        Grow or shrink the pool to ``target`` workers.
+        
+        Returns:
+            Net change in worker count
+        """
+        delta = target - self.size
+        if delta > 0:
+            for _ in range(delta):
+                self.spawn()
+        elif delta < 0:
+            self.retire(-delta)
+        return delta
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Cancel every worker and wait for their threads to exit."""
+        self.retire(self.size)
+        with self._lock:
+            handles = list(self.retiring)
+        for handle in handles:
+            handle.thread.join(timeout)
+        with self._lock:
+            self._reap()
+            if self.retiring:
+                logger.warning(f"{len(self.retiring)} workers did not stop within {timeout}s")
+    
+    def _reap(self) -> None:
+        """Forget retired workers whose threads have exited; must hold the lock."""
+        self.retiring = [handle for handle in self.retiring if handle.alive]
+    
+    def _run(self, worker_id: str, token: CancellationToken) -> None:
+        """Thread entry point."""
+        try:
+            self.target(worker_id, token)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} crashed: {str(e)}")
+
+
+@dataclass
+class LoadAwareScalingPolicy:
+    """
+    Worker sizing from Little's law.
+    
+    Steady-state concurrency is ``arrival_rate * service_time``; dividing by
+    ``target_utilization`` leaves headroom, and an extra term sizes the pool
+    to drain the current backlog within ``drain_time_seconds``. Scale-up jumps
+    straight to the target while scale-down moves ``scale_down_step`` at a time
+    to avoid thrashing under bursty load.
+    """
+    min_workers: int
+    max_workers: int
+    target_utilization: float = 0.7
+    drain_time_seconds: float = 5.0
+    scale_down_step: int = 1
+    
+    def required_workers(self, queue_depth: int, arrival_rate: float, service_time_ms: float) -> int:
+        """Estimate the number of workers needed for the observed load."""
+        service_time = max(service_time_ms, 0.0) / 1000.0
+        steady_state = arrival_rate * service_time / max(self.target_utilization, 0.01)
+        backlog = queue_depth * service_time / max(self.drain_time_seconds, 0.001)
+        return math.ceil(steady_state + backlog)
+    
+    def decide(
+        self,
+        current_workers: int,
+        queue_depth: int,
+        arrival_rate: float,
+        service_time_ms: float
+    ) -> ScalingDecision:
+        """
+        Decide the worker target for the observed load.
+        
+        Args:
+            current_workers: Workers currently active
+            queue_depth: Items waiting to be processed
+            arrival_rate: Items arriving per second
+            service_time_ms: Per-item service time (p95 recommended)
+        
+        Returns:
+            ScalingDecision clamped to [min_workers, max_workers]
+        """
+        required = self.required_workers(queue_depth, arrival_rate, service_time_ms)
+        target = max(self.min_workers, min(self.max_workers, required))
+        reason = (
+            f"required={required} (arrival={arrival_rate:.1f}/s, "
+            f"service={service_time_ms:.1f}ms, queue={queue_depth})"
+        )
+        
+        if target > current_workers:
+            action = "scale_up"
+        elif target < current_workers:
+            action = "scale_down"
+            target = max(target, current_workers - self.scale_down_step)
+        else:
+            action = "no_change"
+        
+        return ScalingDecision(
+            action=action,
+            target_workers=target,
+            reason=reason,
+            confidence=0.9 if service_time_ms > 0 else 0.5,
+            timestamp=datetime.now(),
+            current_workers=current_workers,
+            queue_depth=queue_depth,
+            arrival_rate=arrival_rate,
+            service_time_ms=service_time_ms
+        )
@@ -0,0 +1,95 @@
+"""
+Unit tests for request/response correlation in agent communication.
+"""
+
+import asyncio
+import threading
+import uuid
+from dataclasses import asdict
+from unittest.mock import patch
+
+import pytest
+
+from fraud_detection.agents.bedrock.agent_communication import (
+    AgentCommunicationManager, AgentMessage, AgentRegistration, MessageType
+)
+
+
+@pytest.fixture
+def manager():
+    """Communication manager with one registered agent and no AWS delivery."""
+    with patch.object(AgentCommunicationManager, "_route_message", return_value=True):
+        comm_manager = AgentCommunicationManager()
+        comm_manager.agent_registry["analyzer"] = AgentRegistration(
+            agent_id="analyzer", agent_type="transaction_analyzer", capabilities=[],
+            endpoint="local", status="active", last_heartbeat="", metadata={}
+        )
+        yield comm_manager
+        comm_manager.executor.shutdown(wait=False)
+
+
+def _request():
+    return AgentMessage(
+        message_id=str(uuid.uuid4()),
+        message_type=MessageType.ANALYSIS_REQUEST,
+        sender_agent_id="orchestrator",
+        recipient_agent_id="analyzer",
+        payload={}
+    )
+
+
+def _response(request, sender="analyzer"):
+    return asdict(AgentMessage(
+        message_id=str(uuid.uuid4()),
+        message_type=MessageType.ANALYSIS_RESPONSE,
+        sender_agent_id=sender,
+        recipient_agent_id=request.sender_agent_id,
+        payload={"risk_score": 0.2},
+        correlation_id=request.message_id
+    ))
+
+
+class TestResponseCorrelation:
+    """Test cases for request_response correlation."""
+    
+    def test_response_resolves_waiter(self, manager):
+        """Test a correlated response wakes the waiting request."""
+        request = _request()
+        threading.Timer(0.05, manager.process_incoming_message, args=(_response(request),)).start()
+        
+        response = manager.request_response(request, timeout_seconds=5)
+        
+        assert response.payload == {"risk_score": 0.2}
+        assert manager.response_correlator.get_stats()["pending"] == 0
+        assert manager.response_correlator.stats["resolved"] == 1
+    
+    def test_timeout_and_other_senders_are_ignored(self, manager):
+        """Test responses from the wrong sender do not match and the wait times out."""
+        request = _request()
+        threading.Timer(0.01, manager.process_incoming_message, args=(_response(request, sender="intruder"),)).start()
+        
+        assert manager.request_response(request, timeout_seconds=0.2) is None
+        
+        stats = manager.response_correlator.get_stats()
+        assert stats["timed_out"] == 1 and stats["unmatched"] == 1 and stats["pending"] == 0
+        # A late response is dropped rather than delivered to nobody
+        manager.process_incoming_message(_response(request))
+        assert manager.response_correlator.stats["resolved"] == 0
+    
+    def test_async_waiter_and_cancellation(self, manager):
+        """Test the async waiter resolves and a cancelled request returns None."""
+        async def scenario():
+            answered, cancelled = _request(), _request()
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, manager.process_incoming_message, _response(answered))
+            loop.call_later(0.05, manager.cancel_request, cancelled.message_id)
+            return await asyncio.gather(
+                manager.request_response_async(answered, timeout_seconds=5),
+                manager.request_response_async(cancelled, timeout_seconds=5)
+            )
+        
+        answered, cancelled = asyncio.run(scenario())
+        
+        assert answered.payload == {"risk_score": 0.2}
+        assert cancelled is None
+        assert manager.response_correlator.get_stats()["cancelled"] == 1
@@ -0,0 +1,124 @@
+"""
+Unit tests for parallel scatter-gather agent invocation.
+"""
+
+import threading
+import time
+
+import pytest
+
+from fraud_detection.agents.bedrock.agent_orchestrator import (
+    AgentOrchestrator, AgentResponse, AgentStatus, AnalysisRequest, FraudDecision, Transaction
+)
+
+AGENTS = ["transaction_analyzer", "pattern_detector", "risk_assessor", "compliance_checker"]
+
+
+@pytest.fixture
+def orchestrator():
+    """Orchestrator with short deadlines for testing."""
+    orch = AgentOrchestrator()
+    for config in orch.agent_config.values():
+        config["timeout"] = 1
+    orch.scatter_gather_config["early_termination_confidence"] = 1.1  # disabled unless a test enables it
+    yield orch
+    orch.shutdown(wait=False)
+
+
+def _request(agents=AGENTS):
+    transaction = Transaction(
+        id="tx_1", user_id="user_1", amount=250.0, currency="USD", merchant="Store",
+        category="retail", location="CHICAGO_IL", timestamp="2024-01-01T00:00:00", card_type="credit"
+    )
+    return AnalysisRequest(transaction=transaction, requested_agents=list(agents))
+
+
+def _response(agent_id, is_fraud=False, confidence=0.9):
+    decision = FraudDecision(
+        transaction_id="tx_1", is_fraud=is_fraud, confidence_score=confidence, risk_level="LOW",
+        reasoning=agent_id, evidence=[agent_id], recommended_action="APPROVE", timestamp=""
+    )
+    return AgentResponse(agent_id, decision, 0.0, [], confidence, AgentStatus.ACTIVE)
+
+
+class TestScatterGather:
+    """Test cases for AgentOrchestrator.scatter_gather."""
+    
+    def test_latency_is_the_slowest_agent_not_the_sum(self, orchestrator):
+        """Test agents run concurrently and responses keep the requested order."""
+        def invoke(agent_id, request):
+            time.sleep(0.1)
+            return _response(agent_id)
+        orchestrator._invoke_agent = invoke
+        
+        result = orchestrator.scatter_gather(_request())
+        
+        assert result.total_time_ms < 300
+        assert [r.agent_id for r in result.responses] == AGENTS
+        assert result.completed_agents == AGENTS and not result.is_partial
+        assert result.decision.is_fraud is False
+    
+    def test_timeout_returns_partial_results(self, orchestrator):
+        """Test an agent past its deadline yields an error response and the rest are kept."""
+        orchestrator.agent_config["compliance_checker"]["timeout"] = 0.2
+        orchestrator.scatter_gather_config["max_hedged_attempts"] = 0
+        release = threading.Event()
+        
+        def invoke(agent_id, request):
+            if agent_id == "compliance_checker":
+                release.wait(timeout=5)
+            return _response(agent_id)
+        orchestrator._invoke_agent = invoke
+        
+        result = orchestrator.scatter_gather(_request())
+        release.set()
+        
+        assert result.timed_out_agents == ["compliance_checker"]
+        assert result.timings["compliance_checker"]["status"] == "timed_out"
+        assert result.responses[-1].status == AgentStatus.ERROR
+        assert result.total_time_ms < 600 and result.is_partial
+    
+    def test_hedged_attempt_wins_for_slow_agent(self, orchestrator):
+        """Test a stalled first attempt is overtaken by the hedged retry."""
+        orchestrator.agent_config["risk_assessor"]["timeout"] = 0.2  # hedges after 0.1s
+        calls = []
+        
+        def invoke(agent_id, request):
+            calls.append(agent_id)
+            if agent_id == "risk_assessor" and calls.count(agent_id) == 1:
+                time.sleep(1)
+            return _response(agent_id)
+        orchestrator._invoke_agent = invoke
+        
+        result = orchestrator.scatter_gather(_request(["transaction_analyzer", "risk_assessor"]))
+        
+        timing = result.timings["risk_assessor"]
+        assert timing == {**timing, "status": "completed", "winning_attempt": 2}
+        assert orchestrator.scatter_gather_stats["hedge_wins"] == 1
+        assert result.total_time_ms < 500
+    
+    def test_confident_decision_stops_early(self, orchestrator):
+        """Test gathering stops once the remaining agents cannot change the outcome."""
+        orchestrator.scatter_gather_config["early_termination_confidence"] = 0.85
+        orchestrator.scatter_gather_config["max_hedged_attempts"] = 0
+        release = threading.Event()
+        
+        def invoke(agent_id, request):
+            if agent_id == "compliance_checker":
+                release.wait(timeout=5)
+            return _response(agent_id, is_fraud=True, confidence=0.95)
+        orchestrator._invoke_agent = invoke
+        
+        result = orchestrator.scatter_gather(_request())
+        release.set()
+        
+        assert result.early_terminated and result.skipped_agents == ["compliance_checker"]
+        assert result.decision.is_fraud is True
+        assert len(result.responses) == 3
+    
+    def test_shutdown_rejects_new_invocations(self, orchestrator):
+        """Test shutdown stops the invocation pool."""
+        orchestrator.shutdown()
+        
+        with pytest.raises(RuntimeError):
+            orchestrator.agent_executor.submit(time.sleep, 0)
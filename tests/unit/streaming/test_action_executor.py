@@ -0,0 +1,88 @@
+"""
+Unit tests for per-action-class executors.
+"""
+
+import threading
+import time
+
+from src.fraud_detection.streaming.action_executor import (
+    ActionClass, ActionExecutor, ActionLane, LaneConfig, _DeadlineWatchdog
+)
+
+
+def _lane(max_workers=4, max_pending=100, timeout_seconds=5.0):
+    """Create a standalone lane."""
+    return ActionLane(ActionClass.ALERTING, LaneConfig(max_workers, max_pending, timeout_seconds), _DeadlineWatchdog())
+
+
+class TestActionLane:
+    """Test cases for ActionLane."""
+    
+    def test_same_key_runs_in_order(self):
+        """Test tasks sharing a key run sequentially in submission order."""
+        lane = _lane()
+        order = []
+        outcomes = []
+        
+        for i in range(5):
+            lane.submit(
+                "event_1",
+                lambda i=i: time.sleep(0.01 * (5 - i)) or order.append(i),
+                lambda result, error, timed_out: outcomes.append(error)
+            )
+        
+        assert lane.wait_idle(5)
+        assert order == [0, 1, 2, 3, 4]
+        assert outcomes == [None] * 5
+    
+    def test_timeout_reports_failure_and_unblocks_chain(self):
+        """Test a hung task times out and the next task for the key still runs."""
+        lane = _lane(timeout_seconds=0.1)
+        release = threading.Event()
+        outcomes = []
+        
+        lane.submit("event_1", lambda: release.wait(5), lambda r, e, t: outcomes.append(("first", t)))
+        lane.submit("event_1", lambda: "done", lambda r, e, t: outcomes.append((r, t)))
+        
+        assert lane.wait_idle(2)
+        assert outcomes == [("first", True), ("done", False)]
+        # The hung handler still holds its bulkhead slot until it returns
+        assert lane.get_stats()["pending"] == 1
+        
+        release.set()
+        time.sleep(0.05)
+        assert lane.get_stats()["pending"] == 0
+        assert lane.get_stats()["timed_out"] == 1
+    
+    def test_bulkhead_rejects_when_full(self):
+        """Test submissions beyond max_pending are rejected."""
+        lane = _lane(max_workers=1, max_pending=2)
+        release = threading.Event()
+        
+        assert lane.submit("a", lambda: release.wait(5), lambda r, e, t: None)
+        assert lane.submit("b", lambda: release.wait(5), lambda r, e, t: None)
+        assert lane.submit("c", lambda: None, lambda r, e, t: None) is False
+        
+        release.set()
+        assert lane.wait_idle(5)
+        assert lane.get_stats()["rejected"] == 1
+
+
+class TestActionExecutor:
+    """Test cases for ActionExecutor."""
+    
+    def test_classes_run_on_separate_lanes(self):
+        """Test a saturated alerting lane does not delay blocking actions."""
+        executor = ActionExecutor(lane_configs={ActionClass.ALERTING: LaneConfig(1, 10, 5.0)})
+        release = threading.Event()
+        blocked = threading.Event()
+        
+        executor.submit("send_alert", "event_1", lambda: release.wait(5), lambda r, e, t: None)
+        executor.submit("block_transaction", "event_1", blocked.set, lambda r, e, t: None)
+        
+        assert blocked.wait(2)
+        assert executor.classify("unknown_action") == ActionClass.RECORDING
+        
+        release.set()
+        assert executor.wait_idle(5)
+        executor.shutdown()
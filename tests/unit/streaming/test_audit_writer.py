@@ -0,0 +1,111 @@
+"""
+Unit tests for the buffered audit writer.
+"""
+
+import glob
+import gzip
+import json
+import os
+import pytest
+import tempfile
+
+from src.fraud_detection.streaming.audit_writer import AuditLogWriter, FsyncPolicy, verify_audit_chain
+
+
+@pytest.fixture
+def audit_dir():
+    """Create temporary audit directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+
+def _read_entries(path):
+    """Read JSON lines from an audit file."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestAuditLogWriter:
+    """Test cases for AuditLogWriter."""
+    
+    def test_group_commit_and_hash_chain(self, audit_dir):
+        """Test queued entries are written in order with a valid hash chain."""
+        writer = AuditLogWriter(audit_dir, fsync_policy=FsyncPolicy.BATCH)
+        for i in range(100):
+            assert writer.write("event_submitted", f"event_{i}", {"index": i})
+        assert writer.flush(timeout=5) is True
+        
+        log_path = glob.glob(os.path.join(audit_dir, "audit_*.log"))[0]
+        entries = _read_entries(log_path)
+        
+        assert [entry["entity_id"] for entry in entries] == [f"event_{i}" for i in range(100)]
+        assert verify_audit_chain(log_path)
+        assert writer.get_stats()["entries_written"] == 100
+        assert writer.commits <= 100
+        writer.close()
+    
+    def test_tampering_breaks_chain(self, audit_dir):
+        """Test modifying an entry invalidates the chain."""
+        writer = AuditLogWriter(audit_dir, fsync_policy=FsyncPolicy.NEVER)
+        for i in range(3):
+            writer.write("action", f"entity_{i}", {"amount": i})
+        writer.close()
+        
+        log_path = glob.glob(os.path.join(audit_dir, "audit_*.log"))[0]
+        with open(log_path) as f:
+            lines = f.readlines()
+        tampered = json.loads(lines[1])
+        tampered["details"]["amount"] = 999
+        lines[1] = json.dumps(tampered) + "\n"
+        with open(log_path, "w") as f:
+            f.writelines(lines)
+        
+        assert verify_audit_chain(log_path) is False
+    
+    def test_details_are_copied_on_write(self, audit_dir):
+        """Test mutating details after queueing does not change the logged entry."""
+        writer = AuditLogWriter(audit_dir)
+        details = {"status": "submitted"}
+        writer.write("action", "entity", details)
+        details["status"] = "mutated"
+        writer.close()
+        
+        entries = _read_entries(glob.glob(os.path.join(audit_dir, "audit_*.log"))[0])
+        assert entries[0]["details"]["status"] == "submitted"
+    
+    def test_rotation_compresses_in_background(self, audit_dir):
+        """Test size-based rotation produces gzip files and each file has its own chain."""
+        writer = AuditLogWriter(audit_dir, rotation_size=1024, fsync_policy=FsyncPolicy.NEVER)
+        for i in range(50):
+            writer.write("action", f"entity_{i}", {"payload": "x" * 50})
+        writer.close()
+        
+        rotated = glob.glob(os.path.join(audit_dir, "audit_*.log.*.gz"))
+        current = glob.glob(os.path.join(audit_dir, "audit_*.log"))
+        
+        assert writer.files_rotated > 0
+        assert len(rotated) == writer.files_rotated
+        assert all(verify_audit_chain(path) for path in rotated + current)
+        assert sum(len(_read_entries(path)) for path in rotated + current) == 50
+    
+    def test_reopen_continues_chain(self, audit_dir):
+        """Test a new writer resumes the chain of an existing file."""
+        first = AuditLogWriter(audit_dir)
+        first.write("action", "entity_1", {})
+        first.close()
+        
+        second = AuditLogWriter(audit_dir)
+        second.write("action", "entity_2", {})
+        second.close()
+        
+        log_path = glob.glob(os.path.join(audit_dir, "audit_*.log"))[0]
+        assert len(_read_entries(log_path)) == 2
+        assert verify_audit_chain(log_path)
+    
+    def test_write_after_close_is_rejected(self, audit_dir):
+        """Test writes after close are refused."""
+        writer = AuditLogWriter(audit_dir)
+        writer.close()
+        
+        assert writer.write("action", "entity", {}) is False
@@ -0,0 +1,73 @@
+"""
+Unit tests for offset checkpointing.
+"""
+
+import os
+import tempfile
+
+from src.fraud_detection.streaming.checkpoint import OffsetCommitTracker, load_checkpoint, write_checkpoint
+
+
+class TestOffsetCommitTracker:
+    """Test cases for OffsetCommitTracker."""
+    
+    def test_commits_contiguous_prefix_only(self):
+        """Test out-of-order completion does not commit past an unfinished batch."""
+        tracker = OffsetCommitTracker()
+        tracker.begin("b1", 0, 9)
+        tracker.begin("b2", 10, 19)
+        tracker.begin("b3", 20, 29)
+        
+        assert tracker.complete("b2") == -1
+        assert tracker.complete("b3") == -1
+        assert tracker.complete("b1") == 29
+        assert tracker.in_flight() == []
+    
+    def test_multi_part_batches(self):
+        """Test a batch commits only after all of its parts complete."""
+        tracker = OffsetCommitTracker()
+        tracker.begin("b1", 0, 1, parts=3)
+        
+        tracker.complete("b1")
+        tracker.complete("b1")
+        assert tracker.committed_offset == -1
+        assert tracker.complete("b1") == 1
+    
+    def test_gap_blocks_commit(self):
+        """Test offsets that are not tracked yet hold the watermark back."""
+        tracker = OffsetCommitTracker(committed_offset=4)
+        tracker.begin("later", 10, 12)
+        
+        assert tracker.complete("later") == 4
+        tracker.begin("resumed", 5, 9, parts=0)
+        assert tracker.committed_offset == 12
+    
+    def test_unknown_batch_is_ignored(self):
+        """Test completing an untracked batch leaves the watermark alone."""
+        tracker = OffsetCommitTracker(committed_offset=3)
+        
+        assert tracker.complete("missing") == 3
+
+
+class TestCheckpointFiles:
+    """Test cases for checkpoint persistence."""
+    
+    def test_atomic_write_and_load(self):
+        """Test checkpoints replace the previous file without leaving temporaries."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "checkpoint_latest.json")
+            write_checkpoint(path, {"committed_offsets": {"default": 1}})
+            write_checkpoint(path, {"committed_offsets": {"default": 7}})
+            
+            assert load_checkpoint(path) == {"committed_offsets": {"default": 7}}
+            assert os.listdir(temp_dir) == ["checkpoint_latest.json"]
+    
+    def test_load_missing_or_corrupt(self):
+        """Test missing and corrupt checkpoints load as None."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "checkpoint_latest.json")
+            assert load_checkpoint(path) is None
+            
+            with open(path, "w") as f:
+                f.write("{not json")
+            assert load_checkpoint(path) is None
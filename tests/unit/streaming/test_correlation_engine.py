@@ -0,0 +1,124 @@
+"""
+Unit tests for the incremental correlation engine.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.fraud_detection.streaming.correlation_engine import CorrelationEngine
+
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _event(seconds, **details):
+    """Create a minimal event ``seconds`` after the base time."""
+    return SimpleNamespace(timestamp=BASE_TIME + timedelta(seconds=seconds), details=details)
+
+
+class TestCorrelationEngine:
+    """Test cases for CorrelationEngine."""
+    
+    def test_velocity_fires_once_per_burst(self):
+        """Test velocity fires at the threshold and re-arms after the burst expires."""
+        engine = CorrelationEngine()
+        
+        fired = [engine.add("user_1", _event(i)) for i in range(5)]
+        assert [len(m) for m in fired] == [0, 0, 1, 0, 0]
+        assert fired[2][0].pattern_type == "high_velocity"
+        
+        # Ten minutes later the old burst has expired; a new burst fires again
+        later = [engine.add("user_1", _event(600 + i)) for i in range(3)]
+        assert [len(m) for m in later] == [0, 0, 1]
+    
+    def test_window_expires_on_event_time(self):
+        """Test retention follows event time rather than the wall clock."""
+        engine = CorrelationEngine(window=timedelta(minutes=10))
+        engine.add("user_1", _event(0))
+        engine.add("user_1", _event(60))
+        engine.add("user_1", _event(1200))
+        
+        assert len(engine.windows["user_1"]) == 1
+    
+    def test_impossible_travel(self):
+        """Test consecutive located events in different places correlate."""
+        engine = CorrelationEngine(velocity_threshold=100)
+        
+        assert engine.add("user_1", _event(0, location="NY")) == []
+        assert engine.add("user_1", _event(10, location="NY")) == []
+        matches = engine.add("user_1", _event(20, location="CA"))
+        
+        assert [m.pattern_type for m in matches] == ["impossible_travel"]
+        assert [e.details["location"] for e in matches[0].events] == ["NY", "CA"]
+    
+    def test_distinct_devices_with_expiry(self):
+        """Test the distinct-device count drops as device events expire."""
+        engine = CorrelationEngine(velocity_threshold=100)
+        engine.add("user_1", _event(0, device_id="d1"))
+        engine.add("user_1", _event(1, device_id="d1"))
+        engine.add("user_1", _event(2, device_id="d2"))
+        matches = engine.add("user_1", _event(3, device_id="d3"))
+        
+        assert [m.pattern_type for m in matches] == ["multiple_devices"]
+        
+        engine.add("user_1", _event(900, device_id="d4"))
+        assert len(engine.windows["user_1"].devices) == 1
+    
+    def test_keys_are_independent_and_idle_keys_expire(self):
+        """Test windows are per key and idle windows are dropped."""
+        engine = CorrelationEngine()
+        engine.add("user_1", _event(0))
+        engine.add("user_2", _event(0))
+        
+        assert engine.expire(datetime.now()) == 0
+        assert engine.expire(datetime.now() + timedelta(minutes=11)) == 2
+        assert engine.windows == {}
+    
+    def test_reconfigure_applies_to_existing_windows(self):
+        """Test shrinking the window and capacity trims windows already open."""
+        engine = CorrelationEngine(velocity_threshold=100)
+        for i in range(6):
+            engine.add("user_1", _event(i * 60))
+        
+        engine.reconfigure(capacity=4)
+        assert len(engine.windows["user_1"]) == 4
+        
+        engine.reconfigure(window=timedelta(minutes=2))
+        assert len(engine.windows["user_1"]) == 3
+        assert engine.velocity_window <= timedelta(minutes=2)
+    
+    def test_concurrent_add_expire_and_reconfigure(self):
+        """Test inserts, expiry and reconfiguration from several threads leave the engine consistent."""
+        engine = CorrelationEngine(velocity_threshold=1000)
+        errors = []
+        stop = threading.Event()
+        
+        def insert(offset):
+            try:
+                for i in range(2000):
+                    engine.add(f"user_{(offset + i) % 50}", _event(i))
+            except Exception as e:
+                errors.append(e)
+        
+        def maintain():
+            try:
+                while not stop.is_set():
+                    engine.expire(datetime.now() + timedelta(minutes=11))
+                    engine.reconfigure(capacity=50)
+                    engine.reconfigure(capacity=100)
+            except Exception as e:
+                errors.append(e)
+        
+        inserters = [threading.Thread(target=insert, args=(n,)) for n in range(4)]
+        maintainer = threading.Thread(target=maintain)
+        maintainer.start()
+        for thread in inserters:
+            thread.start()
+        for thread in inserters:
+            thread.join()
+        stop.set()
+        maintainer.join()
+        
+        assert errors == []
+        assert set(engine.windows) == set(engine._last_seen)
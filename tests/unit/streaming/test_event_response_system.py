@@ -3,6 +3,7 @@ Unit tests for Event-Driven Response System.
 """
 
 import pytest
+import threading
 import time
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
@@ -11,6 +12,7 @@ from src.fraud_detection.streaming.event_response_system import (
     EventResponseSystem, FraudEvent, ResponseRule, ResponseExecution,
     EventType, EventSeverity, ResponseAction, create_fraud_event, create_response_rule
 )
+from src.fraud_detection.streaming.retention import RetentionPolicy
 
 
 @pytest.fixture
@@ -127,6 +129,55 @@ class TestEventResponseSystem:
         assert len(matching_rules) == 1
         assert matching_rules[0].rule_id == sample_response_rule.rule_id
     
+    def test_matching_rules_in_priority_order(self, event_system, sample_fraud_event):
+        """Test matches come back in priority order and track rule removal."""
+        rules = [
+            create_response_rule(
+                name=f"Rule {priority}",
+                event_types=[EventType.FRAUD_DETECTED],
+                severity_threshold=EventSeverity.MEDIUM,
+                actions=[ResponseAction.LOG_EVENT],
+                priority=priority
+            )
+            for priority in (50, 10, 30)
+        ]
+        for rule in rules:
+            event_system.add_response_rule(rule)
+        
+        assert [r.priority for r in event_system._find_matching_rules(sample_fraud_event)] == [10, 30, 50]
+        
+        event_system.remove_response_rule(rules[1].rule_id)
+        assert [r.priority for r in event_system._find_matching_rules(sample_fraud_event)] == [30, 50]
+    
+    def test_matching_skips_other_types_severities_and_disabled(self, event_system, sample_fraud_event):
+        """Test the index excludes rules for other event types, higher thresholds and disabled rules."""
+        other_type = create_response_rule(
+            name="Location", event_types=[EventType.LOCATION_ANOMALY],
+            severity_threshold=EventSeverity.LOW, actions=[ResponseAction.LOG_EVENT]
+        )
+        too_severe = create_response_rule(
+            name="Critical only", event_types=[EventType.FRAUD_DETECTED],
+            severity_threshold=EventSeverity.CRITICAL, actions=[ResponseAction.LOG_EVENT]
+        )
+        disabled = create_response_rule(
+            name="Disabled", event_types=[EventType.FRAUD_DETECTED],
+            severity_threshold=EventSeverity.LOW, actions=[ResponseAction.LOG_EVENT]
+        )
+        disabled.enabled = False
+        for rule in (other_type, too_severe, disabled):
+            event_system.add_response_rule(rule)
+        
+        assert event_system._find_matching_rules(sample_fraud_event) == []
+    
+    def test_readding_rule_reindexes_it(self, event_system, sample_fraud_event, sample_response_rule):
+        """Test re-adding a changed rule updates the compiled conditions."""
+        event_system.add_response_rule(sample_response_rule)
+        sample_response_rule.conditions = {"user_ids": ["someone_else"]}
+        event_system.add_response_rule(sample_response_rule)
+        
+        assert event_system._find_matching_rules(sample_fraud_event) == []
+        assert len(event_system.rule_index) == 1
+    
     def test_evaluate_rule_conditions(self, event_system, sample_fraud_event):
         """Test rule condition evaluation."""
         # Rule with risk score condition
@@ -273,6 +324,15 @@ class TestEventResponseSystem:
         assert user_key in event_system.correlation_windows
         assert len(event_system.correlation_windows[user_key]) == 2
     
+    def test_correlation_settings_reconfigure_engine(self, event_system):
+        """Test changing correlation settings reaches the live engine."""
+        event_system.correlation_window_minutes = 5
+        event_system.max_correlation_events = 20
+        
+        assert event_system.correlation_engine.window == timedelta(minutes=5)
+        assert event_system.correlation_engine.capacity == 20
+        assert event_system.correlation_window_minutes == 5
+    
     def test_velocity_correlation_detection(self, event_system):
         """Test velocity correlation detection."""
         user_id = "user_velocity_test"
@@ -287,16 +347,100 @@ class TestEventResponseSystem:
             events.append(event)
             event_system._add_to_correlation_window(event)
         
-        # Detect correlations
-        event_system._detect_velocity_correlation(f"user_{user_id}", events)
-        
-        # Should detect high velocity pattern
-        assert len(event_system.active_correlations) > 0
+        # Should detect high velocity pattern as soon as the third event is inserted
+        assert len(event_system.active_correlations) == 1
         
         # Check correlation details
         correlation = list(event_system.active_correlations.values())[0]
         assert correlation.pattern_type == "high_velocity"
         assert len(correlation.events) >= 3
+    
+    def test_retention_count_limit_and_summary(self, event_system, sample_response_rule):
+        """Test processed events and executions are capped and summarized."""
+        event_system.add_response_rule(sample_response_rule)
+        event_system.retention_policy = RetentionPolicy(max_processed_events=5, max_executions=4)
+        
+        for i in range(10):
+            event_system._process_event(create_fraud_event(
+                EventType.FRAUD_DETECTED, EventSeverity.HIGH, "agent",
+                {"amount": 10.0}, 0.9, 0.9, transaction_id=f"txn_{i}"
+            ))
+        assert event_system.wait_for_actions(timeout=5)
+        
+        evicted = event_system.enforce_retention()
+        
+        assert evicted["processed_events"] == 5
+        assert evicted["response_executions"] == 16
+        assert len(event_system.processed_events) == 5
+        assert len(event_system.response_executions) == 4
+        
+        archived = event_system.get_status()["retention"]["archived"]
+        assert archived["events"]["by_key"] == {"fraud_detected": 5}
+        # Both actions run concurrently, so which of them were evicted varies
+        assert archived["executions"]["count"] == 16
+        assert set(archived["executions"]["by_key"]) == {"block_transaction:success", "send_alert:success"}
+    
+    def test_retention_ttl_and_rule_counts(self, event_system, sample_fraud_event):
+        """Test TTL eviction and pruning of stale hourly rule counts."""
+        event_system.processed_events[sample_fraud_event.event_id] = sample_fraud_event
+        event_system.rule_execution_counts["removed_rule"] = {"2000-01-01-00": 3}
+        
+        evicted = event_system.enforce_retention(now=datetime.now() + timedelta(days=2))
+        
+        assert evicted["processed_events"] == 1
+        assert event_system.processed_events == {}
+        assert event_system.rule_execution_counts == {}
+    
+    def test_cleanup_interval_sets_retention_ttl(self, event_system, sample_fraud_event):
+        """Test changing cleanup_interval_hours applies to the next sweep."""
+        event_system.processed_events[sample_fraud_event.event_id] = sample_fraud_event
+        event_system.cleanup_interval_hours = 1
+        
+        assert event_system.retention_policy.ttl_seconds == 3600.0
+        evicted = event_system.enforce_retention(now=datetime.now() + timedelta(hours=2))
+        assert evicted["processed_events"] == 1
+    
+    def test_retention_spills_executions_to_archive(self, event_system, sample_response_rule, tmp_path):
+        """Test evicted executions are spilled to the columnar archive."""
+        event_system.add_response_rule(sample_response_rule)
+        event_system.retention_policy = RetentionPolicy(max_executions=0, archive_directory=str(tmp_path))
+        event_system._process_event(create_fraud_event(
+            EventType.FRAUD_DETECTED, EventSeverity.CRITICAL, "agent", {}, 0.9, 0.9, transaction_id="txn_1"
+        ))
+        assert event_system.wait_for_actions(timeout=5)
+        
+        event_system.enforce_retention()
+        
+        blocks = list(event_system.execution_archive.read())
+        assert len(blocks) == 1
+        assert sorted(blocks[0].column("action")) == ["block_transaction", "send_alert"]
+        assert list(blocks[0].column("success")) == [1, 1]
+    
+    def test_block_actions_do_not_wait_behind_alerts(self, event_system, sample_fraud_event, sample_response_rule):
+        """Test a slow alert handler does not delay blocking actions."""
+        release_alert = threading.Event()
+        blocked = threading.Event()
+        
+        event_system.register_action_handler(
+            ResponseAction.SEND_ALERT, lambda event, rule: release_alert.wait(5) and {"alert_sent": True}
+        )
+        event_system.register_action_handler(
+            ResponseAction.BLOCK_TRANSACTION, lambda event, rule: blocked.set() or {"blocked": True}
+        )
+        sample_response_rule.actions = [ResponseAction.SEND_ALERT, ResponseAction.BLOCK_TRANSACTION]
+        event_system.add_response_rule(sample_response_rule)
+        
+        event_system._process_event(sample_fraud_event)
+        
+        blocking_lane = event_system.action_executor.classify(ResponseAction.BLOCK_TRANSACTION.value)
+        assert event_system.action_executor.lanes[blocking_lane].wait_idle(2)
+        assert blocked.is_set()
+        assert event_system.metrics["blocked_transactions"] == 1
+        assert event_system.metrics["alerts_sent"] == 0
+        
+        release_alert.set()
+        assert event_system.wait_for_actions(timeout=5)
+        assert event_system.metrics["alerts_sent"] == 1
 
 
 class TestFraudEvent:
@@ -0,0 +1,86 @@
+"""
+Unit tests for adaptive micro-batching.
+"""
+
+import time
+from queue import Queue
+
+from src.fraud_detection.streaming.micro_batcher import AdaptiveBatcher, drain_queue
+
+
+def _filled_queue(count, maxsize=0):
+    """Create a queue holding ``count`` integers."""
+    source = Queue(maxsize=maxsize)
+    for i in range(count):
+        source.put(i)
+    return source
+
+
+class TestDrainQueue:
+    """Test cases for bulk queue draining."""
+    
+    def test_drains_up_to_limit_in_order(self):
+        """Test draining returns FIFO items and leaves the rest."""
+        source = _filled_queue(10)
+        
+        assert drain_queue(source, 4) == [0, 1, 2, 3]
+        assert source.qsize() == 6
+        assert drain_queue(source, 100) == [4, 5, 6, 7, 8, 9]
+        assert drain_queue(source, 5) == []
+    
+    def test_frees_space_for_blocked_producers(self):
+        """Test draining a bounded queue makes room for new puts."""
+        source = _filled_queue(3, maxsize=3)
+        drain_queue(source, 3)
+        
+        source.put_nowait("next")
+        assert source.get_nowait() == "next"
+
+
+class TestAdaptiveBatcher:
+    """Test cases for AdaptiveBatcher."""
+    
+    def test_idle_returns_none(self):
+        """Test no batch is formed when nothing arrives."""
+        batcher = AdaptiveBatcher(Queue())
+        
+        assert batcher.next_batch(100, 50.0, idle_timeout=0.01) is None
+    
+    def test_low_rate_flushes_within_latency_budget(self):
+        """Test a lone event is flushed after at most the latency budget."""
+        source = _filled_queue(1)
+        batcher = AdaptiveBatcher(source)
+        batcher.arrival_rate = 1000.0  # expect a large batch that never arrives
+        
+        start = time.monotonic()
+        events, stats = batcher.next_batch(100, 50.0, idle_timeout=0.1)
+        
+        assert events == [0]
+        assert stats.trigger == "deadline"
+        assert time.monotonic() - start < 0.5
+        assert stats.wait_ms >= 40.0
+        assert stats.fill_ratio == 1 / stats.target_size
+    
+    def test_backlog_fills_to_max_batch_size(self):
+        """Test a backlog is drained in bulk up to the batch size cap."""
+        source = _filled_queue(500)
+        batcher = AdaptiveBatcher(source)
+        batcher.arrival_rate = 100000.0
+        
+        events, stats = batcher.next_batch(100, 50.0)
+        
+        assert events == list(range(100))
+        assert stats.trigger == "full"
+        assert stats.fill_ratio == 1.0
+        assert source.qsize() == 400
+    
+    def test_target_size_tracks_arrival_rate(self):
+        """Test target size is rate times latency budget, clamped."""
+        batcher = AdaptiveBatcher(Queue())
+        
+        batcher.arrival_rate = 0.0
+        assert batcher.target_size(100, 250.0) == 1
+        batcher.arrival_rate = 200.0
+        assert batcher.target_size(100, 250.0) == 50
+        batcher.arrival_rate = 10000.0
+        assert batcher.target_size(100, 250.0) == 100
@@ -0,0 +1,170 @@
+"""
+Unit tests for the segmented replay log.
+"""
+
+import os
+import pytest
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.fraud_detection.streaming.replay_log import INDEX_ENTRY, RECORD_HEADER, SegmentedReplayLog
+
+
+@pytest.fixture
+def log_dir():
+    """Create temporary log directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+
+def _records(start, count, step_seconds=1):
+    """Build (timestamp, payload) tuples spaced step_seconds apart."""
+    return [(start + timedelta(seconds=i * step_seconds), {"event_id": f"event_{i}"}) for i in range(count)]
+
+
+class TestSegmentedReplayLog:
+    """Test cases for SegmentedReplayLog."""
+    
+    def test_append_and_read(self, log_dir):
+        """Test appended records are read back in order with offsets."""
+        log = SegmentedReplayLog(log_dir)
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        
+        offsets = log.append_batch(_records(start, 5))
+        records = list(log.read())
+        
+        assert offsets == [0, 1, 2, 3, 4]
+        assert [r.offset for r in records] == offsets
+        assert records[2].payload == {"event_id": "event_2"}
+        assert records[2].timestamp == start + timedelta(seconds=2)
+        log.close()
+    
+    def test_segments_roll_by_size(self, log_dir):
+        """Test the active segment rolls once it reaches the size limit."""
+        log = SegmentedReplayLog(log_dir, segment_max_bytes=256, index_interval_bytes=64)
+        log.append_batch(_records(datetime(2024, 1, 1), 50))
+        
+        assert len(log.segments) > 1
+        assert all(segment.size <= 256 for segment in log.segments)
+        assert [r.offset for r in log.read()] == list(range(50))
+        log.close()
+    
+    def test_time_range_read_seeks_via_index(self, log_dir):
+        """Test a time-range read returns only records inside the window."""
+        log = SegmentedReplayLog(log_dir, segment_max_bytes=1024, index_interval_bytes=64)
+        start = datetime(2024, 1, 1)
+        log.append_batch(_records(start, 200))
+        
+        records = list(log.read(start + timedelta(seconds=150), start + timedelta(seconds=159)))
+        
+        assert [r.payload["event_id"] for r in records] == [f"event_{i}" for i in range(150, 160)]
+        segment = next(s for s in log.segments if s.base_offset <= 150 < s.next_offset)
+        position, offset = log._seek_position(segment, int((start + timedelta(seconds=150)).timestamp() * 1_000_000))
+        assert offset > segment.base_offset
+        assert position > 0
+        log.close()
+    
+    def test_out_of_order_timestamps(self, log_dir):
+        """Test records with non-monotonic timestamps are still found."""
+        log = SegmentedReplayLog(log_dir, index_interval_bytes=1)
+        start = datetime(2024, 1, 1)
+        log.append_batch([
+            (start + timedelta(seconds=10), {"id": "a"}),
+            (start, {"id": "late"}),
+            (start + timedelta(seconds=20), {"id": "b"})
+        ])
+        
+        records = list(log.read(start, start + timedelta(seconds=5)))
+        
+        assert [r.payload["id"] for r in records] == ["late"]
+        log.close()
+    
+    def test_reopen_recovers_and_truncates_torn_tail(self, log_dir):
+        """Test reopening continues offsets and drops a partially written record."""
+        log = SegmentedReplayLog(log_dir)
+        log.append_batch(_records(datetime(2024, 1, 1), 3))
+        log.close()
+        
+        segment_path = log.segments[-1].log_path
+        intact_size = os.path.getsize(segment_path)
+        with open(segment_path, "ab") as f:
+            f.write(RECORD_HEADER.pack(100, 0, 0) + b"{\"partial\"")
+        
+        reopened = SegmentedReplayLog(log_dir)
+        
+        assert os.path.getsize(segment_path) == intact_size
+        assert reopened.next_offset == 3
+        assert reopened.append({"event_id": "after"}, datetime(2024, 1, 2)) == 3
+        assert [r.offset for r in reopened.read()] == [0, 1, 2, 3]
+        reopened.close()
+    
+    def test_read_from_offset(self, log_dir):
+        """Test offset reads start mid-segment and stop at the end offset."""
+        log = SegmentedReplayLog(log_dir, segment_max_bytes=512, index_interval_bytes=64)
+        log.append_batch(_records(datetime(2024, 1, 1), 60))
+        
+        assert [r.offset for r in log.read_from(37, 44)] == list(range(37, 45))
+        assert [r.offset for r in log.read_from(55)] == list(range(55, 60))
+        assert list(log.read_from(60)) == []
+        log.close()
+    
+    def test_reopen_scans_only_unindexed_records(self, log_dir):
+        """Test reopening restores segment state from the index files instead of rescanning every record."""
+        log = SegmentedReplayLog(log_dir, segment_max_bytes=1024, index_interval_bytes=128)
+        start = datetime(2024, 1, 1)
+        log.append_batch(_records(start, 200))
+        log.close()
+        expected = [(s.next_offset, s.size, s.min_timestamp_us, s.max_timestamp_us, s.index) for s in log.segments]
+        
+        scans = []
+        original = SegmentedReplayLog._iter_segment
+        
+        def recording_iter(self, segment, position, offset, size):
+            scans.append((position, size))
+            return original(self, segment, position, offset, size)
+        
+        with patch.object(SegmentedReplayLog, "_iter_segment", recording_iter):
+            reopened = SegmentedReplayLog(log_dir, segment_max_bytes=1024, index_interval_bytes=128)
+        
+        restored = [(s.next_offset, s.size, s.min_timestamp_us, s.max_timestamp_us, s.index) for s in reopened.segments]
+        assert restored == expected
+        assert all(position > 0 and size - position < 256 for position, size in scans)
+        records = reopened.read(start + timedelta(seconds=10), start + timedelta(seconds=12))
+        assert [r.offset for r in records] == [10, 11, 12]
+        reopened.close()
+    
+    def test_reopen_rebuilds_missing_index(self, log_dir):
+        """Test a segment whose index file is gone is rebuilt by a full scan."""
+        log = SegmentedReplayLog(log_dir, index_interval_bytes=64)
+        log.append_batch(_records(datetime(2024, 1, 1), 20))
+        log.close()
+        index = log.segments[0].index
+        os.unlink(log.segments[0].index_path)
+        
+        reopened = SegmentedReplayLog(log_dir, index_interval_bytes=64)
+        
+        assert reopened.segments[0].index == index
+        assert reopened.next_offset == 20
+        assert os.path.exists(reopened.segments[0].index_path)
+        reopened.close()
+    
+    def test_reopen_steps_back_from_index_entry_at_torn_record(self, log_dir):
+        """Test an index entry written for a record that never made it to disk is dropped on open."""
+        log = SegmentedReplayLog(log_dir, index_interval_bytes=64)
+        log.append_batch(_records(datetime(2024, 1, 1), 10))
+        log.close()
+        segment = log.segments[0]
+        intact_size = os.path.getsize(segment.log_path)
+        with open(segment.index_path, "ab") as f:
+            f.write(INDEX_ENTRY.pack(segment.max_timestamp_us, 10, intact_size, segment.min_timestamp_us))
+        with open(segment.log_path, "ab") as f:
+            f.write(RECORD_HEADER.pack(100, 0, 0) + b"{\"partial\"")
+        
+        reopened = SegmentedReplayLog(log_dir, index_interval_bytes=64)
+        
+        assert os.path.getsize(segment.log_path) == intact_size
+        assert reopened.segments[0].index == segment.index
+        assert reopened.append({"event_id": "after"}, datetime(2024, 1, 2)) == 10
+        assert [r.offset for r in reopened.read_from(8)] == [8, 9, 10]
+        reopened.close()
@@ -0,0 +1,68 @@
+"""
+Unit tests for bounded retention helpers.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from src.fraud_detection.streaming.retention import (
+    ArchiveSummary, ColumnarArchive, evict_from_list, evict_from_mapping
+)
+
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class TestEviction:
+    """Test cases for the eviction helpers."""
+    
+    def test_mapping_evicts_expired_then_over_limit(self):
+        """Test mapping eviction honours both TTL and count limit."""
+        records = OrderedDict((f"k{i}", NOW + timedelta(minutes=i)) for i in range(6))
+        
+        evicted = evict_from_mapping(records, 3, NOW + timedelta(minutes=1), lambda ts: ts)
+        assert len(evicted) == 3
+        assert list(records) == ["k3", "k4", "k5"]
+        
+        evicted = evict_from_mapping(records, 10, NOW, lambda ts: ts)
+        assert evicted == []
+    
+    def test_list_eviction_is_oldest_first(self):
+        """Test list eviction removes a prefix."""
+        records = [NOW + timedelta(minutes=i) for i in range(5)]
+        
+        evicted = evict_from_list(records, 4, NOW + timedelta(minutes=2), lambda ts: ts)
+        
+        assert evicted == [NOW, NOW + timedelta(minutes=1)]
+        assert len(records) == 3
+
+
+class TestArchive:
+    """Test cases for ArchiveSummary and ColumnarArchive."""
+    
+    def test_summary_rollup(self):
+        """Test summaries count keys, track the time range and average durations."""
+        summary = ArchiveSummary()
+        summary.add("a", NOW, 10.0)
+        summary.add("a", NOW - timedelta(hours=1), 20.0)
+        summary.add("b", NOW + timedelta(hours=1))
+        
+        data = summary.to_dict()
+        assert data["count"] == 3
+        assert data["by_key"] == {"a": 2, "b": 1}
+        assert data["first_at"] == (NOW - timedelta(hours=1)).isoformat()
+        assert data["avg_duration_ms"] == 10.0
+    
+    def test_archive_round_trip_and_torn_tail(self, tmp_path):
+        """Test blocks read back in order and a torn final block is skipped."""
+        archive = ColumnarArchive(str(tmp_path), "executions")
+        archive.append([{"id": "a", "ms": 1.5}, {"id": "b", "ms": 2.5}], NOW)
+        archive.append([{"id": "c", "ms": 3.5}], NOW)
+        
+        with open(archive.path_for(NOW), "ab") as f:
+            f.write(b"\x00\x00\x01\x00partial")
+        
+        blocks = list(archive.read())
+        assert [len(block) for block in blocks] == [2, 1]
+        assert list(blocks[0].column("ms")) == [1.5, 2.5]
+        assert archive.rows_written == 3
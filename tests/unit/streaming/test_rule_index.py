@@ -0,0 +1,88 @@
+"""
+Unit tests for the compiled response rule index.
+"""
+
+from datetime import datetime
+
+from src.fraud_detection.streaming.event_response_system import (
+    EventSeverity, EventType, ResponseAction, create_fraud_event, create_response_rule
+)
+from src.fraud_detection.streaming.rule_index import RuleIndex, compile_conditions
+
+
+def _event(**overrides):
+    """Create a fraud event with optional field overrides."""
+    event = create_fraud_event(
+        event_type=EventType.FRAUD_DETECTED,
+        severity=EventSeverity.HIGH,
+        source_agent="test_agent",
+        details={"amount": 500.0},
+        risk_score=0.8,
+        confidence_score=0.9,
+        transaction_id="txn_1",
+        user_id="user_1"
+    )
+    for name, value in overrides.items():
+        setattr(event, name, value)
+    return event
+
+
+class TestCompileConditions:
+    """Test cases for condition compilation."""
+    
+    def test_empty_conditions_match(self):
+        """Test a rule without conditions matches everything."""
+        assert compile_conditions({})(_event()) is True
+    
+    def test_amount_only_applies_to_transactions(self):
+        """Test min_amount is ignored for events without a transaction."""
+        predicate = compile_conditions({"min_amount": 1000})
+        
+        assert predicate(_event()) is False
+        assert predicate(_event(transaction_id=None)) is True
+    
+    def test_user_ids_and_time_window(self):
+        """Test user filter and hour window are combined."""
+        predicate = compile_conditions({
+            "user_ids": ["user_1"],
+            "time_window": {"start_hour": 9, "end_hour": 17}
+        })
+        
+        assert predicate(_event(timestamp=datetime(2024, 1, 1, 12))) is True
+        assert predicate(_event(timestamp=datetime(2024, 1, 1, 20))) is False
+        assert predicate(_event(user_id="user_2", timestamp=datetime(2024, 1, 1, 12))) is False
+
+
+class TestRuleIndex:
+    """Test cases for RuleIndex."""
+    
+    def test_severity_buckets(self):
+        """Test a rule is a candidate only at or above its severity threshold."""
+        index = RuleIndex()
+        rule = create_response_rule(
+            name="High+", event_types=[EventType.FRAUD_DETECTED],
+            severity_threshold=EventSeverity.HIGH, actions=[ResponseAction.SEND_ALERT]
+        )
+        index.add(rule)
+        
+        assert [c.rule for c in index.candidates(_event(severity=EventSeverity.CRITICAL))] == [rule]
+        assert index.candidates(_event(severity=EventSeverity.MEDIUM)) == ()
+        
+        assert index.remove(rule.rule_id) is True
+        assert index.candidates(_event()) == ()
+        assert index.remove(rule.rule_id) is False
+    
+    def test_equal_priorities_keep_insertion_order(self):
+        """Test ties on priority resolve in the order rules were added."""
+        index = RuleIndex()
+        rules = [
+            create_response_rule(
+                name=f"Rule {i}", event_types=[EventType.FRAUD_DETECTED],
+                severity_threshold=EventSeverity.LOW, actions=[ResponseAction.LOG_EVENT], priority=5
+            )
+            for i in range(5)
+        ]
+        for rule in rules:
+            index.add(rule)
+        
+        assert [c.rule for c in index.candidates(_event())] == rules
@@ -2,10 +2,12 @@
 Unit tests for Scalable Event Processing Architecture.
 """
 
+import functools
 import pytest
 import time
 import json
 import tempfile
+import threading
 import shutil
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
@@ -17,6 +19,17 @@ from src.fraud_detection.streaming.scalable_event_processor import (
 )
 
 
+def _write_batch_total(path, events):
+    """Batch processor run in a worker process; records the amount column total."""
+    with open(path, "a") as f:
+        f.write(f"{float(sum(events.column('amount')))}\n")
+
+
+def _append_events(received, events):
+    """Picklable batch processor that records what it was given."""
+    received.append(events)
+
+
 @pytest.fixture
 def temp_dir():
     """Create temporary directory for testing."""
@@ -207,6 +220,72 @@ class TestScalableEventProcessor:
         assert "events_processed" in checkpoint_data
         assert checkpoint_data["events_processed"] == 100
     
+    def test_checkpoint_records_committed_offsets(self, scalable_processor):
+        """Test checkpoints hold the low-watermark offset and in-flight batches."""
+        scalable_processor.processing_mode = ProcessingMode.BATCH
+        scalable_processor._create_event_batch([{"event_id": f"a{i}"} for i in range(3)])
+        scalable_processor._create_event_batch([{"event_id": f"b{i}"} for i in range(3)])
+        
+        first_batch = scalable_processor.batch_queue.get_nowait()
+        scalable_processor._process_batch(first_batch)
+        scalable_processor._create_checkpoint()
+        
+        with open(Path(scalable_processor.replay_storage_path) / "checkpoint_latest.json") as f:
+            checkpoint_data = json.load(f)
+        
+        assert checkpoint_data["committed_offsets"] == {"default": 2}
+        assert [(b["first_offset"], b["last_offset"]) for b in checkpoint_data["in_flight_batches"]] == [(3, 5)]
+        assert checkpoint_data["log_end_offset"] == 5
+    
+    def test_resume_from_checkpoint(self, scalable_processor, temp_dir):
+        """Test a restarted processor re-queues exactly the uncommitted events."""
+        scalable_processor.processing_mode = ProcessingMode.BATCH
+        scalable_processor._create_event_batch([{"event_id": f"a{i}"} for i in range(3)])
+        scalable_processor._create_event_batch([{"event_id": f"b{i}"} for i in range(3)])
+        scalable_processor._process_batch(scalable_processor.batch_queue.get_nowait())
+        in_flight_batch = scalable_processor.batch_queue.get_nowait()
+        scalable_processor._create_checkpoint()
+        # Events logged after the checkpoint must also be recovered
+        scalable_processor._create_event_batch([{"event_id": "c0"}])
+        
+        restarted = ScalableEventProcessor(min_workers=1, max_workers=2, batch_size=5, buffer_size=50,
+                                           processing_mode=ProcessingMode.BATCH)
+        restarted.replay_storage_path = scalable_processor.replay_storage_path
+        restarted.audit_log_path = scalable_processor.audit_log_path
+        
+        resumed_count = restarted.resume_from_checkpoint()
+        
+        resumed_batches = [restarted.batch_queue.get_nowait() for _ in range(restarted.batch_queue.qsize())]
+        assert resumed_count == 4
+        assert resumed_batches[0].batch_id == in_flight_batch.batch_id
+        assert [e["event_id"] for e in resumed_batches[0].events] == ["b0", "b1", "b2"]
+        assert [e["event_id"] for e in resumed_batches[1].events] == ["c0"]
+        
+        for batch in resumed_batches:
+            restarted._process_batch(batch)
+        assert restarted.offset_tracker.committed_offset == 6
+    
+    def test_restart_without_resume_keeps_committing(self, scalable_processor):
+        """Test a restart that skips resume still commits new batches at the log end."""
+        scalable_processor.processing_mode = ProcessingMode.BATCH
+        scalable_processor._create_event_batch([{"event_id": f"a{i}"} for i in range(3)])
+        scalable_processor._create_checkpoint()
+        # Logged but never committed
+        scalable_processor._create_event_batch([{"event_id": "b0"}])
+        
+        restarted = ScalableEventProcessor(min_workers=1, max_workers=2, batch_size=5, buffer_size=50,
+                                           processing_mode=ProcessingMode.BATCH)
+        restarted.replay_storage_path = scalable_processor.replay_storage_path
+        restarted.audit_log_path = scalable_processor.audit_log_path
+        restarted._initialize_storage()
+        
+        for round_number in range(3):
+            restarted._create_event_batch([{"event_id": f"c{round_number}_{i}"} for i in range(2)])
+            restarted._process_batch(restarted.batch_queue.get_nowait())
+        
+        assert restarted.offset_tracker.committed_offset == 9
+        assert restarted.offset_tracker.in_flight() == []
+    
     def test_replay_batch_storage(self, scalable_processor):
         """Test storing batches for replay."""
         events = [{"event_id": f"event_{i}"} for i in range(3)]
@@ -218,8 +297,8 @@ class TestScalableEventProcessor:
         
         scalable_processor._store_replay_batch(batch)
         
-        # Check that replay file was created
-        replay_files = list(Path(scalable_processor.replay_storage_path).glob("events_*.json*"))
+        # Check that a replay segment was created
+        replay_files = list(Path(scalable_processor.replay_storage_path).glob("events_*.log"))
         assert len(replay_files) > 0
     
     def test_event_replay(self, scalable_processor):
@@ -243,9 +322,24 @@ class TestScalableEventProcessor:
         assert replayed_count > 0
         assert scalable_processor.event_buffer.qsize() > 0
     
+    def test_event_replay_time_range(self, scalable_processor):
+        """Test replay only submits events inside the requested window."""
+        now = datetime.now()
+        events = [
+            {"event_id": "old", "_submitted_at": (now - timedelta(hours=2)).isoformat()},
+            {"event_id": "recent", "_submitted_at": now.isoformat()}
+        ]
+        scalable_processor._store_replay_batch(EventBatch(batch_id="mixed", events=events, created_at=now))
+        
+        replayed_count = scalable_processor.replay_events(now - timedelta(minutes=1), now + timedelta(minutes=1))
+        
+        assert replayed_count == 1
+        assert scalable_processor.event_buffer.get_nowait()["event_id"] == "recent"
+    
     def test_audit_logging(self, scalable_processor):
         """Test audit logging functionality."""
         scalable_processor._audit_log("test_action", "test_entity", {"key": "value"})
+        assert scalable_processor.flush_audit_log() is True
         
         # Check that audit log file was created
         audit_files = list(Path(scalable_processor.audit_log_path).glob("audit_*.log"))
@@ -295,6 +389,86 @@ class TestScalableEventProcessor:
         assert len(processed_batches) == 1
         assert len(processed_batches[0]) == 2
     
+    def test_batch_mode_uses_process_pool(self, scalable_processor, temp_dir):
+        """Test BATCH mode ships batches to a lazily created process pool."""
+        output_path = f"{temp_dir}/batch_totals.txt"
+        scalable_processor.processing_mode = ProcessingMode.BATCH
+        scalable_processor.shared_memory_threshold = 0
+        scalable_processor.add_batch_processor(functools.partial(_write_batch_total, output_path), cpu_bound=True)
+        
+        assert scalable_processor.process_executor is None
+        
+        batch = EventBatch(
+            batch_id="cpu_batch",
+            events=[{"event_id": f"e{i}", "amount": float(i)} for i in range(10)],
+            created_at=datetime.now()
+        )
+        scalable_processor._process_batch(batch)
+        
+        deadline = time.time() + 30
+        while scalable_processor.metrics.events_processed < 10 and time.time() < deadline:
+            time.sleep(0.05)
+        scalable_processor.stop()
+        
+        assert scalable_processor.metrics.events_processed == 10
+        with open(output_path) as f:
+            assert float(f.read().strip()) == 45.0
+    
+    def test_batch_processors_stay_in_process_unless_cpu_bound(self, scalable_processor):
+        """Test picklable processors still run in-process on event dicts without the opt-in."""
+        received = []
+        scalable_processor.processing_mode = ProcessingMode.BATCH
+        scalable_processor.add_batch_processor(functools.partial(_append_events, received))
+        
+        with pytest.raises(ValueError):
+            scalable_processor.add_batch_processor(lambda events: None, cpu_bound=True)
+        
+        events = [{"event_id": "e1", "timestamp": datetime(2024, 1, 1)}]
+        scalable_processor._process_batch(EventBatch(batch_id="local", events=events, created_at=datetime.now()))
+        
+        assert received == [events]
+        assert scalable_processor.process_executor is None
+        assert len(scalable_processor.batch_processors) == 1
+    
+    def test_failed_dispatch_releases_slot_and_commits(self, scalable_processor):
+        """Test a batch the process pool rejects frees its slot and does not block checkpoints."""
+        scalable_processor.processing_mode = ProcessingMode.BATCH
+        scalable_processor.shared_memory_threshold = 0
+        scalable_processor.add_batch_processor(functools.partial(_write_batch_total, "unused"), cpu_bound=True)
+        executor = Mock()
+        executor.submit.side_effect = RuntimeError("pool is broken")
+        scalable_processor._batch_slots = threading.Semaphore(1)
+        
+        with patch.object(scalable_processor, "_get_process_executor", return_value=executor):
+            for round_number in range(3):
+                scalable_processor._create_event_batch([{"event_id": f"e{round_number}_{i}"} for i in range(2)])
+                scalable_processor._process_batch(scalable_processor.batch_queue.get_nowait())
+        
+        assert executor.submit.call_count == 3
+        assert scalable_processor._batch_slots.acquire(blocking=False)
+        assert scalable_processor.offset_tracker.committed_offset == 5
+        assert scalable_processor.offset_tracker.in_flight() == []
+    
+    def test_low_rate_events_flush_within_latency_slo(self, scalable_processor):
+        """Test a single event is batched within the latency SLO rather than a fixed timeout."""
+        processed = []
+        scalable_processor.max_batch_latency_ms = 20.0
+        scalable_processor.add_event_processor(processed.append)
+        scalable_processor.start()
+        try:
+            scalable_processor.submit_event({"event_id": "lonely"})
+            deadline = time.time() + 3
+            while not processed and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            scalable_processor.stop()
+        
+        assert [event["event_id"] for event in processed] == ["lonely"]
+        status = scalable_processor.get_status()
+        assert status["batching"]["max_batch_latency_ms"] == 20.0
+        assert status["batching"]["recent"][0]["size"] == 1
+        assert scalable_processor.get_metrics().batch_fill_ratio > 0
+    
     def test_metrics_monitoring(self, scalable_processor):
         """Test metrics monitoring and updates."""
         initial_count = scalable_processor.metrics.events_processed
@@ -0,0 +1,127 @@
+"""
+Unit tests for stream processing metrics primitives.
+"""
+
+import pytest
+import threading
+
+from src.fraud_detection.streaming.stream_metrics import ShardedCounter, LatencyHistogram
+
+
+class TestShardedCounter:
+    """Test cases for ShardedCounter."""
+    
+    def test_counts_are_exact_across_threads(self):
+        """Test concurrent increments from many threads are never lost."""
+        counter = ShardedCounter()
+        
+        def increment():
+            for _ in range(10000):
+                counter.add()
+        
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert counter.value == 80000
+    
+    def test_add_amount_and_reset(self):
+        """Test adding arbitrary amounts and resetting."""
+        counter = ShardedCounter()
+        counter.add(5)
+        counter.add(2)
+        assert counter.value == 7
+        
+        counter.reset()
+        assert counter.value == 0
+    
+    def test_exited_thread_shards_are_retired(self):
+        """Test shards of finished threads are folded away without losing counts."""
+        counter = ShardedCounter()
+        for _ in range(20):
+            thread = threading.Thread(target=counter.add, args=(3,))
+            thread.start()
+            thread.join()
+        
+        assert counter.value == 60
+        assert len(counter._shards.snapshot()) == 1
+
+
+class TestLatencyHistogram:
+    """Test cases for LatencyHistogram."""
+    
+    def test_empty_histogram(self):
+        """Test summary of an empty histogram."""
+        histogram = LatencyHistogram()
+        summary = histogram.summary()
+        
+        assert summary["count"] == 0
+        assert summary["mean_ms"] == 0.0
+        assert summary["p99_ms"] == 0.0
+    
+    def test_percentiles_within_relative_error(self):
+        """Test percentile estimates stay within the bucket precision."""
+        histogram = LatencyHistogram()
+        for value in range(1, 10001):
+            histogram.record(value / 10.0)  # 0.1ms .. 1000ms
+        
+        quantiles = histogram.percentiles()
+        assert quantiles[50.0] == pytest.approx(500.0, rel=0.02)
+        assert quantiles[95.0] == pytest.approx(950.0, rel=0.02)
+        assert quantiles[99.0] == pytest.approx(990.0, rel=0.02)
+        assert quantiles[99.9] == pytest.approx(999.0, rel=0.02)
+        assert histogram.mean == pytest.approx(500.05)
+        assert histogram.min == pytest.approx(0.1)
+        assert histogram.max == pytest.approx(1000.0)
+    
+    def test_memory_is_fixed(self):
+        """Test recording samples does not grow the bucket arrays."""
+        histogram = LatencyHistogram()
+        bucket_count = histogram.bucket_count
+        for value in range(100000):
+            histogram.record(value % 5000)
+        
+        assert histogram.bucket_count == bucket_count
+        assert histogram.count == 100000
+    
+    def test_values_above_max_are_clamped(self):
+        """Test oversized samples land in the last bucket."""
+        histogram = LatencyHistogram(max_value_ms=100.0)
+        histogram.record(10000.0)
+        
+        assert histogram.count == 1
+        assert histogram.percentile(100.0) <= 10000.0
+    
+    def test_shards_merge_across_threads(self):
+        """Test samples recorded on different threads are merged on read."""
+        histogram = LatencyHistogram()
+        
+        def record(value):
+            for _ in range(1000):
+                histogram.record(value)
+        
+        threads = [threading.Thread(target=record, args=(v,)) for v in (1.0, 10.0)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert histogram.count == 2000
+        assert histogram.percentile(25.0) == pytest.approx(1.0, rel=0.02)
+        assert histogram.percentile(75.0) == pytest.approx(10.0, rel=0.02)
+        assert len(histogram._shards.snapshot()) == 1
+        assert histogram.min == pytest.approx(1.0) and histogram.max == pytest.approx(10.0)
+    
+    def test_record_with_count(self):
+        """Test recording a repeated sample in one call."""
+        histogram = LatencyHistogram()
+        histogram.record(2.0, count=10)
+        
+        assert histogram.count == 10
+        assert histogram.mean == pytest.approx(2.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -2,14 +2,18 @@
 Unit tests for Real-Time Transaction Stream Processing.
 """
 
+import asyncio
 import pytest
+import threading
 import time
+from queue import Full
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 
 from src.fraud_detection.streaming.transaction_stream_processor import (
-    TransactionStreamProcessor, StreamingFraudDetector, Transaction, 
-    ProcessingResult, ProcessingPriority, StreamStatus
+    TransactionStreamProcessor, AsyncTransactionStreamProcessor, StreamingFraudDetector, Transaction, 
+    ProcessingResult, ProcessingPriority, StreamStatus,
+    PriorityScheduler, SchedulingPolicy
 )
 
 
@@ -133,6 +137,55 @@ class TestStreamingFraudDetector:
         assert stats["total_processed"] == 1
         assert "average_processing_time_ms" in stats
         assert stats["average_processing_time_ms"] > 0
+    
+    def test_detect_fraud_batch_matches_single(self, fraud_detector):
+        """Test vectorized batch detection matches per-transaction detection."""
+        transactions = [
+            Transaction(
+                transaction_id=f"batch_{i}",
+                user_id="user_1",
+                amount=amount,
+                currency="USD",
+                merchant="Store",
+                category=category,
+                timestamp=datetime.now().replace(hour=hour),
+                location={"country": country},
+                device_info={}
+            )
+            for i, (amount, category, hour, country) in enumerate([
+                (50.0, "grocery", 14, "US"),
+                (8000.0, "crypto", 3, "RU"),
+                (1500.0, "Gambling", 23, "US"),
+                (6000.0, "retail", 12, "DE"),
+            ])
+        ]
+        
+        batch_results = fraud_detector.detect_fraud_batch(transactions)
+        single_results = [StreamingFraudDetector().detect_fraud(t) for t in transactions]
+        
+        assert [r.transaction_id for r in batch_results] == [t.transaction_id for t in transactions]
+        for batch_result, single_result in zip(batch_results, single_results, strict=True):
+            assert batch_result.decision == single_result.decision
+            assert batch_result.risk_score == pytest.approx(single_result.risk_score)
+            assert batch_result.fraud_indicators == single_result.fraud_indicators
+            assert batch_result.recommendations == single_result.recommendations
+        
+        assert fraud_detector.get_stats()["total_processed"] == 4
+    
+    def test_fraud_detector_latency_percentiles(self, fraud_detector, sample_transaction):
+        """Test detector statistics expose latency percentiles from the bounded histogram."""
+        for _ in range(50):
+            fraud_detector.detect_fraud(sample_transaction)
+        
+        stats = fraud_detector.get_stats()
+        assert stats["total_processed"] == 50
+        assert "processing_times" not in stats
+        assert stats["p50_processing_time_ms"] <= stats["p99_processing_time_ms"]
+        assert stats["p999_processing_time_ms"] <= stats["max_processing_time_ms"]
+    
+    def test_detect_fraud_batch_empty(self, fraud_detector):
+        """Test batch detection on an empty batch."""
+        assert fraud_detector.detect_fraud_batch([]) == []
 
 
 class TestTransactionStreamProcessor:
@@ -199,6 +252,10 @@ class TestTransactionStreamProcessor:
         
         priority = stream_processor._determine_priority(normal_txn)
         assert priority == ProcessingPriority.NORMAL
+        
+        # High-risk category
+        normal_txn.category = "Adult_Entertainment"
+        assert stream_processor._determine_priority(normal_txn) == ProcessingPriority.HIGH
     
     def test_process_transaction_not_running(self, stream_processor, sample_transaction):
         """Test processing transaction when processor is not running."""
@@ -272,6 +329,71 @@ class TestTransactionStreamProcessor:
         finally:
             stream_processor.stop()
     
+    def test_batch_fraud_detector_scores_drained_batches(self, stream_processor, fraud_detector):
+        """Test workers drain queued transactions and call the batch detector once per batch."""
+        batch_sizes = []
+        results_received = []
+        
+        def batch_detector(transactions):
+            batch_sizes.append(len(transactions))
+            return fraud_detector.detect_fraud_batch(transactions)
+        
+        stream_processor.max_batch_latency_ms = 50
+        stream_processor.set_batch_fraud_detector(batch_detector)
+        stream_processor.add_result_handler(results_received.append)
+        stream_processor.start()
+        
+        try:
+            for i in range(10):
+                stream_processor.process_transaction(Transaction(
+                    transaction_id=f"batched_{i}",
+                    user_id="user_1",
+                    amount=100.0,
+                    currency="USD",
+                    merchant="Test Store",
+                    category="retail",
+                    timestamp=datetime.now(),
+                    location={"country": "US"},
+                    device_info={}
+                ))
+            
+            deadline = time.time() + 2
+            while len(results_received) < 10 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            stream_processor.stop()
+        
+        assert len(results_received) == 10
+        assert stream_processor.get_metrics().transactions_processed == 10
+        assert sum(batch_sizes) == 10
+        assert len(batch_sizes) < 10
+        assert all(size <= stream_processor.batch_size for size in batch_sizes)
+    
+    def test_scale_down_retires_worker_threads(self, stream_processor, fraud_detector):
+        """Test auto-scaling retires real threads and exports scaling events."""
+        events = []
+        stream_processor.max_workers = 4
+        stream_processor.set_fraud_detector(fraud_detector.detect_fraud)
+        stream_processor.add_scaling_handler(events.append)
+        stream_processor.start()
+        
+        try:
+            stream_processor.worker_pool.resize(4)
+            decision = stream_processor._check_scaling()
+            
+            assert decision.action == "scale_down"
+            assert len(stream_processor.workers) == 3
+            assert events == [decision]
+            
+            for handle in list(stream_processor.worker_pool.retiring):
+                handle.thread.join(timeout=2)
+                assert not handle.alive
+            
+            status = stream_processor.get_status()
+            assert status["scaling_events"][-1]["action"] == "scale_down"
+        finally:
+            stream_processor.stop()
+    
     def test_get_status(self, stream_processor, fraud_detector):
         """Test getting processor status."""
         stream_processor.set_fraud_detector(fraud_detector.detect_fraud)
@@ -357,10 +479,300 @@ class TestTransactionStreamProcessor:
             assert metrics.transactions_processed >= 0
             assert metrics.active_workers > 0
             
+            status = stream_processor.get_status()
+            assert set(status["metrics"]["latency_percentiles_ms"]) == {"p50", "p95", "p99", "p999"}
+            
         finally:
             stream_processor.stop()
 
 
+class TestPriorityScheduler:
+    """Test cases for PriorityScheduler."""
+    
+    def _scheduler(self, **kwargs):
+        capacities = {priority: 100 for priority in ProcessingPriority}
+        return PriorityScheduler(capacities, **kwargs)
+    
+    def test_strict_policy_serves_highest_priority_first(self):
+        """Test strict scheduling drains lanes in priority order."""
+        scheduler = self._scheduler(policy=SchedulingPolicy.STRICT, starvation_timeout=0)
+        scheduler.put_nowait("low", ProcessingPriority.LOW)
+        scheduler.put_nowait("normal", ProcessingPriority.NORMAL)
+        scheduler.put_nowait("critical", ProcessingPriority.CRITICAL)
+        
+        order = [scheduler.get(timeout=0)[0] for _ in range(3)]
+        assert order == ["critical", "normal", "low"]
+        assert scheduler.qsize() == 0
+    
+    def test_weighted_fair_policy_interleaves_lanes(self):
+        """Test weighted-fair scheduling serves lanes proportionally to their weights."""
+        scheduler = self._scheduler(policy=SchedulingPolicy.WEIGHTED_FAIR, starvation_timeout=0)
+        for i in range(15):
+            scheduler.put_nowait(f"critical_{i}", ProcessingPriority.CRITICAL)
+            scheduler.put_nowait(f"low_{i}", ProcessingPriority.LOW)
+        
+        served = [scheduler.get(timeout=0)[1] for _ in range(9)]
+        assert served.count(ProcessingPriority.CRITICAL) == 8
+        assert served.count(ProcessingPriority.LOW) == 1
+    
+    def test_starvation_protection_promotes_old_items(self):
+        """Test a waiting LOW item is served once it exceeds the starvation timeout."""
+        scheduler = self._scheduler(policy=SchedulingPolicy.STRICT, starvation_timeout=0.05)
+        scheduler.put_nowait("low", ProcessingPriority.LOW)
+        time.sleep(0.06)
+        scheduler.put_nowait("critical", ProcessingPriority.CRITICAL)
+        
+        assert scheduler.get(timeout=0) == ("low", ProcessingPriority.LOW)
+        assert scheduler.starvation_promotions == 1
+    
+    def test_starvation_protection_only_promotes_low(self):
+        """Test old items in higher lanes keep their priority order."""
+        scheduler = self._scheduler(policy=SchedulingPolicy.STRICT, starvation_timeout=0.05)
+        scheduler.put_nowait("normal", ProcessingPriority.NORMAL)
+        time.sleep(0.06)
+        scheduler.put_nowait("critical", ProcessingPriority.CRITICAL)
+        
+        assert scheduler.get(timeout=0) == ("critical", ProcessingPriority.CRITICAL)
+        assert scheduler.starvation_promotions == 0
+    
+    def test_put_raises_when_lane_full(self):
+        """Test enqueueing into a full lane raises queue.Full."""
+        scheduler = PriorityScheduler({priority: 1 for priority in ProcessingPriority})
+        scheduler.put_nowait("first", ProcessingPriority.HIGH)
+        
+        with pytest.raises(Full):
+            scheduler.put_nowait("second", ProcessingPriority.HIGH)
+    
+    def test_blocked_consumer_wakes_on_put(self):
+        """Test an idle consumer is woken as soon as work is enqueued."""
+        scheduler = self._scheduler()
+        received = []
+        consumer = threading.Thread(target=lambda: received.append(scheduler.get(timeout=5)))
+        consumer.start()
+        
+        time.sleep(0.05)
+        start = time.monotonic()
+        scheduler.put_nowait("critical", ProcessingPriority.CRITICAL)
+        consumer.join(timeout=1)
+        
+        assert received == [("critical", ProcessingPriority.CRITICAL)]
+        assert time.monotonic() - start < 0.5
+    
+    def test_close_releases_blocked_consumers(self):
+        """Test closing the scheduler releases consumers with an empty result."""
+        scheduler = self._scheduler()
+        received = []
+        consumer = threading.Thread(target=lambda: received.append(scheduler.get(timeout=5)))
+        consumer.start()
+        
+        time.sleep(0.05)
+        scheduler.close()
+        consumer.join(timeout=1)
+        
+        assert received == [(None, None)]
+    
+    def test_get_batch_respects_size_and_deadline(self):
+        """Test batch draining stops at max_items or at the latency deadline."""
+        scheduler = self._scheduler()
+        for i in range(5):
+            scheduler.put_nowait(i, ProcessingPriority.NORMAL)
+        
+        assert len(scheduler.get_batch(max_items=3, max_wait=0.01, timeout=0)) == 3
+        
+        start = time.monotonic()
+        batch = scheduler.get_batch(max_items=10, max_wait=0.05, timeout=0)
+        assert [item for item, _ in batch] == [3, 4]
+        assert time.monotonic() - start >= 0.04
+        
+        assert scheduler.get_batch(max_items=10, max_wait=0.01, timeout=0) == []
+
+
+def _make_transaction(index, amount=100.0):
+    """Create a simple transaction for async stream tests."""
+    return Transaction(
+        transaction_id=f"async_txn_{index}",
+        user_id="user_1",
+        amount=amount,
+        currency="USD",
+        merchant="Test Store",
+        category="retail",
+        timestamp=datetime.now(),
+        location={"country": "US"},
+        device_info={}
+    )
+
+
+async def _transaction_source(count):
+    """Yield transactions as an async iterator."""
+    for i in range(count):
+        yield _make_transaction(i)
+
+
+class TestAsyncTransactionStreamProcessor:
+    """Test cases for AsyncTransactionStreamProcessor."""
+    
+    @pytest.mark.asyncio
+    async def test_results_preserve_input_order(self, fraud_detector):
+        """Test results are yielded in input order even when detectors finish out of order."""
+        async def detector(transaction):
+            index = int(transaction.transaction_id.rsplit("_", 1)[1])
+            await asyncio.sleep(0.001 * (20 - index))
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=20, queue_size=5)
+        processor.set_fraud_detector(detector)
+        
+        results = [result async for result in processor.process_stream(_transaction_source(20))]
+        
+        assert [r.transaction_id for r in results] == [f"async_txn_{i}" for i in range(20)]
+        assert processor.get_metrics().transactions_processed == 20
+        assert processor.status == StreamStatus.STOPPED
+    
+    @pytest.mark.asyncio
+    async def test_slow_transaction_bounds_reorder_buffer(self, fraud_detector):
+        """Test a stalled transaction stops admission instead of buffering the rest of the stream."""
+        release = asyncio.Event()
+        pulled = 0
+        
+        async def source():
+            nonlocal pulled
+            for i in range(100):
+                pulled += 1
+                yield _make_transaction(i)
+        
+        async def detector(transaction):
+            if transaction.transaction_id == "async_txn_0":
+                await release.wait()
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=2, queue_size=3)
+        processor.set_fraud_detector(detector)
+        
+        async def consume():
+            return [result async for result in processor.process_stream(source())]
+        
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        assert pulled <= 2 + 3 + 1  # reorder window plus the item waiting for a slot
+        
+        release.set()
+        results = await asyncio.wait_for(consumer, timeout=5)
+        
+        assert [r.transaction_id for r in results] == [f"async_txn_{i}" for i in range(100)]
+    
+    @pytest.mark.asyncio
+    async def test_results_as_completed(self, fraud_detector):
+        """Test unordered mode yields results as soon as they complete."""
+        async def detector(transaction):
+            if transaction.transaction_id == "async_txn_0":
+                await asyncio.sleep(0.05)
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=4, preserve_order=False)
+        processor.set_fraud_detector(detector)
+        
+        results = [result async for result in processor.process_stream(_transaction_source(4))]
+        
+        assert len(results) == 4
+        assert results[-1].transaction_id == "async_txn_0"
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, fraud_detector):
+        """Test no more than max_concurrency detector calls are in flight."""
+        peak = 0
+        active = 0
+        
+        async def detector(transaction):
+            nonlocal peak, active
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.005)
+            active -= 1
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=3, queue_size=2)
+        processor.set_fraud_detector(detector)
+        
+        results = [result async for result in processor.process_stream(_transaction_source(12))]
+        
+        assert len(results) == 12
+        assert peak == 3
+    
+    @pytest.mark.asyncio
+    async def test_sync_detector_and_errors(self, fraud_detector):
+        """Test sync detectors run off-loop and failures reach error handlers without a result."""
+        errors = []
+        
+        def detector(transaction):
+            if transaction.transaction_id == "async_txn_1":
+                raise ValueError("boom")
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=2)
+        processor.set_fraud_detector(detector)
+        processor.add_error_handler(lambda error, transaction: errors.append(transaction.transaction_id))
+        
+        results = [result async for result in processor.process_stream(_transaction_source(3))]
+        
+        assert [r.transaction_id for r in results] == ["async_txn_0", "async_txn_2"]
+        assert errors == ["async_txn_1"]
+        assert processor.get_metrics().error_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_detector_timeout(self, fraud_detector):
+        """Test slow detector calls are cancelled after the processing timeout."""
+        errors = []
+        
+        async def detector(transaction):
+            await asyncio.sleep(1)
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=2, processing_timeout=0.01)
+        processor.set_fraud_detector(detector)
+        processor.add_error_handler(lambda error, transaction: errors.append(error))
+        
+        results = [result async for result in processor.process_stream(_transaction_source(2))]
+        
+        assert results == []
+        assert len(errors) == 2
+        assert all(isinstance(error, TimeoutError) for error in errors)
+    
+    @pytest.mark.asyncio
+    async def test_early_close_with_full_queue(self, fraud_detector):
+        """Test closing the stream early does not hang while the input queue is full."""
+        async def detector(transaction):
+            index = int(transaction.transaction_id.rsplit("_", 1)[1])
+            await asyncio.sleep(0 if index < 3 else 1)
+            return fraud_detector.detect_fraud(transaction)
+        
+        processor = AsyncTransactionStreamProcessor(max_concurrency=2, queue_size=4)
+        processor.set_fraud_detector(detector)
+        
+        async def consume():
+            results = []
+            stream = processor.process_stream(_transaction_source(100))
+            async for result in stream:
+                results.append(result)
+                if len(results) == 3:
+                    break
+            await stream.aclose()
+            return results
+        
+        results = await asyncio.wait_for(consume(), timeout=5)
+        
+        assert len(results) == 3
+        assert processor.status == StreamStatus.STOPPED
+    
+    @pytest.mark.asyncio
+    async def test_requires_detector(self):
+        """Test processing without a detector raises."""
+        processor = AsyncTransactionStreamProcessor()
+        
+        with pytest.raises(ValueError):
+            async for _ in processor.process_stream(_transaction_source(1)):
+                pass
+
+
 class TestProcessingResult:
     """Test cases for ProcessingResult."""
     
@@ -0,0 +1,114 @@
+"""
+Unit tests for stream worker pool and load-aware scaling.
+"""
+
+import pytest
+import threading
+
+from src.fraud_detection.streaming.worker_pool import (
+    CancellationToken, LoadAwareScalingPolicy, ScalingDecision, WorkerPool
+)
+
+
+def _idle_worker(worker_id, token):
+    """Worker loop that idles until cancelled."""
+    while not token.cancelled:
+        token.wait(0.01)
+
+
+class TestCancellationToken:
+    """Test cases for CancellationToken."""
+    
+    def test_cancel(self):
+        """Test cancelling a token wakes waiters."""
+        token = CancellationToken()
+        assert token.cancelled is False
+        
+        threading.Timer(0.01, token.cancel).start()
+        assert token.wait(1) is True
+        assert token.cancelled is True
+
+
+class TestWorkerPool:
+    """Test cases for WorkerPool."""
+    
+    def test_worker_ids_are_never_reused(self):
+        """Test scale down followed by scale up allocates fresh worker IDs."""
+        pool = WorkerPool(_idle_worker)
+        try:
+            pool.resize(3)
+            pool.resize(1)
+            pool.resize(3)
+            
+            ids = [handle.worker_id for handle in pool.active]
+            assert ids == ["worker_0", "worker_3", "worker_4"]
+        finally:
+            pool.stop(timeout=1)
+    
+    def test_retired_threads_actually_stop(self):
+        """Test retired workers exit instead of being orphaned."""
+        pool = WorkerPool(_idle_worker)
+        try:
+            pool.resize(4)
+            retired = pool.retire(2)
+            
+            for handle in retired:
+                handle.thread.join(timeout=1)
+            
+            assert pool.size == 2
+            assert all(not handle.alive for handle in retired)
+            assert all(handle.alive for handle in pool.active)
+        finally:
+            pool.stop(timeout=1)
+        
+        assert pool.size == 0
+        assert pool.retiring == []
+    
+    def test_retire_calls_wake(self):
+        """Test retiring workers wakes blocked consumers."""
+        wakes = []
+        pool = WorkerPool(_idle_worker, wake=lambda: wakes.append(True))
+        try:
+            pool.resize(2)
+            pool.retire(1)
+            assert wakes == [True]
+        finally:
+            pool.stop(timeout=1)
+
+
+class TestLoadAwareScalingPolicy:
+    """Test cases for LoadAwareScalingPolicy."""
+    
+    def test_littles_law_sizing(self):
+        """Test steady-state workers follow arrival rate times service time."""
+        policy = LoadAwareScalingPolicy(min_workers=1, max_workers=50, target_utilization=1.0)
+        
+        # 200 tx/s * 50ms = 10 concurrent
+        assert policy.required_workers(queue_depth=0, arrival_rate=200, service_time_ms=50) == 10
+    
+    def test_backlog_adds_workers(self):
+        """Test queued work adds capacity to drain within the drain time."""
+        policy = LoadAwareScalingPolicy(min_workers=1, max_workers=50, target_utilization=1.0, drain_time_seconds=1.0)
+        
+        assert policy.required_workers(queue_depth=100, arrival_rate=0, service_time_ms=50) == 5
+    
+    def test_scale_up_jumps_and_scale_down_steps(self):
+        """Test scale up goes straight to target while scale down is gradual."""
+        policy = LoadAwareScalingPolicy(min_workers=2, max_workers=8)
+        
+        up = policy.decide(current_workers=2, queue_depth=1000, arrival_rate=500, service_time_ms=100)
+        assert isinstance(up, ScalingDecision)
+        assert up.action == "scale_up"
+        assert up.target_workers == 8
+        
+        down = policy.decide(current_workers=8, queue_depth=0, arrival_rate=0, service_time_ms=1)
+        assert down.action == "scale_down"
+        assert down.target_workers == 7
+        
+        steady = policy.decide(current_workers=2, queue_depth=0, arrival_rate=0, service_time_ms=0)
+        assert steady.action == "no_change"
+        assert steady.to_dict()["target_workers"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])